@@ -0,0 +1,34 @@
+#-------------------------------------------------------------------------------
+# Name:        NV iGDE Database - Geoprocessing backends
+# Purpose:     Load heavy geoprocessing backends on first use instead of at import. The stage scripts only import
+#              arcpy; a stage that needs Spatial Analyst calls spatialAnalyst() where its raster work starts, which
+#              checks the license out once per process, imports arcpy.sa and checks the license back in at exit.
+#              The orchestrator (GDE_Pipeline_clean.py) and the vector-only stages never load it.
+# Modules: atexit; arcpy (when a backend is first requested)
+#
+# Usage:       sa = spatialAnalyst()
+#              out = sa.Con(sa.Raster(veg) > 0, 1)
+#
+# Author:      sarah.byer
+#
+# Created:     October 2026
+# Copyright:   (c) sarah.byer 2026
+#-------------------------------------------------------------------------------
+
+import atexit
+
+_loaded = {}
+
+# arcpy.sa with the Spatial Analyst extension checked out
+def spatialAnalyst():
+    if "spatial" not in _loaded:
+        import arcpy
+        if arcpy.CheckExtension("Spatial") != "Available":
+            raise RuntimeError("Spatial Analyst license is not available")
+        arcpy.CheckOutExtension("Spatial")
+        atexit.register(arcpy.CheckInExtension, "Spatial")
+        import arcpy.sa
+        _loaded["spatial"] = arcpy.sa
+    return _loaded["spatial"]
+
+# END
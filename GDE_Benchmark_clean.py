@@ -0,0 +1,412 @@
+#-------------------------------------------------------------------------------
+# Name:        NV iGDE Database - Benchmark suite
+# Purpose:     Time the engine of every pipeline stage on deterministic synthetic inputs (GDE_SyntheticData_clean.py)
+#              and compare against a saved baseline, so speedups and slowdowns show up without the K:\GIS3 share.
+#              Times are divided by a fixed calibration loop before comparing, so a baseline saved on one
+#              machine can be checked on another.
+# Modules: argparse; json; shutil; time; GDE_SyntheticData_clean; GDE_StageEngines_clean
+#
+# Usage:       python GDE_Benchmark_clean.py --scale 0.01 --repeat 3
+#              python GDE_Benchmark_clean.py --scale 0.01 --save-baseline bench_baseline.json
+#              python GDE_Benchmark_clean.py --scale 0.01 --baseline bench_baseline.json --tolerance 0.25
+#
+# Author:      sarah.byer
+#
+# Created:     October 2026
+# Copyright:   (c) sarah.byer 2026
+#-------------------------------------------------------------------------------
+
+import argparse, json, shutil, sys, time
+
+import GDE_SyntheticData_clean as synthetic
+import GDE_StageEngines_clean as engines
+
+#-------------------------------------------------------------------------------
+# Stage benchmarks
+# Each entry is (name, function); the function gets the synthetic dataset and runs one stage's engine.
+# One-off setup can be kept in the dataset dict so it is not timed on repeats.
+
+def benchRivers(data):
+    return engines.riversEngine(data["flowlines"], data["major_rivers"])
+
+def benchLakesPlayas(data):
+    return engines.lakesPlayasEngine(data["waterbodies"], data["waterbody_lut"])
+
+def benchWetlands(data):
+    return engines.wetlandsEngine(data["wetlands"])
+
+# Wetlands packed into a ragged-array store, then per-feature areas and a bbox lookup around every spring
+def benchGeometryStore(data):
+    import GDE_GeometryStore_clean as geometrystore
+    store = geometrystore.fromRecords(data["wetlands"], geometrystore.POLYGON)
+    areas = store.areas()
+    hits = 0
+    for site in data["springs"]["sites"]:
+        x, y = site["SHAPE"]
+        hits += len(store.bboxFilter((x - 1000, y - 1000, x + 1000, y + 1000)))
+    return areas, hits
+
+def benchSprings(data):
+    return engines.springsEngine(data["springs"])
+
+# Delta of the next synthetic SSI release against a Springs layer built from the current one
+def benchSpringsDelta(data):
+    import GDE_SpringsDelta_clean as delta
+    if "springs_delta" not in data:
+        current = dict((r["SPRING_ID"], r) for r in engines.springsEngine(data["springs"]))
+        state = {"taxa": delta.taxaDigests(data["springs"])}
+        data["springs_delta"] = (current, synthetic.springsRelease(data["springs"]), state)
+    current, release, state = data["springs_delta"]
+    return delta.springsDelta(current, release["sites"], release, state)
+
+def benchSpecies(data):
+    return engines.speciesEngine(data["hexagons"], data["nnhp"], data["endemism"])
+
+def benchPhreatophytes(data):
+    return engines.phreatophytesEngine(data["rasters"], data["gde_systems"])
+
+# Lossless compaction of raster-derived phreatophyte polygons
+def benchCompaction(data):
+    import GDE_Compaction_clean as compaction
+    return [compaction.compactPolygon(f["SHAPE"]) for f in data["raster_polygons"]]
+
+# Exact grid dissolve of each TNC raster's GDE cells by code, then overlay of rasters sharing a cell size
+def benchGridOverlay(data):
+    import numpy as np
+    from GDE_GridGeometry_clean import Grid, GridRegion
+    gde_codes = [row["SYS_CODE"] for row in data["gde_systems"]]
+    covers = {}
+    areas = {}
+    for raster in data["rasters"]["tnc"]:
+        array = raster["array"]
+        grid = Grid.fromRaster(raster["x0"], raster["y0"], raster["cell"], array.shape[0])
+        by_code = [GridRegion.fromRaster(grid, array == code) for code in gde_codes]
+        cover = GridRegion.union(by_code)
+        areas[raster["source_code"]] = cover.area()
+        covers.setdefault(raster["cell"], []).append(cover)
+    for cell, regions in covers.items():
+        for a, b in zip(regions, regions[1:]):
+            a.intersection(b)
+            a.difference(b)
+    return areas
+
+# Tile-partitioned cascaded-union dissolve of the raster-derived polygons by GRIDCODE, one grid per cell size
+def benchDissolve(data):
+    from GDE_GridGeometry_clean import Grid
+    import GDE_Dissolve_clean as dissolve
+    by_cell = {}
+    for i, f in enumerate(data["raster_polygons"]):
+        cell = synthetic.TNC_RESOLUTIONS[i % len(synthetic.TNC_RESOLUTIONS)]
+        by_cell.setdefault(cell, []).append(f)
+    return dict((cell, dissolve.dissolveGrid(Grid(0.0, 0.0, cell), features, ["GRIDCODE"], workers=1))
+                for cell, features in by_cell.items())
+
+# Overlay partitions for intersecting the wetlands with the hexagons, by tile and by hydrographic area
+def benchOverlayPlan(data):
+    from GDE_Geometry_clean import bbox
+    from GDE_Overlay_clean import planPartitions
+    hexes = [(h["Hex_ID"], bbox(h["SHAPE"])) for h in data["hexagons"]]
+    wetlands = [(i, bbox(w["SHAPE"])) for i, w in enumerate(data["wetlands"])]
+    basins = [(b["HYD_AREA"], bbox(b["SHAPE"])) for b in data["hydrobasins"]]
+    by_tile = planPartitions(hexes, wetlands, 16)
+    by_basin = planPartitions(basins, wetlands, 16, zones=dict((i, i) for i, box in basins))
+    return len(by_tile), len(by_basin)
+
+# Packed R-tree lookup of the GDEs within 1 km of every spring, one at a time and as one batch
+def benchQuery(data):
+    import GDE_GeometryStore_clean as geometrystore
+    from GDE_Query_clean import GDEIndex
+    if "query_index" not in data:
+        data["query_index"] = GDEIndex({"Wetlands": geometrystore.fromRecords(data["wetlands"], geometrystore.POLYGON),
+                                        "Rivers_Streams": geometrystore.fromRecords(data["flowlines"], geometrystore.POLYLINE)})
+    index = data["query_index"]
+    xs = [site["SHAPE"][0] for site in data["springs"]["sites"]]
+    ys = [site["SHAPE"][1] for site in data["springs"]["sites"]]
+    single = sum(len(found) for x, y in zip(xs, ys) for found in index.search(x, y, 1000.0).values())
+    batch = sum(len(q) for q, ids, d in index.searchMany(xs, ys, 1000.0).values())
+    return single, batch
+
+# Summary cube of the wetlands (whole features, placed in the hexagon holding their first vertex) and springs
+# by hexagon, written to SQLite and sliced by WET_SUBTYPE
+def benchSummaryCube(data):
+    import os, tempfile
+    import GDE_GeometryStore_clean as geometrystore
+    import GDE_SummaryCube_clean as cube
+    from GDE_Geometry_clean import polygonArea
+    from GDE_Query_clean import GDEIndex
+    if "cube_pieces" not in data:
+        hexes = GDEIndex({"hex": geometrystore.fromRecords(data["hexagons"], geometrystore.POLYGON, ["Hex_ID"])})
+        hex_ids = hexes.stores["hex"].attributes["Hex_ID"]
+        pieces = {}
+        layers = (("Wetlands", engines.wetlandsEngine(data["wetlands"])), ("Springs", engines.springsEngine(data["springs"])))
+        for layer, rows in layers:
+            pts = [row["SHAPE"] if layer == "Springs" else row["SHAPE"][0][0] for row in rows]
+            q, ids, d = hexes.searchMany([p[0] for p in pts], [p[1] for p in pts])["hex"]
+            pieces[layer] = [(int(hex_ids[i]), k, rows[k], polygonArea(rows[k]["SHAPE"]) if layer == "Wetlands" else 0.0, 0.0)
+                             for k, i in zip(q.tolist(), ids.tolist())]
+        data["cube_pieces"] = pieces
+    cells = {}
+    for layer, pieces in data["cube_pieces"].items():
+        cube.accumulate(cells, "hexagons", layer, pieces, cube.CUBE_LAYERS.get(layer, []))
+    rows = cube.cubeRows(cells, {"Wetlands": "Polygon", "Springs": "Point"})
+    with tempfile.TemporaryDirectory() as folder:
+        db = os.path.join(folder, "cube.sqlite")
+        cube.writeCube(rows, "hexagons", db, os.path.join(folder, "cube.csv"))
+        return cube.query(db, ["value"], layer="Wetlands", attribute="WET_SUBTYPE")
+
+def benchLineTabulation(data):
+    import GDE_GeometryStore_clean as geometrystore
+    from GDE_LineTabulation_clean import tabulateLengths
+    if "tabulation_stores" not in data:
+        data["tabulation_stores"] = (geometrystore.fromRecords(data["flowlines"], geometrystore.POLYLINE, ["FCode", "GNIS_Name"]),
+                                     geometrystore.fromRecords(data["hexagons"], geometrystore.POLYGON, ["Hex_ID"]))
+    lines, hexes = data["tabulation_stores"]
+    table = tabulateLengths(lines, hexes, "Hex_ID")
+    return table.byZone(), table.byClass("FCode"), table.byClass("GNIS_Name")
+
+# Story map field expressions on hexagon-sized columns (fresh compile each time, as in a new process)
+def benchFieldCalc(data):
+    import numpy as np
+    from GDE_FieldCalc_clean import CompiledExpression
+    if "calc_columns" not in data:
+        rng = np.random.RandomState(26)
+        n = max(len(data["hexagons"]), 1) * 100
+        acres = rng.uniform(0, 640, n)
+        data["calc_columns"] = {"AREA_PHR": (acres * rng.uniform(0, 1, n), rng.uniform(0, 1, n) < 0.3),
+                                "POLY_AREA": (acres, np.zeros(n, dtype=bool)),
+                                "COUNT_SPR": (rng.poisson(2, n), np.zeros(n, dtype=bool))}
+    columns = data["calc_columns"]
+    return [CompiledExpression(e)(columns) for e in ("100*(!AREA_PHR!/!POLY_AREA!)", "!COUNT_SPR!/!POLY_AREA!",
+                                                     "0 if !AREA_PHR! is None else !AREA_PHR!")]
+
+# Modules loaded when the orchestrator and the command line tools start; none may pull in arcpy.sa
+STARTUP_MODULES = ["GDE_Pipeline_clean", "GDE_BuildCache_clean", "GDE_Backend_clean", "GDE_Query_clean",
+                   "GDE_Service_clean", "GDE_SpringsDelta_clean", "GDE_VectorTiles_clean"]
+
+# Each module imported in a fresh interpreter, as a stage worker or the orchestrator would
+def benchImports(data):
+    import os, subprocess
+    folder = os.path.dirname(os.path.abspath(__file__))
+    code = "import sys, {}; print(','.join(m for m in ('arcpy', 'arcpy.sa') if m in sys.modules))"
+    loaded = {}
+    for module in STARTUP_MODULES:
+        out = subprocess.run([sys.executable, "-c", code.format(module)], cwd=folder, capture_output=True,
+                             text=True, check=True)
+        loaded[module] = out.stdout.strip()
+        if "arcpy.sa" in loaded[module]:
+            raise RuntimeError("{} loads Spatial Analyst at import".format(module))
+    return loaded
+
+# TNC rasters mosaicked on a common 10 m grid (finer cells win overlaps), then GDE acres by source and code
+def benchMosaic(data):
+    from GDE_Mosaic_clean import Mosaic
+    mosaic = Mosaic(data["rasters"]["tnc"], cell=10.0, keep_codes=[row["SYS_CODE"] for row in data["gde_systems"]])
+    return mosaic.classAcres(), mosaic.overlaps
+
+def _zonalStores(data):
+    import GDE_GeometryStore_clean as geometrystore
+    if "zonal_stores" not in data:
+        data["zonal_stores"] = (geometrystore.fromRecords(data["hexagons"], geometrystore.POLYGON, ["Hex_ID"]),
+                                geometrystore.fromRecords(data["hydrobasins"], geometrystore.POLYGON, ["HYD_AREA"]))
+    return data["zonal_stores"]
+
+# GDE system acres of the LANDFIRE raster per hexagon (coverage fractions along the edges) and per hydrographic area
+def benchZonalHistogram(data):
+    from GDE_ZonalHistogram_clean import zonalHistogram
+    hexes, basins = _zonalStores(data)
+    codes = [row["SYS_CODE"] for row in data["gde_systems"]]
+    landfire = data["rasters"]["landfire"]
+    return (zonalHistogram(landfire, hexes, "Hex_ID", codes, subcells=2).acres,
+            zonalHistogram(landfire, basins, "HYD_AREA", codes).acres)
+
+# Temporary folder for a benchmark's cached setup; runBenchmarks removes it after the last stage
+def _tempDir(data):
+    import tempfile
+    folder = tempfile.mkdtemp()
+    data.setdefault("temp_dirs", []).append(folder)
+    return folder
+
+# The same histograms from zone grids rasterized into a cache folder once (in setup), as on every run after the first
+def benchZoneGrid(data):
+    from GDE_ZonalHistogram_clean import zonalHistogram
+    hexes, basins = _zonalStores(data)
+    codes = [row["SYS_CODE"] for row in data["gde_systems"]]
+    landfire = data["rasters"]["landfire"]
+    if "zone_cache" not in data:
+        data["zone_cache"] = _tempDir(data)
+        zonalHistogram(landfire, hexes, "Hex_ID", codes, subcells=2, cache=data["zone_cache"])
+        zonalHistogram(landfire, basins, "HYD_AREA", codes, cache=data["zone_cache"])
+    return (zonalHistogram(landfire, hexes, "Hex_ID", codes, subcells=2, cache=data["zone_cache"]).acres,
+            zonalHistogram(landfire, basins, "HYD_AREA", codes, cache=data["zone_cache"]).acres)
+
+# Preview of the story map AREA_*/PER_* fields per hexagon at 90 m, with the hexagon zone grid already cached
+def benchStoryMapPreview(data):
+    import GDE_GeometryStore_clean as geometrystore
+    from GDE_StoryMapPreview_clean import previewStoryMap
+    hexes = _zonalStores(data)[0]
+    if "preview_layers" not in data:
+        groups = dict((row["SYS_CODE"], row["SYS_GROUP"]) for row in data["gde_systems"])
+        phreatophytes = [{"PHR_GROUP": groups[f["GRIDCODE"]], "SHAPE": f["SHAPE"]} for f in data["raster_polygons"]]
+        lakes_playas = engines.lakesPlayasEngine(data["waterbodies"], data["waterbody_lut"])
+        data["preview_layers"] = {
+            "Phreatophytes": geometrystore.fromRecords(phreatophytes, geometrystore.POLYGON, ["PHR_GROUP"]),
+            "Wetlands": geometrystore.fromRecords(engines.wetlandsEngine(data["wetlands"]), geometrystore.POLYGON),
+            "Lakes_Playas": geometrystore.fromRecords(lakes_playas, geometrystore.POLYGON, ["BODY_TYPE"])}
+        data["preview_cache"] = _tempDir(data)
+        previewStoryMap(hexes, "Hex_ID", {}, cell=90.0, cache=data["preview_cache"])
+    preview = previewStoryMap(hexes, "Hex_ID", data["preview_layers"], cell=90.0, cache=data["preview_cache"])
+    return preview.fields(), preview.maxErrors()
+
+def benchStoryMapHexagons(data):
+    return engines.storyMapEngine(data["hexagons"], "Hex_ID", data["springs"]["sites"])
+
+def benchStoryMapHydrobasins(data):
+    return engines.storyMapEngine(data["hydrobasins"], "HYD_AREA", data["springs"]["sites"])
+
+# Vector tile pyramid of the story map hexagons and hydrographic areas, rendered in this process
+def benchStoryMapTiles(data):
+    import GDE_VectorTiles_clean as tiles
+    if "tile_layers" not in data:
+        hexes = [tiles.tileFeature(h["SHAPE"], {"COUNT_SPR": i % 5, "PER_WET": (i % 97) / 97.0 * 100}, h["Hex_ID"])
+                 for i, h in enumerate(data["hexagons"])]
+        basins = [tiles.tileFeature(b["SHAPE"], {"HYD_AREA": b["HYD_AREA"], "GDE_COUNT": 3}) for b in data["hydrobasins"]]
+        data["tile_layers"] = [("NV_HydrographicAreas", basins), ("NV_Hexagons", hexes)]
+    return list(tiles.renderPyramid(data["tile_layers"], zooms={"NV_Hexagons": (7, 12)}, workers=1))
+
+BENCHMARKS = [
+    ("rivers", benchRivers),
+    ("lakes_playas", benchLakesPlayas),
+    ("wetlands", benchWetlands),
+    ("geometry_store", benchGeometryStore),
+    ("springs", benchSprings),
+    ("springs_delta", benchSpringsDelta),
+    ("species", benchSpecies),
+    ("phreatophytes", benchPhreatophytes),
+    ("compaction", benchCompaction),
+    ("grid_overlay", benchGridOverlay),
+    ("dissolve", benchDissolve),
+    ("overlay_plan", benchOverlayPlan),
+    ("query", benchQuery),
+    ("summary_cube", benchSummaryCube),
+    ("line_tabulation", benchLineTabulation),
+    ("field_calc", benchFieldCalc),
+    ("imports", benchImports),
+    ("mosaic", benchMosaic),
+    ("zonal_histogram", benchZonalHistogram),
+    ("zone_grid", benchZoneGrid),
+    ("storymap_preview", benchStoryMapPreview),
+    ("storymap_hexagons", benchStoryMapHexagons),
+    ("storymap_hydrobasins", benchStoryMapHydrobasins),
+    ("storymap_tiles", benchStoryMapTiles),
+]
+
+#-------------------------------------------------------------------------------
+# Timing
+
+# Fixed pure-Python workload used to normalize times between machines
+def calibrate(repeat=3):
+    best = None
+    for r in range(repeat):
+        start = time.perf_counter()
+        total = 0
+        for i in range(2000000):
+            total += i * i % 7
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+# Best-of-repeat wall time of fn(data)
+def timeStage(fn, data, repeat=3):
+    best = None
+    for r in range(repeat):
+        start = time.perf_counter()
+        fn(data)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def runBenchmarks(scale=0.01, seed=26, repeat=3, stages=None):
+    start = time.perf_counter()
+    data = synthetic.buildDataset(scale, seed)
+    generate = time.perf_counter() - start
+    results = {"scale": scale, "seed": seed, "repeat": repeat, "calibration": calibrate(),
+               "generate_seconds": generate, "stages": {}}
+    try:
+        for name, fn in BENCHMARKS:
+            if stages and name not in stages:
+                continue
+            seconds = timeStage(fn, data, repeat)
+            results["stages"][name] = seconds
+            print("{:<28} {:>10.4f} s".format(name, seconds))
+    finally:
+        for folder in data.get("temp_dirs", []):
+            shutil.rmtree(folder, ignore_errors=True)
+    return results
+
+#-------------------------------------------------------------------------------
+# Regression thresholds
+
+# Compare normalized stage times; returns a list of (stage, ratio, status) with status "regression",
+# "speedup" or "ok". ratio > 1 means slower than the baseline.
+def compareToBaseline(results, baseline, tolerance=0.25):
+    if (results["scale"], results["seed"]) != (baseline["scale"], baseline["seed"]):
+        raise ValueError("Baseline was recorded at scale {} seed {}; rerun with the same settings".format(baseline["scale"], baseline["seed"]))
+    report = []
+    for name, seconds in sorted(results["stages"].items()):
+        if name not in baseline["stages"]:
+            report.append((name, None, "new"))
+            continue
+        # Per-stage tolerance overrides may be stored in the baseline file
+        stage_tolerance = baseline.get("tolerances", {}).get(name, tolerance)
+        ratio = (seconds / results["calibration"]) / (baseline["stages"][name] / baseline["calibration"])
+        if ratio > 1 + stage_tolerance:
+            status = "regression"
+        elif ratio < 1 - stage_tolerance:
+            status = "speedup"
+        else:
+            status = "ok"
+        report.append((name, ratio, status))
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the NV iGDE pipeline stages on synthetic data")
+    parser.add_argument("--scale", type=float, default=0.01, help="1.0 = statewide feature counts")
+    parser.add_argument("--seed", type=int, default=26)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--stages", help="comma separated stage names (default: all)")
+    parser.add_argument("--baseline", help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed fractional slowdown")
+    parser.add_argument("--save-baseline", help="write the results to this JSON file")
+    parser.add_argument("--list", action="store_true", help="list stage names and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, fn in BENCHMARKS:
+            print(name)
+        return 0
+
+    stages = args.stages.split(",") if args.stages else None
+    results = runBenchmarks(args.scale, args.seed, args.repeat, stages)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print("Baseline saved to {}".format(args.save_baseline))
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        for name, ratio, state in compareToBaseline(results, baseline, args.tolerance):
+            if ratio is None:
+                print("{:<28} {:>10} {}".format(name, "-", state))
+            else:
+                print("{:<28} {:>9.2f}x {}".format(name, ratio, state))
+            if state == "regression":
+                status = 1
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+# END
@@ -0,0 +1,253 @@
+#-------------------------------------------------------------------------------
+# Name:        NV iGDE Database - Build cache
+# Purpose:     Content-addressed cache for the pipeline stages. A stage's key is a hash of its script, its source
+#              datasets and lookup CSVs, the local GDE_*_clean modules it imports (directly or through other
+#              modules), its parameters and the keys of the stages it reads from. When the key
+#              matches the last successful build the stage is skipped (or its outputs are copied back from the
+#              cache geodatabase), so a new SSI drop or an updated lookup CSV only rebuilds what depends on it.
+# Modules: ast; hashlib; json; os; re; shutil; warnings; arcpy (only when outputs are stored or restored)
+#
+# Author:      sarah.byer
+#
+# Created:     October 2026
+# Copyright:   (c) sarah.byer 2026
+#-------------------------------------------------------------------------------
+
+import ast, hashlib, json, os, re, shutil, warnings
+
+CHUNK = 1 << 20
+
+# File geodatabase lock files change while a gdb is open and say nothing about its content
+IGNORED_SUFFIXES = (".lock",)
+
+# Shapefiles are several files on disk
+SHAPEFILE_PARTS = (".shp", ".shx", ".dbf", ".prj", ".cpg", ".sbn", ".sbx")
+
+# Local modules whose changes rebuild the stages that import them
+LOCAL_MODULE = re.compile(r"^GDE_\w+_clean$")
+
+#-------------------------------------------------------------------------------
+# Content hashing
+
+# Digests of files already hashed, keyed by path, size and modification time, so unchanged
+# multi-gigabyte sources (NHD, LANDFIRE) are only read once
+class HashMemo(object):
+
+    def __init__(self, memo_file=None):
+        self.memo_file = memo_file
+        self.entries = {}
+        if memo_file and os.path.exists(memo_file):
+            with open(memo_file) as f:
+                self.entries = json.load(f)
+
+    def save(self):
+        if self.memo_file:
+            with open(self.memo_file, "w") as f:
+                json.dump(self.entries, f)
+
+    def fileDigest(self, path):
+        st = os.stat(path)
+        stamp = "{}:{}".format(st.st_size, st.st_mtime_ns)
+        entry = self.entries.get(path)
+        if entry and entry[0] == stamp:
+            return entry[1]
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(CHUNK), b""):
+                h.update(block)
+        digest = h.hexdigest()
+        self.entries[path] = [stamp, digest]
+        return digest
+
+# Files that make up a dataset path: a single file, every file in a folder/geodatabase, or a shapefile's parts.
+# Paths inside a geodatabase (gdb\feature_class) resolve to the whole geodatabase.
+def datasetFiles(path):
+    lower = path.lower()
+    if ".gdb" in lower and not lower.endswith(".gdb"):
+        path = path[:lower.index(".gdb") + 4]
+    if os.path.isdir(path):
+        files = []
+        for root, dirs, names in os.walk(path):
+            dirs.sort()
+            for name in sorted(names):
+                if not name.lower().endswith(IGNORED_SUFFIXES):
+                    files.append(os.path.join(root, name))
+        return path, files
+    if lower.endswith(".shp"):
+        stem = path[:-4]
+        return path, [stem + ext for ext in SHAPEFILE_PARTS if os.path.exists(stem + ext)]
+    if os.path.exists(path):
+        return path, [path]
+    raise IOError("Source dataset not found: {}".format(path))
+
+def hashDataset(path, memo):
+    base, files = datasetFiles(path)
+    h = hashlib.sha256()
+    for name in files:
+        h.update(os.path.relpath(name, os.path.dirname(base)).replace("\\", "/").encode("utf-8"))
+        h.update(memo.fileDigest(name).encode("ascii"))
+    return h.hexdigest()
+
+# Local modules imported by a script (at module level or inside functions): {path: modification time, modules}
+_IMPORTS = {}
+
+def _moduleImports(path):
+    stamp = os.stat(path).st_mtime_ns
+    entry = _IMPORTS.get(path)
+    if entry and entry[0] == stamp:
+        return entry[1]
+    with open(path, "rb") as f:
+        source = f.read()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        tree = ast.parse(source, path)
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.add(node.module)
+    modules = sorted(name for name in names if LOCAL_MODULE.match(name))
+    _IMPORTS[path] = (stamp, modules)
+    return modules
+
+# Every local module a script depends on, following the imports of the imported modules (file names, sorted)
+def localImports(script, script_dir):
+    seen, pending = set(), [script]
+    while pending:
+        for name in _moduleImports(os.path.join(script_dir, pending.pop())):
+            module_file = name + ".py"
+            if module_file not in seen and module_file != script and os.path.exists(os.path.join(script_dir, module_file)):
+                seen.add(module_file)
+                pending.append(module_file)
+    return sorted(seen)
+
+# Key for one stage; upstream_keys are the keys of the stages that produce its inputs
+def stageKey(stage, upstream_keys, memo, script_dir):
+    h = hashlib.sha256()
+    h.update(stage.name.encode("utf-8"))
+    script = stage.run.split(":")[0] + ".py" if ":" in stage.run else stage.run
+    h.update(memo.fileDigest(os.path.join(script_dir, script)).encode("ascii"))
+    for name in localImports(script, script_dir):
+        h.update(name.encode("utf-8"))
+        h.update(memo.fileDigest(os.path.join(script_dir, name)).encode("ascii"))
+    for source in sorted(stage.sources):
+        h.update(source.encode("utf-8"))
+        h.update(hashDataset(source, memo).encode("ascii"))
+    h.update(json.dumps(stage.params, sort_keys=True, default=str).encode("utf-8"))
+    for key in sorted(upstream_keys):
+        h.update(key.encode("ascii"))
+    return h.hexdigest()
+
+#-------------------------------------------------------------------------------
+# Manifest of successful builds
+
+class BuildCache(object):
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        self.manifest_file = os.path.join(cache_dir, "build_manifest.json")
+        self.memo = HashMemo(os.path.join(cache_dir, "hash_memo.json"))
+        self.manifest = {}
+        if os.path.exists(self.manifest_file):
+            with open(self.manifest_file) as f:
+                self.manifest = json.load(f)
+
+    # Cache geodatabase holding a stage's outputs for one key
+    def cacheGdb(self, stage_name, key):
+        return os.path.join(self.cache_dir, "{}_{}.gdb".format(stage_name, key[:16]))
+
+    def lastKey(self, stage_name):
+        return self.manifest.get(stage_name, {}).get("key")
+
+    def record(self, stage_name, key, stored):
+        self.manifest[stage_name] = {"key": key, "stored": stored}
+        with open(self.manifest_file, "w") as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+        self.memo.save()
+
+    def isStored(self, stage_name, key):
+        entry = self.manifest.get(stage_name, {})
+        return entry.get("key") == key and entry.get("stored", False)
+
+#-------------------------------------------------------------------------------
+# Output handling (runs in the stage worker process, so the orchestrator never imports arcpy)
+
+# Outputs that are whole geodatabases are only checked for existence; plain files (tile packages, CSV
+# exports) are copied next to the cache geodatabase; everything else is a feature class or table that can be
+# truncated, stored and restored
+FILE_OUTPUTS = (".mbtiles", ".sqlite", ".csv")
+
+def isWorkspace(path):
+    return path.lower().endswith(".gdb")
+
+def isFile(path):
+    return path.lower().endswith(FILE_OUTPUTS)
+
+# Geodatabase holding a dataset path (possibly inside a feature dataset), or None
+def workspaceOf(path):
+    folder = os.path.dirname(path)
+    while folder and not isWorkspace(folder):
+        parent = os.path.dirname(folder)
+        if parent == folder:
+            return None
+        folder = parent
+    return folder or None
+
+# Folder holding a stage's file outputs for one key
+def cacheFiles(cache_gdb):
+    return os.path.splitext(cache_gdb)[0] + "_files"
+
+def outputsExist(paths):
+    import arcpy
+    return all(os.path.exists(p) if isFile(p) else arcpy.Exists(p) for p in paths)
+
+# Empty a stage's output layers before it reruns, since the builders append into them
+# (rasters are overwritten by their stage, so they are left in place)
+def truncateOutputs(paths):
+    import arcpy
+    for p in paths:
+        if isFile(p):
+            if os.path.exists(p):
+                os.remove(p)
+        elif not isWorkspace(p) and arcpy.Exists(p) and arcpy.Describe(p).dataType != "RasterDataset":
+            arcpy.TruncateTable_management(p)
+
+def storeOutputs(paths, cache_gdb):
+    import arcpy
+    folder, name = os.path.split(cache_gdb)
+    if arcpy.Exists(cache_gdb):
+        arcpy.Delete_management(cache_gdb)
+    arcpy.CreateFileGDB_management(folder, name)
+    files = cacheFiles(cache_gdb)
+    if os.path.isdir(files):
+        shutil.rmtree(files)
+    for p in paths:
+        if isFile(p):
+            if not os.path.isdir(files):
+                os.makedirs(files)
+            shutil.copy2(p, os.path.join(files, os.path.basename(p)))
+        elif not isWorkspace(p):
+            arcpy.Copy_management(p, os.path.join(cache_gdb, os.path.basename(p)))
+
+# Copy cached outputs back into place (e.g. into a fresh dated iGDE geodatabase, created here if missing)
+def restoreOutputs(paths, cache_gdb):
+    import arcpy
+    for p in paths:
+        if isWorkspace(p):
+            continue
+        if isFile(p):
+            if os.path.dirname(p) and not os.path.isdir(os.path.dirname(p)):
+                os.makedirs(os.path.dirname(p))
+            shutil.copy2(os.path.join(cacheFiles(cache_gdb), os.path.basename(p)), p)
+            continue
+        workspace = workspaceOf(p)
+        if workspace and not arcpy.Exists(workspace):
+            arcpy.CreateFileGDB_management(*os.path.split(workspace))
+        if arcpy.Exists(p):
+            arcpy.Delete_management(p)
+        arcpy.Copy_management(os.path.join(cache_gdb, os.path.basename(p)), p)
+
+# END
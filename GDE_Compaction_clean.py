@@ -0,0 +1,274 @@
+#-------------------------------------------------------------------------------
+# Name:        NV iGDE Database - Geometry compaction
+# Purpose:     Remove the vertices that RasterToPolygon_conversion(..., "NO_SIMPLIFY", ...) leaves at every pixel
+#              edge. Duplicate vertices and vertices in the middle of a straight run are dropped exactly, so the
+#              footprint (and every area and overlay result computed from it) is unchanged while the Dissolve,
+#              Intersect and Erase steps that follow get far fewer vertices to process.
+#              An optional simplification pass then removes the least significant remaining vertices
+#              (Visvalingam-Whyatt) until a layer meets a vertex budget. Vertices shared between rings (of the
+#              same or another feature) are never moved, and a vertex is only removed when no other vertex falls
+#              in the triangle it cuts off and the new edge touches no other edge, so rings never cross. Between
+#              shared vertices each side of a common boundary is simplified on its own, so it can open small gaps.
+# Modules: heapq; GDE_Geometry_clean; arcpy (for rewriting feature classes)
+#
+# Usage:       from GDE_Compaction_clean import compactFeatureClass
+#              compactFeatureClass(rpoly)                     # lossless
+#              compactFeatureClass(gde_phr, vertex_budget=VERTEX_BUDGETS["Phreatophytes"])
+#
+# Author:      sarah.byer
+#
+# Created:     October 2026
+# Copyright:   (c) sarah.byer 2026
+#-------------------------------------------------------------------------------
+
+import heapq
+
+from GDE_Geometry_clean import GridIndex, bbox, shapeParts
+
+# Vertex budget for the optional simplification of each layer; None keeps every corner (lossless only)
+VERTEX_BUDGETS = {
+    "Phreatophytes": None,
+}
+
+#-------------------------------------------------------------------------------
+# Lossless compaction
+
+# Drop repeated vertices and vertices where the ring continues straight on.
+# Works on closed rings (first point == last point) and returns a closed ring; only exact collinearity
+# counts, which is what raster cell edges produce. Spikes (a vertex where the ring doubles back) are kept.
+def compactRing(ring):
+    pts = []
+    for pt in ring:
+        if not pts or pt != pts[-1]:
+            pts.append(pt)
+    if len(pts) > 1 and pts[0] == pts[-1]:
+        pts.pop()
+    if len(pts) < 3:
+        return None
+    changed = True
+    while changed and len(pts) >= 3:
+        changed = False
+        out = []
+        n = len(pts)
+        for i in range(n):
+            ax, ay = out[-1] if out else pts[i - 1]
+            bx, by = pts[i]
+            cx, cy = pts[(i + 1) % n]
+            cross = (bx - ax) * (cy - by) - (by - ay) * (cx - bx)
+            dot = (bx - ax) * (cx - bx) + (by - ay) * (cy - by)
+            if cross == 0 and dot > 0:
+                changed = True
+                continue
+            out.append((bx, by))
+        pts = out
+    if len(pts) < 3:
+        return None
+    pts.append(pts[0])
+    return pts
+
+# Compact every ring of a polygon; rings that collapse are dropped
+def compactPolygon(rings):
+    out = []
+    for ring in rings:
+        compacted = compactRing(ring)
+        if compacted is not None:
+            out.append(compacted)
+    return out
+
+def vertexCount(rings):
+    return sum(len(ring) - 1 for ring in rings)
+
+#-------------------------------------------------------------------------------
+# Budgeted simplification
+
+def _triangleArea(a, b, c):
+    return abs((b[0] - a[0]) * (c[1] - a[1]) - (c[0] - a[0]) * (b[1] - a[1])) / 2.0
+
+def _inTriangle(p, a, b, c):
+    d1 = (p[0] - b[0]) * (a[1] - b[1]) - (a[0] - b[0]) * (p[1] - b[1])
+    d2 = (p[0] - c[0]) * (b[1] - c[1]) - (b[0] - c[0]) * (p[1] - c[1])
+    d3 = (p[0] - a[0]) * (c[1] - a[1]) - (c[0] - a[0]) * (p[1] - a[1])
+    neg = d1 < 0 or d2 < 0 or d3 < 0
+    pos = d1 > 0 or d2 > 0 or d3 > 0
+    return not (neg and pos)
+
+def _orientation(a, b, c):
+    cross = (b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])
+    return (cross > 0) - (cross < 0)
+
+def _onSegment(p, a, b):
+    return min(a[0], b[0]) <= p[0] <= max(a[0], b[0]) and min(a[1], b[1]) <= p[1] <= max(a[1], b[1])
+
+# True if segments ab and cd cross or touch
+def _segmentsTouch(a, b, c, d):
+    o1, o2, o3, o4 = _orientation(a, b, c), _orientation(a, b, d), _orientation(c, d, a), _orientation(c, d, b)
+    if o1 != o2 and o3 != o4:
+        return True
+    return ((o1 == 0 and _onSegment(c, a, b)) or (o2 == 0 and _onSegment(d, a, b)) or
+            (o3 == 0 and _onSegment(a, c, d)) or (o4 == 0 and _onSegment(b, c, d)))
+
+# Simplify a layer's polygons (lists of closed rings) until it has at most vertex_budget vertices, or until
+# the next vertex would cut off more than max_area. Returns the new list of polygons.
+def simplifyPolygons(polygons, vertex_budget=None, max_area=None, cell_size=None):
+    polygons = [compactPolygon(rings) for rings in polygons]
+    total = sum(vertexCount(rings) for rings in polygons)
+    if (vertex_budget is None or total <= vertex_budget) and max_area is None:
+        return polygons
+
+    # Vertices used by more than one ring are pinned
+    owners = {}
+    for f, rings in enumerate(polygons):
+        for r, ring in enumerate(rings):
+            for pt in ring[:-1]:
+                owners.setdefault(pt, set()).add((f, r))
+    pinned = set(pt for pt, rs in owners.items() if len(rs) > 1)
+
+    # Open rings as linked lists; vertex key is (feature, ring, index). Edges are indexed as (start key, end key)
+    # and an edge is current while its start is alive and still links to its end.
+    rings_open = {}
+    prev, nxt, alive = {}, {}, {}
+    size = {}
+    index = GridIndex(cell_size or _cellSize(polygons))
+    edges = GridIndex(index.cell_size)
+    for f, rings in enumerate(polygons):
+        for r, ring in enumerate(rings):
+            pts = ring[:-1]
+            rings_open[(f, r)] = pts
+            size[(f, r)] = len(pts)
+            n = len(pts)
+            for i, pt in enumerate(pts):
+                key = (f, r, i)
+                prev[key] = (f, r, (i - 1) % n)
+                nxt[key] = (f, r, (i + 1) % n)
+                alive[key] = True
+                index.insert(key, (pt[0], pt[1], pt[0], pt[1]))
+            for i in range(n):
+                edges.insert(((f, r, i), (f, r, (i + 1) % n)), _box(pts[i], pts[(i + 1) % n]))
+
+    def point(key):
+        return rings_open[key[:2]][key[2]]
+
+    # True if the edge a-c would touch a current edge that does not end at a or c
+    def shortcutTouches(a, c):
+        for start, end in edges.query(_box(a, c)):
+            if not alive[start] or nxt[start] != end:
+                continue
+            p, q = point(start), point(end)
+            if p in (a, c) or q in (a, c):
+                continue
+            if _segmentsTouch(a, c, p, q):
+                return True
+        return False
+
+    heap = []
+    version = {}
+    def push(key):
+        if point(key) in pinned:
+            return
+        version[key] = version.get(key, 0) + 1
+        heapq.heappush(heap, (_triangleArea(point(prev[key]), point(key), point(nxt[key])), version[key], key))
+
+    for key in alive:
+        push(key)
+
+    while heap and (vertex_budget is None or total > vertex_budget):
+        area, v, key = heapq.heappop(heap)
+        if not alive[key] or version[key] != v:
+            continue
+        if max_area is not None and area > max_area:
+            break
+        # Rings keep at least three vertices
+        if size[key[:2]] <= 3:
+            continue
+        a, b, c = point(prev[key]), point(key), point(nxt[key])
+        box = (min(a[0], b[0], c[0]), min(a[1], b[1], c[1]), max(a[0], b[0], c[0]), max(a[1], b[1], c[1]))
+        blocked = False
+        for other in index.query(box):
+            if other in (key, prev[key], nxt[key]) or not alive[other]:
+                continue
+            p = point(other)
+            if p != a and p != c and _inTriangle(p, a, b, c):
+                blocked = True
+                break
+        if blocked or shortcutTouches(a, c):
+            continue
+        alive[key] = False
+        size[key[:2]] -= 1
+        total -= 1
+        p, n = prev[key], nxt[key]
+        nxt[p], prev[n] = n, p
+        edges.insert((p, n), _box(a, c))
+        push(p)
+        push(n)
+
+    out = []
+    for f, rings in enumerate(polygons):
+        new_rings = []
+        for r in range(len(rings)):
+            pts = [pt for i, pt in enumerate(rings_open[(f, r)]) if alive[(f, r, i)]]
+            new_rings.append(pts + [pts[0]])
+        out.append(new_rings)
+    return out
+
+def _box(a, b):
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[0], b[0]), max(a[1], b[1]))
+
+# Grid cell size giving a few vertices per cell on average
+def _cellSize(polygons):
+    boxes = [bbox(rings) for rings in polygons if rings]
+    if not boxes:
+        return 1.0
+    width = max(b[2] for b in boxes) - min(b[0] for b in boxes)
+    height = max(b[3] for b in boxes) - min(b[1] for b in boxes)
+    count = max(1, sum(vertexCount(rings) for rings in polygons))
+    return max(1.0, (width * height * 4.0 / count) ** 0.5)
+
+#-------------------------------------------------------------------------------
+# Rewriting feature classes with arcpy
+
+def _polygon(rings, spatial_reference):
+    import arcpy
+    return arcpy.Polygon(arcpy.Array([arcpy.Array([arcpy.Point(x, y) for x, y in ring]) for ring in rings]),
+                         spatial_reference)
+
+# Compact (and with a vertex budget, simplify) every polygon of a feature class in place.
+# Returns (vertices before, vertices after).
+def compactFeatureClass(fc, vertex_budget=None, max_area=None):
+    import arcpy
+    spatial_reference = arcpy.Describe(fc).spatialReference
+    if vertex_budget is None and max_area is None:
+        # Each polygon is compacted on its own: one cursor pass, one polygon in memory at a time
+        before = after = 0
+        with arcpy.da.UpdateCursor(fc, ["SHAPE@"]) as cursor:
+            for row in cursor:
+                if row[0] is None:
+                    continue
+                rings = shapeParts(row[0])
+                compacted = compactPolygon(rings)
+                before += vertexCount(rings)
+                after += vertexCount(compacted)
+                if compacted:
+                    cursor.updateRow([_polygon(compacted, spatial_reference)])
+        print("{}: {} vertices compacted to {}".format(fc, before, after))
+        return before, after
+
+    # A vertex budget is shared by all polygons, so they are read first and written back in a second pass
+    with arcpy.da.SearchCursor(fc, ["OID@", "SHAPE@"]) as cursor:
+        oids, polygons = [], []
+        for oid, shape in cursor:
+            if shape is not None:
+                oids.append(oid)
+                polygons.append(shapeParts(shape))
+    before = sum(vertexCount(rings) for rings in polygons)
+    polygons = simplifyPolygons(polygons, vertex_budget, max_area)
+    after = sum(vertexCount(rings) for rings in polygons)
+    shapes = dict(zip(oids, polygons))
+    with arcpy.da.UpdateCursor(fc, ["OID@", "SHAPE@"]) as cursor:
+        for row in cursor:
+            rings = shapes.get(row[0])
+            if rings:
+                cursor.updateRow([row[0], _polygon(rings, spatial_reference)])
+    print("{}: {} vertices compacted to {}".format(fc, before, after))
+    return before, after
+
+# END
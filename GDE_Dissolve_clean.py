@@ -0,0 +1,232 @@
+#-------------------------------------------------------------------------------
+# Name:        NV iGDE Database - Parallel dissolve
+# Purpose:     Dissolve large layers (Phreatophytes, Wetlands, Lakes_Playas, Rivers_Streams, LANDFIRE GDEs) on all
+#              cores instead of one. Features are partitioned into a grid of spatial tiles; each tile is clipped
+#              and dissolved in a worker process (a binary cascaded union for the grid backend, Dissolve_management
+#              for the arcpy backend). Pieces that lie inside their tile are already final, so only the pieces
+#              that touch a tile border are stitched together in a last, much smaller dissolve.
+#              Backends:
+#                arcpy - any feature class (parallelDissolve)
+#                grid  - raster-derived polygons on one cell grid, exact (GDE_GridGeometry_clean.py)
+# Modules: os; sys; multiprocessing; concurrent.futures; GDE_GridGeometry_clean; GDE_Schema_clean; GDE_Workspace_clean; arcpy
+#
+# Usage:       ph_dissolve = parallelDissolve(phreatophytes, ws.new("ph_dissolve"))
+#              ph_types = parallelDissolve(phreatophytes, ws.new("ph_type_dissolve"), ["PHR_GROUP"])
+#
+#              The tile count per side and the number of workers can be set with the GDE_DISSOLVE_TILES and
+#              GDE_WORKERS environment variables.
+#
+# Author:      sarah.byer
+#
+# Created:     October 2026
+# Copyright:   (c) sarah.byer 2026
+#-------------------------------------------------------------------------------
+
+import multiprocessing, os, sys
+from concurrent.futures import ProcessPoolExecutor
+
+from GDE_GridGeometry_clean import GridRegion
+from GDE_Schema_clean import FIELD_TYPES
+from GDE_Workspace_clean import SCRATCH_DIR
+
+TILES_PER_SIDE = int(os.environ.get("GDE_DISSOLVE_TILES", 8))
+WORKERS = int(os.environ.get("GDE_WORKERS", 0)) or None # None: one per CPU
+
+#-------------------------------------------------------------------------------
+# Tiling
+
+# tiles x tiles boxes covering extent (xmin, ymin, xmax, ymax), as (col, row, box)
+def tileBoxes(extent, tiles=TILES_PER_SIDE):
+    xmin, ymin, xmax, ymax = extent
+    w = (xmax - xmin) / float(tiles)
+    h = (ymax - ymin) / float(tiles)
+    boxes = []
+    for row in range(tiles):
+        for col in range(tiles):
+            # The last row/column ends exactly on the extent so nothing is lost to rounding
+            x1 = xmax if col == tiles - 1 else xmin + (col + 1) * w
+            y1 = ymax if row == tiles - 1 else ymin + (row + 1) * h
+            boxes.append((col, row, (xmin + col * w, ymin + row * h, x1, y1)))
+    return boxes
+
+# Union of a list of items as a balanced binary tree of pairwise unions, so each union works on two
+# pieces of similar size instead of growing one large result feature by feature
+def cascadedUnion(items, union):
+    items = list(items)
+    if not items:
+        return None
+    while len(items) > 1:
+        merged = [union(items[i], items[i + 1]) for i in range(0, len(items) - 1, 2)]
+        if len(items) % 2:
+            merged.append(items[-1])
+        items = merged
+    return items[0]
+
+# Run func over the argument lists in a spawn pool.
+# Spawned workers import the parent's __main__ on start-up, and the pipeline scripts do their work at module
+# level, so __main__ points at this module while the workers start.
+def parallelMap(func, args, workers):
+    main = sys.modules["__main__"]
+    sys.modules["__main__"] = sys.modules[__name__]
+    try:
+        with ProcessPoolExecutor(max_workers=workers or WORKERS, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = [pool.submit(func, *a) for a in args]
+            sys.modules["__main__"] = main
+            return [f.result() for f in futures]
+    finally:
+        sys.modules["__main__"] = main
+
+#-------------------------------------------------------------------------------
+# Grid backend (pure NumPy, exact)
+
+def _unionPair(a, b):
+    return GridRegion.union([a, b])
+
+# One tile: the features' cells inside the window, unioned per key
+def _gridTile(grid, window, items):
+    c0, r0, c1, r1 = window
+    per_key = {}
+    for key, rings in items:
+        region = GridRegion.fromRings(grid, rings).clipCells(c0, r0, c1, r1)
+        if not region.isEmpty():
+            per_key.setdefault(key, []).append(region)
+    return dict((key, cascadedUnion(regions, _unionPair)) for key, regions in per_key.items())
+
+# Dissolve raster-derived features (dicts with "SHAPE") on grid by fields: {(values...): GridRegion}.
+# Tiles are cell windows, so stitching is exact: runs that meet at a tile seam merge in the final union.
+def dissolveGrid(grid, features, fields=(), tiles=TILES_PER_SIDE, workers=None):
+    fields = list(fields)
+    items, boxes = [], []
+    for feature in features:
+        rings = feature["SHAPE"]
+        xs, ys = grid.snap([pt[0] for ring in rings for pt in ring], [pt[1] for ring in rings for pt in ring])
+        if not len(xs):
+            continue
+        items.append((tuple(feature[f] for f in fields), rings))
+        boxes.append((int(xs.min()), int(ys.min()), int(xs.max()), int(ys.max())))
+    if not items:
+        return {}
+    extent = (min(b[0] for b in boxes), min(b[1] for b in boxes), max(b[2] for b in boxes), max(b[3] for b in boxes))
+    tasks = []
+    for col, row, box in tileBoxes(extent, tiles):
+        window = tuple(int(round(v)) for v in box)
+        members = [items[i] for i, b in enumerate(boxes)
+                   if b[0] < window[2] and b[2] > window[0] and b[1] < window[3] and b[3] > window[1]]
+        if members and window[2] > window[0] and window[3] > window[1]:
+            tasks.append((grid, window, members))
+
+    if workers == 1:
+        results = [_gridTile(*task) for task in tasks]
+    else:
+        results = parallelMap(_gridTile, tasks, workers)
+
+    by_key = {}
+    for result in results:
+        for key, region in result.items():
+            by_key.setdefault(key, []).append(region)
+    return dict((key, GridRegion.union(regions)) for key, regions in by_key.items())
+
+#-------------------------------------------------------------------------------
+# arcpy backend
+
+# Clip one tile out of in_fc and dissolve it into the scratch geodatabase; returns the output path or None
+def _arcpyTile(in_fc, box, fields, out_fc):
+    import arcpy
+    arcpy.env.overwriteOutput = True
+    sr = arcpy.Describe(in_fc).spatialReference
+    xmin, ymin, xmax, ymax = box
+    tile = arcpy.Polygon(arcpy.Array([arcpy.Point(xmin, ymin), arcpy.Point(xmin, ymax), arcpy.Point(xmax, ymax),
+                                      arcpy.Point(xmax, ymin), arcpy.Point(xmin, ymin)]), sr)
+    clipped = arcpy.Clip_analysis(in_fc, tile, "memory\\tile_clip")
+    if int(arcpy.GetCount_management(clipped)[0]) == 0:
+        arcpy.Delete_management(clipped)
+        return None
+    arcpy.Dissolve_management(clipped, out_fc, fields or "", "", "SINGLE_PART")
+    arcpy.Delete_management(clipped)
+    return out_fc
+
+# Does a piece's extent reach the border of its tile (other than the outer edge of the whole layer)?
+def _onTileBorder(extent, box, layer_extent, tolerance):
+    for side, (piece, tile, outer) in enumerate(zip((extent.XMin, extent.YMin, extent.XMax, extent.YMax), box, layer_extent)):
+        if abs(tile - outer) <= tolerance:
+            continue
+        if (side < 2 and piece <= tile + tolerance) or (side >= 2 and piece >= tile - tolerance):
+            return True
+    return False
+
+def _createLike(in_fc, out_fc, fields, geometry_type, sr):
+    import arcpy
+    out_path, out_name = os.path.split(str(out_fc))
+    if arcpy.Exists(out_fc):
+        arcpy.Delete_management(out_fc)
+    arcpy.CreateFeatureclass_management(out_path, out_name, geometry_type.upper(), spatial_reference=sr)
+    in_fields = dict((f.name.upper(), f) for f in arcpy.ListFields(in_fc))
+    for name in fields:
+        f = in_fields[name.upper()]
+        arcpy.AddField_management(out_fc, f.name, FIELD_TYPES[f.type], field_length=f.length if f.type == "String" else None)
+
+# Dissolve_management(in_fc, out_fc, fields) run tile by tile in worker processes.
+# multi_part=True writes one multipart feature per combination of field values, as Dissolve does by default.
+def parallelDissolve(in_fc, out_fc, fields=None, tiles=TILES_PER_SIDE, workers=None, multi_part=True):
+    import arcpy
+    fields = [fields] if isinstance(fields, str) else list(fields or [])
+    describe = arcpy.Describe(in_fc)
+    sr = describe.spatialReference
+    geometry_type = describe.shapeType
+    ext = describe.extent
+    layer_extent = (ext.XMin, ext.YMin, ext.XMax, ext.YMax)
+    tolerance = (sr.XYTolerance or 0.001) * 2
+
+    scratch = os.path.join(SCRATCH_DIR, "gde_dissolve_{}.gdb".format(os.getpid()))
+    if arcpy.Exists(scratch):
+        arcpy.Delete_management(scratch)
+    arcpy.CreateFileGDB_management(*os.path.split(scratch))
+    try:
+        # Worker processes cannot see this process's memory workspace
+        if str(in_fc).lower().startswith("memory"):
+            in_fc = arcpy.CopyFeatures_management(in_fc, os.path.join(scratch, "dissolve_input"))
+        boxes = tileBoxes(layer_extent, tiles)
+        # Each worker writes its tile to its own feature class in the scratch geodatabase
+        jobs = [(str(in_fc), box, fields, os.path.join(scratch, "tile_{}_{}".format(col, row))) for col, row, box in boxes]
+        outputs = parallelMap(_arcpyTile, jobs, workers)
+
+        # Interior pieces are final; border pieces go to one stitching dissolve
+        in_fields = dict((f.name.upper(), f.name) for f in arcpy.ListFields(in_fc))
+        key_fields = [in_fields[name.upper()] for name in fields]
+        border = os.path.join(scratch, "border_pieces")
+        _createLike(in_fc, border, key_fields, geometry_type, sr)
+        pieces = []
+        with arcpy.da.InsertCursor(border, key_fields + ["SHAPE@"]) as border_cursor:
+            for (col, row, box), tile_fc in zip(boxes, outputs):
+                if tile_fc is None:
+                    continue
+                with arcpy.da.SearchCursor(tile_fc, key_fields + ["SHAPE@"]) as cursor:
+                    for row_values in cursor:
+                        if _onTileBorder(row_values[-1].extent, box, layer_extent, tolerance):
+                            border_cursor.insertRow(row_values)
+                        else:
+                            pieces.append(row_values)
+        stitched = arcpy.Dissolve_management(border, os.path.join(scratch, "border_dissolve"), key_fields or "", "", "SINGLE_PART")
+        with arcpy.da.SearchCursor(stitched, key_fields + ["SHAPE@"]) as cursor:
+            pieces.extend(cursor)
+
+        _createLike(in_fc, out_fc, key_fields, geometry_type, sr)
+        with arcpy.da.InsertCursor(out_fc, key_fields + ["SHAPE@"]) as cursor:
+            if not multi_part:
+                for values in pieces:
+                    cursor.insertRow(values)
+            else:
+                # Single parts are disjoint, so grouping their parts into one geometry needs no further union
+                groups = {}
+                for values in pieces:
+                    groups.setdefault(tuple(values[:-1]), []).append(values[-1])
+                make = arcpy.Polygon if geometry_type == "Polygon" else arcpy.Polyline
+                for key, shapes in groups.items():
+                    parts = arcpy.Array([part for shape in shapes for part in shape])
+                    cursor.insertRow(list(key) + [make(parts, sr)])
+    finally:
+        if arcpy.Exists(scratch):
+            arcpy.Delete_management(scratch)
+    return out_fc
+
+# END
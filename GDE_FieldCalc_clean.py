@@ -0,0 +1,304 @@
+#-------------------------------------------------------------------------------
+# Name:        NV iGDE Database - Field calculator expressions in NumPy
+# Purpose:     Evaluate CalculateField_management's Python expressions ('100*(!AREA_PHR!/!POLY_AREA!)',
+#              '!MILES_RVST!/!POLY_AREA!', '!COUNT_SOURCE_CODE!', ...) on whole columns instead of one row at a time.
+#              The expression is parsed with ast and compiled once into a function over column arrays; every
+#              value carries a null mask, so a null operand (or a division by zero) gives a null result instead of
+#              stopping the tool. Supported: numbers, strings, True/False/None, field references, + - * / // % **,
+#              unary - + not, comparisons (also "is None"/"is not None"), and/or, "a if c else b", and the
+#              functions abs, round, min, max, float, int, str.
+# Modules: ast; itertools; operator; os; re; numpy; arcpy (for calculateField)
+#
+# Usage:       calculateField(ph_int, "PER_PHR", '100*(!AREA_PHR!/!POLY_AREA!)')
+#              expr = compileExpression("!COUNT_SPR!/!POLY_AREA!")
+#              values, nulls = expr({"COUNT_SPR": counts, "POLY_AREA": acres})
+#
+# Author:      sarah.byer
+#
+# Created:     October 2026
+# Copyright:   (c) sarah.byer 2026
+#-------------------------------------------------------------------------------
+
+import ast, itertools, operator, os, re
+
+import numpy as np
+
+FIELD_REF = re.compile(r"!([A-Za-z_][A-Za-z0-9_.]*)!")
+FIELD_PREFIX = "_field_"
+
+# Rows evaluated at a time by calculateField
+CHUNK_ROWS = int(os.environ.get("GDE_FIELDCALC_CHUNK", 100000))
+
+#-------------------------------------------------------------------------------
+# Columns
+
+# (array, null mask) from a list of cursor values: int64 or float64 for numbers, str for text. Integer
+# columns (LONG/SHORT fields) stay int64 when they hold nulls; the null rows are 0 under the mask.
+def toColumn(values):
+    nulls = np.array([v is None for v in values], dtype=bool)
+    present = [v for v in values if v is not None]
+    if all(isinstance(v, (int, float, np.number)) and not isinstance(v, bool) for v in present):
+        integral = all(isinstance(v, (int, np.integer)) for v in present)
+        array = np.array([0 if v is None else v for v in values], dtype=np.int64 if integral else np.float64)
+    elif all(isinstance(v, (bool, np.bool_)) for v in present):
+        array = np.array([bool(v) for v in values], dtype=bool)
+    else:
+        array = np.array(["" if v is None else str(v) for v in values], dtype=str)
+    return array, nulls
+
+# Cursor values from (array, null mask): None where null
+def fromColumn(array, nulls):
+    values = array.tolist()
+    for i in np.flatnonzero(nulls).tolist():
+        values[i] = None
+    return values
+
+#-------------------------------------------------------------------------------
+# Compiler
+# Each compiled node is a function of (columns, n) returning (array, null mask) of length n.
+
+def _broadcast(value, n):
+    if isinstance(value, str):
+        return np.full(n, value, dtype="<U{}".format(max(len(value), 1)))
+    return np.full(n, value)
+
+def _isText(array):
+    return array.dtype.kind in "US"
+
+def _divide(a, b, true_division):
+    zero = b == 0
+    safe = np.where(zero, 1, b)
+    if true_division:
+        return np.true_divide(a, safe), zero
+    return np.floor_divide(a, safe), zero
+
+def _modulo(a, b):
+    zero = b == 0
+    return np.mod(a, np.where(zero, 1, b)), zero
+
+def _power(a, b):
+    with np.errstate(all="ignore"):
+        if a.dtype.kind == "i" and b.dtype.kind == "i" and (b < 0).any():
+            a = a.astype(np.float64)
+        result = np.power(a, b)
+    return result, ~np.isfinite(result) if result.dtype.kind == "f" else np.zeros(len(result), dtype=bool)
+
+def _add(a, b):
+    if _isText(a) or _isText(b):
+        return np.char.add(a.astype(str), b.astype(str)), None
+    return a + b, None
+
+BINARY = {
+    ast.Add: _add,
+    ast.Sub: lambda a, b: (a - b, None),
+    ast.Mult: lambda a, b: (a * b, None),
+    ast.Div: lambda a, b: _divide(a, b, True),
+    ast.FloorDiv: lambda a, b: _divide(a, b, False),
+    ast.Mod: _modulo,
+    ast.Pow: _power,
+}
+
+COMPARE = {
+    ast.Eq: operator.eq, ast.NotEq: operator.ne, ast.Lt: operator.lt,
+    ast.LtE: operator.le, ast.Gt: operator.gt, ast.GtE: operator.ge,
+}
+
+def _truth(value, nulls):
+    array = value != "" if _isText(value) else value.astype(bool)
+    return array & ~nulls
+
+class _Compiler(ast.NodeVisitor):
+
+    # names: {safe identifier: field name} of the field references in the expression
+    def __init__(self, names):
+        self.names = names
+        self.fields = []
+
+    def generic_visit(self, node):
+        raise ValueError("Unsupported expression element: {}".format(type(node).__name__))
+
+    def visit_Expression(self, node):
+        return self.visit(node.body)
+
+    def visit_Constant(self, node):
+        value = node.value
+        if value is None:
+            return lambda columns, n: (np.zeros(n), np.ones(n, dtype=bool))
+        if not isinstance(value, (bool, int, float, str)):
+            raise ValueError("Unsupported constant {!r}".format(value))
+        return lambda columns, n: (_broadcast(value, n), np.zeros(n, dtype=bool))
+
+    def visit_Name(self, node):
+        if node.id not in self.names:
+            raise ValueError("Unknown name {} (fields are written !FIELD!)".format(node.id))
+        field = self.names[node.id]
+        if field not in self.fields:
+            self.fields.append(field)
+        return lambda columns, n: columns[field]
+
+    def visit_BinOp(self, node):
+        if type(node.op) not in BINARY:
+            raise ValueError("Unsupported operator {}".format(type(node.op).__name__))
+        op, left, right = BINARY[type(node.op)], self.visit(node.left), self.visit(node.right)
+        def binary(columns, n):
+            (a, a_null), (b, b_null) = left(columns, n), right(columns, n)
+            with np.errstate(all="ignore"):
+                result, invalid = op(a, b)
+            nulls = a_null | b_null
+            return result, nulls if invalid is None else nulls | invalid
+        return binary
+
+    def visit_UnaryOp(self, node):
+        operand = self.visit(node.operand)
+        if isinstance(node.op, ast.USub):
+            return lambda columns, n: (lambda v: (-v[0], v[1]))(operand(columns, n))
+        if isinstance(node.op, ast.UAdd):
+            return operand
+        if isinstance(node.op, ast.Not):
+            return lambda columns, n: (lambda v: (~_truth(*v), np.zeros(n, dtype=bool)))(operand(columns, n))
+        raise ValueError("Unsupported operator {}".format(type(node.op).__name__))
+
+    def visit_Compare(self, node):
+        operands = [self.visit(node.left)] + [self.visit(c) for c in node.comparators]
+        ops = node.ops
+        for op, right in zip(ops, node.comparators):
+            if isinstance(op, (ast.Is, ast.IsNot)) and not (isinstance(right, ast.Constant) and right.value is None):
+                raise ValueError("'is' is only supported with None")
+            if not isinstance(op, (ast.Is, ast.IsNot)) and type(op) not in COMPARE:
+                raise ValueError("Unsupported comparison {}".format(type(op).__name__))
+        def compare(columns, n):
+            values = [f(columns, n) for f in operands]
+            result = np.ones(n, dtype=bool)
+            for op, (a, a_null), (b, b_null) in zip(ops, values[:-1], values[1:]):
+                if isinstance(op, ast.Is):
+                    result &= a_null
+                elif isinstance(op, ast.IsNot):
+                    result &= ~a_null
+                else:
+                    # Comparisons with a null are false, except != which is true
+                    either = a_null | b_null
+                    test = COMPARE[type(op)](a, b)
+                    result &= np.where(either, isinstance(op, ast.NotEq), test)
+            return result, np.zeros(n, dtype=bool)
+        return compare
+
+    def visit_BoolOp(self, node):
+        operands = [self.visit(v) for v in node.values]
+        both = isinstance(node.op, ast.And)
+        def boolean(columns, n):
+            result = np.full(n, both)
+            for f in operands:
+                truth = _truth(*f(columns, n))
+                result = result & truth if both else result | truth
+            return result, np.zeros(n, dtype=bool)
+        return boolean
+
+    def visit_IfExp(self, node):
+        test, body, orelse = self.visit(node.test), self.visit(node.body), self.visit(node.orelse)
+        def conditional(columns, n):
+            condition = _truth(*test(columns, n))
+            (a, a_null), (b, b_null) = body(columns, n), orelse(columns, n)
+            if _isText(a) != _isText(b):
+                a, b = a.astype(str), b.astype(str)
+            return np.where(condition, a, b), np.where(condition, a_null, b_null)
+        return conditional
+
+    def visit_Call(self, node):
+        if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS or node.keywords:
+            raise ValueError("Unsupported function call")
+        func, args = FUNCTIONS[node.func.id], [self.visit(a) for a in node.args]
+        if node.func.id == "round" and len(node.args) == 2:
+            # The number of digits is a constant of the expression, not a column
+            digits = node.args[1]
+            if not (isinstance(digits, ast.Constant) and type(digits.value) is int):
+                raise ValueError("round() digits must be an integer constant")
+            func, args = lambda a, digits=digits.value: _round(a, digits), args[:1]
+        def call(columns, n):
+            values = [f(columns, n) for f in args]
+            nulls = np.zeros(n, dtype=bool)
+            for v in values:
+                nulls |= v[1]
+            return func(*[v[0] for v in values]), nulls
+        return call
+
+def _round(a, digits=None):
+    if digits is None:
+        return np.round(a).astype(np.int64)
+    return np.round(a, digits)
+
+FUNCTIONS = {
+    "abs": np.abs,
+    "round": _round,
+    "min": lambda *a: np.minimum.reduce(a),
+    "max": lambda *a: np.maximum.reduce(a),
+    "float": lambda a: a.astype(np.float64),
+    "int": lambda a: np.trunc(a.astype(np.float64)).astype(np.int64) if not _isText(a) else a.astype(np.int64),
+    "str": lambda a: a.astype(str),
+}
+
+class CompiledExpression(object):
+
+    def __init__(self, expression):
+        self.expression = expression
+        # Field names (which may hold dots, e.g. joined fields) become numbered identifiers
+        identifiers = {}
+        def identifier(match):
+            return identifiers.setdefault(match.group(1), FIELD_PREFIX + str(len(identifiers)))
+        source = FIELD_REF.sub(identifier, expression.strip())
+        compiler = _Compiler(dict((name, field) for field, name in identifiers.items()))
+        self._evaluate = compiler.visit(ast.parse(source, mode="eval"))
+        self.fields = compiler.fields
+
+    def __repr__(self):
+        return "CompiledExpression({!r})".format(self.expression)
+
+    # columns: {field: array or (array, null mask)}; returns (values, null mask)
+    def __call__(self, columns, n=None):
+        prepared = {}
+        for field in self.fields:
+            column = columns[field]
+            if not isinstance(column, tuple):
+                column = (np.asarray(column), np.zeros(len(column), dtype=bool))
+            prepared[field] = column
+        if n is None:
+            n = len(next(iter(prepared.values()))[0]) if prepared else 1
+        values, nulls = self._evaluate(prepared, n)
+        if np.ndim(values) == 0:
+            values = _broadcast(values.item(), n)
+        return values, nulls
+
+_compiled = {}
+
+def compileExpression(expression):
+    if expression not in _compiled:
+        _compiled[expression] = CompiledExpression(expression)
+    return _compiled[expression]
+
+#-------------------------------------------------------------------------------
+# arcpy
+
+# Values of one chunk of (OID, field values...) rows
+def _evaluateRows(expr, rows):
+    columns = dict((f, toColumn([row[i + 1] for row in rows])) for i, f in enumerate(expr.fields))
+    return fromColumn(*expr(columns, len(rows)))
+
+# Drop-in for CalculateField_management(table, field, expression, "PYTHON3"): one UpdateCursor pass over the
+# table. A SearchCursor in the same row order reads ahead chunk_rows rows, the expression runs on those columns
+# and the UpdateCursor writes the results, so only one chunk is held in memory.
+def calculateField(table, field, expression, chunk_rows=CHUNK_ROWS):
+    import arcpy
+    expr = compileExpression(expression)
+    table = str(table)
+    with arcpy.da.SearchCursor(table, ["OID@"] + expr.fields) as reader, \
+         arcpy.da.UpdateCursor(table, ["OID@", field]) as writer:
+        rows = [None]
+        while rows:
+            rows = list(itertools.islice(reader, chunk_rows))
+            for row, value in zip(rows, _evaluateRows(expr, rows) if rows else []):
+                target = next(writer)
+                if target[0] != row[0]:
+                    raise RuntimeError("calculateField: cursors on {} out of step at OID {}".format(table, row[0]))
+                writer.updateRow([target[0], value])
+    return table
+
+# END
@@ -0,0 +1,275 @@
+#-------------------------------------------------------------------------------
+# Name:        NV iGDE Database - Ragged-array geometry store
+# Purpose:     Hold every geometry of a layer in flat NumPy arrays instead of one geometry object per feature:
+#              all coordinates in a single float64 (n, 2) array, ring/path offsets into it, feature offsets into
+#              the rings, and a bounding box per feature. Features slice out as views of the coordinate array,
+#              boxes filter with vectorized comparisons, and a store saves to .npy files that load memory-mapped,
+#              so statewide layers (Phreatophytes, Wetlands, Lakes_Playas) take a fraction of the memory and can be
+#              handed from one stage to the next without re-reading them through cursors.
+# Modules: json; os; numpy; GDE_Geometry_clean; arcpy (for reading and writing feature classes)
+#
+# Usage:       store = readFeatureClass(gde_wetlands, ["WET_TYPE", "SOURCE_CODE"])
+#              store.save(r"D:\GDE_cache\wetlands_store")
+#              store = GeometryStore.load(r"D:\GDE_cache\wetlands_store")   # memory-mapped
+#              nearby = store.bboxFilter((x - 1000, y - 1000, x + 1000, y + 1000))
+#
+# Author:      sarah.byer
+#
+# Created:     October 2026
+# Copyright:   (c) sarah.byer 2026
+#-------------------------------------------------------------------------------
+
+import json, os
+import numpy as np
+
+from GDE_Geometry_clean import shapeParts
+
+POINT, POLYLINE, POLYGON = "POINT", "POLYLINE", "POLYGON"
+
+#-------------------------------------------------------------------------------
+# Store
+
+class GeometryStore(object):
+
+    # coords: (n, 2) float64; ring_offsets: (rings + 1,) int64 into coords;
+    # feature_offsets: (features + 1,) int64 into the rings; bboxes: (features, 4) float64 xmin, ymin, xmax, ymax;
+    # attributes: {field: array with one value per feature}
+    def __init__(self, geometry_type, coords, ring_offsets, feature_offsets, bboxes=None, attributes=None):
+        self.geometry_type = geometry_type
+        self.coords = coords
+        self.ring_offsets = ring_offsets
+        self.feature_offsets = feature_offsets
+        self.bboxes = bboxes if bboxes is not None else self._computeBboxes()
+        self.attributes = attributes or {}
+
+    def __len__(self):
+        return len(self.feature_offsets) - 1
+
+    def __repr__(self):
+        return "GeometryStore({}, {} features, {} vertices)".format(self.geometry_type, len(self), len(self.coords))
+
+    # Coordinate range [start, stop) of each feature
+    def _coordRanges(self):
+        return self.ring_offsets[self.feature_offsets[:-1]], self.ring_offsets[self.feature_offsets[1:]]
+
+    def _computeBboxes(self):
+        starts, stops = self._coordRanges()
+        bboxes = np.full((len(starts), 4), np.nan)
+        filled = stops > starts
+        if len(self.coords) and filled.any():
+            s = starts[filled]
+            xs, ys = self.coords[:, 0], self.coords[:, 1]
+            bboxes[filled, 0] = np.minimum.reduceat(xs, s)
+            bboxes[filled, 1] = np.minimum.reduceat(ys, s)
+            bboxes[filled, 2] = np.maximum.reduceat(xs, s)
+            bboxes[filled, 3] = np.maximum.reduceat(ys, s)
+        return bboxes
+
+    #---------------------------------------------------------------------------
+    # Access
+
+    # Rings (or paths) of feature i as views of the coordinate array
+    def rings(self, i):
+        r0, r1 = self.feature_offsets[i], self.feature_offsets[i + 1]
+        offsets = self.ring_offsets
+        return [self.coords[offsets[r]:offsets[r + 1]] for r in range(r0, r1)]
+
+    # Feature i in the plain layout used by the engines: list of rings of (x, y) tuples, or an (x, y) tuple for points
+    def shape(self, i):
+        rings = [[tuple(pt) for pt in ring.tolist()] for ring in self.rings(i)]
+        if self.geometry_type == POINT:
+            return rings[0][0] if rings and rings[0] else None
+        return rings
+
+    def record(self, i):
+        row = dict((name, values[i].item() if hasattr(values[i], "item") else values[i])
+                   for name, values in self.attributes.items())
+        row["SHAPE"] = self.shape(i)
+        return row
+
+    def records(self):
+        for i in range(len(self)):
+            yield self.record(i)
+
+    def vertexCount(self):
+        return len(self.coords)
+
+    # Features start..stop as a new store sharing this store's coordinate array (no copy)
+    def slice(self, start, stop):
+        start, stop, step = slice(start, stop).indices(len(self))
+        feature_offsets = self.feature_offsets[start:stop + 1]
+        r0, r1 = feature_offsets[0], feature_offsets[-1]
+        ring_offsets = self.ring_offsets[r0:r1 + 1]
+        c0, c1 = ring_offsets[0], ring_offsets[-1]
+        return GeometryStore(self.geometry_type, self.coords[c0:c1], ring_offsets - c0, feature_offsets - r0,
+                             self.bboxes[start:stop], dict((k, v[start:stop]) for k, v in self.attributes.items()))
+
+    # Arbitrary features (index array or boolean mask) as a new, compacted store
+    def take(self, indices):
+        indices = np.asarray(indices)
+        if indices.dtype == bool:
+            indices = np.flatnonzero(indices)
+        ring_counts = self.feature_offsets[indices + 1] - self.feature_offsets[indices]
+        feature_offsets = np.concatenate(([0], np.cumsum(ring_counts))).astype(np.int64)
+        ring_index = _ranges(self.feature_offsets[indices], ring_counts)
+        ring_lengths = self.ring_offsets[ring_index + 1] - self.ring_offsets[ring_index]
+        ring_offsets = np.concatenate(([0], np.cumsum(ring_lengths))).astype(np.int64)
+        coords = self.coords[_ranges(self.ring_offsets[ring_index], ring_lengths)]
+        return GeometryStore(self.geometry_type, coords, ring_offsets, feature_offsets, self.bboxes[indices],
+                             dict((k, v[indices]) for k, v in self.attributes.items()))
+
+    #---------------------------------------------------------------------------
+    # Vectorized queries and measurements
+
+    # Indices of the features whose bounding box intersects box (xmin, ymin, xmax, ymax)
+    def bboxFilter(self, box):
+        b = self.bboxes
+        hit = (b[:, 0] <= box[2]) & (b[:, 2] >= box[0]) & (b[:, 1] <= box[3]) & (b[:, 3] >= box[1])
+        return np.flatnonzero(hit)
+
+    # Per-feature area (polygons; holes run opposite to exterior rings, as in polygonArea)
+    def areas(self):
+        return np.abs(self._ringSums(lambda x0, y0, x1, y1: x0 * y1 - x1 * y0) / 2.0)
+
+    # Per-feature length (lines) or perimeter (polygons)
+    def lengths(self):
+        return self._ringSums(lambda x0, y0, x1, y1: np.hypot(x1 - x0, y1 - y0))
+
+    # Sum of term(segment) over the segments of every feature's rings
+    def _ringSums(self, term):
+        sums = np.zeros(len(self))
+        if len(self.coords) < 2:
+            return sums
+        x, y = self.coords[:, 0], self.coords[:, 1]
+        seg = np.append(term(x[:-1], y[:-1], x[1:], y[1:]), 0.0)
+        # Segments that join the last vertex of one ring to the first of the next are not part of either
+        seg[self.ring_offsets[1:] - 1] = 0.0
+        starts, stops = self._coordRanges()
+        filled = stops > starts
+        if filled.any():
+            # Each feature is summed on its own (no running total) so large UTM products keep their precision
+            sums[filled] = np.add.reduceat(seg, starts[filled])
+        return sums
+
+    #---------------------------------------------------------------------------
+    # Saving and loading
+
+    def save(self, folder):
+        if not os.path.isdir(folder):
+            os.makedirs(folder)
+        np.save(os.path.join(folder, "coords.npy"), np.ascontiguousarray(self.coords))
+        np.save(os.path.join(folder, "ring_offsets.npy"), np.asarray(self.ring_offsets))
+        np.save(os.path.join(folder, "feature_offsets.npy"), np.asarray(self.feature_offsets))
+        np.save(os.path.join(folder, "bboxes.npy"), np.asarray(self.bboxes))
+        names = sorted(self.attributes)
+        for i, name in enumerate(names):
+            np.save(os.path.join(folder, "attr_{}.npy".format(i)), np.asarray(self.attributes[name]))
+        text = [name for name in names if np.asarray(self.attributes[name]).dtype == object]
+        with open(os.path.join(folder, "store.json"), "w") as f:
+            json.dump({"geometry_type": self.geometry_type, "attributes": names, "text": text,
+                       "features": len(self)}, f)
+
+    # Arrays are memory-mapped read-only unless mmap is False; text columns (Python objects) are read into memory
+    @classmethod
+    def load(cls, folder, mmap=True):
+        mode = "r" if mmap else None
+        with open(os.path.join(folder, "store.json")) as f:
+            meta = json.load(f)
+        def arr(name, text=False):
+            if text:
+                return np.load(os.path.join(folder, name), allow_pickle=True)
+            return np.load(os.path.join(folder, name), mmap_mode=mode)
+        text = set(meta.get("text", ()))
+        attributes = dict((name, arr("attr_{}.npy".format(i), name in text))
+                          for i, name in enumerate(meta["attributes"]))
+        return cls(meta["geometry_type"], arr("coords.npy"), arr("ring_offsets.npy"), arr("feature_offsets.npy"),
+                   arr("bboxes.npy"), attributes)
+
+# Concatenated aranges: start[i] .. start[i] + count[i] for every i
+def _ranges(starts, counts):
+    counts = np.asarray(counts, dtype=np.int64)
+    total = int(counts.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.int64)
+    offsets = np.repeat(np.asarray(starts, dtype=np.int64) - np.concatenate(([0], np.cumsum(counts)[:-1])), counts)
+    return offsets + np.arange(total, dtype=np.int64)
+
+#-------------------------------------------------------------------------------
+# Building stores
+
+# Attribute values as an array: numbers as int64/float64, text as fixed-width unicode (None -> "")
+def _attributeArray(values):
+    if values and all(isinstance(v, (int, np.integer)) and not isinstance(v, bool) for v in values):
+        return np.asarray(values, dtype=np.int64)
+    if any(v is not None for v in values) and all(v is None or isinstance(v, (int, float, np.number)) for v in values):
+        return np.asarray([np.nan if v is None else v for v in values], dtype=np.float64)
+    # Text (and all-null) columns keep their values and nulls as Python objects
+    array = np.empty(len(values), dtype=object)
+    array[:] = [None if v is None else str(v) for v in values]
+    return array
+
+# Store from rows in the engine layout (dicts with "SHAPE": list of rings/paths, or an (x, y) tuple for points)
+def fromRecords(rows, geometry_type=POLYGON, fields=None):
+    rows = list(rows)
+    xs, ys = [], []
+    ring_offsets, feature_offsets = [0], [0]
+    for row in rows:
+        shape = row["SHAPE"]
+        parts = [[shape]] if geometry_type == POINT and shape is not None else (shape or [])
+        for part in parts:
+            for x, y in part:
+                xs.append(x)
+                ys.append(y)
+            ring_offsets.append(len(xs))
+        feature_offsets.append(len(ring_offsets) - 1)
+    coords = np.column_stack((np.asarray(xs, dtype=np.float64), np.asarray(ys, dtype=np.float64))) if xs \
+        else np.zeros((0, 2))
+    if fields is None:
+        fields = [k for k in (rows[0] if rows else {}) if k != "SHAPE"]
+    attributes = dict((name, _attributeArray([row.get(name) for row in rows])) for name in fields)
+    return GeometryStore(geometry_type, coords, np.asarray(ring_offsets, dtype=np.int64),
+                         np.asarray(feature_offsets, dtype=np.int64), attributes=attributes)
+
+#-------------------------------------------------------------------------------
+# Reading and writing with arcpy
+
+SHAPE_TYPES = {"Point": POINT, "Polyline": POLYLINE, "Polygon": POLYGON}
+
+# Read a feature class (in NAD 1983 UTM Zone 11N) into a store
+def readFeatureClass(fc, fields=(), where=None):
+    import arcpy
+    geometry_type = SHAPE_TYPES[arcpy.Describe(fc).shapeType]
+    fields = list(fields)
+    shape_field = "SHAPE@XY" if geometry_type == POINT else "SHAPE@"
+    rows = []
+    with arcpy.da.SearchCursor(fc, fields + [shape_field], where, arcpy.SpatialReference(26911)) as cursor:
+        for row in cursor:
+            record = dict(zip(fields, row[:-1]))
+            shape = row[-1]
+            if geometry_type == POINT:
+                record["SHAPE"] = tuple(shape) if shape else None
+            else:
+                record["SHAPE"] = shapeParts(shape) if shape else []
+            rows.append(record)
+    return fromRecords(rows, geometry_type, fields)
+
+# Append a store's features to an existing feature class
+def writeFeatureClass(store, fc, fields=None):
+    import arcpy
+    fields = list(store.attributes) if fields is None else list(fields)
+    sr = arcpy.SpatialReference(26911)
+    with arcpy.da.InsertCursor(fc, fields + ["SHAPE@"]) as cursor:
+        for i in range(len(store)):
+            rings = store.rings(i)
+            if not rings or not len(rings[0]):
+                # Null shape (e.g. a point without coordinates)
+                geometry = None
+            elif store.geometry_type == POINT:
+                geometry = arcpy.PointGeometry(arcpy.Point(*rings[0][0]), sr)
+            else:
+                parts = arcpy.Array([arcpy.Array([arcpy.Point(x, y) for x, y in ring.tolist()]) for ring in rings])
+                geometry = arcpy.Polygon(parts, sr) if store.geometry_type == POLYGON else arcpy.Polyline(parts, sr)
+            values = [store.attributes[f][i] for f in fields]
+            cursor.insertRow([v.item() if hasattr(v, "item") else v for v in values] + [geometry])
+
+# END
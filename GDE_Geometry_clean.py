@@ -0,0 +1,186 @@
+#-------------------------------------------------------------------------------
+# Name:        NV iGDE Database - Geometry helpers
+# Purpose:     Plain Python geometry helpers used by the pipeline engines and benchmarks.
+#              Polygons are lists of rings, rings are lists of (x, y) tuples in NAD 1983 UTM Zone 11N meters.
+#              Lines are lists of paths, paths are lists of (x, y) tuples. Points are (x, y) tuples.
+# Modules: math
+#
+# Author:      sarah.byer
+#
+# Created:     October 2026
+# Copyright:   (c) sarah.byer 2026
+#-------------------------------------------------------------------------------
+
+import math
+
+# Conversion factors used throughout the iGDE scripts
+SQM_PER_ACRE = 4046.8726098742 # US survey acre
+M_PER_MILE = 1609.3472186944 # US survey mile ("MILES_US" in CalculateGeometryAttributes)
+
+#-------------------------------------------------------------------------------
+# Measurements
+
+# Signed shoelace area of a ring (negative when the ring runs clockwise, as Esri exterior rings do)
+def ringSignedArea(ring):
+    area = 0.0
+    n = len(ring)
+    for i in range(n):
+        x0, y0 = ring[i]
+        x1, y1 = ring[(i + 1) % n]
+        area += x0 * y1 - x1 * y0
+    return area / 2.0
+
+# Area of a polygon; exterior rings and holes are expected to run in opposite directions
+def polygonArea(rings):
+    return abs(sum(ringSignedArea(ring) for ring in rings))
+
+# Length of a path or of every path in a line
+def pathLength(path):
+    length = 0.0
+    for i in range(1, len(path)):
+        length += math.hypot(path[i][0] - path[i - 1][0], path[i][1] - path[i - 1][1])
+    return length
+
+def lineLength(paths):
+    return sum(pathLength(path) for path in paths)
+
+# Bounding box (xmin, ymin, xmax, ymax) of a list of rings/paths
+def bbox(parts):
+    xs = [pt[0] for part in parts for pt in part]
+    ys = [pt[1] for part in parts for pt in part]
+    return (min(xs), min(ys), max(xs), max(ys))
+
+def bboxIntersects(a, b):
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+#-------------------------------------------------------------------------------
+# Point tests
+
+# Even-odd point in ring test
+def pointInRing(x, y, ring):
+    inside = False
+    n = len(ring)
+    j = n - 1
+    for i in range(n):
+        xi, yi = ring[i]
+        xj, yj = ring[j]
+        if (yi > y) != (yj > y) and x < (xj - xi) * (y - yi) / (yj - yi) + xi:
+            inside = not inside
+        j = i
+    return inside
+
+# Even-odd over all rings, so holes are handled without knowing ring orientation
+def pointInPolygon(x, y, rings):
+    inside = False
+    for ring in rings:
+        if pointInRing(x, y, ring):
+            inside = not inside
+    return inside
+
+#-------------------------------------------------------------------------------
+# arcpy geometries
+
+# Rings (or paths) of an arcpy Polygon/Polyline as lists of (x, y) tuples. Each part is an exterior ring followed
+# by its holes, separated by None; empty rings are dropped
+def shapeParts(shape):
+    rings = []
+    for part in shape:
+        ring = []
+        for pt in part:
+            if pt is None:
+                rings.append(ring)
+                ring = []
+            else:
+                ring.append((pt.X, pt.Y))
+        rings.append(ring)
+    return [ring for ring in rings if ring]
+
+#-------------------------------------------------------------------------------
+# NAD 1983 geographic <-> NAD 1983 UTM Zone 11N (WKID 26911), GRS 1980 ellipsoid
+# Snyder (1987) transverse Mercator series; accurate to a few centimeters within Nevada
+
+GRS80_A = 6378137.0
+GRS80_F = 1 / 298.257222101
+UTM_K0 = 0.9996
+UTM_FALSE_EASTING = 500000.0
+
+def _utmConstants():
+    e2 = GRS80_F * (2 - GRS80_F)
+    ep2 = e2 / (1 - e2)
+    return e2, ep2
+
+def _meridianArc(phi, e2):
+    e4 = e2 * e2
+    e6 = e4 * e2
+    return GRS80_A * ((1 - e2 / 4 - 3 * e4 / 64 - 5 * e6 / 256) * phi
+                      - (3 * e2 / 8 + 3 * e4 / 32 + 45 * e6 / 1024) * math.sin(2 * phi)
+                      + (15 * e4 / 256 + 45 * e6 / 1024) * math.sin(4 * phi)
+                      - (35 * e6 / 3072) * math.sin(6 * phi))
+
+def latLonToUtm(lat, lon, zone=11):
+    e2, ep2 = _utmConstants()
+    phi = math.radians(lat)
+    lon0 = math.radians(-183 + 6 * zone)
+    n = GRS80_A / math.sqrt(1 - e2 * math.sin(phi) ** 2)
+    t = math.tan(phi) ** 2
+    c = ep2 * math.cos(phi) ** 2
+    a = math.cos(phi) * (math.radians(lon) - lon0)
+    m = _meridianArc(phi, e2)
+    x = UTM_K0 * n * (a + (1 - t + c) * a ** 3 / 6 + (5 - 18 * t + t * t + 72 * c - 58 * ep2) * a ** 5 / 120)
+    y = UTM_K0 * (m + n * math.tan(phi) * (a * a / 2 + (5 - t + 9 * c + 4 * c * c) * a ** 4 / 24
+                                           + (61 - 58 * t + t * t + 600 * c - 330 * ep2) * a ** 6 / 720))
+    return (x + UTM_FALSE_EASTING, y)
+
+def utmToLatLon(x, y, zone=11):
+    e2, ep2 = _utmConstants()
+    e1 = (1 - math.sqrt(1 - e2)) / (1 + math.sqrt(1 - e2))
+    m = y / UTM_K0
+    mu = m / (GRS80_A * (1 - e2 / 4 - 3 * e2 ** 2 / 64 - 5 * e2 ** 3 / 256))
+    phi1 = (mu + (3 * e1 / 2 - 27 * e1 ** 3 / 32) * math.sin(2 * mu)
+            + (21 * e1 ** 2 / 16 - 55 * e1 ** 4 / 32) * math.sin(4 * mu)
+            + (151 * e1 ** 3 / 96) * math.sin(6 * mu)
+            + (1097 * e1 ** 4 / 512) * math.sin(8 * mu))
+    n1 = GRS80_A / math.sqrt(1 - e2 * math.sin(phi1) ** 2)
+    t1 = math.tan(phi1) ** 2
+    c1 = ep2 * math.cos(phi1) ** 2
+    r1 = GRS80_A * (1 - e2) / (1 - e2 * math.sin(phi1) ** 2) ** 1.5
+    d = (x - UTM_FALSE_EASTING) / (n1 * UTM_K0)
+    lat = phi1 - (n1 * math.tan(phi1) / r1) * (d * d / 2 - (5 + 3 * t1 + 10 * c1 - 4 * c1 * c1 - 9 * ep2) * d ** 4 / 24
+                                               + (61 + 90 * t1 + 298 * c1 + 45 * t1 * t1 - 252 * ep2 - 3 * c1 * c1) * d ** 6 / 720)
+    lon = (d - (1 + 2 * t1 + c1) * d ** 3 / 6 + (5 - 2 * c1 + 28 * t1 - 3 * c1 * c1 + 8 * ep2 + 24 * t1 * t1) * d ** 5 / 120) / math.cos(phi1)
+    return (math.degrees(lat), -183 + 6 * zone + math.degrees(lon))
+
+#-------------------------------------------------------------------------------
+# Simple uniform grid index for bounding box lookups
+
+class GridIndex(object):
+
+    def __init__(self, cell_size):
+        self.cell_size = float(cell_size)
+        self.cells = {}
+
+    def _cellRange(self, box):
+        c0 = int(math.floor(box[0] / self.cell_size))
+        r0 = int(math.floor(box[1] / self.cell_size))
+        c1 = int(math.floor(box[2] / self.cell_size))
+        r1 = int(math.floor(box[3] / self.cell_size))
+        for r in range(r0, r1 + 1):
+            for c in range(c0, c1 + 1):
+                yield (r, c)
+
+    def insert(self, item, box):
+        for key in self._cellRange(box):
+            self.cells.setdefault(key, []).append((item, box))
+
+    # Return every item whose box intersects the query box (each item once)
+    def query(self, box):
+        found = []
+        seen = set()
+        for key in self._cellRange(box):
+            for item, item_box in self.cells.get(key, ()):
+                if item not in seen and bboxIntersects(box, item_box):
+                    seen.add(item)
+                    found.append(item)
+        return found
+
+# END
@@ -0,0 +1,435 @@
+#-------------------------------------------------------------------------------
+# Name:        NV iGDE Database - Grid-snapped integer geometry
+# Purpose:     Exact geometry for raster-derived polygons. TNC and LANDFIRE phreatophyte polygons come from rasters
+#              with a known cell size (RES_METERS) and origin, so every vertex lies on the cell grid. Here those
+#              polygons are stored as runs of cell indices (row, first column, column after the last) plus the
+#              grid origin and cell size. Union (dissolve), intersection, difference (erase) and area on layers of
+#              the same grid are integer sweeps over the runs: no floating point robustness checks and no slivers
+#              from overlaying polygons whose vertices were written at different precisions.
+# Modules: numpy; GDE_Geometry_clean; GDE_Schema_clean
+#
+# Usage:       grid = Grid(x0, y0, 30.0)
+#              lf = GridRegion.fromRings(grid, rings)          # or GridRegion.fromRaster(grid, array == code)
+#              gde = GridRegion.union([lf, tnc_region])        # dissolve
+#              lf_only = lf.difference(tnc_cover)              # erase
+#              lf_only.area(), lf_only.toPolygons()
+#
+# Author:      sarah.byer
+#
+# Created:     October 2026
+# Copyright:   (c) sarah.byer 2026
+#-------------------------------------------------------------------------------
+
+import numpy as np
+
+from GDE_Geometry_clean import bbox, pointInRing, ringSignedArea, shapeParts
+from GDE_Schema_clean import FIELD_TYPES
+
+# Largest distance (in cells) a vertex may be from a grid corner and still be snapped to it
+SNAP_TOLERANCE = 1e-6
+
+#-------------------------------------------------------------------------------
+# Grid
+
+class Grid(object):
+
+    # x0, y0: a cell corner (e.g. the lower left corner of the raster); cell: cell size in meters
+    def __init__(self, x0, y0, cell):
+        self.x0 = float(x0)
+        self.y0 = float(y0)
+        self.cell = float(cell)
+
+    def __repr__(self):
+        return "Grid({}, {}, {})".format(self.x0, self.y0, self.cell)
+
+    def __eq__(self, other):
+        return isinstance(other, Grid) and (self.x0, self.y0, self.cell) == (other.x0, other.y0, other.cell)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((self.x0, self.y0, self.cell))
+
+    # Grid of a raster from its upper left corner, as stored with the synthetic rasters and by arcpy.Raster.extent
+    @classmethod
+    def fromRaster(cls, x_left, y_top, cell, nrows):
+        return cls(x_left, y_top - nrows * cell, cell)
+
+    # Integer corner indices of world coordinates; raises if a vertex is off the grid
+    def snap(self, xs, ys):
+        fx = (np.asarray(xs, dtype=np.float64) - self.x0) / self.cell
+        fy = (np.asarray(ys, dtype=np.float64) - self.y0) / self.cell
+        ix, iy = np.rint(fx), np.rint(fy)
+        off = max(np.max(np.abs(fx - ix), initial=0.0), np.max(np.abs(fy - iy), initial=0.0))
+        if off > SNAP_TOLERANCE:
+            raise ValueError("Vertices are {:.3g} cells off {}".format(off, self))
+        return ix.astype(np.int64), iy.astype(np.int64)
+
+    def toWorld(self, col, row):
+        return (self.x0 + col * self.cell, self.y0 + row * self.cell)
+
+    # Scale factor that maps this grid's cells onto the finer grid other, or None if they do not nest
+    def nestsIn(self, other):
+        ratio = self.cell / other.cell
+        factor = int(round(ratio))
+        if factor < 1 or abs(ratio - factor) > SNAP_TOLERANCE:
+            return None
+        dx = (self.x0 - other.x0) / other.cell
+        dy = (self.y0 - other.y0) / other.cell
+        if abs(dx - round(dx)) > SNAP_TOLERANCE or abs(dy - round(dy)) > SNAP_TOLERANCE:
+            return None
+        return factor, int(round(dx)), int(round(dy))
+
+#-------------------------------------------------------------------------------
+# Run sweeps
+
+def _emptyRuns():
+    return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+# Sweep the runs of several regions at once. counts_to_keep gets a (regions, positions) array of how many runs
+# of each region cover the span after each position and returns which spans are kept; kept spans are
+# merged into normalized runs (sorted, non-overlapping, non-touching within a row).
+def _sweep(run_sets, counts_to_keep):
+    rows, cols, deltas, owners = [], [], [], []
+    for k, (r, c0, c1) in enumerate(run_sets):
+        rows.extend((r, r))
+        cols.extend((c0, c1))
+        deltas.extend((np.ones(len(r), dtype=np.int64), -np.ones(len(r), dtype=np.int64)))
+        owners.extend((np.full(len(r), k), np.full(len(r), k)))
+    rows = np.concatenate(rows)
+    if not len(rows):
+        return _emptyRuns()
+    cols, deltas, owners = np.concatenate(cols), np.concatenate(deltas), np.concatenate(owners)
+    order = np.lexsort((cols, rows))
+    rows, cols, deltas, owners = rows[order], cols[order], deltas[order], owners[order]
+
+    # One entry per distinct (row, col) position with the net change of every region there
+    new = np.ones(len(rows), dtype=bool)
+    new[1:] = (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])
+    first = np.flatnonzero(new)
+    group = np.cumsum(new) - 1
+    change = np.zeros((len(run_sets), len(first)), dtype=np.int64)
+    np.add.at(change, (owners, group), deltas)
+    # Every region's runs open and close within a row, so running totals are back to 0 at the end of each row
+    inside = counts_to_keep(np.cumsum(change, axis=1))
+    before = np.concatenate(([False], inside[:-1]))
+    starts = np.flatnonzero(inside & ~before)
+    stops = np.flatnonzero(~inside & before)
+    prow, pcol = rows[first], cols[first]
+    return prow[starts], pcol[starts], pcol[stops]
+
+#-------------------------------------------------------------------------------
+# Regions
+
+class GridRegion(object):
+
+    # rows, starts, stops: int64 arrays of runs; row r covers cells starts..stops-1 between y0 + r*cell and
+    # y0 + (r+1)*cell. Runs are kept normalized (sorted by row and start, non-overlapping, non-touching).
+    def __init__(self, grid, rows, starts, stops, normalized=False):
+        self.grid = grid
+        rows, starts, stops = (np.asarray(a, dtype=np.int64) for a in (rows, starts, stops))
+        if not normalized:
+            rows, starts, stops = _sweep([(rows, starts, stops)], lambda counts: counts[0] > 0)
+        self.rows, self.starts, self.stops = rows, starts, stops
+
+    def __repr__(self):
+        return "GridRegion({}, {} runs, {} cells)".format(self.grid, len(self.rows), self.cellCount())
+
+    def __eq__(self, other):
+        return (self.grid == other.grid and np.array_equal(self.rows, other.rows)
+                and np.array_equal(self.starts, other.starts) and np.array_equal(self.stops, other.stops))
+
+    def __ne__(self, other):
+        return not self == other
+
+    def isEmpty(self):
+        return len(self.rows) == 0
+
+    def cellCount(self):
+        return int(np.sum(self.stops - self.starts))
+
+    # Exact area in square meters (cell count times cell area)
+    def area(self):
+        return self.cellCount() * self.grid.cell * self.grid.cell
+
+    # (xmin, ymin, xmax, ymax) in world coordinates
+    def bbox(self):
+        if self.isEmpty():
+            return None
+        x0, y0 = self.grid.toWorld(int(self.starts.min()), int(self.rows.min()))
+        x1, y1 = self.grid.toWorld(int(self.stops.max()), int(self.rows.max()) + 1)
+        return (x0, y0, x1, y1)
+
+    #---------------------------------------------------------------------------
+    # Building regions
+
+    @classmethod
+    def empty(cls, grid):
+        r, c0, c1 = _emptyRuns()
+        return cls(grid, r, c0, c1, normalized=True)
+
+    # Cells whose centers fall inside the rings (even-odd, so holes need no particular orientation).
+    # Raster-derived rings have every vertex on a cell corner; snapping raises otherwise.
+    @classmethod
+    def fromRings(cls, grid, rings):
+        rows_all, cols_all = [], []
+        for ring in rings:
+            if len(ring) < 3:
+                continue
+            xs, ys = grid.snap([pt[0] for pt in ring], [pt[1] for pt in ring])
+            if xs[0] != xs[-1] or ys[0] != ys[-1]:
+                xs, ys = np.append(xs, xs[0]), np.append(ys, ys[0])
+            ax, ay, bx, by = xs[:-1], ys[:-1], xs[1:], ys[1:]
+            keep = ay != by
+            ax, ay, bx, by = ax[keep], ay[keep], bx[keep], by[keep]
+            lo, hi = np.minimum(ay, by), np.maximum(ay, by)
+            # Each edge crosses the centers of rows lo..hi-1
+            n = hi - lo
+            edge = np.repeat(np.arange(len(lo)), n)
+            row = lo[edge] + (np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n))
+            # Column of the first cell whose center is right of the crossing (exact for vertical edges)
+            xc = ax[edge] + (row + 0.5 - ay[edge]) * (bx[edge] - ax[edge]) / (by[edge] - ay[edge]).astype(np.float64)
+            rows_all.append(row)
+            cols_all.append(np.ceil(xc - 0.5).astype(np.int64))
+        if not rows_all:
+            return cls.empty(grid)
+        rows, cols = np.concatenate(rows_all), np.concatenate(cols_all)
+        order = np.lexsort((cols, rows))
+        rows, cols = rows[order], cols[order]
+        # Crossings pair up within each row: inside between the 1st and 2nd, 3rd and 4th...
+        starts, stops = cols[0::2], cols[1::2]
+        runs = stops > starts
+        return cls(grid, rows[0::2][runs], starts[runs], stops[runs])
+
+    # Cells of a boolean raster array (row 0 at the top, as rasters are stored) on grid
+    @classmethod
+    def fromRaster(cls, grid, mask):
+        mask = np.asarray(mask, dtype=bool)
+        nrows, ncols = mask.shape
+        padded = np.zeros((nrows, ncols + 2), dtype=np.int8)
+        padded[:, 1:-1] = mask
+        edges = np.diff(padded, axis=1)
+        srow, scol = np.nonzero(edges == 1)
+        erow, ecol = np.nonzero(edges == -1)
+        # Raster rows count down from the top; grid rows count up from y0
+        return cls(grid, nrows - 1 - srow, scol, ecol)
+
+    # The same cells on a finer grid that this grid nests in (e.g. 30 m LANDFIRE onto a 10 m TNC grid)
+    def onGrid(self, grid):
+        if grid == self.grid:
+            return self
+        nest = self.grid.nestsIn(grid)
+        if nest is None:
+            raise ValueError("{} does not nest in {}".format(self.grid, grid))
+        factor, dx, dy = nest
+        n = len(self.rows)
+        rows = (np.repeat(self.rows * factor + dy, factor) + np.tile(np.arange(factor), n))
+        return GridRegion(grid, rows, np.repeat(self.starts * factor + dx, factor),
+                          np.repeat(self.stops * factor + dx, factor))
+
+    #---------------------------------------------------------------------------
+    # Overlay
+
+    def _common(self, others):
+        grid = self.grid
+        for other in others:
+            if other.grid != grid and other.grid.cell < grid.cell:
+                grid = other.grid
+        return grid, [r.onGrid(grid) for r in [self] + list(others)]
+
+    # Dissolve any number of regions into one
+    @staticmethod
+    def union(regions):
+        regions = list(regions)
+        if not regions:
+            raise ValueError("union needs at least one region")
+        grid, regions = regions[0]._common(regions[1:])
+        runs = (np.concatenate([r.rows for r in regions]), np.concatenate([r.starts for r in regions]),
+                np.concatenate([r.stops for r in regions]))
+        return GridRegion(grid, *runs)
+
+    def intersection(self, other):
+        grid, (a, b) = self._common([other])
+        runs = _sweep([(a.rows, a.starts, a.stops), (b.rows, b.starts, b.stops)],
+                      lambda counts: (counts[0] > 0) & (counts[1] > 0))
+        return GridRegion(grid, *runs, normalized=True)
+
+    # Erase other from this region
+    def difference(self, other):
+        grid, (a, b) = self._common([other])
+        runs = _sweep([(a.rows, a.starts, a.stops), (b.rows, b.starts, b.stops)],
+                      lambda counts: (counts[0] > 0) & (counts[1] == 0))
+        return GridRegion(grid, *runs, normalized=True)
+
+    # Part of the region inside a window of cells (cols c0..c1-1, rows r0..r1-1)
+    def clipCells(self, c0, r0, c1, r1):
+        keep = (self.rows >= r0) & (self.rows < r1) & (self.stops > c0) & (self.starts < c1)
+        return GridRegion(self.grid, self.rows[keep], np.maximum(self.starts[keep], c0),
+                          np.minimum(self.stops[keep], c1), normalized=True)
+
+    #---------------------------------------------------------------------------
+    # Back to polygons
+
+    # Boundary rings in grid corner coordinates, exterior rings clockwise and holes counterclockwise
+    # (the Esri convention), with only the corners of each ring kept
+    def cornerRings(self):
+        by_row = {}
+        for r, c0, c1 in zip(self.rows.tolist(), self.starts.tolist(), self.stops.tolist()):
+            by_row.setdefault(r, []).append((c0, c1))
+
+        # Directed boundary edges with the region on their right
+        edges = {}
+        def add(a, b):
+            edges.setdefault(a, []).append(b)
+        for r, runs in by_row.items():
+            for c0, c1 in runs:
+                add((c0, r), (c0, r + 1)) # left side, going up
+                add((c1, r + 1), (c1, r)) # right side, going down
+            for c0, c1 in _subtract(runs, by_row.get(r + 1, [])):
+                add((c0, r + 1), (c1, r + 1)) # top, going right
+            for c0, c1 in _subtract(runs, by_row.get(r - 1, [])):
+                add((c1, r), (c0, r)) # bottom, going left
+
+        rings = []
+        while edges:
+            start = next(iter(edges))
+            ring = [start]
+            prev = start
+            cur = _takeEdge(edges, start, None)
+            while cur != start:
+                ring.append(cur)
+                nxt = _takeEdge(edges, cur, (cur[0] - prev[0], cur[1] - prev[1]))
+                prev, cur = cur, nxt
+            ring.append(start)
+            rings.append(_corners(ring))
+        return rings
+
+    # Polygons (lists of world coordinate rings, each exterior followed by its holes)
+    def toPolygons(self):
+        rings = self.cornerRings()
+        exteriors = [ring for ring in rings if ringSignedArea(ring) < 0]
+        holes = [ring for ring in rings if ringSignedArea(ring) > 0]
+        polygons = [[ring] for ring in exteriors]
+        areas = [abs(ringSignedArea(ring)) for ring in exteriors]
+        boxes = [bbox([ring]) for ring in exteriors]
+        for hole in holes:
+            # A point just inside the region next to the hole's first edge (the region is on the edge's right)
+            (ax, ay), (bx, by) = hole[0], hole[1]
+            dx, dy = (bx > ax) - (bx < ax), (by > ay) - (by < ay)
+            px, py = (ax + bx) / 2.0 + dy * 0.25, (ay + by) / 2.0 - dx * 0.25
+            owners = [i for i, ring in enumerate(exteriors)
+                      if boxes[i][0] < px < boxes[i][2] and boxes[i][1] < py < boxes[i][3] and pointInRing(px, py, ring)]
+            if owners:
+                polygons[min(owners, key=lambda i: areas[i])].append(hole)
+        grid = self.grid
+        return [[[grid.toWorld(c, r) for c, r in ring] for ring in polygon] for polygon in polygons]
+
+# Parts of sorted runs a not covered by sorted runs b
+def _subtract(a, b):
+    out = []
+    j = 0
+    for c0, c1 in a:
+        start = c0
+        while j < len(b) and b[j][1] <= start:
+            j += 1
+        k = j
+        while k < len(b) and b[k][0] < c1:
+            if b[k][0] > start:
+                out.append((start, b[k][0]))
+            start = max(start, b[k][1])
+            k += 1
+        if start < c1:
+            out.append((start, c1))
+    return out
+
+# Follow the boundary out of point; where two cells only touch at a corner, turn right so each ring stays
+# on its own cells (rings may touch at that corner but never cross)
+def _takeEdge(edges, point, heading):
+    options = edges[point]
+    if len(options) > 1 and heading is not None:
+        right = (heading[1], -heading[0])
+        def rank(b):
+            d = ((b[0] > point[0]) - (b[0] < point[0]), (b[1] > point[1]) - (b[1] < point[1]))
+            return 0 if d == right else (1 if d == heading else 2)
+        options.sort(key=rank)
+    b = options.pop(0)
+    if not options:
+        del edges[point]
+    return b
+
+# Drop the points in the middle of straight runs of a closed ring
+def _corners(ring):
+    pts = ring[:-1]
+    n = len(pts)
+    out = []
+    for i in range(n):
+        a, b, c = pts[i - 1], pts[i], pts[(i + 1) % n]
+        if (b[0] - a[0]) * (c[1] - b[1]) != (b[1] - a[1]) * (c[0] - b[0]):
+            out.append(b)
+    out.append(out[0])
+    return out
+
+#-------------------------------------------------------------------------------
+# Dissolving layers
+
+# Regions held per key before they are merged into one
+UNION_BATCH = 256
+
+# Dissolve raster-derived features (dicts with "SHAPE") by fields: {(values...): GridRegion}. features may be
+# a generator; each key keeps its merged region plus at most UNION_BATCH pending ones, so memory follows the
+# dissolved output rather than the input.
+def dissolveByFields(grid, features, fields, batch=UNION_BATCH):
+    groups = {}
+    for feature in features:
+        key = tuple(feature[f] for f in fields)
+        pending = groups.setdefault(key, [])
+        pending.append(GridRegion.fromRings(grid, feature["SHAPE"]))
+        if len(pending) > batch:
+            groups[key] = [GridRegion.union(pending)]
+    return dict((key, GridRegion.union(regions)) for key, regions in groups.items())
+
+# Dissolve_management(in_fc, out_fc, fields) for polygons on one raster's grid, done with exact cell runs.
+# Writes one multipart feature per combination of field values; raises ValueError if a vertex is off the grid.
+def gridDissolve(in_fc, out_fc, grid, fields, constants=None):
+    import arcpy, os
+    from GDE_SchemaBatch_clean import SchemaBatch
+    from GDE_Workspace_clean import constantFieldType
+    constants = constants or {}
+    if not os.path.dirname(str(out_fc)):
+        out_fc = os.path.join(arcpy.env.workspace, out_fc)
+    in_fields = dict((f.name.upper(), f) for f in arcpy.ListFields(in_fc))
+    fields = [in_fields[f.upper()].name for f in fields]
+    spatial_reference = arcpy.Describe(in_fc).spatialReference
+    def features(cursor):
+        for row in cursor:
+            if row[-1] is not None:
+                feature = dict(zip(fields, row[:-1]))
+                feature["SHAPE"] = shapeParts(row[-1])
+                yield feature
+    with arcpy.da.SearchCursor(in_fc, fields + ["SHAPE@"]) as cursor:
+        dissolved = dissolveByFields(grid, features(cursor), fields)
+
+    if arcpy.Exists(out_fc):
+        arcpy.Delete_management(out_fc)
+    arcpy.CreateFeatureclass_management(os.path.dirname(out_fc), os.path.basename(out_fc), "POLYGON",
+                                        spatial_reference=spatial_reference)
+    schema = SchemaBatch(out_fc)
+    for name in fields:
+        f = in_fields[name.upper()]
+        schema.add(name, FIELD_TYPES[f.type], length=f.length if f.type == "String" else None)
+    # Constant columns (e.g. the raster's SOURCECODE) are written with each row
+    constant_fields = sorted(constants)
+    for name in constant_fields:
+        schema.add(name, constantFieldType(constants[name]))
+    schema.apply()
+    constant_values = [constants[name] for name in constant_fields]
+    with arcpy.da.InsertCursor(out_fc, fields + constant_fields + ["SHAPE@"]) as cursor:
+        for key in sorted(dissolved, key=str):
+            rings = [ring for polygon in dissolved[key].toPolygons() for ring in polygon]
+            if rings:
+                parts = arcpy.Array([arcpy.Array([arcpy.Point(x, y) for x, y in ring]) for ring in rings])
+                cursor.insertRow(list(key) + constant_values + [arcpy.Polygon(parts, spatial_reference)])
+    return out_fc
+
+# END
@@ -8,11 +8,12 @@
 # Copyright:   (c) sarah.byer 2019
 #-------------------------------------------------------------------------------
 
-# Import ArcGIS modules and check out spatial analyst extension
+# Import ArcGIS modules
 import arcpy, os
 from arcpy import env
-from arcpy.sa import *
-arcpy.CheckOutExtension("spatial")
+
+from GDE_Loader_clean import bulkLoad
+from GDE_Workspace_clean import IntermediateWorkspace
 
 # Path to temporary geodatabase
 path =  r"K:\GIS3\Projects\GDE\Geospatial\Geodatabase_Layers\NV_GDE_Template_Temp.gdb"
@@ -22,6 +23,9 @@ env.workspace = path
 env.overwriteOutput = True
 env.outputCoordinateSystem = arcpy.SpatialReference(26911) # Spatial reference NAD 1983 UTM Zone 11N. The code is '26911'
 
+# Intermediate NHD waterbody copies and lookup joins (GDE_Workspace_clean.py)
+ws = IntermediateWorkspace()
+
 #-------------------------------------------------------------------------------
 #-------------------------------------------------------------------------------
 # Load NHD Waterbody Data and filter by FCode
@@ -34,7 +38,7 @@ fcodes = [36100, 39004, 39009, 39011] # Reservoirs/human-altered bodies included
 # Not including 39010 (perennial, stage = normal pool); only grabs 4 features, none of which look like perennial ponds/pools on imagery.
 
 # Create a copy of the waterbody dataset and filter Fcodes
-waterbody_copy = arcpy.CopyFeatures_management(waterbody, "nhd_waterbody_temp")
+waterbody_copy = arcpy.CopyFeatures_management(waterbody, ws.new("nhd_waterbody_temp"))
 with arcpy.da.UpdateCursor(waterbody_copy, ['FCode']) as cursor:
     for row in cursor:
         if row[0] not in fcodes:
@@ -50,8 +54,9 @@ arcpy.GetCount_management(all_bodies)
 
 # Clip to Nevada
 nv = r"K:\GIS3\States\NV\Nevada_83.shp"
-body_nv = arcpy.Clip_analysis(all_bodies, nv, "nhd_waterbody_gde_nv")
+body_nv = arcpy.Clip_analysis(all_bodies, nv, ws.new("nhd_waterbody_gde_nv"))
 arcpy.GetCount_management(body_nv)
+ws.release(all_bodies)
 
 
 # Calculate area in acres
@@ -71,40 +76,17 @@ gde_lake_playa = r"K:\GIS3\Projects\GDE\Geospatial\NV_iGDE_050919.gdb\Lakes_Play
 
 # Load lookup table for waterbody types, codes, descriptions
 waterbody_lut_file = r"K:\GIS3\Projects\GDE\Tables\NHD_Waterbody_lut.csv"
-waterbody_lut = arcpy.TableToTable_conversion(waterbody_lut_file, env.workspace, "nhd_waterbody_lut")
+waterbody_lut = arcpy.CopyRows_management(waterbody_lut_file, ws.new("nhd_waterbody_lut"))
 
 # Populate Type and Description fields using lookup table
 arcpy.JoinField_management(body_nv, "FCode", waterbody_lut, "FCode", ["Type", "Description"])
 [f.name for f in arcpy.ListFields(body_nv)]
+ws.release(waterbody_lut)
 
-# Define fields to map NHD data to GDE Feature Class
-def mapFields(inlayer, infield, mapfield_name, mapfield_alias, mapfield_type): # mapFields function
-    fldMap = arcpy.FieldMap()
-    fldMap.addInputField(inlayer, infield)
-    mapOut = fldMap.outputField
-    mapOut.name, mapOut.alias, mapOut.type = mapfield_name, mapfield_alias, mapfield_type
-    fldMap.outputField = mapOut
-    return fldMap
-fcode_map = mapFields(body_nv, "FCode", "BODY_CODE", "Waterbody Code", "LONG")
-ftype_map = mapFields(body_nv, "Type", "BODY_TYPE", "Waterbody Type", "TEXT")
-desc_map = mapFields(body_nv, "Description", "BODY_DESC", "Waterbody Description", "TEXT")
-name_map = mapFields(body_nv, "GNIS_Name", "BODY_NAME", "Waterbody Name", "TEXT")
-perm_id_map = mapFields(body_nv, "Permanent_Identifier", "PERM_ID", "Permanent Identifier", "TEXT")
-acre_map = mapFields(body_nv, "AREA_ACRES", "AREA_ACRES", "Area (acres)", "DOUBLE")
-fldMap_list = [fcode_map, ftype_map, desc_map, name_map, perm_id_map, acre_map]
-allFldMappings = arcpy.FieldMappings()
-for fm in fldMap_list:
-    allFldMappings.addFieldMap(fm)
-
-# Append NHD features to template feature class with field mappings
-waterbody_gde = arcpy.Append_management(body_nv, gde_lake_playa, "NO_TEST", allFldMappings)
-
-# Populate Source Codes - all codes = "nhdw"
+# Load NHD waterbodies into the template feature class; the mapping (GDE_Schema_clean.py) fills in
+# the source code as the rows are written
 # National Hydrography Dataset Waterbodies = "nhdw"
-with arcpy.da.UpdateCursor(waterbody_gde, ['SOURCE_CODE']) as cursor:
-    for row in cursor:
-        row[0] = "nhdw"
-        cursor.updateRow(row)
-del cursor
+bulkLoad(body_nv, gde_lake_playa, "Lakes_Playas", "nhdw")
+ws.release(body_nv)
 
 # END
\ No newline at end of file
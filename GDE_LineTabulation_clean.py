@@ -0,0 +1,194 @@
+#-------------------------------------------------------------------------------
+# Name:        NV iGDE Database - Line length tabulation
+# Purpose:     Length of lines (Rivers_Streams) inside each zone (hexagon or hydrographic area), computed in NumPy
+#              instead of Dissolve -> Intersect(..., "LINE") -> Dissolve -> CalculateGeometryAttributes.
+#              Lines are split into segments and zone boundaries into edges; a packed R-tree over the edges
+#              (GDE_Query_clean.py) finds the edges each segment may cross, the segments are cut at every crossing,
+#              and each piece is assigned to the zones holding its midpoint (even-odd rule, with the ray limited
+#              to the zone's box). Clipped lengths are summed per zone and line feature in one pass, so totals and
+#              breakdowns by any line attribute (RIVER_TYPE, RIVER_NAME) come from the same table. Segments digitized
+#              more than once (same end points, in either direction) count once, as after the Dissolve of the
+#              tool chain; the length goes to the first feature holding the segment.
+# Modules: numpy; GDE_GeometryStore_clean; GDE_Query_clean; arcpy (to read feature classes)
+#
+# Usage:       table = tabulateFeatureClass(rivers, gde_unit, "Hex_ID", ["RIVER_TYPE", "RIVER_NAME", "SOURCE_CODE"])
+#              miles = dict((unit, m / M_PER_MILE) for unit, m in table.byZone().items())
+#              by_type = table.byClass("RIVER_TYPE")      # {(unit, river type): meters}
+#
+# Author:      sarah.byer
+#
+# Created:     October 2026
+# Copyright:   (c) sarah.byer 2026
+#-------------------------------------------------------------------------------
+
+import numpy as np
+
+from GDE_GeometryStore_clean import _ranges, readFeatureClass
+from GDE_Query_clean import PackedRTree
+
+BLOCK = 200000 # line segments processed together
+SMALL_ZONE = 64 # zones with up to this many edges (hexagons) are tested against all their edges, without the tree
+
+#-------------------------------------------------------------------------------
+# Segments and edges
+
+# Segments (x0, y0, x1, y1) of every path or ring of a store, with the feature each comes from.
+# closed=True adds the closing edge of rings whose last vertex is not their first.
+def storeSegments(store, closed=False):
+    coords, offsets = store.coords, store.ring_offsets
+    n = len(coords)
+    starts, stops = offsets[:-1], offsets[1:]
+    last = np.zeros(n, dtype=bool)
+    last[stops[stops > starts] - 1] = True
+    k = np.flatnonzero(~last[:-1]) if n > 1 else np.zeros(0, dtype=np.int64)
+    segs = np.column_stack((coords[k], coords[k + 1]))
+    ring = np.searchsorted(offsets, k, side="right") - 1
+    if closed:
+        filled = stops - starts > 2
+        first, end = starts[filled], stops[filled] - 1
+        open_ring = (coords[first] != coords[end]).any(axis=1)
+        if open_ring.any():
+            segs = np.vstack((segs, np.column_stack((coords[end[open_ring]], coords[first[open_ring]]))))
+            ring = np.concatenate((ring, np.flatnonzero(filled)[open_ring]))
+    feature = np.searchsorted(store.feature_offsets, ring, side="right") - 1
+    return segs, feature
+
+# Segments with the same end points (in either direction) reduced to their first occurrence
+def uniqueSegments(segs, seg_feature):
+    flip = (segs[:, 0] > segs[:, 2]) | ((segs[:, 0] == segs[:, 2]) & (segs[:, 1] > segs[:, 3]))
+    keys = np.where(flip[:, None], segs[:, [2, 3, 0, 1]], segs) + 0.0  # -0.0 -> 0.0
+    first = np.sort(np.unique(keys, axis=0, return_index=True)[1]) if len(segs) else np.zeros(0, dtype=np.int64)
+    return segs[first], seg_feature[first]
+
+def _boxes(segs):
+    return np.column_stack((np.minimum(segs[:, 0], segs[:, 2]), np.minimum(segs[:, 1], segs[:, 3]),
+                            np.maximum(segs[:, 0], segs[:, 2]), np.maximum(segs[:, 1], segs[:, 3])))
+
+#-------------------------------------------------------------------------------
+# Tabulation
+
+class LengthTable(object):
+
+    # Length (m) of line feature line_index[i] inside zone zone_index[i]
+    def __init__(self, zone_ids, line_attributes, zone_index, line_index, length):
+        self.zone_ids = zone_ids
+        self.line_attributes = line_attributes
+        self.zone_index = zone_index
+        self.line_index = line_index
+        self.length = length
+
+    def __len__(self):
+        return len(self.length)
+
+    # {zone id: meters}
+    def byZone(self):
+        totals = np.bincount(self.zone_index, weights=self.length, minlength=len(self.zone_ids))
+        return dict((_item(self.zone_ids[z]), totals[z]) for z in np.flatnonzero(totals))
+
+    # {(zone id, value of field): meters}
+    def byClass(self, field):
+        column = np.asarray(self.line_attributes[field])[self.line_index]
+        if column.dtype == object:
+            # Text columns may hold None, which np.unique cannot sort with strings
+            lookup = {}
+            codes = np.array([lookup.setdefault(v, len(lookup)) for v in column.tolist()], dtype=np.int64)
+            values = np.empty(len(lookup), dtype=object)
+            values[:] = list(lookup)
+        else:
+            values, codes = np.unique(column, return_inverse=True)
+        keys = self.zone_index * len(values) + codes.ravel()
+        cells, inverse = np.unique(keys, return_inverse=True)
+        sums = np.bincount(inverse.ravel(), weights=self.length)
+        return dict(((_item(self.zone_ids[c // len(values)]), _item(values[c % len(values)])), s)
+                    for c, s in zip(cells.tolist(), sums.tolist()))
+
+    # (zone id, line feature, {field: value}, 0.0, meters) for GDE_SummaryCube_clean.accumulate
+    def pieces(self):
+        fields = list(self.line_attributes)
+        for z, i, length in zip(self.zone_index.tolist(), self.line_index.tolist(), self.length.tolist()):
+            yield (_item(self.zone_ids[z]), i, dict((f, _item(self.line_attributes[f][i])) for f in fields), 0.0, length)
+
+def _item(value):
+    return value.item() if hasattr(value, "item") else value
+
+# Clip segments against every zone and return (zone, line feature, length) of each piece inside a zone
+def _clipBlock(segs, seg_feature, edges, edge_zone, edge_start, edge_count, edge_tree, zone_boxes, zone_tree):
+    x0, y0, x1, y1 = segs[:, 0], segs[:, 1], segs[:, 2], segs[:, 3]
+    rx, ry = x1 - x0, y1 - y0
+
+    # Crossings of segments with zone edges, as parameters t along the segment
+    s, e = edge_tree.queryMany(_boxes(segs))
+    qx, qy = edges[e, 2] - edges[e, 0], edges[e, 3] - edges[e, 1]
+    wx, wy = edges[e, 0] - x0[s], edges[e, 1] - y0[s]
+    denom = rx[s] * qy - ry[s] * qx
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = (wx * qy - wy * qx) / denom
+        u = (wx * ry[s] - wy * rx[s]) / denom
+    cut = (denom != 0) & (t > 0) & (t < 1) & (u >= 0) & (u <= 1)
+
+    # Pieces between consecutive cuts of each segment
+    n = len(segs)
+    piece_seg = np.concatenate((np.arange(n), np.arange(n), s[cut]))
+    piece_t = np.concatenate((np.zeros(n), np.ones(n), t[cut]))
+    order = np.lexsort((piece_t, piece_seg))
+    piece_seg, piece_t = piece_seg[order], piece_t[order]
+    same = piece_seg[1:] == piece_seg[:-1]
+    seg_id = piece_seg[:-1][same]
+    t0, t1 = piece_t[:-1][same], piece_t[1:][same]
+    keep = t1 > t0
+    seg_id, t0, t1 = seg_id[keep], t0[keep], t1[keep]
+    mid = (t0 + t1) / 2.0
+    mx, my = x0[seg_id] + rx[seg_id] * mid, y0[seg_id] + ry[seg_id] * mid
+    piece_length = np.hypot(rx[seg_id], ry[seg_id]) * (t1 - t0)
+
+    # Zones holding each piece's midpoint: candidates by box, then even-odd along a ray to the zone's right edge.
+    # Small zones test all their edges; large ones only the edges the ray's box meets.
+    pm, pz = zone_tree.queryMany(np.column_stack((mx, my, mx, my)))
+    small = np.flatnonzero(edge_count[pz] <= SMALL_ZONE)
+    large = np.flatnonzero(edge_count[pz] > SMALL_ZONE)
+    rays = np.column_stack((mx[pm[large]], my[pm[large]], zone_boxes[pz[large], 2], my[pm[large]]))
+    rp, re = edge_tree.queryMany(rays)
+    same_zone = edge_zone[re] == pz[large[rp]]
+    rp = np.concatenate((np.repeat(small, edge_count[pz[small]]), large[rp[same_zone]]))
+    re = np.concatenate((_ranges(edge_start[pz[small]], edge_count[pz[small]]), re[same_zone]))
+    ex0, ey0, ex1, ey1 = edges[re, 0], edges[re, 1], edges[re, 2], edges[re, 3]
+    px, py = mx[pm[rp]], my[pm[rp]]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        crosses = ((ey0 > py) != (ey1 > py)) & (px < ex0 + (py - ey0) * (ex1 - ex0) / (ey1 - ey0))
+    inside = np.bincount(rp[crosses], minlength=len(pm)) % 2 == 1
+    pm, pz = pm[inside], pz[inside]
+    return pz, seg_feature[seg_id[pm]], piece_length[pm]
+
+# Length of every line feature in every zone. lines and zones are GeometryStores (polyline, polygon);
+# zone_field names the zone id attribute.
+def tabulateLengths(lines, zones, zone_field, block=BLOCK):
+    segs, seg_feature = uniqueSegments(*storeSegments(lines))
+    edges, edge_zone = storeSegments(zones, closed=True)
+    order = np.argsort(edge_zone, kind="stable")
+    edges, edge_zone = edges[order], edge_zone[order]
+    edge_count = np.bincount(edge_zone, minlength=len(zones))
+    edge_start = np.concatenate(([0], np.cumsum(edge_count)[:-1]))
+    edge_tree = PackedRTree(_boxes(edges))
+    zone_boxes = np.nan_to_num(zones.bboxes, nan=0.0)
+    zone_tree = PackedRTree(zones.bboxes)
+    zone_parts, line_parts, length_parts = [], [], []
+    for start in range(0, len(segs), block):
+        z, f, length = _clipBlock(segs[start:start + block], seg_feature[start:start + block], edges, edge_zone,
+                                  edge_start, edge_count, edge_tree, zone_boxes, zone_tree)
+        zone_parts.append(z)
+        line_parts.append(f)
+        length_parts.append(length)
+
+    # One row per (zone, line feature)
+    zone_index = np.concatenate(zone_parts) if zone_parts else np.zeros(0, dtype=np.int64)
+    line_index = np.concatenate(line_parts) if line_parts else np.zeros(0, dtype=np.int64)
+    length = np.concatenate(length_parts) if length_parts else np.zeros(0)
+    keys, inverse = np.unique(zone_index * max(len(lines), 1) + line_index, return_inverse=True)
+    sums = np.bincount(inverse.ravel(), weights=length, minlength=len(keys))
+    return LengthTable(zones.attributes[zone_field], lines.attributes, keys // max(len(lines), 1),
+                       keys % max(len(lines), 1), sums)
+
+def tabulateFeatureClass(line_fc, zone_fc, zone_field, fields=()):
+    return tabulateLengths(readFeatureClass(line_fc, fields), readFeatureClass(zone_fc, [zone_field]), zone_field)
+
+# END
@@ -0,0 +1,147 @@
+#-------------------------------------------------------------------------------
+# Name:        NV iGDE Database - Query service load test
+# Purpose:     Measure requests per second and latency of the iGDE query service (GDE_Service_clean.py).
+#              A number of client threads send a mix of hydrographic area, hexagon, species and nearby requests
+#              for a fixed time. --synthetic starts a service on synthetic data (GDE_SyntheticData_clean.py) in
+#              this process, so the test runs on any machine.
+# Modules: argparse; json; random; threading; time; urllib; GDE_Service_clean; GDE_SyntheticData_clean
+#
+# Usage:       python GDE_LoadTest_clean.py --synthetic --clients 32 --seconds 10
+#              python GDE_LoadTest_clean.py --url http://localhost:8026 --clients 32 --seconds 20
+#
+# Author:      sarah.byer
+#
+# Created:     October 2026
+# Copyright:   (c) sarah.byer 2026
+#-------------------------------------------------------------------------------
+
+import argparse, json, random, threading, time
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import GDE_Service_clean as service
+
+#-------------------------------------------------------------------------------
+# Synthetic service
+
+# GDEService over synthetic hexagons, hydrographic areas, NNHP species and GDE layers
+def syntheticService(scale=0.01, cache_size=service.CACHE_SIZE):
+    import GDE_GeometryStore_clean as geometrystore
+    import GDE_StageEngines_clean as engines
+    import GDE_SyntheticData_clean as synthetic
+    from GDE_Query_clean import GDEIndex
+    data = synthetic.buildDataset(scale)
+    sites = data["springs"]["sites"]
+    hexagons = dict((str(row["Hex_ID"]), row) for row in engines.storyMapEngine(data["hexagons"], "Hex_ID", sites))
+    basins = dict((str(row["HYD_AREA"]), row) for row in engines.storyMapEngine(data["hydrobasins"], "HYD_AREA", sites))
+
+    # Species per hexagon from the NNHP points
+    hex_index = GDEIndex({"Hexagons": geometrystore.fromRecords(data["hexagons"], geometrystore.POLYGON, ["Hex_ID"])})
+    points = data["nnhp"]["points"]
+    q, ids, d = hex_index.searchMany([p["SHAPE"][0] for p in points], [p["SHAPE"][1] for p in points])["Hexagons"]
+    hex_ids = hex_index.stores["Hexagons"].attributes["Hex_ID"]
+    hex_species = {}
+    for k, i in zip(q.tolist(), ids.tolist()):
+        names = hex_species.setdefault(str(hex_ids[i]), {})
+        names[points[k]["SNAME"]] = points[k]["ENDEMISM"]
+    hex_species = dict((h, [{"SCI_NAME": n, "ENDEMISM": e} for n, e in sorted(names.items())])
+                       for h, names in hex_species.items())
+
+    index = GDEIndex({"Springs": geometrystore.fromRecords(sites, geometrystore.POINT, ["SPRING_ID"]),
+                      "Wetlands": geometrystore.fromRecords(data["wetlands"], geometrystore.POLYGON),
+                      "Rivers_Streams": geometrystore.fromRecords(data["flowlines"], geometrystore.POLYLINE)})
+    points = [site["SHAPE"] for site in sites]
+    return service.GDEService(hexagons, basins, hex_species, index, cache_size), points
+
+#-------------------------------------------------------------------------------
+# Load test
+
+# Request paths in the proportions partners use: mostly unit summaries, some species lists and nearby searches
+def requestPaths(hex_ids, basin_ids, points, count=2000, seed=26):
+    rng = random.Random(seed)
+    paths = []
+    for i in range(count):
+        kind = rng.random()
+        if kind < 0.4:
+            paths.append("/hexagon/{}".format(rng.choice(hex_ids)))
+        elif kind < 0.6:
+            paths.append("/hydroarea/{}".format(rng.choice(basin_ids)))
+        elif kind < 0.8 or not points:
+            paths.append("/hexagon/{}/species".format(rng.choice(hex_ids)))
+        else:
+            x, y = rng.choice(points)
+            paths.append("/nearby?x={:.0f}&y={:.0f}&radius={}".format(x + rng.uniform(-500, 500), y + rng.uniform(-500, 500),
+                                                                       rng.choice([500, 1000, 2000])))
+    return paths
+
+def _client(url, paths, stop_at, latencies, errors, seed):
+    rng = random.Random(seed)
+    while time.time() < stop_at:
+        start = time.time()
+        try:
+            with urlopen(url + rng.choice(paths)) as response:
+                response.read()
+        except HTTPError as e:
+            if e.code != 404:
+                errors.append(e.code)
+        except OSError as e:
+            errors.append(str(e))
+        latencies.append(time.time() - start)
+
+def loadTest(url, paths, clients=16, seconds=10.0):
+    latencies, errors = [], []
+    stop_at = time.time() + seconds
+    threads = [threading.Thread(target=_client, args=(url, paths, stop_at, latencies, errors, i)) for i in range(clients)]
+    start = time.time()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.time() - start
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000 if latencies else 0.0
+    return {"requests": len(latencies), "errors": len(errors), "seconds": round(elapsed, 2),
+            "requests_per_sec": round(len(latencies) / elapsed, 1),
+            "p50_ms": round(pct(0.50), 2), "p95_ms": round(pct(0.95), 2), "p99_ms": round(pct(0.99), 2)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the iGDE query service")
+    parser.add_argument("--url", help="Service to test, e.g. http://localhost:8026")
+    parser.add_argument("--synthetic", action="store_true", help="Start a service on synthetic data in this process")
+    parser.add_argument("--scale", type=float, default=0.01, help="Synthetic data scale")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--paths", type=int, default=2000, help="Distinct request paths (fewer means more cache hits)")
+    parser.add_argument("--workers", type=int, default=service.WORKERS, help="Service threads (--synthetic)")
+    parser.add_argument("--cache-size", type=int, default=service.CACHE_SIZE, help="Service cache (--synthetic)")
+    args = parser.parse_args()
+
+    server = None
+    if args.synthetic:
+        gde_service, points = syntheticService(args.scale, args.cache_size)
+        server = service.PooledHTTPServer(("localhost", 0), gde_service, args.workers)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = "http://localhost:{}".format(server.server_address[1])
+        hex_ids, basin_ids = sorted(gde_service.hexagons), sorted(gde_service.basins)
+    elif args.url:
+        url = args.url.rstrip("/")
+        # Request ids and points come from the same layers the service reads
+        gde_service = service.GDEService.fromDatabase()
+        hex_ids, basin_ids = sorted(gde_service.hexagons), sorted(gde_service.basins)
+        points = [(x, y) for x, y in gde_service.index.stores["Springs"].coords.tolist()] if gde_service.index else []
+    else:
+        parser.error("give --url or --synthetic")
+
+    paths = requestPaths(hex_ids, basin_ids, points, args.paths)
+    result = loadTest(url, paths, args.clients, args.seconds)
+    with urlopen(url + "/stats") as response:
+        result["cache"] = json.loads(response.read().decode("utf-8"))
+    print(json.dumps(result, indent=2))
+    if server:
+        server.shutdown()
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
+
+# END
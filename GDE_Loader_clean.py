@@ -0,0 +1,174 @@
+#-------------------------------------------------------------------------------
+# Name:        NV iGDE Database - Bulk loader
+# Purpose:     Load a source table/feature class into an iGDE template layer using the declarative mapping in
+#              GDE_Schema_clean.py. The mapping is compiled once into a single projection and cast (one generated
+#              function per source), constant columns such as SOURCE_CODE are filled in as the rows are written,
+#              and rows go straight into the target with one SearchCursor/InsertCursor pass. Replaces the
+#              mapFields()/FieldMappings/Append blocks and the SOURCE_CODE UpdateCursors that followed them.
+#              Source fields that are virtual constant columns of the input (IntermediateWorkspace.setConstants)
+#              are not read; their values are compiled into the projection like the mapping's own constants.
+#              Rows can be dropped on the way (exclude), so a source needing only row filtering is streamed
+#              straight from the original dataset in batches instead of being copied and cleaned first.
+# Modules: itertools; GDE_Schema_clean; arcpy (for reading and writing the layers)
+#
+# Usage:       from GDE_Loader_clean import bulkLoad
+#              bulkLoad(body_nv, gde_lake_playa, "Lakes_Playas", "nhdw")
+#              bulkLoad(ssi_copy, gde_springs, "Springs", "ssi", constants=ws.constants(ssi_copy))
+#              bulkLoad(epa_wetlands, gde_wetlands, "Wetlands", "driw", constants={"SOURCECODE": "driw"},
+#                       exclude={"WETLAND_TYPE": ["Lake"], "WETLAND_SUBTYPE": ["dry"]})
+#
+# Author:      sarah.byer
+#
+# Created:     October 2026
+# Copyright:   (c) sarah.byer 2026
+#-------------------------------------------------------------------------------
+
+import itertools
+
+from GDE_Schema_clean import LAYER_GEOMETRY, SOURCE_MAPPINGS, layerField
+
+BATCH_SIZE = 5000
+
+#-------------------------------------------------------------------------------
+# Casts to the iGDE field types (nulls stay null, like Append)
+
+def _text(value, length):
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        value = str(value)
+    return value[:length] if length else value
+
+def _int(value):
+    if value is None or value == "":
+        return None
+    if isinstance(value, int):
+        return value
+    return int(round(float(value)))
+
+def _float(value):
+    if value is None or value == "":
+        return None
+    return float(value)
+
+CASTS = {"TEXT": "_text", "LONG": "_int", "SHORT": "_int", "DOUBLE": "_float", "FLOAT": "_float"}
+
+def castValue(field, value):
+    cast = CASTS[field[1]]
+    if cast == "_text":
+        return _text(value, field[3] if len(field) > 3 else None)
+    return globals()[cast](value)
+
+#-------------------------------------------------------------------------------
+# Compiling a mapping
+
+class CompiledMapping(object):
+
+    # read_fields: source cursor fields; write_fields: target cursor fields;
+    # project: function from a source row (tuple) to a target row (tuple)
+    def __init__(self, layer, source, read_fields, write_fields, project, code):
+        self.layer = layer
+        self.source = source
+        self.read_fields = read_fields
+        self.write_fields = write_fields
+        self.project = project
+        self.code = code
+
+# Compile SOURCE_MAPPINGS[layer][source] (or an explicit mapping dict) into one generated function,
+# e.g. lambda r: (_text(r[0], 200), _int(r[1]), 'nhdw', r[2]) so each row costs a single call.
+# virtual: {source field: value} of constant columns the input has not written
+def compileMapping(layer, source, mapping=None, virtual=None):
+    if mapping is None:
+        mapping = SOURCE_MAPPINGS[layer][source]
+    virtual = virtual or {}
+    fields = [(infield, target) for infield, target in mapping.get("fields", []) if infield not in virtual]
+    constants = dict(mapping.get("constants", {}))
+    constants.update((target, virtual[infield]) for infield, target in mapping.get("fields", []) if infield in virtual)
+
+    targets = [target for infield, target in fields] + list(constants)
+    duplicates = set(t for t in targets if targets.count(t) > 1)
+    if duplicates:
+        raise ValueError("{} mapping for {} writes {} more than once".format(source, layer, ", ".join(sorted(duplicates))))
+
+    read_fields, write_fields, exprs = [], [], []
+    for i, (infield, target) in enumerate(fields):
+        field = layerField(layer, target)
+        read_fields.append(infield)
+        write_fields.append(target)
+        if field[1] == "TEXT":
+            exprs.append("_text(r[{}], {})".format(i, field[3] if len(field) > 3 else None))
+        else:
+            exprs.append("{}(r[{}])".format(CASTS[field[1]], i))
+    # Constants are cast once here and written as literals
+    for target, value in sorted(constants.items()):
+        write_fields.append(target)
+        exprs.append(repr(castValue(layerField(layer, target), value)))
+    if LAYER_GEOMETRY[layer]:
+        exprs.append("r[{}]".format(len(read_fields)))
+        read_fields.append("SHAPE@")
+        write_fields.append("SHAPE@")
+
+    code = "lambda r: ({},)".format(", ".join(exprs))
+    project = eval(code, {"_text": _text, "_int": _int, "_float": _float})
+    return CompiledMapping(layer, source, read_fields, write_fields, project, code)
+
+#-------------------------------------------------------------------------------
+# Loading with arcpy
+
+# Source fields the mapping reads that the input does not have
+def missingFields(in_table, compiled, extra=()):
+    import arcpy
+    names = set(f.name.upper() for f in arcpy.ListFields(in_table))
+    return [f for f in list(compiled.read_fields) + list(extra) if f != "SHAPE@" and f.upper() not in names]
+
+# Source rows without the ones whose field holds an excluded value (nulls are kept, like the UpdateCursor
+# deletes this replaces). exclude: {source field: values}; read_fields: the fields of each row
+def excludeRows(rows, read_fields, exclude):
+    tests = [(read_fields.index(field), frozenset(values)) for field, values in sorted(exclude.items())]
+    for row in rows:
+        for i, values in tests:
+            if row[i] in values:
+                break
+        else:
+            yield row
+
+# Write already-read source rows through a compiled mapping in batches; returns the number of rows written
+def insertRows(rows, target, compiled, batch_size=BATCH_SIZE):
+    import arcpy
+    project = compiled.project
+    count = 0
+    rows = iter(rows)
+    with arcpy.da.InsertCursor(target, compiled.write_fields) as cursor:
+        insert = cursor.insertRow
+        while True:
+            batch = list(map(project, itertools.islice(rows, batch_size)))
+            if not batch:
+                break
+            for row in batch:
+                insert(row)
+            count += len(batch)
+            print("{} rows loaded into {}".format(count, compiled.layer))
+    return count
+
+# Load in_table into the iGDE layer target using the mapping for (layer, source).
+# constants: {source field: value} of in_table's virtual constant columns (or of values to write for every row);
+# exclude: {source field: values} of rows to leave out. Rows stream from the SearchCursor through the filter
+# and the projection into the InsertCursor, batch_size at a time.
+def bulkLoad(in_table, target, layer, source, where=None, batch_size=BATCH_SIZE, mapping=None, constants=None,
+             exclude=None):
+    import arcpy
+    compiled = compileMapping(layer, source, mapping, constants)
+    # Filter fields the mapping does not read go after SHAPE@, where the projection ignores them
+    read_fields = list(compiled.read_fields)
+    read_fields += sorted(f for f in (exclude or {}) if f not in read_fields)
+    missing = missingFields(in_table, compiled, read_fields[len(compiled.read_fields):])
+    if missing:
+        raise ValueError("{} is missing fields for the {} {} mapping: {}".format(in_table, layer, source, ", ".join(missing)))
+    # Read geometry in the target's spatial reference so the insert does not reproject row by row
+    spatial_reference = arcpy.Describe(target).spatialReference if LAYER_GEOMETRY[layer] else None
+    with arcpy.da.SearchCursor(in_table, read_fields, where, spatial_reference) as rows:
+        if exclude:
+            rows = excludeRows(rows, read_fields, exclude)
+        return insertRows(rows, target, compiled, batch_size)
+
+# END
@@ -0,0 +1,324 @@
+#-------------------------------------------------------------------------------
+# Name:        NV iGDE Database - Raster mosaic of the TNC study areas
+# Purpose:     Resolve overlaps between TNC study areas on the raster grid instead of with vector erases. Every BpS
+#              raster is placed on a common snap grid (the finest raster's grid unless a cell size is given) and
+#              overlapping cells are settled in one pass by a precedence rule: the finer RES_METERS wins, or an
+#              explicit order of source codes. The result is one raster of BpS (or GDE) codes and one raster of
+#              the source of every cell (1..n into the list of source codes, 0 where no raster covers the cell).
+#              The grid is processed in blocks and blocks no raster touches are skipped. Rasters opened with
+#              openRaster() are read a band of rows at a time, so the statewide extent of the study areas is never
+#              held in memory at once.
+# Modules: math; os; numpy; GDE_Geometry_clean (acres); arcpy (for reading and writing rasters)
+#
+# Usage:       mosaic = Mosaic(rasters)                            # raster dicts as in GDE_SyntheticData_clean.py
+#              mosaic = Mosaic(rasters, precedence=["nvtnc11", "nvtnc4"], keep_codes=gde_codes)
+#              for r0, c0, classes, sources in mosaic.blocks(): ...
+#              mosaicRasters(tnc_rasters, tncSourceCodes, path + "\\TNC_BpS_Mosaic", path + "\\TNC_Source_Mosaic",
+#                            precedence=["nvtnc5", "nvtnc11"], code_fixes={"nvtnc7": {11550: 11551}})
+#
+# Author:      sarah.byer
+#
+# Created:     October 2026
+# Copyright:   (c) sarah.byer 2026
+#-------------------------------------------------------------------------------
+
+import math, os
+
+import numpy as np
+
+from GDE_Geometry_clean import SQM_PER_ACRE
+
+NODATA = -9999
+SOURCE_NODATA = 0
+BLOCK = 2048
+
+# Raster attribute fields that hold the BpS code, in the order they are looked for
+VALUE_FIELDS = ["SYS_CODE", "BSYS_CODE", "BSYSCODE"]
+
+#-------------------------------------------------------------------------------
+# Common grid
+
+class MosaicGrid(object):
+
+    # x0, y0: upper left corner (like the raster dicts and arcpy extents); cell: cell size in meters
+    def __init__(self, x0, y0, cell, nrows, ncols):
+        self.x0 = float(x0)
+        self.y0 = float(y0)
+        self.cell = float(cell)
+        self.nrows = int(nrows)
+        self.ncols = int(ncols)
+
+    def __repr__(self):
+        return "MosaicGrid({}, {}, {}, {}x{})".format(self.x0, self.y0, self.cell, self.nrows, self.ncols)
+
+    # Grid of a raster dict itself
+    @classmethod
+    def ofRaster(cls, raster):
+        nrows, ncols = rasterShape(raster)
+        return cls(raster["x0"], raster["y0"], raster["cell"], nrows, ncols)
+
+    # Grid snapped to the snap raster (the finest one unless given) that covers every raster
+    @classmethod
+    def covering(cls, rasters, cell=None, snap=None):
+        if snap is None:
+            snap = min(rasters, key=lambda r: r["cell"])
+        cell = float(cell or snap["cell"])
+        left = min(r["x0"] for r in rasters)
+        top = max(r["y0"] for r in rasters)
+        right = max(r["x0"] + rasterShape(r)[1] * r["cell"] for r in rasters)
+        bottom = min(r["y0"] - rasterShape(r)[0] * r["cell"] for r in rasters)
+        x0 = snap["x0"] + math.floor((left - snap["x0"]) / cell + 1e-9) * cell
+        y0 = snap["y0"] + math.ceil((top - snap["y0"]) / cell - 1e-9) * cell
+        ncols = int(math.ceil((right - x0) / cell - 1e-9))
+        nrows = int(math.ceil((y0 - bottom) / cell - 1e-9))
+        return cls(x0, y0, cell, nrows, ncols)
+
+    # Rows and columns of a raster sampled at this grid's cell centers, for the grid cells [r0, r1) x [c0, c1):
+    # (grid rows, grid cols, raster rows, raster cols) of the cells whose centers fall inside the raster
+    def sampling(self, raster, r0, r1, c0, c1):
+        nrows, ncols = rasterShape(raster)
+        rows = np.arange(r0, r1)
+        cols = np.arange(c0, c1)
+        src_rows = np.floor((raster["y0"] - (self.y0 - (rows + 0.5) * self.cell)) / raster["cell"]).astype(np.int64)
+        src_cols = np.floor((self.x0 + (cols + 0.5) * self.cell - raster["x0"]) / raster["cell"]).astype(np.int64)
+        row_in = (src_rows >= 0) & (src_rows < nrows)
+        col_in = (src_cols >= 0) & (src_cols < ncols)
+        return rows[row_in], cols[col_in], src_rows[row_in], src_cols[col_in]
+
+    # Grid cells [r0, r1) x [c0, c1) a raster's extent touches, or None
+    def window(self, raster):
+        nrows, ncols = rasterShape(raster)
+        c0 = int(math.floor((raster["x0"] - self.x0) / self.cell))
+        c1 = int(math.ceil((raster["x0"] + ncols * raster["cell"] - self.x0) / self.cell))
+        r0 = int(math.floor((self.y0 - raster["y0"]) / self.cell))
+        r1 = int(math.ceil((self.y0 - raster["y0"] + nrows * raster["cell"]) / self.cell))
+        r0, r1, c0, c1 = max(r0, 0), min(r1, self.nrows), max(c0, 0), min(c1, self.ncols)
+        if r0 >= r1 or c0 >= c1:
+            return None
+        return r0, r1, c0, c1
+
+    # Lower left corner of the block starting at (r0, c0) with nrows rows, for NumPyArrayToRaster
+    def lowerLeft(self, r0, c0, nrows):
+        return self.x0 + c0 * self.cell, self.y0 - (r0 + nrows) * self.cell
+
+#-------------------------------------------------------------------------------
+# Precedence
+
+# Indices of the rasters, highest precedence first. "finest": the smaller cell size wins (ties keep the list
+# order); a list of source codes or raster names: listed rasters first in that order, the rest by cell size
+def precedenceOrder(rasters, precedence="finest"):
+    by_cell = sorted(range(len(rasters)), key=lambda i: (rasters[i]["cell"], i))
+    if precedence == "finest":
+        return by_cell
+    if isinstance(precedence, str):
+        raise ValueError("Unknown precedence rule {}".format(precedence))
+    rank = dict((key, k) for k, key in enumerate(precedence))
+    listed = [i for i in range(len(rasters)) if rasters[i]["source_code"] in rank or rasters[i].get("name") in rank]
+    listed.sort(key=lambda i: rank.get(rasters[i]["source_code"], rank.get(rasters[i].get("name"))))
+    return listed + [i for i in by_cell if i not in listed]
+
+#-------------------------------------------------------------------------------
+# Mosaic
+
+class Mosaic(object):
+
+    # rasters: dicts with array (or read and shape, see openRaster), x0, y0 (upper left), cell, nodata and
+    # source_code (optionally name and code_fixes {old code: new code}); keep_codes: codes kept in the class
+    # raster (e.g. the GDE systems), other covered cells are NoData there but keep their source
+    def __init__(self, rasters, precedence="finest", cell=None, keep_codes=None, grid=None):
+        self.rasters = list(rasters)
+        self.source_codes = [r["source_code"] for r in self.rasters]
+        self.order = precedenceOrder(self.rasters, precedence)
+        self.grid = grid or MosaicGrid.covering(self.rasters, cell)
+        self.keep_codes = None if keep_codes is None else np.array(sorted(keep_codes), dtype=np.int64)
+        self.windows = [self.grid.window(r) for r in self.rasters]
+        self.overlaps = {}  # (winning source code, overridden source code) -> cells
+        self._bands = {}  # raster index -> (first row, end row, rows) of the band last read
+
+    def __repr__(self):
+        return "Mosaic({} rasters on {})".format(len(self.rasters), self.grid)
+
+    # Value of a source code in the source raster
+    def sourceValue(self, source_code):
+        return self.source_codes.index(source_code) + 1
+
+    # Source codes that lost cells to another raster
+    def overridden(self):
+        return sorted(set(loser for winner, loser in self.overlaps))
+
+    # Raster values after the code fixes, as int64. The raster's rows are read as one band, which the other
+    # blocks of the same block row reuse
+    def _values(self, i, src_rows, src_cols):
+        raster = self.rasters[i]
+        r0, r1 = int(src_rows[0]), int(src_rows[-1]) + 1
+        band = self._bands.get(i)
+        if band is None or band[0] > r0 or band[1] < r1:
+            band = self._bands[i] = (r0, r1, rasterRows(raster, r0, r1))
+        values = band[2][np.ix_(src_rows - band[0], src_cols)].astype(np.int64)
+        valid = values != raster.get("nodata", NODATA)
+        for old_code, new_code in raster.get("code_fixes", {}).items():
+            values[values == old_code] = new_code
+        return values, valid
+
+    # Mosaic of the grid cells [r0, r1) x [c0, c1): (classes, sources), or None if no raster covers them
+    def block(self, r0, r1, c0, c1):
+        touching = [i for i in self.order if self.windows[i] is not None and self.windows[i][0] < r1 and
+                    self.windows[i][1] > r0 and self.windows[i][2] < c1 and self.windows[i][3] > c0]
+        if not touching:
+            return None
+        classes = np.full((r1 - r0, c1 - c0), NODATA, dtype=np.int32)
+        sources = np.zeros((r1 - r0, c1 - c0), dtype=np.uint8)
+        for i in touching:
+            rows, cols, src_rows, src_cols = self.grid.sampling(self.rasters[i], r0, r1, c0, c1)
+            if not len(rows) or not len(cols):
+                continue
+            values, valid = self._values(i, src_rows, src_cols)
+            target = np.ix_(rows - r0, cols - c0)
+            taken = sources[target]
+            # Cells already written by a raster of higher precedence stay; count them as overlaps
+            lost = valid & (taken != SOURCE_NODATA)
+            if lost.any():
+                winners = np.bincount(taken[lost], minlength=len(self.rasters) + 1)
+                for w in np.flatnonzero(winners).tolist():
+                    key = (self.source_codes[w - 1], self.source_codes[i])
+                    self.overlaps[key] = self.overlaps.get(key, 0) + int(winners[w])
+            write = valid & (taken == SOURCE_NODATA)
+            classes[target] = np.where(write, values, classes[target])
+            sources[target] = np.where(write, i + 1, taken)
+        if self.keep_codes is not None:
+            classes[~np.isin(classes, self.keep_codes)] = NODATA
+        return classes, sources
+
+    # (r0, c0, classes, sources) for every block of the grid a raster touches
+    def blocks(self, block=BLOCK):
+        self.overlaps = {}
+        self._bands = {}
+        for r0 in range(0, self.grid.nrows, block):
+            for c0 in range(0, self.grid.ncols, block):
+                result = self.block(r0, min(r0 + block, self.grid.nrows), c0, min(c0 + block, self.grid.ncols))
+                if result is not None:
+                    yield (r0, c0) + result
+
+    # Whole grid as two arrays, for small extents
+    def toArrays(self, block=BLOCK):
+        classes = np.full((self.grid.nrows, self.grid.ncols), NODATA, dtype=np.int32)
+        sources = np.zeros((self.grid.nrows, self.grid.ncols), dtype=np.uint8)
+        for r0, c0, c, s in self.blocks(block):
+            classes[r0:r0 + c.shape[0], c0:c0 + c.shape[1]] = c
+            sources[r0:r0 + s.shape[0], c0:c0 + s.shape[1]] = s
+        return classes, sources
+
+    # Acres of each (source code, class) in the mosaic
+    def classAcres(self, block=BLOCK):
+        cell_acres = self.grid.cell * self.grid.cell / SQM_PER_ACRE
+        acres = {}
+        for r0, c0, classes, sources in self.blocks(block):
+            keep = classes != NODATA
+            keys, counts = np.unique(np.stack([sources[keep].astype(np.int64), classes[keep].astype(np.int64)]),
+                                     axis=1, return_counts=True)
+            for (s, code), count in zip(keys.T.tolist(), counts.tolist()):
+                key = (self.source_codes[s - 1], code)
+                acres[key] = acres.get(key, 0.0) + count * cell_acres
+        return acres
+
+#-------------------------------------------------------------------------------
+# arcpy
+
+# Attribute field of a raster that holds the BpS code (the cell values are used if none of VALUE_FIELDS exist)
+def valueField(path):
+    import arcpy
+    names = [f.name for f in arcpy.ListFields(path)]
+    for field in VALUE_FIELDS:
+        if field in names:
+            return field
+    return "Value"
+
+# Function that maps a raster's cell values to the codes of its value field (NoData where a value has no row)
+def _valueLookup(path, field):
+    import arcpy
+    if field == "Value":
+        return lambda array: array
+    with arcpy.da.SearchCursor(path, ["Value", field]) as cursor:
+        lookup = dict((value, code) for value, code in cursor)
+    keys = np.array(sorted(lookup), dtype=np.int64)
+    codes = np.array([lookup[k] for k in keys.tolist()], dtype=np.int32)
+    def remap(array):
+        position = np.clip(np.searchsorted(keys, array), 0, len(keys) - 1)
+        return np.where((array != NODATA) & (keys[position] == array), codes[position], NODATA).astype(np.int32)
+    return remap
+
+# Raster dict of a BpS raster, with the cell values mapped to the codes of its value field
+def readRaster(path, source_code, field=None):
+    import arcpy
+    raster = arcpy.Raster(path)
+    field = field or valueField(path)
+    array = _valueLookup(path, field)(arcpy.RasterToNumPyArray(raster, nodata_to_value=NODATA).astype(np.int32))
+    return {"name": os.path.basename(path), "array": array, "x0": raster.extent.XMin, "y0": raster.extent.YMax,
+            "cell": raster.meanCellWidth, "nodata": NODATA, "field": field, "source_code": source_code,
+            "spatial_reference": raster.spatialReference}
+
+# Raster dict of a BpS raster that reads bands of rows on demand (read(r0, r1)) instead of holding the array,
+# for rasters too large to read at once
+def openRaster(path, source_code=None, field=None):
+    import arcpy
+    raster = arcpy.Raster(path)
+    field = field or valueField(path)
+    remap = _valueLookup(path, field)
+    cell, x0, y0 = raster.meanCellWidth, raster.extent.XMin, raster.extent.YMax
+    def read(r0, r1):
+        corner = arcpy.Point(x0, y0 - r1 * cell)
+        band = arcpy.RasterToNumPyArray(raster, corner, raster.width, r1 - r0, nodata_to_value=NODATA)
+        return remap(band.astype(np.int32))
+    return {"name": os.path.basename(path), "read": read, "shape": (raster.height, raster.width), "x0": x0, "y0": y0,
+            "cell": cell, "nodata": NODATA, "field": field, "source_code": source_code,
+            "spatial_reference": raster.spatialReference}
+
+# Rows [r0, r1) of a raster dict, from its array or its reader
+def rasterRows(raster, r0, r1):
+    if "read" in raster:
+        return raster["read"](r0, r1)
+    return raster["array"][r0:r1]
+
+def rasterShape(raster):
+    return raster["shape"] if "shape" in raster else raster["array"].shape
+
+# Mosaic the rasters at paths (one source code each) into out_classes (BpS codes, 32 bit) and out_sources (source
+# values 1..n, 8 bit, with a SOURCECODE field in its attribute table). The rasters are read a band of rows at a
+# time; code_fixes {source code: {old code: new code}} corrects a raster's codes as they are read. Each block is
+# written as a temporary raster and the blocks are combined with MosaicToNewRaster_management; they do not overlap.
+def mosaicRasters(paths, source_codes, out_classes, out_sources, precedence="finest", cell=None, keep_codes=None,
+                  block=BLOCK, code_fixes=None):
+    import arcpy
+    rasters = [openRaster(p, code) for p, code in zip(paths, source_codes)]
+    for raster in rasters:
+        raster["code_fixes"] = (code_fixes or {}).get(raster["source_code"], {})
+    mosaic = Mosaic(rasters, precedence, cell, keep_codes)
+    grid = mosaic.grid
+    spatial_reference = rasters[0]["spatial_reference"]
+    scratch = arcpy.env.scratchGDB
+    class_tiles, source_tiles = [], []
+    for r0, c0, classes, sources in mosaic.blocks(block):
+        corner = arcpy.Point(*grid.lowerLeft(r0, c0, classes.shape[0]))
+        tile = "mosaic_{}_{}".format(r0, c0)
+        arcpy.NumPyArrayToRaster(classes, corner, grid.cell, grid.cell, NODATA).save(os.path.join(scratch, tile + "_cls"))
+        arcpy.NumPyArrayToRaster(sources, corner, grid.cell, grid.cell, SOURCE_NODATA).save(os.path.join(scratch, tile + "_src"))
+        class_tiles.append(os.path.join(scratch, tile + "_cls"))
+        source_tiles.append(os.path.join(scratch, tile + "_src"))
+    print("{} blocks written; cells overridden (winner, overridden): {}".format(len(class_tiles), mosaic.overlaps))
+
+    for tiles, out, pixel_type in ((class_tiles, out_classes, "32_BIT_SIGNED"), (source_tiles, out_sources, "8_BIT_UNSIGNED")):
+        arcpy.MosaicToNewRaster_management(tiles, os.path.dirname(out), os.path.basename(out), spatial_reference,
+                                           pixel_type, grid.cell, 1, "FIRST")
+        for t in tiles:
+            arcpy.Delete_management(t)
+
+    # Source code of each source value
+    arcpy.BuildRasterAttributeTable_management(out_sources, "Overwrite")
+    arcpy.AddField_management(out_sources, "SOURCECODE", "TEXT", field_length=20)
+    with arcpy.da.UpdateCursor(out_sources, ["Value", "SOURCECODE"]) as cursor:
+        for row in cursor:
+            row[1] = mosaic.source_codes[row[0] - 1]
+            cursor.updateRow(row)
+    return mosaic
+
+# END
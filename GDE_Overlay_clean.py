@@ -0,0 +1,202 @@
+#-------------------------------------------------------------------------------
+# Name:        NV iGDE Database - Parallel overlay
+# Purpose:     Run Intersect, Erase and Clip on all cores. One input "owns" the partitions: each of its features
+#              belongs to exactly one partition, picked by the tile holding the centre of its extent (its
+#              reference point) or by its zone (e.g. HYD_AREA). The other input is cut down to the features whose
+#              extent meets the partition, found with a grid index, and each partition runs in its own worker
+#              process. Every output feature comes from one owned feature, so the partition outputs are merged
+#              without duplicates and without cutting features at partition borders.
+#                Intersect - partitions are owned by the summary units (the last input)
+#                Erase/Clip - partitions are owned by the input features
+# Modules: os; GDE_Dissolve_clean; GDE_Geometry_clean; GDE_Workspace_clean; arcpy
+#
+# Usage:       ph_chunk = parallelIntersect([ph_dissolve, gde_unit], ws.new("ph_chunk"))
+#              lf_poly_erase = parallelErase(lf_clip, tnc_cover, ws.new("Landfire_GDE_Erase"))
+#
+#              The number of partitions can be set with the GDE_OVERLAY_PARTITIONS environment variable
+#              (default: four per worker).
+#
+# Author:      sarah.byer
+#
+# Created:     October 2026
+# Copyright:   (c) sarah.byer 2026
+#-------------------------------------------------------------------------------
+
+import math, os
+
+from GDE_Dissolve_clean import WORKERS, parallelMap
+from GDE_Geometry_clean import GridIndex
+from GDE_Workspace_clean import SCRATCH_DIR
+
+PARTITIONS = int(os.environ.get("GDE_OVERLAY_PARTITIONS", 0)) or 4 * (WORKERS or os.cpu_count() or 1)
+
+#-------------------------------------------------------------------------------
+# Partition planning
+
+def referencePoint(box):
+    return ((box[0] + box[2]) / 2.0, (box[1] + box[3]) / 2.0)
+
+def _unionBox(boxes):
+    return (min(b[0] for b in boxes), min(b[1] for b in boxes), max(b[2] for b in boxes), max(b[3] for b in boxes))
+
+# Split the owned features (id, box) into about `partitions` groups and find the other features (id, box)
+# each group can touch. zones, if given, is {id: zone value}; features of one zone stay together and
+# zones are spread over the partitions by feature count.
+# Returns [(owned ids, candidate other ids, group box)] for every non-empty partition.
+def planPartitions(owned, others, partitions=PARTITIONS, zones=None):
+    owned = list(owned)
+    if not owned:
+        return []
+    groups = []
+    if zones:
+        by_zone = {}
+        for item in owned:
+            by_zone.setdefault(zones.get(item[0]), []).append(item)
+        bins = [[] for i in range(min(partitions, len(by_zone)))]
+        for members in sorted(by_zone.values(), key=len, reverse=True):
+            min(bins, key=len).extend(members)
+        groups = bins
+    else:
+        side = max(1, int(math.ceil(math.sqrt(partitions))))
+        xmin, ymin, xmax, ymax = _unionBox([box for i, box in owned])
+        w = (xmax - xmin) / side or 1.0
+        h = (ymax - ymin) / side or 1.0
+        cells = {}
+        for item in owned:
+            x, y = referencePoint(item[1])
+            col = min(int((x - xmin) / w), side - 1)
+            row = min(int((y - ymin) / h), side - 1)
+            cells.setdefault((row, col), []).append(item)
+        groups = [cells[key] for key in sorted(cells)]
+
+    others = list(others)
+    other_boxes = dict(others)
+    index = GridIndex(_indexCell(others))
+    for i, box in others:
+        index.insert(i, box)
+    plan = []
+    for members in groups:
+        if not members:
+            continue
+        # Each partition gets its own index of its members, so a candidate is only sent to the partitions
+        # where it meets a member and not to every partition whose overall box it crosses
+        member_index = GridIndex(_indexCell(members))
+        for i, box in members:
+            member_index.insert(i, box)
+        group_box = _unionBox([box for i, box in members])
+        candidates = [i for i in index.query(group_box) if member_index.query(other_boxes[i])]
+        plan.append(([i for i, box in members], candidates, group_box))
+    return plan
+
+# (partition number, owned ids, candidate ids) of the partitions that need a worker. Intersect and clip
+# partitions without candidates have no output and are skipped; erase partitions keep their features unchanged.
+def partitionJobs(operation, plan):
+    return [(i, ids, candidates) for i, (ids, candidates, box) in enumerate(plan) if candidates or operation == "erase"]
+
+# Index cell size of about the mean feature size
+def _indexCell(items):
+    if not items:
+        return 1.0
+    size = sum((b[2] - b[0]) + (b[3] - b[1]) for i, b in items) / (2.0 * len(items))
+    return max(size, 1.0)
+
+#-------------------------------------------------------------------------------
+# Workers
+
+def _where(fc, ids):
+    import arcpy
+    oid = arcpy.AddFieldDelimiters(fc, arcpy.Describe(fc).OIDFieldName)
+    return "{} IN ({})".format(oid, ",".join(str(i) for i in ids)) if ids else "1=0"
+
+# Run one partition: feature layers over the source feature classes restricted to the partition's features,
+# so the FID_ fields of Intersect still refer to the source features
+def _overlayPartition(operation, in_fc, overlay_fc, owned, candidates, out_fc, tool_args):
+    import arcpy
+    arcpy.env.overwriteOutput = True
+    owned_fc, other_fc = (overlay_fc, in_fc) if operation == "intersect" else (in_fc, overlay_fc)
+    name = lambda fc: os.path.splitext(os.path.basename(fc))[0]
+    owned_lyr = arcpy.MakeFeatureLayer_management(owned_fc, name(owned_fc), _where(owned_fc, owned))
+    other_lyr = arcpy.MakeFeatureLayer_management(other_fc, name(other_fc), _where(other_fc, candidates))
+    if operation == "erase" and owned and not candidates:
+        # Nothing to erase in this partition: its features pass through
+        arcpy.CopyFeatures_management(owned_lyr, out_fc)
+    elif operation == "intersect":
+        arcpy.Intersect_analysis([other_lyr, owned_lyr], out_fc, *tool_args)
+    elif operation == "erase":
+        arcpy.Erase_analysis(owned_lyr, other_lyr, out_fc, *tool_args)
+    else:
+        arcpy.Clip_analysis(owned_lyr, other_lyr, out_fc, *tool_args)
+    arcpy.Delete_management([owned_lyr, other_lyr])
+    return out_fc if int(arcpy.GetCount_management(out_fc)[0]) else None
+
+#-------------------------------------------------------------------------------
+# Overlay tools
+
+def _boxes(fc, zone_field=None):
+    import arcpy
+    items, zones = [], {}
+    fields = ["OID@", "SHAPE@"] + ([zone_field] if zone_field else [])
+    with arcpy.da.SearchCursor(fc, fields) as cursor:
+        for row in cursor:
+            if row[1] is None:
+                continue
+            e = row[1].extent
+            items.append((row[0], (e.XMin, e.YMin, e.XMax, e.YMax)))
+            if zone_field:
+                zones[row[0]] = row[2]
+    return items, zones
+
+# operation is "intersect" (in_fc intersected with the units in overlay_fc), "erase" or "clip" (in_fc
+# erased/clipped by overlay_fc). tool_args are passed on to the arcpy tool after the output.
+def parallelOverlay(operation, in_fc, overlay_fc, out_fc, tool_args=(), partitions=PARTITIONS, zone_field=None,
+                    workers=None):
+    import arcpy
+    scratch = os.path.join(SCRATCH_DIR, "gde_overlay_{}.gdb".format(os.getpid()))
+    if arcpy.Exists(scratch):
+        arcpy.Delete_management(scratch)
+    arcpy.CreateFileGDB_management(*os.path.split(scratch))
+    try:
+        # Worker processes cannot see this process's memory workspace
+        inputs = []
+        for fc in (in_fc, overlay_fc):
+            if str(fc).lower().startswith("memory"):
+                fc = arcpy.CopyFeatures_management(fc, os.path.join(scratch, os.path.basename(str(fc))))
+            inputs.append(str(fc))
+        in_fc, overlay_fc = inputs
+        owned_fc, other_fc = (overlay_fc, in_fc) if operation == "intersect" else (in_fc, overlay_fc)
+        owned, zones = _boxes(owned_fc, zone_field)
+        others = _boxes(other_fc)[0]
+        plan = planPartitions(owned, others, partitions, zones)
+        print("{} {} by {}: {} partitions".format(operation, in_fc, overlay_fc, len(plan)))
+
+        if arcpy.Exists(out_fc):
+            arcpy.Delete_management(out_fc)
+        if operation == "erase" and not any(candidates for ids, candidates, box in plan):
+            # Nothing overlaps the erase features: the output is a copy of the input
+            arcpy.CopyFeatures_management(in_fc, out_fc)
+            return out_fc
+        jobs = [(operation, in_fc, overlay_fc, ids, candidates, os.path.join(scratch, "part_{}".format(i)), list(tool_args))
+                for i, ids, candidates in partitionJobs(operation, plan)]
+        outputs = [out for out in parallelMap(_overlayPartition, jobs, workers) if out]
+        if outputs:
+            arcpy.Merge_management(outputs, out_fc)
+        else:
+            # Nothing overlaps: an empty output with the tool's own schema
+            _overlayPartition(operation, in_fc, overlay_fc, [], [], out_fc, list(tool_args))
+    finally:
+        if arcpy.Exists(scratch):
+            arcpy.Delete_management(scratch)
+    return out_fc
+
+# Intersect_analysis([features, units], out_fc, ...) partitioned by the units
+def parallelIntersect(in_features, out_fc, join_attributes="ALL", cluster_tolerance="", output_type="INPUT", **kwargs):
+    in_fc, units = in_features
+    return parallelOverlay("intersect", in_fc, units, out_fc, [join_attributes, cluster_tolerance, output_type], **kwargs)
+
+def parallelErase(in_fc, erase_fc, out_fc, **kwargs):
+    return parallelOverlay("erase", in_fc, erase_fc, out_fc, **kwargs)
+
+def parallelClip(in_fc, clip_fc, out_fc, **kwargs):
+    return parallelOverlay("clip", in_fc, clip_fc, out_fc, **kwargs)
+
+# END
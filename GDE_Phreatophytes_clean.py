@@ -8,11 +8,19 @@
 # Copyright:   (c) sarah.byer 2019
 #-------------------------------------------------------------------------------
 
-# Import ArcGIS modules and check out spatial analyst extension
+# Import ArcGIS modules
 import arcpy, os
 from arcpy import env
-from arcpy.sa import *
-arcpy.CheckOutExtension("spatial")
+
+from GDE_Backend_clean import spatialAnalyst
+from GDE_Compaction_clean import compactFeatureClass, VERTEX_BUDGETS
+from GDE_Dissolve_clean import parallelDissolve
+from GDE_GridGeometry_clean import Grid, gridDissolve
+from GDE_Loader_clean import bulkLoad
+from GDE_Mosaic_clean import mosaicRasters
+from GDE_Overlay_clean import parallelErase
+from GDE_SchemaBatch_clean import SchemaBatch
+from GDE_Workspace_clean import IntermediateWorkspace, materializeConstants
 
 # Path to temporary geodatabase
 path =  r"K:\GIS3\Projects\GDE\Geospatial\Geodatabase_Layers\NV_GDE_Template_Temp.gdb"
@@ -22,9 +30,15 @@ env.workspace = path
 env.overwriteOutput = True
 env.outputCoordinateSystem = arcpy.SpatialReference(26911) # Spatial reference NAD 1983 UTM Zone 11N. The code is '26911'
 
+# Intermediate datasets of the Landfire and DRI steps are kept in memory (spilling to local scratch over the
+# budget) and deleted after their last use. The TNC raster polygons stay in the temporary geodatabase since
+# they are converted a few rasters at a time across sessions.
+ws = IntermediateWorkspace()
+
 #-------------------------------------------------------------------------------
 #-------------------------------------------------------------------------------
 # Process vegetation rasters from TNC
+spatialAnalyst() # check out the extension for the raster steps only
 
 # Read in rasters from the workspace
 raster_path = r"K:\GIS3\Projects\GDE\Geospatial\Geodatabase_Layers\GDE_Vegetation\TNCData\ReclassedRasters"
@@ -51,7 +65,6 @@ for r in m:
 env.workspace = path
 
 # Convert raster to polygon, store the SYS CODE field which describes the reference biophysical setting (vegetation) 
-# Assigns source code from tncSourceCodes (above)
 # """NOTE: large, fine-resolution rasters may not process using Python. Change the range below to process one or a few rasters at a time.
 for raster in range(0, 1): # Change range - run for a couple rasters at a time
     outname = gdb_path + r"/" + str(m[raster])[:-4] + "_poly" # Output fc name
@@ -71,10 +84,9 @@ for raster in range(0, 1): # Change range - run for a couple rasters at a time
         print("Converting raster to polygon and storing the BSYSCODE field.")
         rpoly = arcpy.RasterToPolygon_conversion(rastername, outname, "NO_SIMPLIFY", "BSYSCODE")
 
-    # Add source code to polygone feature class
-    arcpy.AddField_management(rpoly, 'SOURCECODE', 'TEXT', field_length = 20)
-    arcpy.CalculateField_management(rpoly, "SOURCECODE", "'{}'".format(tncSourceCodes[raster]), "PYTHON_9.3")
-    print("Souce Code " + str(tncSourceCodes[raster]) + " added to SOURCECODE field.")
+    # Drop the duplicate and collinear vertices left at every cell edge (the footprint is unchanged)
+    # The source code is added when the polygons are dissolved (below)
+    compactFeatureClass(rpoly)
 
 # Get list of polygon fcs
 tncpoly = arcpy.ListFeatureClasses("*_poly")
@@ -94,47 +106,26 @@ for i in range(0,len(m)): # get cell size from all rasters in the list
 print(resolutions)
 
 
-# Dissolve first polygon fc to create a template fc to store the remaining fc boundaries
-poly1 = tncpoly[0]
-tnc_polygon_bnd = arcpy.Dissolve_management(poly1, path + "\\tnc_project_area_polygons")
-arcpy.AddField_management(tnc_polygon_bnd, "RES_METERS", "FLOAT") # Add field that stores the resolution in meters
-poly1_res = resolutions[0]
-arcpy.CalculateField_management(tnc_polygon_bnd, "RES_METERS", poly1_res)
-arcpy.AddField_management(tnc_polygon_bnd, "FILENAME", "TEXT") # Add field that stores the file name
-poly1_name = str(m[0])
-arcpy.CalculateField_management(tnc_polygon_bnd, "FILENAME", '"' + poly1_name + '"') 
-arcpy.AddField_management(tnc_polygon_bnd, "SOURCECODE", "TEXT") # Add field that stores the source code
-poly1_code = str(tncSourceCodes[0])
-arcpy.CalculateField_management(tnc_polygon_bnd, "SOURCECODE", '"' + poly1_code + '"') 
+# Create the fc that stores the boundary of each mapped area, with fields for the resolution in meters,
+# the file name and the source code
+tnc_polygon_bnd = arcpy.CreateFeatureclass_management(path, "tnc_project_area_polygons", "POLYGON",
+                                                      spatial_reference=env.outputCoordinateSystem)[0]
+SchemaBatch(tnc_polygon_bnd).add("RES_METERS", "FLOAT").add("FILENAME", "TEXT").add("SOURCECODE", "TEXT").apply()
+
+# Dissolve each area to a single polygon feature; the resolution, file name and source code of the area are
+# written with its boundary (one insert per area instead of a field calculation per field)
+with arcpy.da.InsertCursor(tnc_polygon_bnd, ["RES_METERS", "FILENAME", "SOURCECODE", "SHAPE@"]) as bnd_cursor:
+    for poly in range(0, len(tncpoly)):
+        area = tncpoly[poly]
+        print("Dissolving " + str(area) + "...")
+        area_boundary = arcpy.Dissolve_management(area, ws.new("temp_boundary"))
+        print("Designating area native resolution at " + str(resolutions[poly]) + " meters...")
+        with arcpy.da.SearchCursor(area_boundary, ["SHAPE@"]) as cursor:
+            for row in cursor:
+                bnd_cursor.insertRow([resolutions[poly], str(m[poly]), str(tncSourceCodes[poly]), row[0]])
+        ws.release(area_boundary)
 [f.name for f in arcpy.ListFields(tnc_polygon_bnd)]
 
-
-# Dissolve the remaining areas and append to the first polygon feature
-for poly in range(1, len(tncpoly)):
-    area = tncpoly[poly]
-    outname = path + "\\temp_boundary"
-    
-    # Dissolve the polygon fc to create a single polygon feature for the mapped area
-    print("Dissolving " + str(area) + "...")
-    area_boundary = arcpy.Dissolve_management(area, outname)
-    
-    # Add resolution information from raster
-    arcpy.AddField_management(area_boundary, "RES_METERS", "FLOAT")
-    area_resolution = resolutions[poly]
-    print("Designating area native resolution at " + str(area_resolution) + " meters...")
-    arcpy.CalculateField_management(area_boundary, "RES_METERS", area_resolution)
-    
-    # Add fields that store the file name and source code
-    arcpy.AddField_management(area_boundary, "FILENAME", "TEXT")
-    area_name = str(m[poly])
-    arcpy.CalculateField_management(area_boundary, "FILENAME", '"' + area_name + '"') 
-    arcpy.AddField_management(area_boundary, "SOURCECODE", "TEXT")
-    area_code = str(tncSourceCodes[poly])
-    arcpy.CalculateField_management(area_boundary, "SOURCECODE", '"' + area_code + '"')
-    
-    # Append boundary to template fc created above
-    arcpy.Append_management(area_boundary, tnc_polygon_bnd, "NO_TEST")
-
 # Save copy of the boundary fc
 arcpy.CopyFeatures_management(tnc_polygon_bnd, path + "\\TNC_MappedAreas")
 
@@ -153,24 +144,30 @@ arcpy.CalculateGeometryAttributes_management(tnc_areas, [["Acres", "AREA"]], "",
 
 
 #-------------------------------------------------------------------------------
-# Erase portion of Wassuk Range overlapped by Mt Grant
+# Resolve overlaps between TNC study areas (e.g. Mt Grant inside the Wassuk Range)
 
-# Isolate Mt Grant boundary
-grant = arcpy.Copy_management(tnc_areas, "mtgrant_bnd")
-with arcpy.da.UpdateCursor(grant, ['FILENAME']) as cursor:
-    for row in cursor:
-        if row[0] != "MtGrant_MaskSYSxCLA052918.tif":
-            cursor.deleteRow()
-del cursor
-arcpy.GetCount_management(grant)
+# Mosaic the rasters on a common snap grid (GDE_Mosaic_clean.py). Mt Grant wins over the Wassuk Range where they
+# overlap; other overlaps go to the finer RES_METERS. Writes the BpS code and the source of every cell
+grant_code = tncSourceCodes[[str(r) for r in m].index("MtGrant_MaskSYSxCLA052918.tif")]
+wassuk_code = tncSourceCodes[10]
+
+# Erroneous system codes that will be GDEs, fixed in the mosaic and in the polygons below
+tnc_code_fixes = {tncSourceCodes[6]: {11550: 11551}, # Spring Mountains - Mesquite
+                  tncSourceCodes[3]: {11550: 10542}} # Great Basin NP - Ponderosa Pine Riparian
 
-# Erase wassuk features using mt grant mask. Creates a donut in the Wassuk Range vegetation fc
-wassuk = tncpoly[10]
-wassuk_erase = arcpy.Erase_analysis(wassuk, grant, "wassuk_erase")
+tnc_rasters = [raster_path + "\\" + str(r) for r in m]
+tnc_mosaic = mosaicRasters(tnc_rasters, tncSourceCodes, path + "\\TNC_BpS_Mosaic", path + "\\TNC_Source_Mosaic",
+                           precedence=[grant_code, wassuk_code], code_fixes=tnc_code_fixes)
 
-# Replace existing wassuk polygon feature with new, erased feature
-arcpy.Delete_management(tncpoly[10])
-arcpy.Copy_management(wassuk_erase, "Wassuk_MaskSYSxCLA052918__poly")
+# Rebuild the polygons of each area that lost cells to another area from the cells it kept (the Wassuk Range
+# polygons get a donut where Mt Grant is). The rebuilt polygons lie on the mosaic grid.
+sa = spatialAnalyst()
+for code in tnc_mosaic.overridden():
+    i = tncSourceCodes.index(code)
+    print("Removing cells of " + str(m[i]) + " covered by other study areas...")
+    kept = sa.SetNull(sa.Raster(path + "\\TNC_Source_Mosaic") != tnc_mosaic.sourceValue(code), path + "\\TNC_BpS_Mosaic")
+    rpoly = arcpy.RasterToPolygon_conversion(kept, path + "\\" + str(m[i])[:-4] + "_poly", "NO_SIMPLIFY", "Value")
+    compactFeatureClass(rpoly)
 
 
 #-------------------------------------------------------------------------------
@@ -192,34 +189,37 @@ print(gde_codes)
 # General polygons i nthe Wetland dataset do include the riparian around the Owyhee River
 
 
-# Fix erroneous system codes that will be GDEs
-# Spring Mountains - update Mesquite code
-sm = tncpoly[6]
-with arcpy.da.UpdateCursor(sm, ['gridcode']) as cursor:
-    for row in cursor:
-        if row[0] == 11550:
-            row[0] = 11551
-            cursor.updateRow(row)
-del cursor
-
-# Great Basin NP - update Ponderosa Pine Riparian code
-gb = tncpoly[3]
-with arcpy.da.UpdateCursor(gb, ['gridcode']) as cursor:
-    for row in cursor:
-        if row[0] == 11550:
-            row[0] = 10542
-            cursor.updateRow(row)
-del cursor
+# Fix erroneous system codes that will be GDEs (tnc_code_fixes: Spring Mountains Mesquite, Great Basin NP
+# Ponderosa Pine Riparian)
+for feat in range(0, len(tncpoly)):
+    fixes = tnc_code_fixes.get(tncSourceCodes[feat], {})
+    if not fixes:
+        continue
+    with arcpy.da.UpdateCursor(tncpoly[feat], ['gridcode']) as cursor:
+        for row in cursor:
+            if row[0] in fixes:
+                row[0] = fixes[row[0]]
+                cursor.updateRow(row)
+    del cursor
 
 #-------------------------------------------------------------------------------
 # Retain only GDEs from vegetation feature classes
 
-# Dissolve vegetation fcs by BpS code and source code
+# Dissolve vegetation fcs by BpS code; the raster's source code (tncSourceCodes) is written with each feature
+# The polygons of each raster lie on its cell grid, so they are dissolved as exact integer cell runs
+# (GDE_GridGeometry_clean.py); Dissolve_management is used if a raster's polygons are off its grid
 for feat in range(0, len(tncpoly)):
     poly = tncpoly[feat]
     poly_name = str(poly)[:-5] + "_dissolve"
     print("Dissolving " + str(poly) + "...")
-    poly_dissolve = arcpy.Dissolve_management(poly, poly_name, ["GRIDCODE", "SOURCECODE"])
+    grid = Grid(m[feat].extent.XMin, m[feat].extent.YMin, m[feat].meanCellWidth)
+    source_code = {"SOURCECODE": tncSourceCodes[feat]}
+    try:
+        poly_dissolve = gridDissolve(poly, poly_name, grid, ["GRIDCODE"], constants=source_code)
+    except ValueError:
+        print("Polygons are off the raster grid; using Dissolve_management")
+        poly_dissolve = arcpy.Dissolve_management(poly, poly_name, ["GRIDCODE"])
+        materializeConstants(poly_dissolve, source_code)
 
 # Delete polygons that are NOT GDEs according to the gde_codes list
 tncpoly_dissolved = sorted(arcpy.ListFeatureClasses("*_dissolve*"), key=str.lower)
@@ -288,15 +288,6 @@ env.workspace = gde_gdb
 arcpy.ListFeatureClasses()
 path = env.workspace
 
-# Create custom function for field mapping
-def mapFields(inlayer, infield, mapfield_name, mapfield_alias, mapfield_type): # mapFields function
-    fldMap = arcpy.FieldMap()
-    fldMap.addInputField(inlayer, infield)
-    mapOut = fldMap.outputField
-    mapOut.name, mapOut.alias, mapOut.type = mapfield_name, mapfield_alias, mapfield_type
-    fldMap.outputField = mapOut
-    return fldMap
-
 # Load Phreatophyte layer from template
 gde_phr = gde_gdb + "\\Phreatophytes"
 
@@ -305,18 +296,12 @@ tnc_veg = path + "\\TNC_AllGDE_NV"
 
 # Add Phreatophyte Group to the attribute table of TNC layer (generalizes phreatophyte types in the public database)
 phrea_lut = r"K:\GIS3\Projects\GDE\Tables\GDE_Phreatophyte_NameCodeGroup.csv"
-phrea_tbl = arcpy.TableToTable_conversion(phrea_lut, path, "gde_phreatophyte_lut")
+phrea_tbl = arcpy.CopyRows_management(phrea_lut, ws.new("gde_phreatophyte_lut", consumers=2))
 arcpy.JoinField_management(tnc_veg, "SYS_CODE", phrea_tbl, "SYS_CODE", ["SYS_GROUP"])
+ws.release(phrea_tbl)
 
 # Append TNC Phreatophytes to GDE Phreatophytes layer
-veg_type_map = mapFields(tnc_veg, "SYS_NAME", "PHR_TYPE", "Phreatophyte Type", "TEXT")
-veg_group_map = mapFields(tnc_veg, "SYS_GROUP", "PHR_GROUP", "Phreatophyte Group", "TEXT")
-source_map = mapFields(tnc_veg, "SOURCECODE", "SOURCE_CODE", "Source Code", "TEXT")
-fldMap_list = [veg_type_map, veg_group_map, source_map]
-allFldMappings = arcpy.FieldMappings()
-for fm in fldMap_list:
-    allFldMappings.addFieldMap(fm)
-arcpy.Append_management(tnc_veg, gde_phr, "NO_TEST", allFldMappings)
+bulkLoad(tnc_veg, gde_phr, "Phreatophytes", "tnc")
 
 
 #-------------------------------------------------------------------------------
@@ -330,7 +315,7 @@ lf_bps = r"K:\GIS3\States\NV\Landfire_BPS_NV\US_140BPS_20180618\grid\us_140bps"
 
 # Read in lookup table with codes and names for identified non-wetland GDE systems in Landfire
 lf_code_csv = r"K:\GIS3\Projects\GDE\Tables\Landfire_TNC_GDE_lut.csv"
-lf_code_tbl = arcpy.TableToTable_conversion(lf_code_csv, path, "LF_GDE_Codes")
+lf_code_tbl = arcpy.CopyRows_management(lf_code_csv, ws.new("LF_GDE_Codes"))
 lf_codes = list()
 with arcpy.da.SearchCursor(lf_code_tbl, ['SYS_CODE']) as cursor:
     for row in cursor:
@@ -338,6 +323,7 @@ with arcpy.da.SearchCursor(lf_code_tbl, ['SYS_CODE']) as cursor:
         lf_codes.append(code)
 del cursor
 print(lf_codes)
+ws.release(lf_code_tbl)
 
 # Subset out the non-wetland GDE classes
 lf_copy = arcpy.Copy_management(lf_bps, "LF_BPS_Copy")
@@ -358,27 +344,30 @@ with arcpy.da.UpdateCursor(lf_copy, ['BPS_MODEL']) as cursor:
 del cursor
 
 # Convert lf from raster to polygon
-arcpy.RasterToPolygon_conversion(lf_copy, "Landfire_GDE_Subset", "NO_SIMPLIFY", "BPS_CODE")
-lf_poly = path + "\\Landfire_GDE_Subset"
+lf_poly = arcpy.RasterToPolygon_conversion(lf_copy, ws.new("Landfire_GDE_Subset"), "NO_SIMPLIFY", "BPS_CODE")
+compactFeatureClass(lf_poly)
 
 # Clip to Nevada
 nv = r"K:\GIS3\States\NV\Nevada_83.shp"
-lf_clip = arcpy.Clip_analysis(lf_poly, nv, "LF_GDE_NV")
+lf_clip = arcpy.Clip_analysis(lf_poly, nv, ws.new("LF_GDE_NV"))
+ws.release(lf_poly)
 
 # Erase section overlapped by TNC data - TNC data take priority
 tnc_cover = path + "\\TNC_MappedAreas_NV"
-lf_poly_erase = path + '\\Landfire_GDE_Erase'
-arcpy.Erase_analysis(lf_clip, tnc_cover, lf_poly_erase)
+lf_poly_erase = parallelErase(lf_clip, tnc_cover, ws.new("Landfire_GDE_Erase"))
+ws.release(lf_clip)
 
 # Dissolve polygons in lf by BpS and join SYS_GROUPs and SYS_CODEs from the lookup table
-lf_veg = arcpy.Dissolve_management(lf_poly_erase, path + "\\LF_GDE_Dissolve", ["gridcode"])
+lf_veg = parallelDissolve(lf_poly_erase, ws.new("LF_GDE_Dissolve", consumers=2), ["gridcode"])
 arcpy.JoinField_management(lf_veg, "gridcode", phrea_tbl, "SYS_CODE", ["SYS_GROUP", "SYS_CODE", "SYS_NAME"])
+ws.release(lf_poly_erase, phrea_tbl)
 
 #-------------------------------------------------------------------------------
 # Limit greasewood coverage from LANDFIRE to DRI goundwater discharge boundaries
 
 # Make a copy of the lf fc to process greasewood features
-lf_greasewood = arcpy.Copy_management(lf_veg, "lf_greasewood")
+lf_greasewood = arcpy.CopyFeatures_management(lf_veg, ws.new("lf_greasewood"))
+ws.release(lf_veg)
 
 # Keep only greasewood in Greasewood layer
 with arcpy.da.UpdateCursor(lf_greasewood, ['SYS_CODE']) as cursor:
@@ -390,7 +379,7 @@ del cursor
 
 # Isolate Phreatophyte-type boundaries from basin dataset
 gw_basins = r"K:\GIS3\Projects\GDE\Geospatial\Geodatabase_Layers\GDE_Vegetation\NV_ETunit_2019_package_updates\NV_ETunit_2019.shp"
-basins = arcpy.CopyFeatures_management(gw_basins, "basin_phreatophytes")
+basins = arcpy.CopyFeatures_management(gw_basins, ws.new("basin_phreatophytes"))
 phreatophyte_options = ["Phreatophyte", "Phreatophytes"]
 
 with arcpy.da.UpdateCursor(basins, ['Type']) as cursor:
@@ -400,7 +389,8 @@ with arcpy.da.UpdateCursor(basins, ['Type']) as cursor:
 del cursor
 
 # Clip lf greasewood features to discharge boundaries
-lf_greasewood_basins = arcpy.Clip_analysis(lf_greasewood, basins, "lf_greasewood_basins")
+lf_greasewood_basins = arcpy.Clip_analysis(lf_greasewood, basins, ws.new("lf_greasewood_basins"))
+ws.release(lf_greasewood, basins)
 
 # Remove unedited greasewood from original landfire phreatophyte layer
 with arcpy.da.UpdateCursor(lf_veg, ['SYS_CODE']) as cursor:
@@ -411,31 +401,19 @@ with arcpy.da.UpdateCursor(lf_veg, ['SYS_CODE']) as cursor:
 del cursor
 
 # Add edited Greasewood back into landfire phreatophyte layer
-lf_phr = arcpy.Copy_management(lf_veg, "LF_PHR_Fixed")
+lf_phr = arcpy.CopyFeatures_management(lf_veg, ws.new("LF_PHR_Fixed", consumers=2))
 arcpy.Append_management(lf_greasewood_basins, lf_phr, "NO_TEST")
+ws.release(lf_veg, lf_greasewood_basins)
 
-# Add source code field to lf fc
-arcpy.AddField_management(lf_phr, "SOURCECODE", "TEXT")
-with arcpy.da.UpdateCursor(lf_phr, "SOURCECODE") as cursor:
-    for row in cursor:
-        row[0] = "lf"
-        cursor.updateRow(row)
-        print("Source Code updated to lf")
-del cursor
+# Source code of the lf features; written by the load into the Phreatophytes layer
+ws.setConstants(lf_phr, SOURCECODE="lf")
 arcpy.GetCount_management(lf_phr)
 
 #-------------------------------------------------------------------------------
 
-# Append landfire to GDE Phreatophytes layer; fill in fields
-lf_name_map = mapFields(lf_phr, "SYS_NAME", "PHR_TYPE", "Phreatophyte Type", "TEXT")
-lf_code_map = mapFields(lf_phr, "SYS_CODE", "PHR_CODE", "Phreatophyte Code", "LONG")
-lf_group_map = mapFields(lf_phr, "SYS_GROUP", "PHR_GROUP", "Phreatophyte Group", "TEXT")
-lf_source_map = mapFields(lf_phr, "SOURCECODE", "SOURCE_CODE", "Source Code", "TEXT")
-fldMap_list = [lf_name_map, lf_code_map, lf_group_map, lf_source_map]
-lfFldMappings = arcpy.FieldMappings()
-for fm in fldMap_list:
-    lfFldMappings.addFieldMap(fm)
-arcpy.Append_management(lf_phr, gde_phr, "NO_TEST", lfFldMappings) # Append Landfire GDE features to Vegetation layer
+# Load landfire into the GDE Phreatophytes layer; fill in fields
+bulkLoad(lf_phr, gde_phr, "Phreatophytes", "lf", constants=ws.constants(lf_phr)) # Append Landfire GDE features to Vegetation layer
+ws.release(lf_phr)
 
 #-------------------------------------------------------------------------------
 #-------------------------------------------------------------------------------
@@ -443,13 +421,13 @@ arcpy.Append_management(lf_phr, gde_phr, "NO_TEST", lfFldMappings) # Append Land
 
 # Load layers used to mask (take priority over) DRI boundaries
 tnc_cover = path + "\\TNC_MappedAreas_NV"
-landfire_cover = path + "\\LF_PHR_Fixed"
+landfire_cover = lf_phr
 
 # Path to all hydrographic basins provided in May 2019
 gw_basins = r"K:\GIS3\Projects\GDE\Geospatial\Geodatabase_Layers\GDE_Vegetation\NV_ETunit_2019_package_updates\NV_ETunit_2019.shp"
 
 # Make a copy of the boundaries and delete non-phreatphyte features
-basins = arcpy.CopyFeatures_management(gw_basins, "basin_phreatophytes")
+basins = arcpy.CopyFeatures_management(gw_basins, ws.new("basin_phreatophytes"))
 with arcpy.da.UpdateCursor(basins, ['Type']) as cursor:
     for row in cursor:
         if "Phreatophyte" not in str(row[0]):
@@ -459,48 +437,36 @@ del cursor
 
 # Clip to extent of Nevada
 nv = r"K:\GIS3\States\NV\Nevada_83.shp"
-basins_clip = arcpy.Clip_analysis(basins, nv)
+basins_clip = arcpy.Clip_analysis(basins, nv, ws.new("basin_phreatophytes_clip"))
+ws.release(basins)
 
-# Assign source code to features
-# Desert Research Institute Phreatophytes = "drip"
-arcpy.AddField_management(basins_clip, "SOURCE_CODE", "TEXT")
-with arcpy.da.UpdateCursor(basins_clip, ["SOURCE_CODE"]) as cursor:
-    for row in cursor:
-        row[0] = "drip"
-        cursor.updateRow(row)
-del cursor
-
-# Add phreatopgyte fields
-arcpy.AddField_management(basins_clip, "PHR_GROUP", "TEXT")
-arcpy.AddField_management(basins_clip, "PHR_TYPE", "TEXT")
 [f.name for f in arcpy.ListFields(basins_clip)]
 
 # Dissolve basin phreatophyte layer
-basins_dissolve = arcpy.Dissolve_management(basins_clip, "basins_dissolve", ["HYD_AREA", "HYD_AREA_N", "PHR_GROUP", "PHR_TYPE", "SOURCE_CODE"])
+# (the source code and phreatophyte fields are the same for every feature and are assigned below)
+basins_dissolve = arcpy.Dissolve_management(basins_clip, ws.new("basins_dissolve"), ["HYD_AREA", "HYD_AREA_N"])
+ws.release(basins_clip)
 
 # Mask with overlapping TNC data
-basins_erase1 = arcpy.Erase_analysis(basins_dissolve, tnc_cover, "basins_erase1")
+basins_erase1 = parallelErase(basins_dissolve, tnc_cover, ws.new("basins_erase1"))
+ws.release(basins_dissolve)
 
 # Mask with overlapping Landfire data
-basins_erase2 = arcpy.Erase_analysis(basins_erase1, landfire_cover, "basins_erase2")
+basins_erase2 = parallelErase(basins_erase1, landfire_cover, ws.new("basins_erase2"))
+ws.release(basins_erase1, landfire_cover)
 
-# Assign to all boundaries "Unknown Phreatophytes" and "Unknown" to PHR_TYPE and PHR_GROUP, respectively
-with arcpy.da.UpdateCursor(basins_erase2, ['PHR_TYPE', 'PHR_GROUP']) as cursor:
-    for row in cursor:
-        row[0] = "Unknown Phreatophytes"
-        row[1] = "Unknown"
-        cursor.updateRow(row)
-del cursor
+# Assign to all boundaries "Unknown Phreatophytes" and "Unknown" to PHR_TYPE and PHR_GROUP, respectively,
+# and the source code; Desert Research Institute Phreatophytes = "drip"
+ws.setConstants(basins_erase2, PHR_TYPE="Unknown Phreatophytes", PHR_GROUP="Unknown", SOURCE_CODE="drip")
+
+# Append basin phreatophyte features to GDE phreaotphytes layer; the constants are written by the load
+bulkLoad(basins_erase2, gde_phr, "Phreatophytes", "drip", constants=ws.constants(basins_erase2))
+ws.release(basins_erase2)
+
+#-------------------------------------------------------------------------------
 
-# Append basin phreatophyte features to GDE phreaotphytes layer
-type_map = mapFields(basins_erase2, "PHR_TYPE", "PHR_TYPE", "Phreatophyte Type", "TEXT")
-group_map = mapFields(basins_erase2, "PHR_GROUP", "PHR_GROUP", "Phreatophyte Group", "TEXT")
-source_map = mapFields(basins_erase2, "SOURCE_CODE", "SOURCE_CODE", "Source Code", "TEXT")
-comment_map = mapFields(basins_erase2, "HYD_AREA_N", "COMMENTS", "Comments", "TEXT")
-fldMap_list = [type_map, group_map, source_map, comment_map]
-allFldMappings = arcpy.FieldMappings()
-for fm in fldMap_list:
-    allFldMappings.addFieldMap(fm)
-arcpy.Append_management(basins_erase2, gde_phr, "NO_TEST", allFldMappings)
+# Compact the finished layer; with a vertex budget set in GDE_Compaction_clean.py it is also simplified
+# (shared boundaries between phreatophyte polygons are kept)
+compactFeatureClass(gde_phr, vertex_budget=VERTEX_BUDGETS["Phreatophytes"])
 
 # END
\ No newline at end of file
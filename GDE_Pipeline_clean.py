@@ -0,0 +1,342 @@
+#-------------------------------------------------------------------------------
+# Name:        NV iGDE Database - Pipeline orchestrator
+# Purpose:     Run the iGDE scripts as a dependency graph. Each stage declares the datasets it reads and writes;
+#              a stage starts in its own worker process as soon as every input has been produced, so the layer
+#              builders run side by side and the story map summaries start once their layers are ready.
+#              With the build cache (GDE_BuildCache_clean.py) stages whose script, sources, parameters and
+#              upstream stages are unchanged are skipped or restored from the cache instead of rebuilt.
+# Modules: argparse; concurrent.futures; multiprocessing; os; runpy; sys; time; GDE_BuildCache_clean
+#
+# Usage:       python GDE_Pipeline_clean.py --dry-run
+#              python GDE_Pipeline_clean.py --workers 4
+#              python GDE_Pipeline_clean.py --only rivers,story_map_hexagons
+#              python GDE_Pipeline_clean.py --cache-dir D:\GDE_cache
+#              python GDE_Pipeline_clean.py --no-cache
+#
+# Author:      sarah.byer
+#
+# Created:     October 2026
+# Copyright:   (c) sarah.byer 2026
+#-------------------------------------------------------------------------------
+
+import argparse, multiprocessing, os, runpy, sys, time, traceback
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import GDE_BuildCache_clean as buildcache
+
+# Scripts live next to this file
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# iGDE geodatabases written by the stages
+GDE_GDB = r"K:\GIS3\Projects\GDE\Geospatial\NV_iGDE_050919.gdb"
+STORY_GDB = r"K:\GIS3\Projects\GDE\Geospatial\NV_iGDE_Story_061719.gdb"
+TEMP_GDB = r"K:\GIS3\Projects\GDE\Geospatial\Geodatabase_Layers\NV_GDE_Template_Temp.gdb"
+CACHE_DIR = r"K:\GIS3\Projects\GDE\Geospatial\Build_Cache"
+
+# Where each dataset named in the stage outputs lives
+OUTPUT_PATHS = {
+    "Template": GDE_GDB,
+    "Source_tbl": GDE_GDB + "\\Source_tbl",
+    "Wetlands": GDE_GDB + "\\Wetlands",
+    "Lakes_Playas": GDE_GDB + "\\Lakes_Playas",
+    "Rivers_Streams": GDE_GDB + "\\Rivers_Streams",
+    "Springs": GDE_GDB + "\\Springs",
+    "Species": GDE_GDB + "\\Species",
+    "Species_tbl": GDE_GDB + "\\Species_tbl",
+    "Phreatophytes": GDE_GDB + "\\Phreatophytes",
+    "TNC_BpS_Mosaic": TEMP_GDB + "\\TNC_BpS_Mosaic",
+    "Story_gdb": STORY_GDB,
+    "NV_Hexagons": STORY_GDB + "\\NV_Hexagons",
+    "NV_HydrographicAreas": STORY_GDB + "\\NV_HydrographicAreas",
+    "NV_Photos": STORY_GDB + "\\NV_Photos",
+    "Story_tiles": r"K:\GIS3\Projects\GDE\Geospatial\NV_iGDE_Story_tiles.mbtiles",
+    "Hex_species": r"K:\GIS3\Projects\GDE\Geospatial\NV_iGDE_Hex_species.csv",
+    "Summary_cube_hexagons": r"K:\GIS3\Projects\GDE\Geospatial\NV_iGDE_Summary_cube_hexagons.sqlite",
+    "Summary_cube_hexagons_csv": r"K:\GIS3\Projects\GDE\Geospatial\NV_iGDE_Summary_cube_hexagons.csv",
+    "Summary_cube_hydrographic_areas": r"K:\GIS3\Projects\GDE\Geospatial\NV_iGDE_Summary_cube_hydrographic_areas.sqlite",
+    "Summary_cube_hydrographic_areas_csv": r"K:\GIS3\Projects\GDE\Geospatial\NV_iGDE_Summary_cube_hydrographic_areas.csv",
+    "Hexagons_GDE_systems": r"K:\GIS3\Projects\GDE\Geospatial\NV_iGDE_Hexagons_GDE_systems.csv",
+    "HydrographicAreas_GDE_systems": r"K:\GIS3\Projects\GDE\Geospatial\NV_iGDE_HydrographicAreas_GDE_systems.csv",
+}
+
+# Source datasets and lookup tables read by the scripts
+NHD_GDB = r"K:\GIS3\States\NV\NHD\NHD_H_Nevada_State_GDB.gdb"
+NV_BOUNDARY = r"K:\GIS3\States\NV\Nevada_83.shp"
+TABLES = r"K:\GIS3\Projects\GDE\Tables"
+LAYERS = r"K:\GIS3\Projects\GDE\Geospatial\Geodatabase_Layers"
+HEXAGONS = LAYERS + r"\GDE_Boundaries\nv_chat_polygons.shp"
+HYDROBASINS = LAYERS + r"\GDE_Boundaries\NDWR_HydroBasins.shp"
+NNHP = r"K:\GIS3\States\NV\NNHP_DONOTSHARE"
+LANDFIRE_BPS = r"K:\GIS3\States\NV\Landfire_BPS_NV\US_140BPS_20180618\grid\us_140bps"
+
+#-------------------------------------------------------------------------------
+# Stage definitions
+
+class Stage(object):
+
+    # run is either a script file name (run as __main__) or "module:function"
+    # sources are external datasets/CSVs hashed into the build key; params are stage settings also hashed,
+    # and are passed to scripts as GDE_<PARAM> environment variables
+    def __init__(self, name, run, inputs=(), outputs=(), sources=(), params=None):
+        self.name = name
+        self.run = run
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.sources = list(sources)
+        self.params = dict(params or {})
+
+    def __repr__(self):
+        return "Stage({!r})".format(self.name)
+
+# "Template" stands for the empty iGDE geodatabase; builders fill in its layers. The empty story map geodatabase
+# is made with it, and each story map unit set copies its summary layer into it.
+# NOTE: the builders write to different feature classes of the same file geodatabase, which file geodatabases
+# allow from separate processes; they must not share intermediate names in NV_GDE_Template_Temp.gdb.
+STAGES = [
+    Stage("template", "Create_GDE_Template_clean.py", [], ["Template", "Source_tbl", "Story_gdb"],
+          [TABLES + r"\gde_source_tbl_050919.csv"]),
+    Stage("wetlands", "GDE_Wetlands_clean.py", ["Template"], ["Wetlands"],
+          [LAYERS + r"\GDE_Wetlands\NVwetV1d.gdb"]),
+    Stage("lakes_playas", "GDE_LakesPlayas_clean.py", ["Template"], ["Lakes_Playas"],
+          [NHD_GDB, NV_BOUNDARY, TABLES + r"\NHD_Waterbody_lut.csv"]),
+    Stage("rivers", "GDE_Rivers_clean.py", ["Template"], ["Rivers_Streams"],
+          [NHD_GDB, NV_BOUNDARY, TABLES + r"\NV_GDE_Major_RiversStreams.csv"]),
+    Stage("springs", "GDE_Springs_clean.py", ["Template"], ["Springs"],
+          [r"K:\GIS3\States_WIP\NV\Hydrology\Springs\Nevada_Springs_Apr_21_2019.gdb"]),
+    Stage("species", "GDE_Species_clean.py", ["Template"], ["Species", "Species_tbl", "Hex_species"],
+          [HEXAGONS, NNHP + r"\TNC_GDE_2019", NNHP + r"\TNC_GDE_April_2019_DS_poly",
+           LAYERS + r"\GDE_Species\Endemic_corrections_ESM_NNHP.csv"]),
+    # The TNC BpS mosaic is also read by the story map GDE system histograms
+    Stage("phreatophytes", "GDE_Phreatophytes_clean.py", ["Template"], ["Phreatophytes", "TNC_BpS_Mosaic"],
+          [LAYERS + r"\GDE_Vegetation\TNCData\ReclassedRasters", TABLES + r"\TNC_Raster_GDE_Systems.csv",
+           TABLES + r"\GDE_Phreatophyte_NameCodeGroup.csv", TABLES + r"\Landfire_TNC_GDE_lut.csv",
+           LANDFIRE_BPS,
+           LAYERS + r"\GDE_Vegetation\NV_ETunit_2019_package_updates\NV_ETunit_2019.shp", NV_BOUNDARY]),
+    # One story map stage per unit set; the two share no outputs, so they run side by side
+    Stage("story_map_hexagons", "GDE_StoryMapLayers_clean.py",
+          ["Story_gdb", "Phreatophytes", "TNC_BpS_Mosaic", "Wetlands", "Springs", "Lakes_Playas", "Rivers_Streams"],
+          ["NV_Hexagons", "Summary_cube_hexagons", "Summary_cube_hexagons_csv", "Hexagons_GDE_systems"],
+          [HEXAGONS, TABLES + r"\TNC_Raster_GDE_Systems.csv", TABLES + r"\Landfire_TNC_GDE_lut.csv", LANDFIRE_BPS],
+          {"unit_set": "hexagons"}),
+    Stage("story_map_hydrobasins", "GDE_StoryMapLayers_clean.py",
+          ["Story_gdb", "Phreatophytes", "TNC_BpS_Mosaic", "Wetlands", "Springs", "Lakes_Playas", "Rivers_Streams"],
+          ["NV_HydrographicAreas", "Summary_cube_hydrographic_areas", "Summary_cube_hydrographic_areas_csv",
+           "HydrographicAreas_GDE_systems"],
+          [HYDROBASINS, TABLES + r"\TNC_Raster_GDE_Systems.csv", TABLES + r"\Landfire_TNC_GDE_lut.csv", LANDFIRE_BPS],
+          {"unit_set": "hydrographic_areas"}),
+    # Photo points are attributed by hand, so this stage has no sources to hash
+    Stage("story_map_photos", "GDE_StoryMapPhotos_clean.py", ["Story_gdb"], ["NV_Photos"]),
+    Stage("story_map_tiles", "GDE_VectorTiles_clean.py", ["NV_Hexagons", "NV_HydrographicAreas", "NV_Photos"],
+          ["Story_tiles"]),
+]
+
+#-------------------------------------------------------------------------------
+# Graph checks
+
+# Map each dataset to the stage that produces it; raises if two stages write the same dataset
+def producers(stages):
+    made_by = {}
+    for stage in stages:
+        for out in stage.outputs:
+            if out in made_by:
+                raise ValueError("{} is produced by both {} and {}".format(out, made_by[out].name, stage.name))
+            made_by[out] = stage
+    return made_by
+
+# Stages each stage waits on. With strict=False, inputs produced outside the given stages
+# are treated as already built (used when rerunning part of the pipeline).
+def dependencies(stages, strict=True):
+    made_by = producers(stages)
+    deps = {}
+    for stage in stages:
+        needed = set()
+        for name in stage.inputs:
+            if name in made_by:
+                needed.add(made_by[name].name)
+            elif strict:
+                raise ValueError("{} needs {}, which no stage produces".format(stage.name, name))
+        deps[stage.name] = needed
+    return deps
+
+# Stages grouped into waves that could run together; raises on a cycle
+def waves(stages, strict=True):
+    deps = dependencies(stages, strict)
+    done = set()
+    result = []
+    remaining = [s.name for s in stages]
+    while remaining:
+        ready = [name for name in remaining if deps[name] <= done]
+        if not ready:
+            raise ValueError("Dependency cycle among stages: {}".format(", ".join(remaining)))
+        result.append(ready)
+        done.update(ready)
+        remaining = [name for name in remaining if name not in done]
+    return result
+
+# The named stages plus everything downstream of them
+def downstream(stages, names):
+    deps = dependencies(stages)
+    selected = set(names)
+    changed = True
+    while changed:
+        changed = False
+        for stage in stages:
+            if stage.name not in selected and deps[stage.name] & selected:
+                selected.add(stage.name)
+                changed = True
+    return [s for s in stages if s.name in selected]
+
+#-------------------------------------------------------------------------------
+# Execution
+
+# Runs in a worker process; returns (name, state, seconds, error text or None).
+# job carries the build cache decision made by the orchestrator:
+#   {"reuse": bool, "stored": bool, "cache_gdb": path or None, "paths": [output paths]}
+def runStage(stage, job=None):
+    start = time.time()
+    state = "done"
+    try:
+        if job and job["reuse"] and buildcache.outputsExist(job["paths"]):
+            state = "cached"
+        elif job and job["reuse"] and job["stored"]:
+            buildcache.restoreOutputs(job["paths"], job["cache_gdb"])
+            state = "restored"
+        else:
+            if job:
+                buildcache.truncateOutputs(job["paths"])
+            if ":" in stage.run:
+                module_name, func_name = stage.run.split(":")
+                module = __import__(module_name)
+                getattr(module, func_name)()
+            else:
+                # Scripts use relative paths to their own folder and read their settings from the environment
+                # (the worker's sys.argv is the orchestrator's, so it is reset to the script alone)
+                os.chdir(SCRIPT_DIR)
+                for key, value in stage.params.items():
+                    os.environ["GDE_" + key.upper()] = str(value)
+                sys.argv = [os.path.join(SCRIPT_DIR, stage.run)]
+                runpy.run_path(sys.argv[0], run_name="__main__")
+            if job and job["cache_gdb"]:
+                buildcache.storeOutputs(job["paths"], job["cache_gdb"])
+        return (stage.name, state, time.time() - start, None)
+    except BaseException:
+        return (stage.name, "failed", time.time() - start, traceback.format_exc())
+
+# Build keys for every stage in dependency order
+def stageKeys(stages, cache):
+    deps = dependencies(stages, strict=False)
+    keys = {}
+    for wave in waves(stages, strict=False):
+        for name in wave:
+            stage = [s for s in stages if s.name == name][0]
+            keys[name] = buildcache.stageKey(stage, [keys[d] for d in deps[name]], cache.memo, SCRIPT_DIR)
+    return keys
+
+FINISHED = ("done", "cached", "restored")
+FAILED = ("failed", "skipped")
+
+def _executor(workers):
+    # A fresh process per stage so arcpy environment settings never leak between scripts
+    context = multiprocessing.get_context("spawn")
+    try:
+        return ProcessPoolExecutor(max_workers=workers, mp_context=context, max_tasks_per_child=1)
+    except TypeError: # Python < 3.11
+        return ProcessPoolExecutor(max_workers=workers, mp_context=context)
+
+# Run the given stages, starting each one as soon as its producers have finished.
+# Stages whose inputs come from a stage outside the selection are treated as already satisfied.
+# cache is a GDE_BuildCache_clean.BuildCache or None; store=False skips copying outputs into the cache.
+# Returns a dict of stage name -> (state, seconds, error) where state is
+# "done", "cached" (key unchanged, outputs in place), "restored" (copied back from the cache), "failed" or "skipped"
+def runPipeline(stages=None, workers=None, run_stage=runStage, cache=None, store=True):
+    stages = list(STAGES if stages is None else stages)
+    deps = dependencies(stages, strict=False)
+    by_name = dict((s.name, s) for s in stages)
+    waves(stages, strict=False) # fail fast on cycles
+
+    # Keys always chain through the full graph so a partial rerun sees the same keys as a full build
+    keys = {}
+    if cache:
+        keys = stageKeys(STAGES if all(s in STAGES for s in stages) else stages, cache)
+    jobs = {}
+    for stage in stages:
+        if not cache:
+            jobs[stage.name] = None
+            continue
+        key = keys[stage.name]
+        paths = [OUTPUT_PATHS[out] for out in stage.outputs if out in OUTPUT_PATHS]
+        jobs[stage.name] = {"reuse": cache.lastKey(stage.name) == key, "stored": cache.isStored(stage.name, key),
+                            "cache_gdb": cache.cacheGdb(stage.name, key) if store else None, "paths": paths}
+
+    status = {}
+    pending = [s.name for s in stages]
+    running = {}
+    workers = workers or min(len(stages), os.cpu_count() or 1)
+    with _executor(workers) as pool:
+        while pending or running:
+            # Skip anything downstream of a failure
+            for name in list(pending):
+                bad = [d for d in deps[name] if status.get(d, ("",))[0] in FAILED]
+                if bad:
+                    status[name] = ("skipped", 0.0, "upstream stage {} did not finish".format(bad[0]))
+                    pending.remove(name)
+                    print("Skipping {} ({} did not finish)".format(name, bad[0]))
+
+            # Start every stage whose producers are done
+            for name in list(pending):
+                if all(status.get(d, ("",))[0] in FINISHED for d in deps[name]):
+                    print("Starting {}...".format(name))
+                    running[pool.submit(run_stage, by_name[name], jobs[name])] = name
+                    pending.remove(name)
+
+            if not running:
+                break
+            finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                stage_name, state, seconds, error = future.result()
+                status[name] = (state, seconds, error)
+                if error:
+                    print("{} failed after {:.1f} s\n{}".format(name, seconds, error))
+                    continue
+                print("{} {} in {:.1f} s".format(name, state, seconds))
+                if cache:
+                    job = jobs[name]
+                    stored = bool(job["cache_gdb"]) if state == "done" else job["stored"]
+                    cache.record(name, keys[name], stored)
+    return status
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the NV iGDE scripts as a dependency graph")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--only", help="comma separated stage names; downstream stages are included")
+    parser.add_argument("--dry-run", action="store_true", help="print the stage waves and exit")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="build cache folder")
+    parser.add_argument("--no-cache", action="store_true", help="rebuild every selected stage")
+    parser.add_argument("--no-store", action="store_true", help="skip unchanged stages but do not copy outputs into the cache")
+    args = parser.parse_args(argv)
+
+    stages = STAGES
+    if args.only:
+        names = [n.strip() for n in args.only.split(",") if n.strip()]
+        unknown = [n for n in names if n not in set(s.name for s in STAGES)]
+        if unknown:
+            parser.error("unknown stage {} (choose from {})".format(", ".join(unknown), ", ".join(s.name for s in STAGES)))
+        stages = downstream(STAGES, names)
+
+    if args.dry_run:
+        for i, wave in enumerate(waves(stages, strict=False)):
+            print("Wave {}: {}".format(i + 1, ", ".join(wave)))
+        return 0
+
+    cache = None if args.no_cache else buildcache.BuildCache(args.cache_dir)
+    status = runPipeline(stages, args.workers, cache=cache, store=not args.no_store)
+    for name in [s.name for s in stages]:
+        state, seconds, error = status.get(name, ("skipped", 0.0, None))
+        print("{:<20} {:<8} {:>8.1f} s".format(name, state, seconds))
+    return 0 if all(v[0] in FINISHED for v in status.values()) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+# END
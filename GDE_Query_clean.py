@@ -0,0 +1,350 @@
+#-------------------------------------------------------------------------------
+# Name:        NV iGDE Database - GDE lookup
+# Purpose:     Answer "which GDEs are within this distance of this point?" against the finished iGDE layers
+#              (Springs, Wetlands, Phreatophytes, Lakes_Playas, Rivers_Streams) without selections in ArcMap.
+#              Each layer is held in a geometry store (GDE_GeometryStore_clean.py) and indexed with a packed
+#              R-tree: boxes sorted into leaves by Sort-Tile-Recursive and every level kept as one NumPy array, so
+#              a query walks a handful of vectorized comparisons. Candidates are then measured exactly (distance
+#              to the point, line or polygon; zero inside a polygon). Batch queries run thousands of points
+#              through the tree together, for screening water-right applications. The saved stores are rebuilt
+#              when any file of the source geodatabase has changed size or modification time.
+# Modules: argparse; csv; hashlib; json; math; os; numpy; GDE_BuildCache_clean; GDE_Geometry_clean;
+#          GDE_GeometryStore_clean; arcpy (to read the layers)
+#
+# Usage:       python GDE_Query_clean.py --lat 39.53 --lon -119.81 --radius 1000
+#              python GDE_Query_clean.py --csv wells.csv --radius 1000 --out wells_gdes.csv
+#              (wells.csv has LATITUDE and LONGITUDE columns, or X and Y in NAD 1983 UTM Zone 11N)
+#
+#              index = GDEIndex.fromDatabase()            # or GDEIndex.load(QUERY_CACHE)
+#              hits = index.search(x, y, 1000.0)         # {layer: [(feature, distance m), ...]}
+#
+# Author:      sarah.byer
+#
+# Created:     October 2026
+# Copyright:   (c) sarah.byer 2026
+#-------------------------------------------------------------------------------
+
+import argparse, csv, hashlib, json, math, os
+import numpy as np
+
+from GDE_BuildCache_clean import datasetFiles
+from GDE_Geometry_clean import latLonToUtm
+from GDE_GeometryStore_clean import POINT, POLYGON, GeometryStore, _ranges, readFeatureClass
+
+GDE_GDB = r"K:\GIS3\Projects\GDE\Geospatial\NV_iGDE_050919.gdb"
+QUERY_CACHE = r"K:\GIS3\Projects\GDE\Geospatial\Build_Cache\query_stores"
+SOURCES_FILE = "sources.json" # geodatabase and source stamp the saved stores were read from
+
+# Layers searched and the fields returned with each hit
+QUERY_LAYERS = {
+    "Springs": ["SPRING_ID", "SPRING_NAME", "SPRING_TYPE1", "SOURCE_CODE"],
+    "Wetlands": ["WET_TYPE", "WET_SUBTYPE", "SOURCE_CODE"],
+    "Phreatophytes": ["PHR_TYPE", "PHR_GROUP", "SOURCE_CODE"],
+    "Lakes_Playas": ["BODY_NAME", "BODY_TYPE", "SOURCE_CODE"],
+    "Rivers_Streams": ["RIVER_NAME", "RIVER_TYPE", "SOURCE_CODE"],
+}
+
+NODE_SIZE = 16
+EMPTY_BOX = (np.inf, np.inf, -np.inf, -np.inf) # matches nothing (features with no geometry)
+
+#-------------------------------------------------------------------------------
+# Packed R-tree
+
+# Boxes of groups of node_size consecutive boxes
+def _groupBoxes(boxes, node_size):
+    pad = -len(boxes) % node_size
+    if pad:
+        boxes = np.vstack((boxes, np.tile(EMPTY_BOX, (pad, 1))))
+    groups = boxes.reshape(-1, node_size, 4)
+    return np.column_stack((groups[:, :, 0].min(axis=1), groups[:, :, 1].min(axis=1),
+                            groups[:, :, 2].max(axis=1), groups[:, :, 3].max(axis=1)))
+
+# Sort-Tile-Recursive order: vertical slices by x centre, each slice sorted by y centre
+def _strOrder(boxes, node_size):
+    n = len(boxes)
+    cx = np.nan_to_num((boxes[:, 0] + boxes[:, 2]) / 2.0, nan=np.inf)
+    cy = np.nan_to_num((boxes[:, 1] + boxes[:, 3]) / 2.0, nan=np.inf)
+    leaves = int(math.ceil(n / float(node_size)))
+    slice_size = int(math.ceil(math.sqrt(leaves))) * node_size
+    by_x = np.argsort(cx, kind="stable")
+    slice_id = np.empty(n, dtype=np.int64)
+    slice_id[by_x] = np.arange(n) // slice_size
+    return np.lexsort((cy, slice_id))
+
+class PackedRTree(object):
+
+    # bboxes: (n, 4) xmin, ymin, xmax, ymax; rows with NaN never match
+    def __init__(self, bboxes, node_size=NODE_SIZE):
+        boxes = np.array(bboxes, dtype=np.float64).reshape(-1, 4)
+        boxes[np.isnan(boxes).any(axis=1)] = EMPTY_BOX
+        self.node_size = node_size
+        self._slots = np.arange(node_size)
+        self.order = _strOrder(boxes, node_size)
+        level = boxes[self.order]
+        self.levels = [level]
+        while len(level) > 1:
+            level = _groupBoxes(level, node_size)
+            self.levels.append(level)
+        self._level_columns = None
+
+    def __len__(self):
+        return len(self.order)
+
+    def _columns(self, depth):
+        if self._level_columns is None:
+            self._level_columns = [np.ascontiguousarray(level.T) for level in self.levels]
+        return self._level_columns[depth]
+
+    def _children(self, nodes, depth):
+        children = (nodes[:, None] * self.node_size + self._slots).ravel()
+        return children, children < len(self.levels[depth - 1])
+
+    # Indices of the boxes intersecting box
+    def query(self, box):
+        if not len(self.order):
+            return np.zeros(0, dtype=np.int64)
+        xmin, ymin, xmax, ymax = box
+        nodes = np.zeros(1, dtype=np.int64)
+        for depth in range(len(self.levels) - 1, -1, -1):
+            b = self.levels[depth][nodes]
+            nodes = nodes[(b[:, 0] <= xmax) & (b[:, 2] >= xmin) & (b[:, 1] <= ymax) & (b[:, 3] >= ymin)]
+            if depth:
+                children, valid = self._children(nodes, depth)
+                nodes = children[valid]
+        return self.order[nodes]
+
+    # Many boxes (m, 4) at once: (query index, box index) of every intersecting pair
+    def queryMany(self, boxes):
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        if not len(self.order) or not len(boxes):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        queries = np.arange(len(boxes))
+        nodes = np.zeros(len(boxes), dtype=np.int64)
+        qx0, qy0, qx1, qy1 = np.ascontiguousarray(boxes.T)
+        for depth in range(len(self.levels) - 1, -1, -1):
+            # One side at a time on column arrays: each test gathers two vectors, and later tests see fewer pairs
+            x0, y0, x1, y1 = self._columns(depth)
+            for node_side, query_side, above in ((x0, qx1, False), (x1, qx0, True), (y0, qy1, False), (y1, qy0, True)):
+                a, b = node_side[nodes], query_side[queries]
+                keep = np.flatnonzero(a >= b if above else a <= b)
+                queries, nodes = queries[keep], nodes[keep]
+            if depth:
+                children, valid = self._children(nodes, depth)
+                queries = np.repeat(queries, self.node_size)[valid]
+                nodes = children[valid]
+        return queries, self.order[nodes]
+
+#-------------------------------------------------------------------------------
+# Exact distances
+
+# Distance from points (px[k], py[k]) to features ids[k] of a store; zero inside polygons
+def pairDistances(store, px, py, ids):
+    px, py, ids = np.asarray(px, dtype=np.float64), np.asarray(py, dtype=np.float64), np.asarray(ids, dtype=np.int64)
+    if not len(ids):
+        return np.zeros(0)
+    starts = store.ring_offsets[store.feature_offsets[ids]]
+    stops = store.ring_offsets[store.feature_offsets[ids + 1]]
+    coords = store.coords
+    if store.geometry_type == POINT:
+        out = np.full(len(ids), np.inf)
+        filled = stops > starts
+        pts = coords[starts[filled]]
+        out[filled] = np.hypot(pts[:, 0] - px[filled], pts[:, 1] - py[filled])
+        return out
+
+    # Every segment of every pair's feature; segments joining two rings are masked out
+    counts = np.maximum(stops - starts - 1, 0)
+    seg = _ranges(starts, counts)
+    pair = np.repeat(np.arange(len(ids)), counts)
+    ring_offsets = store.ring_offsets
+    after = np.minimum(np.searchsorted(ring_offsets, seg + 1), len(ring_offsets) - 1)
+    valid = ring_offsets[after] != seg + 1
+    x0, y0 = coords[seg, 0], coords[seg, 1]
+    x1, y1 = coords[seg + 1, 0], coords[seg + 1, 1]
+    qx, qy = px[pair], py[pair]
+    dx, dy = x1 - x0, y1 - y0
+    length2 = dx * dx + dy * dy
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = np.clip(np.where(length2 > 0, ((qx - x0) * dx + (qy - y0) * dy) / length2, 0.0), 0.0, 1.0)
+    d = np.where(valid, np.hypot(x0 + t * dx - qx, y0 + t * dy - qy), np.inf)
+
+    out = np.full(len(ids), np.inf)
+    filled = counts > 0
+    if filled.any():
+        first = np.concatenate(([0], np.cumsum(counts)[:-1]))[filled]
+        out[filled] = np.minimum.reduceat(d, first)
+        if store.geometry_type == POLYGON:
+            # Even-odd rule along a ray to +x
+            with np.errstate(invalid="ignore", divide="ignore"):
+                crosses = valid & ((y0 > qy) != (y1 > qy)) & (qx < x0 + (qy - y0) * dx / dy)
+            inside = np.add.reduceat(crosses.astype(np.int64), first) % 2 == 1
+            out[np.flatnonzero(filled)[inside]] = 0.0
+    return out
+
+#-------------------------------------------------------------------------------
+# Index over the iGDE layers
+
+def toUtm(xs, ys, latlon=False):
+    if not latlon:
+        return np.asarray(xs, dtype=np.float64), np.asarray(ys, dtype=np.float64)
+    # xs are longitudes and ys latitudes
+    utm = np.array([latLonToUtm(lat, lon) for lon, lat in zip(np.atleast_1d(xs), np.atleast_1d(ys))]).reshape(-1, 2)
+    return utm[:, 0], utm[:, 1]
+
+class GDEIndex(object):
+
+    # stores: {layer name: GeometryStore}
+    def __init__(self, stores, node_size=NODE_SIZE):
+        self.stores = dict(stores)
+        self.trees = dict((name, PackedRTree(store.bboxes, node_size)) for name, store in self.stores.items())
+
+    def __repr__(self):
+        return "GDEIndex({})".format(", ".join("{} {}".format(name, len(s)) for name, s in sorted(self.stores.items())))
+
+    @classmethod
+    def fromDatabase(cls, gdb=GDE_GDB, layers=QUERY_LAYERS):
+        return cls(dict((name, readFeatureClass(os.path.join(gdb, name), fields)) for name, fields in layers.items()))
+
+    def save(self, folder):
+        for name, store in self.stores.items():
+            store.save(os.path.join(folder, name))
+
+    @classmethod
+    def load(cls, folder, layers=QUERY_LAYERS):
+        return cls(dict((name, GeometryStore.load(os.path.join(folder, name))) for name in layers
+                        if os.path.isdir(os.path.join(folder, name))))
+
+    def _layers(self, layers):
+        return [name for name in (layers or sorted(self.stores)) if name in self.stores]
+
+    # Features whose bounding box meets box: {layer: feature indices}
+    def bbox(self, box, layers=None):
+        return dict((name, self.trees[name].query(box)) for name in self._layers(layers))
+
+    # Features within radius meters of (x, y): {layer: [(feature index, distance), ...] nearest first}.
+    # radius 0 returns the features that contain or touch the point. With latlon=True, x is the longitude
+    # and y the latitude.
+    def search(self, x, y, radius=0.0, layers=None, latlon=False):
+        (x,), (y,) = toUtm([x], [y], latlon)
+        hits = {}
+        for name in self._layers(layers):
+            ids = self.trees[name].query((x - radius, y - radius, x + radius, y + radius))
+            d = pairDistances(self.stores[name], np.full(len(ids), x), np.full(len(ids), y), ids)
+            keep = d <= radius
+            ids, d = ids[keep], d[keep]
+            order = np.argsort(d, kind="stable")
+            hits[name] = list(zip(ids[order].tolist(), d[order].tolist()))
+        return hits
+
+    # Point query: the features at (x, y)
+    def point(self, x, y, layers=None, latlon=False):
+        return self.search(x, y, 0.0, layers, latlon)
+
+    # search() for many points: {layer: (point indices, feature indices, distances)}
+    def searchMany(self, xs, ys, radius=0.0, layers=None, latlon=False):
+        xs, ys = toUtm(xs, ys, latlon)
+        boxes = np.column_stack((xs - radius, ys - radius, xs + radius, ys + radius))
+        hits = {}
+        for name in self._layers(layers):
+            q, ids = self.trees[name].queryMany(boxes)
+            d = pairDistances(self.stores[name], xs[q], ys[q], ids)
+            keep = d <= radius
+            hits[name] = (q[keep], ids[keep], d[keep])
+        return hits
+
+    def record(self, layer, i):
+        row = self.stores[layer].record(i)
+        del row["SHAPE"]
+        return row
+
+#-------------------------------------------------------------------------------
+# Command line
+
+# Hash of the name, size and modification time of every file in the geodatabase (lock files excluded)
+def sourceStamp(gdb):
+    base, files = datasetFiles(gdb)
+    h = hashlib.sha256()
+    for name in files:
+        st = os.stat(name)
+        h.update("{}:{}:{}\n".format(os.path.relpath(name, base), st.st_size, st.st_mtime_ns).encode("utf-8"))
+    return h.hexdigest()
+
+def _savedSources(cache):
+    try:
+        with open(os.path.join(cache, SOURCES_FILE)) as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+
+# Saved index if it was read from gdb as it is now, otherwise the layers are read again and saved.
+# Without access to gdb the saved index is used as is.
+def loadIndex(cache=QUERY_CACHE, gdb=GDE_GDB, rebuild=False):
+    stamp = sourceStamp(gdb) if os.path.exists(gdb) else None
+    if not rebuild and os.path.isdir(cache):
+        if stamp is None or _savedSources(cache) == {"gdb": gdb, "stamp": stamp}:
+            return GDEIndex.load(cache)
+        print("Source layers changed since the index was saved; rebuilding")
+    index = GDEIndex.fromDatabase(gdb)
+    index.save(cache)
+    with open(os.path.join(cache, SOURCES_FILE), "w") as f:
+        json.dump({"gdb": gdb, "stamp": stamp}, f)
+    return index
+
+def _readPoints(csv_file):
+    with open(csv_file, newline="") as f:
+        rows = list(csv.DictReader(f))
+    latlon = bool(rows) and "LATITUDE" in rows[0]
+    xs = [float(row["LONGITUDE"] if latlon else row["X"]) for row in rows]
+    ys = [float(row["LATITUDE"] if latlon else row["Y"]) for row in rows]
+    return rows, xs, ys, latlon
+
+def main():
+    parser = argparse.ArgumentParser(description="Find iGDE features near a point or a list of points")
+    parser.add_argument("--lat", type=float)
+    parser.add_argument("--lon", type=float)
+    parser.add_argument("--x", type=float, help="NAD 1983 UTM Zone 11N easting")
+    parser.add_argument("--y", type=float, help="NAD 1983 UTM Zone 11N northing")
+    parser.add_argument("--csv", help="CSV of points with LATITUDE/LONGITUDE or X/Y columns")
+    parser.add_argument("--out", help="CSV to write the batch results to")
+    parser.add_argument("--radius", type=float, default=1000.0, help="Search radius (m)")
+    parser.add_argument("--layers", nargs="*", choices=sorted(QUERY_LAYERS))
+    parser.add_argument("--gdb", default=GDE_GDB)
+    parser.add_argument("--cache", default=QUERY_CACHE, help="Folder of saved layer stores")
+    parser.add_argument("--rebuild", action="store_true", help="Re-read the layers from the geodatabase")
+    args = parser.parse_args()
+
+    index = loadIndex(args.cache, args.gdb, args.rebuild)
+    print(index)
+    if args.csv:
+        rows, xs, ys, latlon = _readPoints(args.csv)
+        hits = index.searchMany(xs, ys, args.radius, args.layers, latlon)
+        out_rows = []
+        for layer, (q, ids, d) in sorted(hits.items()):
+            for k, i, dist in zip(q.tolist(), ids.tolist(), d.tolist()):
+                out_row = dict(rows[k])
+                out_row.update({"LAYER": layer, "FEATURE": i, "DISTANCE_M": round(dist, 1)})
+                out_row.update(index.record(layer, i))
+                out_rows.append(out_row)
+        print("{} points, {} GDEs within {} m".format(len(rows), len(out_rows), args.radius))
+        if args.out:
+            fields = []
+            for row in out_rows:
+                fields.extend(k for k in row if k not in fields)
+            with open(args.out, "w", newline="") as f:
+                writer = csv.DictWriter(f, fields)
+                writer.writeheader()
+                writer.writerows(out_rows)
+        return
+    latlon = args.lat is not None
+    x, y = (args.lon, args.lat) if latlon else (args.x, args.y)
+    if x is None or y is None:
+        parser.error("give --lat/--lon, --x/--y or --csv")
+    for layer, found in sorted(index.search(x, y, args.radius, args.layers, latlon).items()):
+        print("{}: {}".format(layer, len(found)))
+        for i, dist in found:
+            print("    {:8.1f} m  {}".format(dist, index.record(layer, i)))
+
+if __name__ == "__main__":
+    main()
+
+# END
@@ -8,11 +8,12 @@
 # Copyright:   (c) sarah.byer 2019
 #-------------------------------------------------------------------------------
 
-# Import ArcGIS modules and check out spatial analyst extension
+# Import ArcGIS modules
 import arcpy, os
 from arcpy import env
-from arcpy.sa import *
-arcpy.CheckOutExtension("spatial")
+
+from GDE_Loader_clean import bulkLoad
+from GDE_Workspace_clean import IntermediateWorkspace
 
 # Path to temporary geodatabase
 path =  r"K:\GIS3\Projects\GDE\Geospatial\Geodatabase_Layers\NV_GDE_Template_Temp.gdb"
@@ -22,6 +23,9 @@ env.workspace = path
 env.overwriteOutput = True
 env.outputCoordinateSystem = arcpy.SpatialReference(26911) # Spatial reference NAD 1983 UTM Zone 11N. The code is '26911'
 
+# Intermediate NHD flowline selections and copies (GDE_Workspace_clean.py)
+ws = IntermediateWorkspace()
+
 #-------------------------------------------------------------------------------
 #-------------------------------------------------------------------------------
 
@@ -30,7 +34,7 @@ flowline = r"K:\GIS3\States\NV\NHD\NHD_H_Nevada_State_GDB.gdb\NHDFlowline"
 
 # Create flowline dataset with only perennial streams/rivers
 # https://nhd.usgs.gov/userguide.html
-flowline_copy = arcpy.CopyFeatures_management(flowline, "nhd_flowline_temp")
+flowline_copy = arcpy.CopyFeatures_management(flowline, ws.new("nhd_flowline_temp"))
 with arcpy.da.UpdateCursor(flowline_copy, ['FCode']) as cursor:
     for row in cursor:
         if row[0] != 46006:
@@ -42,7 +46,7 @@ del cursor
 # Create a flowline dataset with major Nevada rivers/streams
 
 # Make a copy of NHDFlowline
-flowline_major = arcpy.CopyFeatures_management(flowline, "nhd_flowline_major")
+flowline_major = arcpy.CopyFeatures_management(flowline, ws.new("nhd_flowline_major"))
 
 # Allowable FCode list
 fcodes = [55800, 46006] # Articifial Path, Stream/River Perennial
@@ -75,11 +79,13 @@ del cursor
 
 # Delete artificial path segment of the Quinn River that runs through Black Rock Desert by removing its permanent ID values
 permid_select = "Permanent_Identifier NOT BETWEEN '152068036' AND '152068098'"
-flowline_ids = arcpy.Select_analysis(flowline_major, "flowline_ids", permid_select)
+flowline_ids = arcpy.Select_analysis(flowline_major, ws.new("flowline_ids"), permid_select)
+ws.release(flowline_major)
 
 # Remove 'White River Wash' - not a major river
 wr_select = "GNIS_Name <> 'White River Wash'"
-flowline_select = arcpy.Select_analysis(flowline_ids, "flowline_select", wr_select)
+flowline_select = arcpy.Select_analysis(flowline_ids, ws.new("flowline_select"), wr_select)
+ws.release(flowline_ids)
 
 
 # Combine all-perennials with major streams/rivers by removing duplicates from all-perennials
@@ -94,7 +100,8 @@ len(set(major_ids)) == len(major_ids) # Check all ids are unique, this expressio
 
 
 # Copy the all-perennial feature class
-flowline_perennial = arcpy.Copy_management(flowline_copy, "flowline_perennial")
+flowline_perennial = arcpy.CopyFeatures_management(flowline_copy, ws.new("flowline_perennial"))
+ws.release(flowline_copy)
 
 # Count number of features and number of unique perennial IDs - should be equal
 count_peren = int(str(arcpy.GetCount_management(flowline_perennial)))
@@ -120,13 +127,15 @@ len(dupes)
 count_peren == int(str(arcpy.GetCount_management(flowline_perennial))) + len(dupes) # Should be True
 
 # Append all-perennial features to major rivers/streams feature class
-rivers = arcpy.Copy_management(flowline_select, "flowline_gdes")
+rivers = arcpy.CopyFeatures_management(flowline_select, ws.new("flowline_gdes"))
 arcpy.Append_management(flowline_perennial, rivers, "NO_TEST")
+ws.release(flowline_select, flowline_perennial)
 arcpy.GetCount_management(rivers)
 
 # Clip to Nevada
 nv = r"K:\GIS3\States\NV\Nevada_83.shp"
-river_nv = arcpy.Clip_analysis(rivers, nv, "flowline_gdes_nv")
+river_nv = arcpy.Clip_analysis(rivers, nv, ws.new("flowline_gdes_nv"))
+ws.release(rivers)
 
 # Calculate river length in miles
 arcpy.AddField_management(river_nv, "LENGTH_MI", "DOUBLE")
@@ -149,33 +158,9 @@ del cursor
 
 gde_rivers = r"K:\GIS3\Projects\GDE\Geospatial\NV_iGDE_050919.gdb\Rivers_Streams"
 
-# Define map fields to append river features to GDE River Template
-def mapFields(inlayer, infield, mapfield_name, mapfield_alias, mapfield_type): # mapFields function
-    fldMap = arcpy.FieldMap()
-    fldMap.addInputField(inlayer, infield)
-    mapOut = fldMap.outputField
-    mapOut.name, mapOut.alias, mapOut.type = mapfield_name, mapfield_alias, mapfield_type
-    fldMap.outputField = mapOut
-    return fldMap
-
-# Append NHD features to template feature class with field mappings
-name_map = mapFields(river_nv, "GNIS_Name", "RIVER_NAME", "River Name", "TEXT")
-type_map = mapFields(river_nv, "RIVER_TYPE", "RIVER_TYPE", "River Type", "TEXT")
-code_map = mapFields(river_nv, "FCode", "RIVER_CODE", "River Code", "LONG")
-length_map = mapFields(river_nv, "LENGTH_MI", "LENGTH_MI", "Length (miles)", "DOUBLE")
-perm_id_map = mapFields(river_nv, "Permanent_Identifier", "PERM_ID", "Permanent Identifier", "TEXT")
-fldMap_list = [name_map, type_map, code_map, length_map, perm_id_map]
-allFldMappings = arcpy.FieldMappings()
-for fm in fldMap_list:
-    allFldMappings.addFieldMap(fm)
-river_gde = arcpy.Append_management(river_nv, gde_rivers, "NO_TEST", allFldMappings)
-    
-# Populate source code field
+# Load NHD flowlines into the template feature class; the source code is filled in by the mapping
 # National Hydrography Dataset Flowline = "nhdf"
-with arcpy.da.UpdateCursor(river_gde, ['SOURCE_CODE']) as cursor:
-    for row in cursor:
-        row[0] = "nhdf"
-        cursor.updateRow(row)
-del cursor
+bulkLoad(river_nv, gde_rivers, "Rivers_Streams", "nhdf")
+ws.release(river_nv)
 
 # END
\ No newline at end of file
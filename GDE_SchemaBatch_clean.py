@@ -0,0 +1,140 @@
+#-------------------------------------------------------------------------------
+# Name:        NV iGDE Database - Batched schema changes
+# Purpose:     Collect the field adds, drops, renames and type changes for one dataset and apply them together,
+#              instead of one AddField/DeleteField call (and possibly one table rewrite) per field.
+#              apply() picks the cheapest way to get the final schema:
+#                - adds, drops and renames only: one DeleteField call for all drops, AlterField per rename (a
+#                  metadata change), one AddFields call for all adds
+#                - any type change: one rewrite into a new dataset with the final schema (rows copied with a
+#                  cursor pair, values cast to the new types), which then replaces the original
+# Modules: os; GDE_Schema_clean (field type names); arcpy (in apply)
+#
+# Usage:       SchemaBatch(gde_unit).add("AREA_SPR", "DOUBLE").add("GDE_COUNT", "LONG").apply()
+#              SchemaBatch(hydrobasin_new).drop(*drop_fields).apply()
+#              SchemaBatch(tbl).rename("COUNT_SNAME", "NNHP_COUNT").retype("HYD_AREA", "TEXT", 10).apply()
+#
+# Author:      sarah.byer
+#
+# Created:     October 2026
+# Copyright:   (c) sarah.byer 2026
+#-------------------------------------------------------------------------------
+
+import os
+
+from GDE_Schema_clean import FIELD_TYPES
+
+# Types a rewrite can carry over; other field types (Raster, ...) are rejected before anything is written
+FIELD_TYPES_IN = dict(FIELD_TYPES, Date="DATE", Guid="GUID", Blob="BLOB")
+
+# Cast a value to an AddField type for the rewrite; values that do not convert become null
+def castValue(value, field_type):
+    if value is None:
+        return None
+    try:
+        if field_type == "TEXT":
+            return str(value)
+        if field_type in ("DOUBLE", "FLOAT"):
+            return float(value)
+        if field_type in ("LONG", "SHORT"):
+            return int(float(value))
+    except (TypeError, ValueError):
+        return None
+    return value
+
+class SchemaBatch(object):
+
+    def __init__(self, dataset):
+        self.dataset = str(dataset)
+        self.adds = []      # [name, type, alias, length]
+        self.drops = []
+        self.renames = {}   # old name -> (new name, alias)
+        self.retypes = {}   # name -> (type, length)
+
+    def __repr__(self):
+        return "SchemaBatch({!r}: +{} -{} ~{} >{})".format(self.dataset, len(self.adds), len(self.drops),
+                                                           len(self.renames), len(self.retypes))
+
+    def add(self, name, field_type, alias=None, length=None):
+        self.adds.append([name, field_type, alias or name, length])
+        return self
+
+    def drop(self, *names):
+        self.drops.extend(n for n in names if n not in self.drops)
+        return self
+
+    def rename(self, name, new_name, alias=None):
+        self.renames[name] = (new_name, alias or new_name)
+        return self
+
+    def retype(self, name, field_type, length=None):
+        self.retypes[name] = (field_type, length)
+        return self
+
+    # Final schema as [old name or None, name, type, alias, length] from the current fields
+    def plan(self, fields):
+        existing = set(f.name for f in fields)
+        missing = [n for n in list(self.drops) + list(self.renames) + list(self.retypes) if n not in existing]
+        if missing:
+            raise ValueError("{} has no field(s) {}".format(self.dataset, ", ".join(missing)))
+        schema = []
+        for f in fields:
+            if f.type in ("OID", "Geometry", "GlobalID") or f.name in self.drops or f.name.upper().startswith("SHAPE_"):
+                continue
+            if f.name not in self.retypes and f.type not in FIELD_TYPES_IN:
+                raise ValueError("{} field {} has type {}, which a schema rewrite cannot copy; drop it in the same "
+                                 "batch".format(self.dataset, f.name, f.type))
+            name, alias = self.renames.get(f.name, (f.name, f.aliasName))
+            field_type, length = self.retypes.get(f.name, (FIELD_TYPES_IN.get(f.type), f.length if f.type == "String" else None))
+            schema.append([f.name, name, field_type, alias, length])
+        for name, field_type, alias, length in self.adds:
+            schema.append([None, name, field_type, alias, length])
+        return schema
+
+    def apply(self):
+        import arcpy
+        if not (self.adds or self.drops or self.renames or self.retypes):
+            return self.dataset
+        if self.retypes:
+            self._rewrite(self.plan(arcpy.ListFields(self.dataset)))
+        else:
+            if self.drops:
+                arcpy.DeleteField_management(self.dataset, self.drops)
+            for name, (new_name, alias) in self.renames.items():
+                arcpy.AlterField_management(self.dataset, name, new_name, alias)
+            if self.adds:
+                arcpy.AddFields_management(self.dataset, [[n, t, a, l] if l else [n, t, a] for n, t, a, l in self.adds])
+        self.adds, self.drops, self.renames, self.retypes = [], [], {}, {}
+        return self.dataset
+
+    # Copy the rows into a dataset with the final schema and swap it in for the original
+    def _rewrite(self, schema):
+        import arcpy
+        desc = arcpy.Describe(self.dataset)
+        workspace = os.path.dirname(self.dataset) or arcpy.env.workspace
+        name = os.path.basename(self.dataset)
+        tmp_name = os.path.basename(arcpy.CreateUniqueName(name + "_schema", workspace))
+        shape_type = getattr(desc, "shapeType", None)
+        if shape_type:
+            tmp = arcpy.CreateFeatureclass_management(workspace, tmp_name, shape_type.upper(),
+                                                      spatial_reference=desc.spatialReference,
+                                                      has_m="ENABLED" if desc.hasM else "DISABLED",
+                                                      has_z="ENABLED" if desc.hasZ else "DISABLED")[0]
+        else:
+            tmp = arcpy.CreateTable_management(workspace, tmp_name)[0]
+        arcpy.AddFields_management(tmp, [[n, t, a, l] if l else [n, t, a] for old, n, t, a, l in schema])
+
+        copied = [s for s in schema if s[0] is not None]
+        source = [s[0] for s in copied] + (["SHAPE@"] if shape_type else [])
+        target = [s[1] for s in copied] + (["SHAPE@"] if shape_type else [])
+        casts = [s[2] if s[0] in self.retypes else None for s in copied]
+        with arcpy.da.SearchCursor(self.dataset, source) as rows, arcpy.da.InsertCursor(tmp, target) as out:
+            for row in rows:
+                row = list(row)
+                for i, field_type in enumerate(casts):
+                    if field_type:
+                        row[i] = castValue(row[i], field_type)
+                out.insertRow(row)
+        arcpy.Delete_management(self.dataset)
+        arcpy.Rename_management(tmp, self.dataset)
+
+# END
@@ -0,0 +1,194 @@
+#-------------------------------------------------------------------------------
+# Name:        NV iGDE Database - Layer schemas and source mappings
+# Purpose:     Field definitions of every iGDE layer/table (used by Create_GDE_Template_clean.py) and the declarative
+#              source-to-iGDE column mapping for each source loaded into them. GDE_Loader_clean.py compiles a
+#              mapping into one projection and cast and writes the rows straight into the template layer.
+# Modules: none
+#
+# Author:      sarah.byer
+#
+# Created:     October 2026
+# Copyright:   (c) sarah.byer 2026
+#-------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------
+# iGDE template layers
+# Fields are [name, type, alias, (length)] in the order arcpy.AddFields_management takes them
+
+LAYER_FIELDS = {
+    "Phreatophytes": [['SOURCE_CODE', 'TEXT', 'Source Code', 10],
+                      ['PHR_TYPE', 'TEXT', 'Phreatophyte Type', 55],
+                      ['PHR_GROUP', 'TEXT', 'Phreatophyte Group', 20],
+                      ['COMMENTS', 'TEXT', 'Comments', 200]],
+    "Springs": [['SOURCE_CODE', 'TEXT', 'Source Code', 10],
+                ['SPRING_ID', 'LONG', 'Spring ID'],
+                ['SPRING_NAME', 'TEXT', 'Spring Name', 255],
+                ['SPRING_TYPE1', 'TEXT', 'Spring Type 1', 20],
+                ['SPRING_TYPE2', 'TEXT', 'Spring Type 2', 20],
+                ['IMAGE_LINK', 'TEXT', 'Image Hyperlink', 255],
+                ['SKETCH_LINK', 'TEXT', 'Sketch Hyperlink', 255],
+                ['LATITUDE', 'DOUBLE', 'Latitude'],
+                ['LONGITUDE', 'DOUBLE', 'Longitude'],
+                ['ELEVATION', 'DOUBLE', 'Elevation (m)'],
+                ['INV_STAT', 'TEXT', 'Inventory Status', 20],
+                ['SURV_COUNT', 'SHORT', 'Survey Count'],
+                ['FLOW_MEAN', 'DOUBLE', 'Flow Mean (L/s)'],
+                ['PH_MEAN', 'DOUBLE', 'pH Mean'],
+                ['WATER_TEMP_MEAN', 'DOUBLE', 'Water Temperature Mean (C)'],
+                ['SPEC_COND_MEAN', 'DOUBLE', 'Specific Conductance Mean (uS/cm)'],
+                ['ALKALINITY_MEAN', 'DOUBLE', 'Alkalinity Mean (mg/L)'],
+                ['SPRING_AREA', 'DOUBLE', 'Spring Area (m2)'],
+                ['VERT_COUNT', 'LONG', 'Vertebrate Species Count'],
+                ['INVERT_COUNT', 'LONG', 'Invertebrate Species Count'],
+                ['FLORA_COUNT', 'LONG', 'Plant Species Count'],
+                ['COMMENTS', 'TEXT', 'Comments', 200]],
+    "Wetlands": [['WET_TYPE', 'TEXT', 'Wetland Type', 30],
+                 ['WET_SUBTYPE', 'TEXT', 'Wetland Subtype', 30],
+                 ['SOURCE_CODE', 'TEXT', 'Source Code', 10],
+                 ['COMMENTS', 'TEXT', 'Comments', 200]],
+    "Lakes_Playas": [['PERM_ID', 'TEXT', 'Permanent Identifier', 255],
+                     ['BODY_NAME', 'TEXT', 'Waterbody Name', 200],
+                     ['BODY_TYPE', 'TEXT', 'Waterbody Type', 50],
+                     ['BODY_CODE', 'LONG', 'Waterbody Code'],
+                     ['BODY_DESC', 'TEXT', 'Waterbody Description', 200],
+                     ['AREA_ACRES', 'DOUBLE', 'Area (acres)'],
+                     ['SOURCE_CODE', 'TEXT', 'Source Code', 10],
+                     ['COMMENTS', 'TEXT', 'Comments', 200]],
+    "Rivers_Streams": [['PERM_ID', 'TEXT', 'Permanent Identifier', 255],
+                       ['RIVER_NAME', 'TEXT', 'River Name', 200],
+                       ['RIVER_CODE', 'LONG', 'River Code'],
+                       ['RIVER_TYPE', 'TEXT', 'River Type', 100],
+                       ['LENGTH_MI', 'DOUBLE', 'Length (miles)'],
+                       ['SOURCE_CODE', 'TEXT', 'Source Code', 10],
+                       ['COMMENTS', 'TEXT', 'Comments', 200]],
+    "Species_tbl": [['SCI_NAME', 'TEXT', 'Scientific Name', 80],
+                    ['COM_NAME', 'TEXT', 'Common Name', 80],
+                    ['MAJOR_GROUP', 'TEXT', 'Major Taxonomic Group', 20],
+                    ['MINOR_GROUP', 'TEXT', 'Minor Taxonomic Group', 20],
+                    ['NV_RANK', 'TEXT', 'NV Conservation Status Rank', 20],
+                    ['G_RANK', 'TEXT', 'Global Conservation Status Rank', 20],
+                    ['NV_STATUS', 'TEXT', 'NV Protection Status', 20],
+                    ['ESA_STATUS', 'TEXT', 'ESA Conservation Status', 20],
+                    ['BLM_STATUS', 'TEXT', 'BLM Conservation Status', 20],
+                    ['USFS_STATUS', 'TEXT', 'USFS Conservation Status', 20],
+                    ['NNPS_STATUS', 'TEXT', 'NNPS Conservation Status', 20],
+                    ['WAP2012', 'TEXT', 'WAP 2012 Species of Conservation Priority', 20],
+                    ['ENDEMISM', 'TEXT', 'Endemism', 20],
+                    ['NNHP_LIST', 'TEXT', 'NNHP List', 20],
+                    ['SOURCE_CODE', 'TEXT', 'Source Code', 10],
+                    ['COMMENTS', 'TEXT', 'Comments', 200]],
+    "Species": [['HEX_ID', 'LONG', 'Hexagon ID'],
+                ['COUNT_NNHP', 'LONG', 'NNHP Species Count'],
+                ['COUNT_EN', 'LONG', 'Endemic Species Count'],
+                ['SOURCE_CODE', 'TEXT', 'Source Code', 10],
+                ['COMMENTS', 'TEXT', 'Comments', 200]],
+    "Source_tbl": [['SOURCE_CODE', 'TEXT', 'Source Code', 10],
+                   ['SOURCE_NAME', 'TEXT', 'Source Name', 255],
+                   ['SOURCE_BODY', 'TEXT', 'Source Originating Body', 255],
+                   ['LAYER', 'TEXT', 'Layers Using Source', 80],
+                   ['SOURCE_LINK', 'TEXT', 'Source Link', 255],
+                   ['SOURCE_CITE', 'TEXT', 'Source Citation', 255],
+                   ['MAP_METHOD', 'TEXT', 'Mapping Method', 255],
+                   ['MAP_UNIT', 'DOUBLE', 'Minimum Mapping Unit'],
+                   ['COMMENTS', 'TEXT', 'Comments', 255],
+                   ['SOURCE_YEAR', 'LONG', 'SOURCE_YEAR']],
+}
+
+# Geometry type of each layer (None = table)
+LAYER_GEOMETRY = {
+    "Phreatophytes": "POLYGON",
+    "Springs": "POINT",
+    "Wetlands": "POLYGON",
+    "Lakes_Playas": "POLYGON",
+    "Rivers_Streams": "POLYLINE",
+    "Species_tbl": None,
+    "Species": "POLYGON",
+    "Source_tbl": None,
+}
+
+# Order the template script creates them in
+LAYER_ORDER = ["Phreatophytes", "Springs", "Wetlands", "Lakes_Playas", "Rivers_Streams", "Species_tbl", "Species", "Source_tbl"]
+
+#-------------------------------------------------------------------------------
+# Source mappings
+# SOURCE_MAPPINGS[layer][source] = {"fields": [(source field, iGDE field), ...], "constants": {iGDE field: value}}
+# Constants are filled in while the rows are loaded (no UpdateCursor pass afterwards).
+
+SOURCE_MAPPINGS = {
+    "Phreatophytes": {
+        # TNC GDE vegetation (GDE_Phreatophytes_clean.py)
+        "tnc": {"fields": [("SYS_NAME", "PHR_TYPE"), ("SYS_GROUP", "PHR_GROUP"), ("SOURCECODE", "SOURCE_CODE")],
+                "constants": {}},
+        # Landfire BpS phreatophytes; SYS_CODE is not carried over since the template has no PHR_CODE field
+        "lf": {"fields": [("SYS_NAME", "PHR_TYPE"), ("SYS_GROUP", "PHR_GROUP"), ("SOURCECODE", "SOURCE_CODE")],
+               "constants": {}},
+        # DRI groundwater discharge basins
+        "drip": {"fields": [("PHR_TYPE", "PHR_TYPE"), ("PHR_GROUP", "PHR_GROUP"), ("SOURCE_CODE", "SOURCE_CODE"),
+                            ("HYD_AREA_N", "COMMENTS")],
+                 "constants": {}},
+    },
+    "Springs": {
+        # Springs Stewardship Institute summarized sites (GDE_Springs_clean.py)
+        "ssi": {"fields": [("SOURCECODE", "SOURCE_CODE"), ("SiteID", "SPRING_ID"), ("ShortName", "SPRING_NAME"),
+                           ("SpringType1", "SPRING_TYPE1"), ("SpringType2", "SPRING_TYPE2"),
+                           ("CastImageHyperlink", "IMAGE_LINK"), ("CastSketchHyperlink", "SKETCH_LINK"),
+                           ("LatitudeDD", "LATITUDE"), ("LongitudeDD", "LONGITUDE"), ("ElevationM", "ELEVATION"),
+                           ("InventoryLevel", "INV_STAT"), ("SurveyCount", "SURV_COUNT"), ("Flow_Mean", "FLOW_MEAN"),
+                           ("pH_Mean", "PH_MEAN"), ("Water_Temp_Mean", "WATER_TEMP_MEAN"),
+                           ("Spec_Cond_Mean", "SPEC_COND_MEAN"), ("Alkalinity_Mean", "ALKALINITY_MEAN"),
+                           ("TotalAreaSQM", "SPRING_AREA"), ("COUNT_VertSciName", "VERT_COUNT"),
+                           ("COUNT_InvertSciName", "INVERT_COUNT"), ("COUNT_FloraSciName", "FLORA_COUNT")],
+                "constants": {}},
+    },
+    "Wetlands": {
+        # DRI wetlands (GDE_Wetlands_clean.py)
+        "driw": {"fields": [("WETLAND_TYPE", "WET_TYPE"), ("WETLAND_SUBTYPE", "WET_SUBTYPE"), ("SOURCECODE", "SOURCE_CODE")],
+                 "constants": {}},
+    },
+    "Lakes_Playas": {
+        # NHD waterbodies (GDE_LakesPlayas_clean.py)
+        "nhdw": {"fields": [("FCode", "BODY_CODE"), ("Type", "BODY_TYPE"), ("Description", "BODY_DESC"),
+                            ("GNIS_Name", "BODY_NAME"), ("Permanent_Identifier", "PERM_ID"), ("AREA_ACRES", "AREA_ACRES")],
+                 "constants": {"SOURCE_CODE": "nhdw"}},
+    },
+    "Rivers_Streams": {
+        # NHD flowlines (GDE_Rivers_clean.py)
+        "nhdf": {"fields": [("GNIS_Name", "RIVER_NAME"), ("RIVER_TYPE", "RIVER_TYPE"), ("FCode", "RIVER_CODE"),
+                            ("LENGTH_MI", "LENGTH_MI"), ("Permanent_Identifier", "PERM_ID")],
+                 "constants": {"SOURCE_CODE": "nhdf"}},
+    },
+    "Species_tbl": {
+        # Unique NNHP species (GDE_Species_clean.py)
+        "nnhp": {"fields": [("SNAME", "SCI_NAME"), ("SCOMNAME", "COM_NAME"), ("MAJORGROUP", "MAJOR_GROUP"),
+                            ("MINORGROUP", "MINOR_GROUP"), ("S_RANK", "NV_RANK"), ("G_RANK", "G_RANK"),
+                            ("NV_STAT", "NV_STATUS"), ("USESA_NV", "ESA_STATUS"), ("BLM_STAT", "BLM_STATUS"),
+                            ("USFS_STAT", "USFS_STATUS"), ("NNPS_STAT", "NNPS_STATUS"), ("WAP2012", "WAP2012"),
+                            ("ENDEMISM", "ENDEMISM"), ("NNHP_TRACK", "NNHP_LIST"), ("SOURCECODE", "SOURCE_CODE")],
+                 "constants": {}},
+    },
+    "Species": {
+        # NNHP species counts per hexagon (GDE_Species_clean.py)
+        "nnhp": {"fields": [("Hex_ID", "HEX_ID"), ("NNHP_COUNT", "COUNT_NNHP"), ("COUNT_EN", "COUNT_EN")],
+                 "constants": {"SOURCE_CODE": "nnhp"}},
+    },
+    "Source_tbl": {
+        # Source table csv (Create_GDE_Template_clean.py)
+        "csv": {"fields": [("SOURCE_CODE", "SOURCE_CODE"), ("SOURCE_NAME", "SOURCE_NAME"), ("SOURCE_BODY", "SOURCE_BODY"),
+                           ("LAYER", "LAYER"), ("SOURCE_LINK", "SOURCE_LINK"), ("SOURCE_CITE", "SOURCE_CITE"),
+                           ("MAP_METHOD", "MAP_METHOD"), ("MAP_UNIT", "MAP_UNIT"), ("COMMENTS", "COMMENTS"),
+                           ("SOURCE_YEAR", "SOURCE_YEAR")],
+                "constants": {}},
+    },
+}
+
+# arcpy.ListFields types and the AddField types that recreate them
+FIELD_TYPES = {"String": "TEXT", "Integer": "LONG", "SmallInteger": "SHORT", "Double": "DOUBLE", "Single": "FLOAT"}
+
+# Field definition of one iGDE field
+def layerField(layer, name):
+    for field in LAYER_FIELDS[layer]:
+        if field[0] == name:
+            return field
+    raise KeyError("{} has no field {}".format(layer, name))
+
+# END
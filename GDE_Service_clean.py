@@ -0,0 +1,230 @@
+#-------------------------------------------------------------------------------
+# Name:        NV iGDE Database - Query service
+# Purpose:     Serve the iGDE summaries over HTTP on a local machine, so partners can look up a hydrographic
+#              area, a hexagon, its species or the GDEs near a point without the story map or the whole database.
+#              Responses are JSON. Requests are handled by a fixed pool of threads, and responses are kept in an
+#              LRU cache keyed by the request path, since the data only change when the pipeline is rerun.
+#                /hydroarea/<HYD_AREA>            NV_HydrographicAreas summary fields
+#                /hexagon/<Hex_ID>                NV_Hexagons summary fields
+#                /hexagon/<Hex_ID>/species        species recorded in the hexagon (NV_iGDE_Hex_species.csv)
+#                /nearby?lat=..&lon=..&radius=..  GDEs within radius m (or x=..&y=.. in UTM 11N), see GDE_Query_clean.py
+#                /stats                           cache size, hits and misses
+# Modules: argparse; collections; concurrent.futures; csv; http.server; json; math; sys; threading; traceback;
+#          urllib; GDE_Query_clean; arcpy (to read the summary layers)
+#
+# Usage:       python GDE_Service_clean.py --port 8026 --workers 16 --cache-size 4096
+#              python GDE_LoadTest_clean.py --url http://localhost:8026 --clients 32 --seconds 20
+#
+# Author:      sarah.byer
+#
+# Created:     October 2026
+# Copyright:   (c) sarah.byer 2026
+#-------------------------------------------------------------------------------
+
+import argparse, csv, json, math, sys, threading, traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from GDE_Query_clean import QUERY_CACHE, loadIndex
+
+STORY_GDB = r"K:\GIS3\Projects\GDE\Geospatial\NV_iGDE_Story_061719.gdb"
+HEX_SPECIES = r"K:\GIS3\Projects\GDE\Geospatial\NV_iGDE_Hex_species.csv"
+
+PORT = 8026
+WORKERS = 16
+CACHE_SIZE = 4096
+MAX_RADIUS = 10000.0 # m
+
+#-------------------------------------------------------------------------------
+# Response cache
+
+class LRUCache(object):
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            if key in self.items:
+                self.items.move_to_end(key)
+                self.hits += 1
+                return self.items[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self.lock:
+            self.items[key] = value
+            self.items.move_to_end(key)
+            while len(self.items) > self.maxsize:
+                self.items.popitem(last=False)
+
+    def stats(self):
+        with self.lock:
+            return {"size": len(self.items), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+#-------------------------------------------------------------------------------
+# Data and request handling
+
+# Summary rows of a table: {id value: {field: value}} without the geometry fields
+def readSummaries(fc, id_field):
+    import arcpy
+    fields = [f.name for f in arcpy.ListFields(fc) if f.type not in ("Geometry", "OID", "Blob")
+              and not f.name.upper().startswith("SHAPE_")]
+    rows = {}
+    with arcpy.da.SearchCursor(fc, fields) as cursor:
+        for row in cursor:
+            record = dict(zip(fields, row))
+            rows[str(record[id_field])] = record
+    return rows
+
+# {Hex_ID: [{"SCI_NAME": .., "ENDEMISM": ..}, ...]} from the Species stage's CSV export
+def readHexSpecies(csv_file=HEX_SPECIES):
+    species = {}
+    with open(csv_file, newline="") as f:
+        for row in csv.DictReader(f):
+            species.setdefault(row["Hex_ID"], []).append({"SCI_NAME": row["SCI_NAME"], "ENDEMISM": row["ENDEMISM"]})
+    for names in species.values():
+        names.sort(key=lambda r: r["SCI_NAME"])
+    return species
+
+class NotFound(Exception):
+    pass
+
+class GDEService(object):
+
+    # hexagons/basins: {id: summary row}; hex_species: {Hex_ID: [species]}; index: GDE_Query_clean.GDEIndex or None
+    def __init__(self, hexagons, basins, hex_species, index=None, cache_size=CACHE_SIZE):
+        self.hexagons = hexagons
+        self.basins = basins
+        self.hex_species = hex_species
+        self.index = index
+        self.cache = LRUCache(cache_size)
+
+    @classmethod
+    def fromDatabase(cls, story_gdb=STORY_GDB, hex_species=HEX_SPECIES, query_cache=QUERY_CACHE, cache_size=CACHE_SIZE):
+        return cls(readSummaries(story_gdb + "\\NV_Hexagons", "Hex_ID"),
+                   readSummaries(story_gdb + "\\NV_HydrographicAreas", "HYD_AREA"),
+                   readHexSpecies(hex_species), loadIndex(query_cache), cache_size)
+
+    # (status, JSON body bytes) for a request path; successful responses are cached
+    def respond(self, path):
+        if path.rstrip("/") == "/stats":
+            return 200, json.dumps(self.cache.stats()).encode("utf-8")
+        body = self.cache.get(path)
+        if body is not None:
+            return 200, body
+        try:
+            body = json.dumps(self.route(path), default=str).encode("utf-8")
+        except NotFound as e:
+            return 404, json.dumps({"error": str(e)}).encode("utf-8")
+        except (ValueError, KeyError) as e:
+            return 400, json.dumps({"error": str(e)}).encode("utf-8")
+        except Exception as e:
+            traceback.print_exc(file=sys.stderr)
+            return 500, json.dumps({"error": "Internal error: {}".format(type(e).__name__)}).encode("utf-8")
+        self.cache.put(path, body)
+        return 200, body
+
+    def route(self, path):
+        url = urlsplit(path)
+        parts = [p for p in url.path.split("/") if p]
+        if len(parts) == 2 and parts[0] == "hydroarea":
+            return self._lookup(self.basins, parts[1], "HYD_AREA")
+        if len(parts) == 2 and parts[0] == "hexagon":
+            return self._lookup(self.hexagons, parts[1], "Hex_ID")
+        if len(parts) == 3 and parts[0] == "hexagon" and parts[2] == "species":
+            self._lookup(self.hexagons, parts[1], "Hex_ID")
+            species = self.hex_species.get(parts[1], [])
+            return {"Hex_ID": parts[1], "count": len(species), "species": species}
+        if len(parts) == 1 and parts[0] == "nearby":
+            return self.nearby(dict((k, v[0]) for k, v in parse_qs(url.query).items()))
+        raise NotFound("No endpoint {}".format(url.path))
+
+    def _lookup(self, rows, key, field):
+        if key not in rows:
+            raise NotFound("No {} {}".format(field, key))
+        return rows[key]
+
+    def nearby(self, query):
+        if self.index is None:
+            raise NotFound("The GDE index is not loaded")
+        radius = float(query.get("radius", 1000.0))
+        if not math.isfinite(radius) or radius < 0:
+            raise ValueError("radius must be a finite number of meters >= 0, not {}".format(query["radius"]))
+        radius = min(radius, MAX_RADIUS)
+        latlon = "lat" in query
+        x, y = (float(query["lon"]), float(query["lat"])) if latlon else (float(query["x"]), float(query["y"]))
+        hits = self.index.search(x, y, radius, latlon=latlon)
+        return {"radius": radius,
+                "layers": dict((layer, [dict(self.index.record(layer, i), DISTANCE_M=round(d, 1)) for i, d in found])
+                               for layer, found in hits.items())}
+
+#-------------------------------------------------------------------------------
+# HTTP server
+
+class GDERequestHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        status, body = self.server.service.respond(self.path)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+# HTTPServer that hands each connection to a fixed pool of threads
+class PooledHTTPServer(HTTPServer):
+
+    def __init__(self, address, service, workers=WORKERS):
+        HTTPServer.__init__(self, address, GDERequestHandler)
+        self.service = service
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        HTTPServer.server_close(self)
+        self.pool.shutdown(wait=True)
+
+def serve(service, host="localhost", port=PORT, workers=WORKERS):
+    server = PooledHTTPServer((host, port), service, workers)
+    print("Serving the iGDE on http://{}:{} with {} threads".format(host, server.server_address[1], workers))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Local HTTP query service for the iGDE summaries")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--workers", type=int, default=WORKERS, help="Request threads")
+    parser.add_argument("--cache-size", type=int, default=CACHE_SIZE, help="Responses kept in the LRU cache")
+    args = parser.parse_args()
+    serve(GDEService.fromDatabase(cache_size=args.cache_size), args.host, args.port, args.workers)
+
+if __name__ == "__main__":
+    main()
+
+# END
@@ -0,0 +1,205 @@
+#-------------------------------------------------------------------------------
+# Name:        NV iGDE Database - Springs delta ingest
+# Purpose:     Apply a new SSI release to the existing iGDE Springs layer as inserts, updates and deletes
+#              instead of re-copying the summarized table and re-appending every spring (GDE_Springs_clean.py).
+#              Sites are matched on SPRING_ID/SiteID and compared by row key; taxa counts are only recomputed
+#              for sites whose taxa records changed since the last run, and "No Spring" sites are removed.
+# Modules: argparse; hashlib; json; os; GDE_StageEngines_clean; arcpy (for reading and writing the layers)
+#
+# Usage:       python GDE_SpringsDelta_clean.py K:\GIS3\States_WIP\NV\Hydrology\Springs\Nevada_Springs_May_19_2019.gdb
+#              python GDE_SpringsDelta_clean.py <release gdb> --dry-run
+#
+# Author:      sarah.byer
+#
+# Created:     October 2026
+# Copyright:   (c) sarah.byer 2026
+#-------------------------------------------------------------------------------
+
+import argparse, hashlib, json, os, sys
+
+from GDE_StageEngines_clean import springRecord, taxaCounts, NO_SPRING
+
+# iGDE Springs layer and the file that remembers each site's taxa digest between releases
+gde_springs = r"K:\GIS3\Projects\GDE\Geospatial\NV_iGDE_050919.gdb\Springs"
+state_file = r"K:\GIS3\Projects\GDE\Geospatial\Geodatabase_Layers\GDE_Springs\springs_delta_state.json"
+
+# iGDE Springs fields written by the delta (everything springRecord maps); counts are compared separately
+SPRING_FIELDS = ["SOURCE_CODE", "SPRING_ID", "SPRING_NAME", "SPRING_TYPE1", "SPRING_TYPE2", "IMAGE_LINK",
+                 "SKETCH_LINK", "LATITUDE", "LONGITUDE", "ELEVATION", "INV_STAT", "SURV_COUNT", "FLOW_MEAN",
+                 "PH_MEAN", "WATER_TEMP_MEAN", "SPEC_COND_MEAN", "ALKALINITY_MEAN", "SPRING_AREA"]
+COUNT_FIELDS = ["VERT_COUNT", "INVERT_COUNT", "FLORA_COUNT"]
+
+# SSI summarized table fields read for each site
+SSI_FIELDS = ["SiteID", "ShortName", "SpringType1", "SpringType2", "CastImageHyperlink", "CastSketchHyperlink",
+              "LatitudeDD", "LongitudeDD", "ElevationM", "InventoryLevel", "SurveyCount", "Flow_Mean", "pH_Mean",
+              "Water_Temp_Mean", "Spec_Cond_Mean", "Alkalinity_Mean", "TotalAreaSQM"]
+TAXA_FIELDS = {"vert": ["SiteID", "FaunaGenus", "FaunaSpecies"],
+               "invert": ["SiteID", "Genus", "Species"],
+               "flora": ["SiteID", "Genus", "Species", "FloraSpecies"]}
+TAXA_TABLES = {"vert": "_Summarized_TaxaVert_by_Site", "invert": "_Summarized_TaxaInvert_by_Site",
+               "flora": "_Summarized_TaxaFlora_by_Site"}
+
+#-------------------------------------------------------------------------------
+# Hashing
+
+def _norm(value):
+    # Round floats so values that went through the geodatabase compare equal
+    if isinstance(value, float):
+        return round(value, 6)
+    return value
+
+# Comparable key of a Springs record's attributes (without counts) and location
+def rowKey(record):
+    values = [_norm(record.get(f)) for f in SPRING_FIELDS]
+    x, y = record["SHAPE"]
+    values.append((round(x, 3), round(y, 3)))
+    return tuple(values)
+
+# Digest of each site's raw taxa rows, all three tables together, in table order
+# (a reordered table only costs a recount, never a missed change)
+def taxaDigests(taxa):
+    rows_by_site = {}
+    for key in sorted(TAXA_FIELDS):
+        fields = TAXA_FIELDS[key][1:]
+        for row in taxa[key]:
+            rows_by_site.setdefault(row["SiteID"], []).append((key,) + tuple(row[f] for f in fields))
+    digests = {}
+    for site_id, rows in rows_by_site.items():
+        digests[str(site_id)] = hashlib.sha1(repr(rows).encode("utf-8")).hexdigest()
+    return digests
+
+#-------------------------------------------------------------------------------
+# Delta
+
+# current: {SPRING_ID: Springs record (SPRING_FIELDS + COUNT_FIELDS + SHAPE)}
+# sites: SSI summarized rows (SSI_FIELDS + SHAPE); taxa: {"vert"|"invert"|"flora": rows}
+# state: {"taxa": {SiteID: digest}} from the last run, or None to recompute every site's counts
+# Returns (inserts, updates, deletes, new_state, counted) where inserts/updates are Springs records,
+# deletes are SPRING_IDs and counted is the number of sites whose taxa counts were recomputed
+def springsDelta(current, sites, taxa, state=None):
+    new_digests = taxaDigests(taxa)
+    old_digests = (state or {}).get("taxa")
+
+    live = dict((site["SiteID"], site) for site in sites if str(site["InventoryLevel"]) not in NO_SPRING)
+
+    # Sites whose taxa changed (or all of them without a previous state)
+    if old_digests is None:
+        taxa_changed = set(live)
+    else:
+        taxa_changed = set(sid for sid in live if new_digests.get(str(sid)) != old_digests.get(str(sid)))
+    # New sites always need counts
+    taxa_changed.update(sid for sid in live if sid not in current)
+
+    counts = taxaCounts(taxa["vert"], taxa["invert"], taxa["flora"], site_ids=taxa_changed)
+
+    inserts, updates = [], []
+    for sid, site in live.items():
+        old = current.get(sid)
+        if old is None:
+            inserts.append(springRecord(site, counts))
+            continue
+        if sid in taxa_changed:
+            record = springRecord(site, counts)
+        else:
+            # Taxa unchanged: carry the stored counts forward
+            record = springRecord(site, {"vert": {}, "invert": {}, "flora": {}})
+            for f in COUNT_FIELDS:
+                record[f] = old.get(f)
+        if rowKey(record) != rowKey(old) or any(record[f] != old.get(f) for f in COUNT_FIELDS):
+            updates.append(record)
+
+    # Springs no longer in the release, and sites now marked "No Spring"
+    deletes = sorted(sid for sid in current if sid not in live)
+
+    new_state = {"taxa": dict((k, v) for k, v in new_digests.items() if int(k) in live)}
+    return inserts, updates, deletes, new_state, len(taxa_changed)
+
+#-------------------------------------------------------------------------------
+# Reading and writing with arcpy
+
+def _readTable(table, fields, shape=False, spatial_reference=None):
+    import arcpy
+    cursor_fields = fields + (["SHAPE@XY"] if shape else [])
+    rows = []
+    with arcpy.da.SearchCursor(table, cursor_fields, spatial_reference=spatial_reference) as cursor:
+        for row in cursor:
+            record = dict(zip(fields, row[:len(fields)]))
+            if shape:
+                record["SHAPE"] = row[-1]
+            rows.append(record)
+    return rows
+
+def readRelease(release_gdb):
+    import arcpy
+    base = os.path.splitext(os.path.basename(release_gdb.rstrip("\\/")))[0]
+    utm = arcpy.SpatialReference(26911)
+    sites = _readTable(os.path.join(release_gdb, base + "_Summarized"), SSI_FIELDS, True, utm)
+    taxa = {}
+    for key, suffix in TAXA_TABLES.items():
+        taxa[key] = _readTable(os.path.join(release_gdb, base + suffix), TAXA_FIELDS[key])
+    return sites, taxa
+
+def readCurrent(springs_fc):
+    rows = _readTable(springs_fc, SPRING_FIELDS + COUNT_FIELDS, True)
+    return dict((row["SPRING_ID"], row) for row in rows)
+
+def _idList(ids):
+    return "SPRING_ID IN ({})".format(",".join(str(int(i)) for i in ids))
+
+def applyDelta(springs_fc, inserts, updates, deletes, batch=500):
+    import arcpy
+    fields = SPRING_FIELDS + COUNT_FIELDS
+    edit = arcpy.da.Editor(os.path.dirname(springs_fc))
+    edit.startEditing(False, False)
+    edit.startOperation()
+    try:
+        # Deletes and updates in batches of ids so each cursor only visits the affected rows
+        for i in range(0, len(deletes), batch):
+            with arcpy.da.UpdateCursor(springs_fc, ["SPRING_ID"], _idList(deletes[i:i + batch])) as cursor:
+                for row in cursor:
+                    cursor.deleteRow()
+        by_id = dict((r["SPRING_ID"], r) for r in updates)
+        ids = sorted(by_id)
+        for i in range(0, len(ids), batch):
+            with arcpy.da.UpdateCursor(springs_fc, fields + ["SHAPE@XY"], _idList(ids[i:i + batch])) as cursor:
+                for row in cursor:
+                    record = by_id[row[1]]
+                    cursor.updateRow([record[f] for f in fields] + [record["SHAPE"]])
+        with arcpy.da.InsertCursor(springs_fc, fields + ["SHAPE@XY"]) as cursor:
+            for record in inserts:
+                cursor.insertRow([record[f] for f in fields] + [record["SHAPE"]])
+        edit.stopOperation()
+        edit.stopEditing(True)
+    except Exception:
+        edit.stopOperation()
+        edit.stopEditing(False)
+        raise
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply an SSI release to the iGDE Springs layer as a delta")
+    parser.add_argument("release_gdb", help="SSI release geodatabase, e.g. Nevada_Springs_Apr_21_2019.gdb")
+    parser.add_argument("--springs", default=gde_springs, help="iGDE Springs feature class")
+    parser.add_argument("--state", default=state_file, help="taxa digest state file")
+    parser.add_argument("--dry-run", action="store_true", help="report the delta without editing")
+    args = parser.parse_args(argv)
+
+    state = None
+    if os.path.exists(args.state):
+        with open(args.state) as f:
+            state = json.load(f)
+    sites, taxa = readRelease(args.release_gdb)
+    current = readCurrent(args.springs)
+    inserts, updates, deletes, new_state, counted = springsDelta(current, sites, taxa, state)
+    print("{} inserts, {} updates, {} deletes; taxa counts recomputed for {} sites".format(
+        len(inserts), len(updates), len(deletes), counted))
+
+    if not args.dry_run:
+        applyDelta(args.springs, inserts, updates, deletes)
+        with open(args.state, "w") as f:
+            json.dump(new_state, f)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+# END
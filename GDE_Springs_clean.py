@@ -8,11 +8,12 @@
 # Copyright:   (c) sarah.byer 2019
 #-------------------------------------------------------------------------------
 
-# Import ArcGIS modules and check out spatial analyst extension
+# Import ArcGIS modules
 import arcpy, os
 from arcpy import env
-from arcpy.sa import *
-arcpy.CheckOutExtension("spatial")
+
+from GDE_Loader_clean import bulkLoad
+from GDE_Workspace_clean import IntermediateWorkspace
 
 # Path to temporary geodatabase
 path =  r"K:\GIS3\Projects\GDE\Geospatial\Geodatabase_Layers\NV_GDE_Template_Temp.gdb"
@@ -22,24 +23,24 @@ env.workspace = path
 env.overwriteOutput = True
 env.outputCoordinateSystem = arcpy.SpatialReference(26911) # Spatial reference NAD 1983 UTM Zone 11N. The code is '26911'
 
+# Intermediate copies of the SSI tables (GDE_Workspace_clean.py)
+ws = IntermediateWorkspace()
+
 #-------------------------------------------------------------------------------
 #-------------------------------------------------------------------------------
 
 # Process SSI data
+# """NOTE this script builds the Springs layer from scratch. For later SSI releases use GDE_SpringsDelta_clean.py,
+# which applies only the inserted, updated and deleted springs to the existing Springs layer"""
 
 ssi_gdb = r"K:\GIS3\States_WIP\NV\Hydrology\Springs\Nevada_Springs_Apr_21_2019.gdb"
 ssi_orig =  r"K:\GIS3\States_WIP\NV\Hydrology\Springs\Nevada_Springs_Apr_21_2019.gdb\Nevada_Springs_Apr_21_2019_Summarized"
 
 # Make a copy of the springs data to process
-ssi_copy = arcpy.Copy_management(ssi_orig, "ssi_summarized_copy")
+ssi_copy = arcpy.CopyFeatures_management(ssi_orig, ws.new("ssi_summarized_copy"))
 
-# Add and populate a Source Code field
-arcpy.AddField_management(ssi_copy, "SOURCECODE", "TEXT", 20)
-with arcpy.da.UpdateCursor(ssi_copy, ["SOURCECODE"]) as cursor:
-    for row in cursor:
-        row[0] = "ssi"
-        cursor.updateRow(row)
-del cursor
+# Source Code of every spring; written by the load into the Springs layer
+ws.setConstants(ssi_copy, SOURCECODE="ssi")
 
 #-------------------------------------------------------------------------------
 
@@ -49,7 +50,7 @@ del cursor
 
 # """Vertebrates"""
 vert_tbl = ssi_gdb + "\\Nevada_Springs_Apr_21_2019_Summarized_TaxaVert_by_Site"
-vert_copy = arcpy.Copy_management(vert_tbl, "ssi_vert_copy")
+vert_copy = arcpy.CopyRows_management(vert_tbl, ws.new("ssi_vert_copy"))
 
 # Standardize empty genus and species attributes
 # Make values 'Null' if length of genus/species name is < 2 or it is already 'Null'
@@ -88,13 +89,14 @@ with arcpy.da.UpdateCursor(vert_copy, ['FaunaGenus', 'FaunaSpecies', 'VertSciNam
 del cursor
 
 # Calculate number of valid species observed at springs
-vert_tbl_outname = path + "\\SSI_VertCount_tbl"
+vert_tbl_outname = ws.new("SSI_VertCount_tbl")
 vert_tbl_sum = arcpy.Statistics_analysis(vert_copy, vert_tbl_outname, [["VertSciName", "COUNT"]], "SiteID")
+ws.release(vert_copy)
 
 
 # """Invertebrates"""
 invert_tbl = ssi_gdb + "\\Nevada_Springs_Apr_21_2019_Summarized_TaxaInvert_by_Site"
-invert_copy = arcpy.Copy_management(invert_tbl, "ssi_invert_copy")
+invert_copy = arcpy.CopyRows_management(invert_tbl, ws.new("ssi_invert_copy"))
 
 # Standardize empty genus and species attributes
 # Make values 'Null' if length of genus/species name is < 2 or it is already 'Null'
@@ -133,13 +135,14 @@ with arcpy.da.UpdateCursor(invert_copy, ['Genus', 'Species', 'InvertSciName']) a
 del cursor
 
 # Calculate number of valid species observed at springs
-invert_tbl_outname = path + "\\SSI_InvertCount_tbl"
+invert_tbl_outname = ws.new("SSI_InvertCount_tbl")
 invert_tbl_sum = arcpy.Statistics_analysis(invert_copy, invert_tbl_outname, [["InvertSciName", "COUNT"]], "SiteID")
+ws.release(invert_copy)
 
 
 # """Plants"""
 flora_tbl = ssi_gdb + "\\Nevada_Springs_Apr_21_2019_Summarized_TaxaFlora_by_Site"
-flora_copy = arcpy.Copy_management(flora_tbl, "ssi_flora_copy")
+flora_copy = arcpy.CopyRows_management(flora_tbl, ws.new("ssi_flora_copy"))
 
 # Standardize empty genus and species attributes
 # Make values 'Null' if length of genus/species name is < 2 or it is already 'Null'
@@ -185,13 +188,15 @@ with arcpy.da.UpdateCursor(flora_copy, ['Genus', 'Species', 'FloraSciName', 'Flo
 del cursor
 
 # Calculate number of valid species observed at springs
-flora_tbl_outname = path + "\\SSI_FloraCount_tbl"
+flora_tbl_outname = ws.new("SSI_FloraCount_tbl")
 flora_tbl_sum = arcpy.Statistics_analysis(flora_copy, flora_tbl_outname, [["FloraSciName", "COUNT"]], "SiteID")
+ws.release(flora_copy)
 
 # Join calculated species fields from tables to the SSI dataset by Site ID
 arcpy.JoinField_management(ssi_copy, "SiteID", vert_tbl_sum, "SiteID", "COUNT_VertSciName")
 arcpy.JoinField_management(ssi_copy, "SiteID", invert_tbl_sum, "SiteID", "COUNT_InvertSciName")
 arcpy.JoinField_management(ssi_copy, "SiteID", flora_tbl_sum, "SiteID", "COUNT_FloraSciName")
+ws.release(vert_tbl_sum, invert_tbl_sum, flora_tbl_sum)
 [f.name for f in arcpy.ListFields(ssi_copy)]
 
 # Don't replace Nulls in species count records with zeroes
@@ -213,50 +218,8 @@ del cursor
 # Add springs to iGDE Springs layer
 gde_springs = r"K:\GIS3\Projects\GDE\Geospatial\NV_iGDE_050919.gdb\Springs"
 
-# Map to iGDE Springs layer and put point features there
-def mapFields(inlayer, infield, mapfield_name, mapfield_alias, mapfield_type): # mapFields function
-    fldMap = arcpy.FieldMap()
-    fldMap.addInputField(inlayer, infield)
-    mapOut = fldMap.outputField
-    mapOut.name, mapOut.alias, mapOut.type = mapfield_name, mapfield_alias, mapfield_type
-    fldMap.outputField = mapOut
-    return fldMap
-
-# Field mapping for Springs (from SSI to GDE Springs)
-source_map = mapFields(ssi_copy, "SOURCECODE", "SOURCE_CODE", "Source Code", "TEXT")
-spring_id_map = mapFields(ssi_copy, "SiteID", "SPRING_ID", "Spring ID", "LONG")
-spring_name_map = mapFields(ssi_copy, "ShortName", "SPRING_NAME", "Spring Name", "TEXT")
-spring_type1_map = mapFields(ssi_copy, "SpringType1", "SPRING_TYPE1", "Spring Type 1", "TEXT")
-spring_type2_map = mapFields(ssi_copy, "SpringType2", "SPRING_TYPE2", "Spring Type 2", "TEXT")
-image_link_map = mapFields(ssi_copy, "CastImageHyperlink", "IMAGE_LINK", "Image Hyperlink", "TEXT")
-sketch_link_map = mapFields(ssi_copy, "CastSketchHyperlink", "SKECTH_LINK", "Sketch Hyperlink", "TEXT")
-lat_map = mapFields(ssi_copy, "LatitudeDD", "LATITUDE", "Latitude", "DOUBLE")
-long_map = mapFields(ssi_copy, "LongitudeDD", "LONGITUDE", "Longitude", "DOUBLE")
-elev_map = mapFields(ssi_copy, "ElevationM", "ELEVATION", "Elevation (m)", "DOUBLE")
-inv_stat_map = mapFields(ssi_copy, "InventoryLevel", "INV_STAT", "Inventory Status", "TEXT")
-surv_count_map = mapFields(ssi_copy, "SurveyCount", "SURV_COUNT", "Survey Count", "SHORT")
-flow_map = mapFields(ssi_copy, "Flow_Mean", "FLOW_MEAN", "Flow Mean (L/s)", "DOUBLE")
-ph_map = mapFields(ssi_copy, "pH_Mean", "PH_MEAN", "pH Mean", "DOUBLE")
-temp_map = mapFields(ssi_copy, "Water_Temp_Mean", "WATER_TEMP_MEAN", "Water Temperature Mean (C)", "DOUBLE")
-spec_map = mapFields(ssi_copy, "Spec_Cond_Mean", "SPEC_COND_MEAN", "Specific Conductance Mean (uS/cm)", "DOUBLE")
-alk_map = mapFields(ssi_copy, "Alkalinity_Mean", "ALKALINITY_MEAN", "Alkalinity Mean (mg/L)", "DOUBLE")
-area_map = mapFields(ssi_copy, "TotalAreaSQM", "SPRING_AREA", "Spring Area (m2)", "DOUBLE")
-vert_ct_map = mapFields(ssi_copy, "COUNT_VertSciName", "VERT_COUNT", "Vertebrate Species Count", "LONG") # Calculated
-invert_ct_map = mapFields(ssi_copy, "COUNT_InvertSciName", "INVERT_COUNT", "Invertebrate Species Count", "LONG") # Calculated
-flora_ct_map = mapFields(ssi_copy, "COUNT_FloraSciName", "FLORA_COUNT", "Plant Species Count", "LONG") # Calculated
-
-maplist = [source_map, spring_id_map, spring_name_map, 
-           spring_type1_map, spring_type2_map, image_link_map, 
-           sketch_link_map, lat_map, long_map, 
-           elev_map, inv_stat_map, surv_count_map, 
-           flow_map, ph_map, temp_map, 
-           spec_map, alk_map, area_map, 
-           vert_ct_map, invert_ct_map, flora_ct_map]
-springFldMappings = arcpy.FieldMappings()
-for fm in maplist:
-    springFldMappings.addFieldMap(fm)
-
-# Append to GDE database Wetland layer
-arcpy.Append_management(ssi_copy, gde_springs, "NO_TEST", springFldMappings)
+# Load the summarized springs into the iGDE Springs layer (SSI to GDE Springs mapping in GDE_Schema_clean.py)
+bulkLoad(ssi_copy, gde_springs, "Springs", "ssi", constants=ws.constants(ssi_copy))
+ws.release(ssi_copy)
 
 # END
\ No newline at end of file
@@ -0,0 +1,225 @@
+#-------------------------------------------------------------------------------
+# Name:        NV iGDE Database - Stage engines
+# Purpose:     Plain Python/NumPy versions of the attribute and counting logic in each iGDE builder script.
+#              Inputs are lists of dict rows with a "SHAPE" key (see GDE_SyntheticData_clean.py for the layout),
+#              so the logic can be timed and checked without arcpy.
+# Modules: GDE_Geometry_clean; numpy
+#
+# Author:      sarah.byer
+#
+# Created:     October 2026
+# Copyright:   (c) sarah.byer 2026
+#-------------------------------------------------------------------------------
+
+import numpy as np
+from GDE_Geometry_clean import (SQM_PER_ACRE, M_PER_MILE, polygonArea, lineLength, bbox,
+                                pointInPolygon, GridIndex)
+
+#-------------------------------------------------------------------------------
+# Rivers_Streams (GDE_Rivers_clean.py)
+
+PERENNIAL_FCODE = 46006
+MAJOR_FCODES = [55800, 46006] # Artificial Path, Stream/River Perennial
+QUINN_PERMID_RANGE = ('152068036', '152068098') # Artificial path through the Black Rock Desert
+
+def riversEngine(flowlines, major_rivers):
+    river_names = [row["Name"] for row in major_rivers]
+
+    # Major rivers/streams: artificial paths and perennials with a major river name
+    major = [f for f in flowlines if f["FCode"] in MAJOR_FCODES
+             and any(river in str(f["GNIS_Name"]) for river in river_names)]
+    major = [f for f in major if not (QUINN_PERMID_RANGE[0] <= f["Permanent_Identifier"] <= QUINN_PERMID_RANGE[1])]
+    major = [f for f in major if f["GNIS_Name"] != "White River Wash"]
+
+    # All perennials not already in the major rivers/streams set
+    major_ids = set(f["Permanent_Identifier"] for f in major)
+    perennial = [f for f in flowlines if f["FCode"] == PERENNIAL_FCODE and f["Permanent_Identifier"] not in major_ids]
+
+    rivers = []
+    for f in major + perennial:
+        rivers.append({"PERM_ID": f["Permanent_Identifier"], "RIVER_NAME": f["GNIS_Name"], "RIVER_CODE": f["FCode"],
+                       "RIVER_TYPE": "Perennial Stream/River" if f["FCode"] == PERENNIAL_FCODE else "Artificial Path",
+                       "LENGTH_MI": lineLength(f["SHAPE"]) / M_PER_MILE, "SOURCE_CODE": "nhdf", "SHAPE": f["SHAPE"]})
+    return rivers
+
+#-------------------------------------------------------------------------------
+# Lakes_Playas (GDE_LakesPlayas_clean.py)
+
+WATERBODY_FCODES = [36100, 39004, 39009, 39011]
+
+def lakesPlayasEngine(waterbodies, waterbody_lut):
+    lut = dict((row["FCode"], row) for row in waterbody_lut)
+    bodies = []
+    for f in waterbodies:
+        if f["FCode"] not in WATERBODY_FCODES:
+            continue
+        lookup = lut.get(f["FCode"], {})
+        bodies.append({"PERM_ID": f["Permanent_Identifier"], "BODY_NAME": f["GNIS_Name"],
+                       "BODY_TYPE": lookup.get("Type"), "BODY_CODE": f["FCode"], "BODY_DESC": lookup.get("Description"),
+                       "AREA_ACRES": polygonArea(f["SHAPE"]) / SQM_PER_ACRE, "SOURCE_CODE": "nhdw", "SHAPE": f["SHAPE"]})
+    return bodies
+
+#-------------------------------------------------------------------------------
+# Wetlands (GDE_Wetlands_clean.py)
+
+# True for records kept in the Wetlands layer (no Lake features, no dry playas)
+def isWetland(row):
+    return row["WETLAND_TYPE"] != "Lake" and row["WETLAND_SUBTYPE"] != "dry"
+
+def wetlandsEngine(wetlands):
+    return [{"WET_TYPE": f["WETLAND_TYPE"], "WET_SUBTYPE": f["WETLAND_SUBTYPE"], "SOURCE_CODE": "driw",
+             "SHAPE": f["SHAPE"]} for f in wetlands if isWetland(f)]
+
+#-------------------------------------------------------------------------------
+# Springs (GDE_Springs_clean.py)
+
+FLORA_KEEP_NAMES = ["Philonotis fontana", "Primula fragrans", "Scirpus americanus", "Spirogyra parula"]
+NO_SPRING = ["No Spring", "NoSpring"]
+
+# Make values None if the genus/species name is shorter than 2 characters or already None
+def cleanTaxon(value):
+    if value is None or len(str(value)) < 2:
+        return None
+    return value
+
+# Scientific name for a taxa record, or None if the record is deleted in the springs script
+def taxaSciName(genus, species, full_name=None):
+    genus, species = cleanTaxon(genus), cleanTaxon(species)
+    if species is not None:
+        return str(genus) + " " + str(species)
+    elif full_name is not None and str(full_name) in FLORA_KEEP_NAMES:
+        return str(full_name)
+    return None
+
+# Count of valid taxa records per SiteID (Statistics_analysis COUNT on the sci name field)
+def taxaCounts(vert, invert, flora, site_ids=None):
+    counts = {"vert": {}, "invert": {}, "flora": {}}
+    tables = [("vert", vert, "FaunaGenus", "FaunaSpecies", None),
+              ("invert", invert, "Genus", "Species", None),
+              ("flora", flora, "Genus", "Species", "FloraSpecies")]
+    for key, rows, genus_field, species_field, full_field in tables:
+        out = counts[key]
+        for row in rows:
+            if site_ids is not None and row["SiteID"] not in site_ids:
+                continue
+            name = taxaSciName(row[genus_field], row[species_field], row[full_field] if full_field else None)
+            if name is not None:
+                out[row["SiteID"]] = out.get(row["SiteID"], 0) + 1
+    return counts
+
+# One iGDE Springs row from an SSI site and its taxa counts
+def springRecord(site, counts):
+    sid = site["SiteID"]
+    return {"SOURCE_CODE": "ssi", "SPRING_ID": sid, "SPRING_NAME": site["ShortName"],
+            "SPRING_TYPE1": site["SpringType1"], "SPRING_TYPE2": site["SpringType2"],
+            "IMAGE_LINK": site["CastImageHyperlink"], "SKETCH_LINK": site["CastSketchHyperlink"],
+            "LATITUDE": site["LatitudeDD"], "LONGITUDE": site["LongitudeDD"], "ELEVATION": site["ElevationM"],
+            "INV_STAT": site["InventoryLevel"], "SURV_COUNT": site["SurveyCount"], "FLOW_MEAN": site["Flow_Mean"],
+            "PH_MEAN": site["pH_Mean"], "WATER_TEMP_MEAN": site["Water_Temp_Mean"],
+            "SPEC_COND_MEAN": site["Spec_Cond_Mean"], "ALKALINITY_MEAN": site["Alkalinity_Mean"],
+            "SPRING_AREA": site["TotalAreaSQM"],
+            # Nulls are kept: zero would suggest a surveyed spring with no species
+            "VERT_COUNT": counts["vert"].get(sid), "INVERT_COUNT": counts["invert"].get(sid),
+            "FLORA_COUNT": counts["flora"].get(sid), "SHAPE": site["SHAPE"]}
+
+def springsEngine(springs):
+    counts = taxaCounts(springs["vert"], springs["invert"], springs["flora"])
+    return [springRecord(site, counts) for site in springs["sites"] if str(site["InventoryLevel"]) not in NO_SPRING]
+
+#-------------------------------------------------------------------------------
+# Species (GDE_Species_clean.py)
+
+# Representative vertices used for the hexagon INTERSECT join; the 5 m buffers are too small to matter at hex scale
+def _vertices(shape):
+    if isinstance(shape, tuple):
+        return [shape]
+    return [pt for part in shape for pt in part]
+
+def speciesEngine(hexagons, nnhp, endemism):
+    features = nnhp["points"] + nnhp["lines"] + nnhp["polys"]
+
+    # Remove extirpated species and fix Juga laurae
+    features = [f for f in features if "SX" not in str(f["S_RANK"])]
+    corrections = dict((row["SNAME"], row["ENDEMISM"]) for row in endemism)
+    records = []
+    for f in features:
+        sname = "Juga acutifilosa" if f["SNAME"] == "Juga laurae" else f["SNAME"]
+        end = f["ENDEMISM"]
+        if end == " ":
+            end = corrections.get(sname, end)
+        records.append((sname, end, f["SHAPE"]))
+
+    # Unique species table (first record wins, as JoinField does)
+    unique = {}
+    for sname, end, shape in records:
+        unique.setdefault(sname, end)
+
+    # Species names per hexagon
+    index = GridIndex(5000.0)
+    for hexagon in hexagons:
+        index.insert(hexagon["Hex_ID"], bbox(hexagon["SHAPE"]))
+    hex_shapes = dict((h["Hex_ID"], h["SHAPE"]) for h in hexagons)
+    names = {}
+    for sname, end, shape in records:
+        for x, y in _vertices(shape):
+            for hex_id in index.query((x, y, x, y)):
+                if pointInPolygon(x, y, hex_shapes[hex_id]):
+                    names.setdefault(hex_id, {})[sname] = end
+
+    species = []
+    for h in hexagons:
+        found = names.get(h["Hex_ID"], {})
+        species.append({"HEX_ID": h["Hex_ID"], "COUNT_NNHP": len(found),
+                        "COUNT_EN": sum(1 for end in found.values() if end == "Y"), "SOURCE_CODE": "nnhp",
+                        "SHAPE": h["SHAPE"]})
+    return {"species": species, "species_tbl": unique}
+
+#-------------------------------------------------------------------------------
+# Phreatophytes (GDE_Phreatophytes_clean.py)
+
+# Area (acres) of each GDE BpS class in each raster, after masking out non-GDE codes
+def phreatophytesEngine(rasters, gde_systems):
+    gde_codes = np.array(sorted(row["SYS_CODE"] for row in gde_systems), dtype=np.int64)
+    classes = {}
+    for raster in [rasters["landfire"]] + rasters["tnc"]:
+        array = raster["array"]
+        # Erroneous codes (e.g. Spring Mountains mesquite 11550 -> 11551) are remapped before masking
+        for old_code, new_code in raster.get("code_fixes", {}).items():
+            array = np.where(array == old_code, new_code, array)
+        valid = array[np.isin(array, gde_codes)]
+        codes, counts = np.unique(valid, return_counts=True)
+        cell_acres = raster["cell"] * raster["cell"] / SQM_PER_ACRE
+        for code, count in zip(codes.tolist(), counts.tolist()):
+            key = (raster["source_code"], code)
+            classes[key] = classes.get(key, 0.0) + count * cell_acres
+    return classes
+
+#-------------------------------------------------------------------------------
+# Story map summaries (GDE_StoryMapLayers_clean.py)
+
+# Number of springs in each unit (COUNT_SPR), keyed by the unit id field
+def springsPerUnit(units, unit_field, springs):
+    index = GridIndex(10000.0)
+    shapes = {}
+    for unit in units:
+        shapes[unit[unit_field]] = unit["SHAPE"]
+        index.insert(unit[unit_field], bbox(unit["SHAPE"]))
+    counts = dict((unit[unit_field], 0) for unit in units)
+    for spring in springs:
+        x, y = spring["SHAPE"]
+        for unit_id in index.query((x, y, x, y)):
+            if pointInPolygon(x, y, shapes[unit_id]):
+                counts[unit_id] += 1
+    return counts
+
+def storyMapEngine(units, unit_field, springs):
+    counts = springsPerUnit(units, unit_field, springs)
+    summary = []
+    for unit in units:
+        poly_area = polygonArea(unit["SHAPE"]) / SQM_PER_ACRE
+        count = counts[unit[unit_field]]
+        summary.append({unit_field: unit[unit_field], "POLY_AREA": poly_area, "COUNT_SPR": count,
+                        "AREA_SPR": count / poly_area})
+    return summary
+
+# END
@@ -8,11 +8,20 @@
 # Copyright:   (c) sarah.byer 2019
 #-------------------------------------------------------------------------------
 
-# Import ArcGIS modules and check out spatial analyst extension
-import arcpy, os
+# Import ArcGIS modules
+import arcpy, os, sys
 from arcpy import env
-from arcpy.sa import *
-arcpy.CheckOutExtension("spatial")
+
+from GDE_Dissolve_clean import parallelDissolve
+from GDE_FieldCalc_clean import calculateField
+from GDE_Geometry_clean import M_PER_MILE
+from GDE_LineTabulation_clean import tabulateFeatureClass
+from GDE_Overlay_clean import parallelIntersect
+from GDE_SchemaBatch_clean import SchemaBatch
+from GDE_SummaryCube_clean import buildCube
+from GDE_Workspace_clean import IntermediateWorkspace
+from GDE_ZonalHistogram_clean import writeHistograms, zonalHistogramFeatureClass
+from GDE_ZoneGrid_clean import ZONE_CACHE
 
 # Path to temporary geodatabase
 path =  r"K:\GIS3\Projects\GDE\Geospatial\Geodatabase_Layers\NV_GDE_Template_Temp.gdb"
@@ -22,13 +31,21 @@ env.workspace = path
 env.overwriteOutput = True
 env.outputCoordinateSystem = arcpy.SpatialReference(26911) # Spatial reference NAD 1983 UTM Zone 11N. The code is '26911'
 
+# Intermediate datasets are kept in memory (spilling to local scratch over the budget) and deleted after
+# their last use. The summary units (hexagon_units, hydrobasin_units) stay in the temporary geodatabase.
+ws = IntermediateWorkspace()
+
 #-------------------------------------------------------------------------------
 #-------------------------------------------------------------------------------
 # Select the area unit that will be used to summarize: hexagons or hydro basins
 
-# """NOTE - switch the area unit between hexagons or hydrographic basins"""
-#area_unit = r"K:\GIS3\Projects\GDE\Geospatial\Geodatabase_Layers\GDE_Boundaries\nv_chat_polygons.shp"
-area_unit = r"K:\GIS3\Projects\GDE\Geospatial\Geodatabase_Layers\GDE_Boundaries\NDWR_HydroBasins.shp"
+# The unit set is the first argument or GDE_UNIT_SET (set by each story map stage in GDE_Pipeline_clean.py)
+UNIT_SETS = {"hexagons": r"K:\GIS3\Projects\GDE\Geospatial\Geodatabase_Layers\GDE_Boundaries\nv_chat_polygons.shp",
+             "hydrographic_areas": r"K:\GIS3\Projects\GDE\Geospatial\Geodatabase_Layers\GDE_Boundaries\NDWR_HydroBasins.shp"}
+unit_set = sys.argv[1] if len(sys.argv) > 1 else os.environ.get("GDE_UNIT_SET", "hydrographic_areas")
+if unit_set not in UNIT_SETS:
+    raise ValueError("Unknown unit set {}; expected one of {}".format(unit_set, ", ".join(sorted(UNIT_SETS))))
+area_unit = UNIT_SETS[unit_set]
 
 # Make a copy of the area unit; this will be used to contain the summary attributes
 for fc in [1]:
@@ -38,17 +55,19 @@ for fc in [1]:
     if "Hex_ID" in area_unit_fields:
         print("Copying hexagon features")
         gde_unit = arcpy.CopyFeatures_management(area_unit, "hexagon_units") # HEXAGONS
-        # Calculate shape area of the unit features
-        arcpy.AddField_management(gde_unit, "POLY_AREA", "DOUBLE")
+        # Add the unit's own summary fields in one batch, then calculate shape area of the unit features
+        SchemaBatch(gde_unit).add("POLY_AREA", "DOUBLE").add("AREA_SPR", "DOUBLE").add("MILES_RVST", "DOUBLE").add("GDE_COUNT", "LONG").apply()
         arcpy.CalculateGeometryAttributes_management(gde_unit, [["POLY_AREA", "AREA"]], "", "ACRES", env.outputCoordinateSystem)
         gde_unit = path + "\\hexagon_units"
+        unit_zone = None # overlays are partitioned by tile
     else:
         print("Copying hydrographic basin features")
         gde_unit = arcpy.CopyFeatures_management(area_unit, "hydrobasin_units") # HYDRO BASINS
-        # Calculate shape area of the unit features
-        arcpy.AddField_management(gde_unit, "POLY_AREA", "DOUBLE")
+        # Add the unit's own summary fields in one batch, then calculate shape area of the unit features
+        SchemaBatch(gde_unit).add("POLY_AREA", "DOUBLE").add("AREA_SPR", "DOUBLE").add("MILES_RVST", "DOUBLE").add("AREA_RVST", "DOUBLE").add("GDE_COUNT", "LONG").apply()
         arcpy.CalculateGeometryAttributes_management(gde_unit, [["POLY_AREA", "AREA"]], "", "ACRES", env.outputCoordinateSystem)
         gde_unit = path + "\\hydrobasin_units"
+        unit_zone = "HYD_AREA" # overlays are partitioned by basin
         
 
 
@@ -63,17 +82,19 @@ phreatophytes = r"K:\GIS3\Projects\GDE\Geospatial\NV_iGDE_050919.gdb\Phreatophyt
 
 # Calculate area of each unit that has phreatophyte features
 # Dissolve phreatophytes, then intersect with summarizing unit, then dissolve again by intersecting unit
-ph_dissolve = arcpy.Dissolve_management(phreatophytes, "ph_dissolve")
-ph_chunk = arcpy.Intersect_analysis([ph_dissolve, gde_unit], "ph_chunk")
+ph_dissolve = parallelDissolve(phreatophytes, ws.new("ph_dissolve"))
+ph_chunk = parallelIntersect([ph_dissolve, gde_unit], ws.new("ph_chunk"), zone_field=unit_zone)
+ws.release(ph_dissolve)
 
 # Dissolve by Hex_ID or HYD_AREA
 gde_unit_fields = list([f.name for f in arcpy.ListFields(gde_unit)])
 if "Hex_ID" in gde_unit_fields:
     print("Dissolving by hexagons")
-    ph_int = arcpy.Dissolve_management(ph_chunk, "ph_int", "Hex_ID") # HEXAGONS
+    ph_int = arcpy.Dissolve_management(ph_chunk, ws.new("ph_int"), "Hex_ID") # HEXAGONS
 else:
     print("Dissolving by hydrographic basins")
-    ph_int = arcpy.Dissolve_management(ph_chunk, "ph_int", "HYD_AREA") # HYDRO BASINS 
+    ph_int = arcpy.Dissolve_management(ph_chunk, ws.new("ph_int"), "HYD_AREA") # HYDRO BASINS 
+ws.release(ph_chunk)
 
 # Phreatophytes are "chopped" by the hexagons they fall in, OR
 # Phreatophytes are "clumped" by the HYD_AREA they fall into
@@ -87,94 +108,88 @@ else:
     arcpy.JoinField_management(ph_int, "HYD_AREA", gde_unit, "HYD_AREA", ["POLY_AREA"])
 
 # Calculate area of each phreatophyte chunk
-arcpy.AddField_management(ph_int, "AREA_PHR", "DOUBLE") 
+SchemaBatch(ph_int).add("AREA_PHR", "DOUBLE").add("PER_PHR", "DOUBLE").apply()
 arcpy.CalculateGeometryAttributes_management(ph_int, [["AREA_PHR", "AREA"]], "", "ACRES", env.outputCoordinateSystem)
 
 # Calculate percent of each summarizing unit that is phreatophyte
-arcpy.AddField_management(ph_int, "PER_PHR", "DOUBLE") 
-arcpy.CalculateField_management(ph_int, "PER_PHR", '100*(!AREA_PHR!/!POLY_AREA!)', "PYTHON3")
+calculateField(ph_int, "PER_PHR", '100*(!AREA_PHR!/!POLY_AREA!)')
 
 
 # Calculate area of each unit that has forest, shrubland, or unknown features
 # Dissolve by phreatophyte groups
-ph_types = arcpy.Dissolve_management(phreatophytes, "ph_type_dissolve", ["PHR_GROUP"])
+ph_types = parallelDissolve(phreatophytes, ws.new("ph_type_dissolve"), ["PHR_GROUP"])
 
 # Isolate forests, shrublands, and unknown groups in different feature classes
-forests = arcpy.Copy_management(ph_types, "forests_dissolve")
+forests = arcpy.CopyFeatures_management(ph_types, ws.new("forests_dissolve"))
 with arcpy.da.UpdateCursor(forests, ['PHR_GROUP']) as cursor:
     for row in cursor:
         if row[0] != "Forest":
             print("Deleting non-forest features")
             cursor.deleteRow()
 del cursor
-shrubs = arcpy.Copy_management(ph_types, "shrubs_dissolve")
+shrubs = arcpy.CopyFeatures_management(ph_types, ws.new("shrubs_dissolve"))
 with arcpy.da.UpdateCursor(shrubs, ['PHR_GROUP']) as cursor:
     for row in cursor:
         if row[0] != "Shrubland":
             print("Deleting non-shrubland features")
             cursor.deleteRow()
 del cursor
-unknown = arcpy.Copy_management(ph_types, "unknown_dissolve")
+unknown = arcpy.CopyFeatures_management(ph_types, ws.new("unknown_dissolve"))
 with arcpy.da.UpdateCursor(unknown, ['PHR_GROUP']) as cursor:
     for row in cursor:
         if row[0] != "Unknown":
             print("Deleting non-unknown features")
             cursor.deleteRow()
 del cursor
+ws.release(ph_types)
 
 # Intersect forests with summarizing unit to get areas/percent covers
-forests_chunk = arcpy.Intersect_analysis([forests, gde_unit], "forests_chunk")
+forests_chunk = parallelIntersect([forests, gde_unit], ws.new("forests_chunk"), zone_field=unit_zone)
 if "hexagon" in str(gde_unit):
     print("Processing forests in hexagons")
-    forests_int = arcpy.Dissolve_management(forests_chunk, "forests_intersect", "Hex_ID")
+    forests_int = arcpy.Dissolve_management(forests_chunk, ws.new("forests_intersect"), "Hex_ID")
     arcpy.JoinField_management(forests_int, "Hex_ID", gde_unit, "Hex_ID", ["POLY_AREA"])
 else:
     print("Processing forests in hydro basins")
-    forests_int = arcpy.Dissolve_management(forests_chunk, "forests_intersect", "HYD_AREA")
+    forests_int = arcpy.Dissolve_management(forests_chunk, ws.new("forests_intersect"), "HYD_AREA")
     arcpy.JoinField_management(forests_int, "HYD_AREA", gde_unit, "HYD_AREA", ["POLY_AREA"])
+ws.release(forests, forests_chunk)
     
-arcpy.AddField_management(forests_int, "AREA_FRST", "DOUBLE") 
+SchemaBatch(forests_int).add("AREA_FRST", "DOUBLE").add("PER_FRST", "DOUBLE").apply()
 arcpy.CalculateGeometryAttributes_management(forests_int, [["AREA_FRST", "AREA"]], "", "ACRES", env.outputCoordinateSystem)
-arcpy.AddField_management(forests_int, "PER_FRST", "DOUBLE") 
-arcpy.CalculateField_management(forests_int, "PER_FRST", '100*(!AREA_FRST!/!POLY_AREA!)', "PYTHON3")
+calculateField(forests_int, "PER_FRST", '100*(!AREA_FRST!/!POLY_AREA!)')
 
 # Intersect shrubs with summarizing unit to get areas/percent covers
-shrubs_chunk = arcpy.Intersect_analysis([shrubs, gde_unit], "shrubs_chunk")
+shrubs_chunk = parallelIntersect([shrubs, gde_unit], ws.new("shrubs_chunk"), zone_field=unit_zone)
 if "hexagon" in str(gde_unit):
     print("Processing shrubs in hexagons")
-    shrubs_int = arcpy.Dissolve_management(shrubs_chunk, "shrubs_intersect", "Hex_ID")
+    shrubs_int = arcpy.Dissolve_management(shrubs_chunk, ws.new("shrubs_intersect"), "Hex_ID")
     arcpy.JoinField_management(shrubs_int, "Hex_ID", gde_unit, "Hex_ID", ["POLY_AREA"])
 else:
     print("Processing shrubs in hydro basins")
-    shrubs_int = arcpy.Dissolve_management(shrubs_chunk, "shrubs_intersect", "HYD_AREA")
+    shrubs_int = arcpy.Dissolve_management(shrubs_chunk, ws.new("shrubs_intersect"), "HYD_AREA")
     arcpy.JoinField_management(shrubs_int, "HYD_AREA", gde_unit, "HYD_AREA", ["POLY_AREA"])
+ws.release(shrubs, shrubs_chunk)
     
-arcpy.AddField_management(shrubs_int, "AREA_SHRUB", "DOUBLE") 
+SchemaBatch(shrubs_int).add("AREA_SHRUB", "DOUBLE").add("PER_SHRUB", "DOUBLE").apply()
 arcpy.CalculateGeometryAttributes_management(shrubs_int, [["AREA_SHRUB", "AREA"]], "", "ACRES", env.outputCoordinateSystem)
-arcpy.AddField_management(shrubs_int, "PER_SHRUB", "DOUBLE") 
-arcpy.CalculateField_management(shrubs_int, "PER_SHRUB", '100*(!AREA_SHRUB!/!POLY_AREA!)', "PYTHON3")
+calculateField(shrubs_int, "PER_SHRUB", '100*(!AREA_SHRUB!/!POLY_AREA!)')
 
 # Intersect unknown features with summarizing unit to get areas/percent covers
-unknown_chunk = arcpy.Intersect_analysis([unknown, gde_unit], "unknown_chunk")
+unknown_chunk = parallelIntersect([unknown, gde_unit], ws.new("unknown_chunk"), zone_field=unit_zone)
 if "hexagon" in str(gde_unit):
     print("Processing unknown features in hexagons")
-    unknown_int = arcpy.Dissolve_management(unknown_chunk, "unknown_intersect", "Hex_ID")
+    unknown_int = arcpy.Dissolve_management(unknown_chunk, ws.new("unknown_intersect"), "Hex_ID")
     arcpy.JoinField_management(unknown_int, "Hex_ID", gde_unit, "Hex_ID", ["POLY_AREA"])
 else:
     print("Processing unknown features in hydro basins")
-    unknown_int = arcpy.Dissolve_management(unknown_chunk, "unknown_intersect", "HYD_AREA")
+    unknown_int = arcpy.Dissolve_management(unknown_chunk, ws.new("unknown_intersect"), "HYD_AREA")
     arcpy.JoinField_management(unknown_int, "HYD_AREA", gde_unit, "HYD_AREA", ["POLY_AREA"])
+ws.release(unknown, unknown_chunk)
 
-arcpy.AddField_management(unknown_int, "AREA_UNK", "DOUBLE") 
+SchemaBatch(unknown_int).add("AREA_UNK", "DOUBLE").add("PER_UNK", "DOUBLE").apply()
 arcpy.CalculateGeometryAttributes_management(unknown_int, [["AREA_UNK", "AREA"]], "", "ACRES", env.outputCoordinateSystem)
-arcpy.AddField_management(unknown_int, "PER_UNK", "DOUBLE") 
-arcpy.CalculateField_management(unknown_int, "PER_UNK", '100*(!AREA_UNK!/!POLY_AREA!)', "PYTHON3")
-
-# Paths to processed features above 
-ph_int = path + "\\ph_int"
-forests_int = path + "\\forests_intersect"
-shrubs_int = path + "\\shrubs_intersect"
-unknown_int = path + "\\unknown_intersect"
+calculateField(unknown_int, "PER_UNK", '100*(!AREA_UNK!/!POLY_AREA!)')
 
 # Join new calculated area fields from intersect layers to full gde unit layer
 for fc in [1]:
@@ -193,6 +208,7 @@ for fc in [1]:
         arcpy.JoinField_management(gde_unit, 'HYD_AREA', forests_int, 'HYD_AREA', ["AREA_FRST", "PER_FRST"])
         arcpy.JoinField_management(gde_unit, 'HYD_AREA', shrubs_int, 'HYD_AREA', ["AREA_SHRUB", "PER_SHRUB"])
         arcpy.JoinField_management(gde_unit, 'HYD_AREA', unknown_int, 'HYD_AREA', ["AREA_UNK", "PER_UNK"])
+ws.release(ph_int, forests_int, shrubs_int, unknown_int)
 
 # Make sure all values that may be null are reclassified to 0
 ph_fields = ["AREA_PHR", "PER_PHR", "AREA_FRST", "PER_FRST", "AREA_SHRUB", "PER_SHRUB", "AREA_UNK", "PER_UNK"]
@@ -230,28 +246,29 @@ wetlands = r"K:\GIS3\Projects\GDE\Geospatial\NV_iGDE_050919.gdb\Wetlands"
 
 # Calculate area of each unit that has wetland features
 # Dissolve phreatophytes, then intersect with summarizing unit
-wet_dissolve = arcpy.Dissolve_management(wetlands, "wet_dissolve")
-wet_chunk = arcpy.Intersect_analysis([wet_dissolve, gde_unit], "wet_chunk")
+wet_dissolve = parallelDissolve(wetlands, ws.new("wet_dissolve"))
+wet_chunk = parallelIntersect([wet_dissolve, gde_unit], ws.new("wet_chunk"), zone_field=unit_zone)
+ws.release(wet_dissolve)
 
 if "hexagon" in str(gde_unit):
     print("Dissolving wetlands by hexagon and joining POLY_AREA")
-    wet_int = arcpy.Dissolve_management(wet_chunk, "wet_int", "Hex_ID")
+    wet_int = arcpy.Dissolve_management(wet_chunk, ws.new("wet_int"), "Hex_ID")
     arcpy.JoinField_management(wet_int, "Hex_ID", gde_unit, "Hex_ID", ["POLY_AREA"])    
 else:
     print("Dissolving wetlands by hydro basin and joining POLY_AREA")
-    wet_int = arcpy.Dissolve_management(wet_chunk, "wet_int", "HYD_AREA")
+    wet_int = arcpy.Dissolve_management(wet_chunk, ws.new("wet_int"), "HYD_AREA")
     arcpy.JoinField_management(wet_int, "HYD_AREA", gde_unit, "HYD_AREA", ["POLY_AREA"])
+ws.release(wet_chunk)
 
 # Wetlands are "chopped" by the hexagons they fall in, OR
 # Wetlands are "clumped" by the HYD_AREA they fall into
 
 # Calculate area of each wetland chunk
-arcpy.AddField_management(wet_int, "AREA_WET", "DOUBLE") 
+SchemaBatch(wet_int).add("AREA_WET", "DOUBLE").add("PER_WET", "DOUBLE").apply()
 arcpy.CalculateGeometryAttributes_management(wet_int, [["AREA_WET", "AREA"]], "", "ACRES", env.outputCoordinateSystem)
 
 # Calculate percent of each summarizing unit that is wetland
-arcpy.AddField_management(wet_int, "PER_WET", "DOUBLE") 
-arcpy.CalculateField_management(wet_int, "PER_WET", '100*(!AREA_WET!/!POLY_AREA!)', "PYTHON3")
+calculateField(wet_int, "PER_WET", '100*(!AREA_WET!/!POLY_AREA!)')
 
 # Join new calculated area fields to full gde unit layer
 for fc in [1]:
@@ -266,6 +283,7 @@ for fc in [1]:
         print("Joining new wetland fields to hydrographic basin features by HYD_AREA")
         arcpy.JoinField_management(gde_unit, 'HYD_AREA', wet_int, 'HYD_AREA', ["AREA_WET"])
         arcpy.JoinField_management(gde_unit, 'HYD_AREA', wet_int, 'HYD_AREA', ["PER_WET"])
+ws.release(wet_int)
         
 # Make sure all values that may be null (no wetlands) are reclassified to 0
 wet_fields = ["AREA_WET", "PER_WET"]
@@ -300,7 +318,7 @@ springs = r"K:\GIS3\Projects\GDE\Geospatial\NV_iGDE_050919.gdb\Springs"
 
 # Spatial join springs to area unit
  # Creates a "copy" of each area unit where there is at least 1 spring in a unit
-unit_springs = arcpy.SpatialJoin_analysis(gde_unit, springs, "temp_join_units_springs", "JOIN_ONE_TO_MANY", "KEEP_ALL", "", "INTERSECT")
+unit_springs = arcpy.SpatialJoin_analysis(gde_unit, springs, ws.new("temp_join_units_springs"), "JOIN_ONE_TO_MANY", "KEEP_ALL", "", "INTERSECT")
 
 # Count number of times a feature has a source code (number of springs) by the unit's ID
 for fc in [1]:
@@ -309,14 +327,15 @@ for fc in [1]:
     fields = list([f.name for f in fields])
     if "Hex_ID" in fields:
         print("Counting number of springs in hexagons")
-        unit_springs_count = arcpy.Statistics_analysis(unit_springs, "join_units_springs_count", [["SOURCE_CODE", "COUNT"]], ["Hex_ID"])
+        unit_springs_count = arcpy.Statistics_analysis(unit_springs, ws.new("join_units_springs_count"), [["SOURCE_CODE", "COUNT"]], ["Hex_ID"])
     else:
         print("Counting number of springs in hydrographic basins")
-        unit_springs_count = arcpy.Statistics_analysis(unit_springs, "join_units_springs_count", [["SOURCE_CODE", "COUNT"]], ["HYD_AREA"])
+        unit_springs_count = arcpy.Statistics_analysis(unit_springs, ws.new("join_units_springs_count"), [["SOURCE_CODE", "COUNT"]], ["HYD_AREA"])
+ws.release(unit_springs)
 
 # Calculate number of springs per unit in the table
 arcpy.AddField_management(unit_springs_count, "COUNT_SPR", "LONG")
-arcpy.CalculateField_management(unit_springs_count, 'COUNT_SPR', "!COUNT_SOURCE_CODE!", "PYTHON3")
+calculateField(unit_springs_count, 'COUNT_SPR', "!COUNT_SOURCE_CODE!")
 with arcpy.da.UpdateCursor(unit_springs_count, ["COUNT_SPR"]) as cursor: # Null values become 0
     for row in cursor:
         if row[0] == None:
@@ -336,10 +355,10 @@ for fc in [1]:
     else:
         print("Adding spring summary fields to hydrographic basin layer")
         arcpy.JoinField_management(gde_unit, "HYD_AREA", unit_springs_count, "HYD_AREA", ["COUNT_SPR"])
+ws.release(unit_springs_count)
 
 # Calculate springs per acre - only for hydro basins!
-arcpy.AddField_management(gde_unit, "AREA_SPR", "DOUBLE")
-arcpy.CalculateField_management(gde_unit, "AREA_SPR", "!COUNT_SPR!/!POLY_AREA!", "PYTHON3")
+calculateField(gde_unit, "AREA_SPR", "!COUNT_SPR!/!POLY_AREA!")
 
 
 # 'COUNT_SPR' and 'AREA_SPR' contains the summary data for this layer
@@ -354,77 +373,79 @@ lakes_playas = r"K:\GIS3\Projects\GDE\Geospatial\NV_iGDE_050919.gdb\Lakes_Playas
 
 # Calculate area of each unit that has lake/playa features
 # Dissolve lakes/playas, then intersect with summarizing unit
-lp_dissolve = arcpy.Dissolve_management(lakes_playas, "lp_dissolve")
-lp_chunk = arcpy.Intersect_analysis([lp_dissolve, gde_unit], "lp_chunk")
+lp_dissolve = parallelDissolve(lakes_playas, ws.new("lp_dissolve"))
+lp_chunk = parallelIntersect([lp_dissolve, gde_unit], ws.new("lp_chunk"), zone_field=unit_zone)
+ws.release(lp_dissolve)
 
 if "hexagon" in str(gde_unit):
     print("Dissolving lakes/playas by hexagon and joining POLY_AREA")
-    lp_int = arcpy.Dissolve_management(lp_chunk, "lp_int", "Hex_ID")
+    lp_int = arcpy.Dissolve_management(lp_chunk, ws.new("lp_int"), "Hex_ID")
     arcpy.JoinField_management(lp_int, "Hex_ID", gde_unit, "Hex_ID", ["POLY_AREA"]) 
 else:
     print("Dissolving lakes/playas by hydro basin and joining POLY_AREA")
-    lp_int = arcpy.Dissolve_management(lp_chunk, "lp_int", "HYD_AREA")
+    lp_int = arcpy.Dissolve_management(lp_chunk, ws.new("lp_int"), "HYD_AREA")
     arcpy.JoinField_management(lp_int, "HYD_AREA", gde_unit, "HYD_AREA", ["POLY_AREA"])
+ws.release(lp_chunk)
 
 # Calculate area of each lake/playa chunk
-arcpy.AddField_management(lp_int, "AREA_LKPL", "DOUBLE") 
+SchemaBatch(lp_int).add("AREA_LKPL", "DOUBLE").add("PER_LKPL", "DOUBLE").apply()
 arcpy.CalculateGeometryAttributes_management(lp_int, [["AREA_LKPL", "AREA"]], "", "ACRES", env.outputCoordinateSystem)
 
 # Calculate percent of each summarizing unit that is lake/playa
-arcpy.AddField_management(lp_int, "PER_LKPL", "DOUBLE") 
-arcpy.CalculateField_management(lp_int, "PER_LKPL", '100*(!AREA_LKPL!/!POLY_AREA!)', "PYTHON3")
+calculateField(lp_int, "PER_LKPL", '100*(!AREA_LKPL!/!POLY_AREA!)')
 
 
 # Calculate area of each unit that has lakes vs. playa features
 # Dissolve by body type
-lp_types = arcpy.Dissolve_management(lakes_playas, "lp_type_dissolve", ["BODY_TYPE"])
+lp_types = arcpy.Dissolve_management(lakes_playas, ws.new("lp_type_dissolve"), ["BODY_TYPE"])
 # Isolate lakes and Playas in different feature classes
-lakes = arcpy.Copy_management(lp_types, "lakes_dissolve")
+lakes = arcpy.CopyFeatures_management(lp_types, ws.new("lakes_dissolve"))
 with arcpy.da.UpdateCursor(lakes, ['BODY_TYPE']) as cursor:
     for row in cursor:
         if row[0] != "Lake":
             print("Deleting non-Lake features")
             cursor.deleteRow()
 del cursor
-playas = arcpy.Copy_management(lp_types, "playas_dissolve")
+playas = arcpy.CopyFeatures_management(lp_types, ws.new("playas_dissolve"))
 with arcpy.da.UpdateCursor(playas, ["BODY_TYPE"]) as cursor:
     for row in cursor:
         if row[0] != "Playa":
             cursor.deleteRow()
 del cursor
+ws.release(lp_types)
 
 
 # Intersect lakes with summarizing unit to get areas/percent covers
-lakes_chunk = arcpy.Intersect_analysis([lakes, gde_unit], "lakes_chunk")
+lakes_chunk = parallelIntersect([lakes, gde_unit], ws.new("lakes_chunk"), zone_field=unit_zone)
 if "hexagon" in str(gde_unit):
     print("Processing lakes in hexagons")
-    lakes_int = arcpy.Dissolve_management(lakes_chunk, "lakes_int", "Hex_ID")
+    lakes_int = arcpy.Dissolve_management(lakes_chunk, ws.new("lakes_int"), "Hex_ID")
     arcpy.JoinField_management(lakes_int, "Hex_ID", gde_unit, "Hex_ID", ["POLY_AREA"])
 else:
     print("processing lakes in hydro basins")
-    lakes_int = arcpy.Dissolve_management(lakes_chunk, "lakes_int", "HYD_AREA")
+    lakes_int = arcpy.Dissolve_management(lakes_chunk, ws.new("lakes_int"), "HYD_AREA")
     arcpy.JoinField_management(lakes_int, "HYD_AREA", gde_unit, "HYD_AREA", ["POLY_AREA"])
+ws.release(lakes, lakes_chunk)
 
-arcpy.AddField_management(lakes_int, "AREA_LAKE", "DOUBLE") 
+SchemaBatch(lakes_int).add("AREA_LAKE", "DOUBLE").add("PER_LAKE", "DOUBLE").apply()
 arcpy.CalculateGeometryAttributes_management(lakes_int, [["AREA_LAKE", "AREA"]], "", "ACRES", env.outputCoordinateSystem)
-arcpy.AddField_management(lakes_int, "PER_LAKE", "DOUBLE") 
-arcpy.CalculateField_management(lakes_int, "PER_LAKE", '100*(!AREA_LAKE!/!POLY_AREA!)', "PYTHON3")
+calculateField(lakes_int, "PER_LAKE", '100*(!AREA_LAKE!/!POLY_AREA!)')
 
 # Intersect playas with summarizing unit to get areas/percent covers
-playas_chunk = arcpy.Intersect_analysis([playas, gde_unit], "playas_chunk")
+playas_chunk = parallelIntersect([playas, gde_unit], ws.new("playas_chunk"), zone_field=unit_zone)
 if "hexagon" in str(gde_unit):
     print("Processing playas in hexagons")
-    playas_int = arcpy.Dissolve_management(playas_chunk, "playa_int", "Hex_ID")
+    playas_int = arcpy.Dissolve_management(playas_chunk, ws.new("playa_int"), "Hex_ID")
     arcpy.JoinField_management(playas_int, "Hex_ID", gde_unit, "Hex_ID", ["POLY_AREA"])
 else:
     print("processing playas in hydro basins")
-    playas_int = arcpy.Dissolve_management(playas_chunk, "playas_int", "HYD_AREA")
+    playas_int = arcpy.Dissolve_management(playas_chunk, ws.new("playas_int"), "HYD_AREA")
     arcpy.JoinField_management(playas_int, "HYD_AREA", gde_unit, "HYD_AREA", ["POLY_AREA"])
+ws.release(playas, playas_chunk)
 
-arcpy.AddField_management(playas_int, "AREA_PLAYA", "DOUBLE") 
+SchemaBatch(playas_int).add("AREA_PLAYA", "DOUBLE").add("PER_PLAYA", "DOUBLE").apply()
 arcpy.CalculateGeometryAttributes_management(playas_int, [["AREA_PLAYA", "AREA"]], "", "ACRES", env.outputCoordinateSystem)
-arcpy.AddField_management(playas_int, "PER_PLAYA", "DOUBLE") 
-arcpy.CalculateField_management(playas_int, "PER_PLAYA", '100*(!AREA_PLAYA!/!POLY_AREA!)', "PYTHON3")
+calculateField(playas_int, "PER_PLAYA", '100*(!AREA_PLAYA!/!POLY_AREA!)')
 
 
 # Join new calculated area field from erase layer to full gde unit layer
@@ -442,6 +463,7 @@ for fc in [1]:
         arcpy.JoinField_management(gde_unit, 'HYD_AREA', lp_int, 'HYD_AREA', ["AREA_LKPL", "PER_LKPL"])
         arcpy.JoinField_management(gde_unit, 'HYD_AREA', lakes_int, 'HYD_AREA', ["AREA_LAKE", "PER_LAKE"])
         arcpy.JoinField_management(gde_unit, 'HYD_AREA', playas_int, 'HYD_AREA', ["AREA_PLAYA", "PER_PLAYA"])
+ws.release(lp_int, lakes_int, playas_int)
 [f.name for f in arcpy.ListFields(gde_unit)]
 
 # Make sure all values that may be null are reclassified to 0
@@ -474,52 +496,31 @@ for field in lp_fields:
 # Load river data
 rivers = r"K:\GIS3\Projects\GDE\Geospatial\NV_iGDE_050919.gdb\Rivers_Streams"
 
-# Dissolve rivers to simplify processing
-rivers_dissolve = arcpy.Dissolve_management(rivers, "dissolve_rivers")
-
-# Intersect river lines with units
-rivers_chunk = arcpy.Intersect_analysis([rivers_dissolve, gde_unit], "rivers_chunk", "ALL", "", "LINE")
+# Clip river lines to the units and total their length per unit (and per RIVER_TYPE/RIVER_NAME) in one pass
 if "hexagon" in str(gde_unit):
     print("Processing rivers in hexagons")
-    rivers_int = arcpy.Dissolve_management(rivers_chunk, "rivers_int", "Hex_ID")
-    arcpy.JoinField_management(rivers_int, "Hex_ID", gde_unit, "Hex_ID", ["POLY_AREA"])
+    unit_field = "Hex_ID"
 else:
     print("processing rivers in hydro basins")
-    rivers_int = arcpy.Dissolve_management(rivers_chunk, "rivers_int", "HYD_AREA")
-    arcpy.JoinField_management(rivers_int, "HYD_AREA", gde_unit, "HYD_AREA", ["POLY_AREA"])
-
-# Calculate sum of miles of rivers in each unit
-arcpy.AddField_management(rivers_int, "MILES_RVST", "DOUBLE")
-arcpy.CalculateGeometryAttributes_management(rivers_int, [["MILES_RVST", "LENGTH"]], "MILES_US", "", env.outputCoordinateSystem)
-arcpy.GetCount_management(rivers_int) # Not all basins/hexagons will have rivers
-
-# Calculate miles of rivers per acre in each unit - hydro basin only!
-arcpy.AddField_management(rivers_int, "AREA_RVST", "DOUBLE") 
-arcpy.CalculateField_management(rivers_int, "AREA_RVST", '!MILES_RVST!/!POLY_AREA!', "PYTHON3")
-
-# Join 'MILES_RIVST' to the main unit feature class
-for fc in [1]:
-    fields = arcpy.ListFields(gde_unit)
-    print([f.name for f in fields])
-    fields = list([f.name for f in fields])
-    if "Hex_ID" in fields:
-        print("Adding rivers fields field to hexagon layer")
-        arcpy.JoinField_management(gde_unit, "Hex_ID", rivers_int, "Hex_ID", ["MILES_RVST"])
-       # arcpy.JoinField_management(gde_unit, "Hex_ID", rivers_int, "Hex_ID", ["AREA_RVST"])
-    else:
-        print("Adding MILES_RIVST field and AREA_RIVST to hydrographic basin layer")
-        arcpy.JoinField_management(gde_unit, "HYD_AREA", rivers_int, "HYD_AREA", ["MILES_RVST"])
-        arcpy.JoinField_management(gde_unit, "HYD_AREA", rivers_int, "HYD_AREA", ["AREA_RVST"])
-
-# Make sure all values that may be null (no rivers/streams) are reclassified to 0
-rs_fields = ["MILES_RVST", "AREA_RVST"]
-for field in rs_fields:
-    with arcpy.da.UpdateCursor(gde_unit, field) as cursor:
-        for row in cursor:
-            if row[0] is None:
-                row[0] = 0
-                cursor.updateRow(row)
-    del cursor
+    unit_field = "HYD_AREA"
+river_lengths = tabulateFeatureClass(rivers, gde_unit, unit_field, ["RIVER_TYPE", "RIVER_NAME", "SOURCE_CODE"])
+river_meters = river_lengths.byZone()
+
+# Sum of miles of rivers in each unit, and miles of rivers per acre - hydro basin only!
+# Units without rivers/streams get 0
+rs_fields = [unit_field, "POLY_AREA", "MILES_RVST"]
+if unit_field == "HYD_AREA":
+    print("Adding MILES_RIVST field and AREA_RIVST to hydrographic basin layer")
+    rs_fields.append("AREA_RVST")
+else:
+    print("Adding rivers fields field to hexagon layer")
+with arcpy.da.UpdateCursor(gde_unit, rs_fields) as cursor:
+    for row in cursor:
+        row[2] = river_meters.get(row[0], 0.0) / M_PER_MILE
+        if len(row) > 3:
+            row[3] = row[2] / row[1] if row[1] else 0
+        cursor.updateRow(row)
+del cursor
 
 # MILES_RVST and AREA_RVST
 
@@ -528,7 +529,6 @@ for field in rs_fields:
 # Calculate GDE Presence/Score
 # Count number of physical GDE features presence in each unit (hexagon/hydro basin)
 
-arcpy.AddField_management(gde_unit, "GDE_COUNT", "LONG")
 with arcpy.da.UpdateCursor(gde_unit, ['PER_PHR', 'GDE_COUNT']) as cursor:
     for row in cursor:
         if row[0] > 0:
@@ -577,23 +577,61 @@ del cursor
 
 #-------------------------------------------------------------------------------
 #-------------------------------------------------------------------------------
-# When both hexagons and hydro basins have been processed, add feature classes to the Story Map GDB
+# Phreatophyte systems from the rasters
+# Area and percent of each unit in each GDE system (BpS code), counted from the cells of the TNC mosaic
+# (GDE_Phreatophytes_clean.py) and the LANDFIRE BpS raster, read a band of rows at a time
+# (GDE_ZonalHistogram_clean.py). The 30 m LANDFIRE cells are split along unit edges by coverage fraction;
+# the TNC cells are fine enough to count by their centers. The units rasterized on the LANDFIRE grid are kept in
+# the zone grid cache (GDE_ZoneGrid_clean.py) for the next run; the sparse TNC mosaic only rasterizes the bands
+# inside the study areas and is not cached.
+
+tnc_code_csv = r"K:\GIS3\Projects\GDE\Tables\TNC_Raster_GDE_Systems.csv"
+lf_code_csv = r"K:\GIS3\Projects\GDE\Tables\Landfire_TNC_GDE_lut.csv"
+with arcpy.da.SearchCursor(tnc_code_csv, ["SYS_CODE"]) as cursor:
+    tnc_codes = [row[0] for row in cursor]
+with arcpy.da.SearchCursor(lf_code_csv, ["SYS_CODE"]) as cursor:
+    lf_codes = [row[0] for row in cursor]
+
+tnc_mosaic = path + "\\TNC_BpS_Mosaic"
+lf_bps = r"K:\GIS3\States\NV\Landfire_BPS_NV\US_140BPS_20180618\grid\us_140bps"
+system_histograms = {"tnc": zonalHistogramFeatureClass(tnc_mosaic, gde_unit, unit_field, tnc_codes, field="Value"),
+                     "lf": zonalHistogramFeatureClass(lf_bps, gde_unit, unit_field, lf_codes, subcells=4, field="BPS_CODE",
+                                                      cache=ZONE_CACHE)}
+unit_name = "Hexagons" if unit_field == "Hex_ID" else "HydrographicAreas"
+writeHistograms(system_histograms, r"K:\GIS3\Projects\GDE\Geospatial\NV_iGDE_{}_GDE_systems.csv".format(unit_name))
+
+#-------------------------------------------------------------------------------
+#-------------------------------------------------------------------------------
+# Summary cube
+# Area/length/count of every layer by unit, class and source code (NV_iGDE_Summary_cube_<unit set>.sqlite), for breakdowns
+# that have no story map field
+
+if "hexagon" in str(gde_unit):
+    buildCube(gde_unit, "hexagons", "Hex_ID", ws=ws, pieces={"Rivers_Streams": river_lengths.pieces()})
+else:
+    buildCube(gde_unit, "hydrographic_areas", "HYD_AREA", ws=ws, pieces={"Rivers_Streams": river_lengths.pieces()})
+
+#-------------------------------------------------------------------------------
+#-------------------------------------------------------------------------------
+# Add this run's summary units to the Story Map GDB (created empty by Create_GDE_Template_clean.py)
 
-arcpy.CreateFileGDB_management(r"K:\GIS3\Projects\GDE\Geospatial", "NV_iGDE_Story_061719")
 gdb = r"K:\GIS3\Projects\GDE\Geospatial\NV_iGDE_Story_061719.gdb"
+if not arcpy.Exists(gdb):
+    arcpy.CreateFileGDB_management(r"K:\GIS3\Projects\GDE\Geospatial", "NV_iGDE_Story_061719")
 env.workspace = gdb
 arcpy.ListFeatureClasses()
 
-# Copy hexagon and hydrobasin feature classes to th enew geodatabase
-hexagons = path + "\\hexagon_units"
-hydrobasins = path + "\\hydrobasin_units"
-arcpy.CopyFeatures_management(hexagons, r"K:\GIS3\Projects\GDE\Geospatial\NV_iGDE_Story_061719.gdb\NV_Hexagons")
-arcpy.CopyFeatures_management(hydrobasins, r"K:\GIS3\Projects\GDE\Geospatial\NV_iGDE_Story_061719.gdb\NV_HydrographicAreas")
-
-# Remove unnecessary fields from hydro basin layer
-hydrobasin_new = r"K:\GIS3\Projects\GDE\Geospatial\NV_iGDE_Story_061719.gdb\NV_HydrographicAreas"
-drop_fields = ['COUNT_HYD_', 'HA750_2003', 'HA750_2004', 'PLTSYM', 'DES_REAS', 'SCALE', 'DESIG_ORDE', 'PERIMETER']
-for field in drop_fields:
-    arcpy.DeleteField_management(hydrobasin_new, field)
+# Copy the hexagon or hydrobasin feature class to the story map geodatabase
+if unit_set == "hexagons":
+    hexagons = path + "\\hexagon_units"
+    arcpy.CopyFeatures_management(hexagons, gdb + "\\NV_Hexagons")
+else:
+    hydrobasins = path + "\\hydrobasin_units"
+    hydrobasin_new = gdb + "\\NV_HydrographicAreas"
+    arcpy.CopyFeatures_management(hydrobasins, hydrobasin_new)
+
+    # Remove unnecessary fields from hydro basin layer
+    drop_fields = ['COUNT_HYD_', 'HA750_2003', 'HA750_2004', 'PLTSYM', 'DES_REAS', 'SCALE', 'DESIG_ORDE', 'PERIMETER']
+    SchemaBatch(hydrobasin_new).drop(*drop_fields).apply()
 
 # END
\ No newline at end of file
@@ -8,11 +8,9 @@
 # Copyright:   (c) sarah.byer 2019
 #-------------------------------------------------------------------------------
 
-# Import ArcGIS modules and check out spatial analyst extension
+# Import ArcGIS modules
 import arcpy, os
 from arcpy import env
-from arcpy.sa import *
-arcpy.CheckOutExtension("spatial")
 
 # Path to temporary geodatabase
 path =  r"K:\GIS3\Projects\GDE\Geospatial\Geodatabase_Layers\NV_GDE_Template_Temp.gdb"
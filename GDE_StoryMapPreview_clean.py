@@ -0,0 +1,279 @@
+#-------------------------------------------------------------------------------
+# Name:        NV iGDE Database - Story map preview
+# Purpose:     Approximate the story map AREA_*/PER_* fields (GDE_StoryMapLayers_clean.py) in seconds, for trying
+#              out symbology without the exact dissolve/intersect run. The iGDE polygon layers are rasterized at a
+#              chosen cell size (a cell is covered when its center is inside any feature of the layer, so overlaps
+#              count once like the dissolve) and counted against the zone grid of the units (GDE_ZoneGrid_clean.py),
+#              which splits the cells along the unit edges by coverage fraction and is cached between runs.
+#              Every field comes with a worst-case error bound against the exact engine. Only cells a boundary
+#              passes through can be misclassified, so each unit's AREA error is at most the area of the cells the
+#              layer outline crosses in or next to it (its |dx| + |dy| length times the cell size) plus that of the
+#              sub-cells the unit outline crosses where the layer covers it. A cell next to a unit edge counts in
+#              full for every unit around it, so the bound assumes every crossed cell is misclassified the wrong way
+#              and is usually far above the real error. The bounds shrink with the cell size: compare maxErrors()
+#              at 90 m and 30 m to choose speed or fidelity.
+# Modules: argparse; csv; os; numpy; GDE_Geometry_clean (acres); GDE_GeometryStore_clean; GDE_LineTabulation_clean
+#          (segments); GDE_Mosaic_clean (grids); GDE_ZoneGrid_clean; arcpy (to read the layers)
+#
+# Usage:       python GDE_StoryMapPreview_clean.py --units hexagons --cell 90
+#              python GDE_StoryMapPreview_clean.py --units hydrographic_areas --cell 30 --out hydrobasin_preview.csv
+#
+#              preview = previewStoryMap(hexagons, "Hex_ID", {"Wetlands": wetlands, ...}, cell=90.0)
+#              preview.fields()["PER_WET"]     # percent of each hexagon in wetlands
+#              preview.maxErrors()             # {"AREA_WET": acres, "PER_WET": percent, ...}
+#
+# Author:      sarah.byer
+#
+# Created:     October 2026
+# Copyright:   (c) sarah.byer 2026
+#-------------------------------------------------------------------------------
+
+import argparse, csv, os
+
+import numpy as np
+
+from GDE_Geometry_clean import SQM_PER_ACRE
+from GDE_GeometryStore_clean import readFeatureClass
+from GDE_LineTabulation_clean import storeSegments
+from GDE_Mosaic_clean import MosaicGrid
+from GDE_ZoneGrid_clean import BLOCK_CELLS, ZONE_CACHE, coverRows, zoneEdges, zoneGrid
+
+GDE_GDB = r"K:\GIS3\Projects\GDE\Geospatial\NV_iGDE_050919.gdb"
+# Same unit set names as GDE_StoryMapLayers_clean.py
+UNIT_SETS = {
+    "hexagons": (r"K:\GIS3\Projects\GDE\Geospatial\Geodatabase_Layers\GDE_Boundaries\nv_chat_polygons.shp", "Hex_ID"),
+    "hydrographic_areas": (r"K:\GIS3\Projects\GDE\Geospatial\Geodatabase_Layers\GDE_Boundaries\NDWR_HydroBasins.shp", "HYD_AREA"),
+}
+
+# Story map fields of each iGDE polygon layer: (field suffix, selection field, selection value); the fields are
+# AREA_<suffix> (acres) and PER_<suffix> (percent of the unit), e.g. AREA_FRST from the Forest phreatophytes
+PREVIEW_LAYERS = [
+    ("Phreatophytes", [("PHR", None, None), ("FRST", "PHR_GROUP", "Forest"), ("SHRUB", "PHR_GROUP", "Shrubland"),
+                       ("UNK", "PHR_GROUP", "Unknown")]),
+    ("Wetlands", [("WET", None, None)]),
+    ("Lakes_Playas", [("LKPL", None, None), ("LAKE", "BODY_TYPE", "Lake"), ("PLAYA", "BODY_TYPE", "Playa")]),
+]
+
+#-------------------------------------------------------------------------------
+# Rasterizing the layers
+
+# Grid of the given cell size, snapped to multiples of it, covering the units
+def previewGrid(zones, cell):
+    boxes = np.asarray(zones.bboxes)
+    x0 = np.floor(boxes[:, 0].min() / cell) * cell
+    y0 = np.ceil(boxes[:, 3].max() / cell) * cell
+    ncols = int(np.ceil((boxes[:, 2].max() - x0) / cell))
+    nrows = int(np.ceil((y0 - boxes[:, 1].min()) / cell))
+    return MosaicGrid(x0, y0, cell, nrows, ncols)
+
+class CoverageLayer(object):
+
+    # Polygons of one story map field rasterized band by band on a grid. Edges are sorted by their top row so a
+    # band only scans the edges that can reach it.
+    def __init__(self, store, grid):
+        self.store = store
+        self.grid = grid
+        edges, edge_zone = zoneEdges(store, grid)
+        top = np.minimum(edges[:, 1], edges[:, 3])
+        order = np.argsort(top, kind="stable")
+        self.edges, self.edge_zone, self.top = edges[order], edge_zone[order], top[order]
+        self.span = float(np.abs(edges[:, 3] - edges[:, 1]).max()) if len(edges) else 0.0
+
+    def __len__(self):
+        return len(self.store)
+
+    # Boolean (rows, ncols) coverage of rows [r0, r1)
+    def rows(self, r0, r1):
+        lo, hi = np.searchsorted(self.top, [r0 - self.span - 1, r1 + 1])
+        return coverRows(self.edges[lo:hi], self.edge_zone[lo:hi], r0, r1, self.grid.ncols)
+
+    # |dx| + |dy| length of the outlines near each unit of a zone grid. A piece of outline counts for every unit
+    # holding one of the 3 x 3 cells around it, since the cells it crosses may be split between units.
+    def outlineLengths(self, zone_grid):
+        nzones = len(zone_grid)
+        if not len(self.store):
+            return np.zeros(nzones)
+        segs, feature = storeSegments(self.store, closed=True)
+        row, col, length, which = _pieceCells(segs, self.grid)
+        near = np.empty((len(row), 9), dtype=np.int64)
+        for k, (dr, dc) in enumerate((dr, dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1)):
+            r = np.clip(row + dr, 0, self.grid.nrows - 1)
+            c = np.clip(col + dc, 0, self.grid.ncols - 1)
+            near[:, k] = zone_grid.ids[r, c]
+        near.sort(axis=1)
+        first = np.ones(near.shape, dtype=bool)
+        first[:, 1:] = near[:, 1:] != near[:, :-1]
+        first &= near > 0
+        return np.bincount(near[first] - 1, weights=np.broadcast_to(length[:, None], near.shape)[first], minlength=nzones)
+
+# Outline segments cut into pieces no longer than a cell: grid row and column of the middle of each piece, its
+# |dx| + |dy| length and the segment it came from
+def _pieceCells(segs, grid):
+    dx, dy = segs[:, 2] - segs[:, 0], segs[:, 3] - segs[:, 1]
+    counts = np.maximum(np.ceil(np.hypot(dx, dy) / grid.cell), 1).astype(np.int64)
+    which = np.repeat(np.arange(len(segs)), counts)
+    t = (np.arange(len(which)) - np.repeat(np.cumsum(counts) - counts, counts) + 0.5) / counts[which]
+    col = np.floor((segs[which, 0] + t * dx[which] - grid.x0) / grid.cell).astype(np.int64)
+    row = np.floor((grid.y0 - segs[which, 1] - t * dy[which]) / grid.cell).astype(np.int64)
+    length = (np.abs(dx) + np.abs(dy))[which] / counts[which]
+    return row, col, length, which
+
+#-------------------------------------------------------------------------------
+# Preview
+
+class StoryMapPreview(object):
+
+    # acres/bounds: {field suffix: per unit acres / maximum absolute error of the acres}; poly_acres: unit areas
+    def __init__(self, zone_field, zone_ids, poly_acres, acres, bounds, cell, subcells):
+        self.zone_field = zone_field
+        self.zone_ids = zone_ids
+        self.poly_acres = poly_acres
+        self.acres = acres
+        self.bounds = bounds
+        self.cell = cell
+        self.subcells = subcells
+
+    def __repr__(self):
+        return "StoryMapPreview({} {} units, {} m cells, {} fields)".format(len(self.zone_ids), self.zone_field, self.cell,
+                                                                          2 * len(self.acres))
+
+    def _percent(self, acres):
+        with np.errstate(all="ignore"):
+            return np.minimum(np.where(self.poly_acres > 0, 100.0 * acres / self.poly_acres, 0.0), 100.0)
+
+    # {"AREA_<suffix>": acres per unit, "PER_<suffix>": percent per unit (at most 100, as in the story map)}
+    def fields(self):
+        values = {}
+        for suffix in sorted(self.acres):
+            values["AREA_" + suffix] = self.acres[suffix]
+            values["PER_" + suffix] = self._percent(self.acres[suffix])
+        return values
+
+    # Worst-case error bound of every field in every unit, in the field's units
+    def errors(self):
+        values = {}
+        for suffix in sorted(self.bounds):
+            values["AREA_" + suffix] = self.bounds[suffix]
+            values["PER_" + suffix] = self._percent(self.bounds[suffix])
+        return values
+
+    # Estimated maximum absolute error of each field against the exact engine, over all units
+    def maxErrors(self):
+        return dict((field, float(e.max()) if len(e) else 0.0) for field, e in self.errors().items())
+
+    # One row per unit: the fields and their error bounds (<field>_ERR)
+    def rows(self):
+        values, errors = self.fields(), self.errors()
+        names = sorted(values)
+        rows = []
+        for i, zone_id in enumerate(self.zone_ids.tolist()):
+            row = {self.zone_field: zone_id}
+            for name in names:
+                row[name] = float(values[name][i])
+                row[name + "_ERR"] = float(errors[name][i])
+            rows.append(row)
+        return rows
+
+# Preview of the story map fields of the units in zones (a polygon store with zone_field).
+# layers: {"Phreatophytes"/"Wetlands"/"Lakes_Playas": polygon store with the PREVIEW_LAYERS selection fields};
+# cell: preview cell size (m); subcells: coverage fraction precision along the unit edges
+def previewStoryMap(zones, zone_field, layers, cell=90.0, subcells=4, cache=ZONE_CACHE, block_cells=BLOCK_CELLS):
+    grid = previewGrid(zones, cell)
+    zone_grid = zoneGrid(zones, zone_field, grid, subcells, cache, block_cells)
+    nzones = len(zone_grid)
+    coverage = {}
+    for layer, fields in PREVIEW_LAYERS:
+        if layer not in layers:
+            continue
+        for suffix, field, value in fields:
+            store = layers[layer]
+            if field is not None:
+                store = store.take(np.flatnonzero(np.asarray(store.attributes[field]) == value))
+            coverage[suffix] = CoverageLayer(store, grid)
+
+    # Unit outlines by row, to look up whether the layer covers the cells they cross
+    segs, unit = storeSegments(zones, closed=True)
+    unit_row, unit_col, unit_length, which = _pieceCells(segs, grid)
+    unit = unit[which]
+    order = np.argsort(unit_row, kind="stable")
+    unit_row, unit_col, unit_length, unit = unit_row[order], unit_col[order], unit_length[order], unit[order]
+
+    cells = dict((suffix, np.zeros(nzones)) for suffix in coverage)
+    covered_outline = dict((suffix, np.zeros(nzones)) for suffix in coverage)
+    rows = max(1, block_cells // max(1, grid.ncols))
+    for r0 in range(0, grid.nrows, rows):
+        r1 = min(r0 + rows, grid.nrows)
+        block = zone_grid.block(r0, r1)
+        interior = block.interior()
+        lo, hi = np.searchsorted(unit_row, [r0, r1])
+        on_grid = (unit_col[lo:hi] >= 0) & (unit_col[lo:hi] < grid.ncols)
+        crossing = (unit_row[lo:hi][on_grid] - r0, unit_col[lo:hi][on_grid])
+        for suffix, layer in coverage.items():
+            if not len(layer):
+                continue
+            mask = layer.rows(r0, r1)
+            if not mask.any():
+                continue
+            whole = interior & mask
+            cells[suffix] += np.bincount(block.ids[whole] - 1, minlength=nzones)
+            part = mask.ravel()[block.edge_cells]
+            cells[suffix] += np.bincount(block.edge_zones[part], weights=block.edge_fractions[part], minlength=nzones)
+            hit = mask[crossing]
+            covered_outline[suffix] += np.bincount(unit[lo:hi][on_grid][hit], weights=unit_length[lo:hi][on_grid][hit],
+                                                   minlength=nzones)
+
+    # Misclassified area is at most the cells crossed by the layer outlines, and the sub-cells crossed by the
+    # unit outlines where the layer covers them
+    acres, bounds = {}, {}
+    for suffix, layer in coverage.items():
+        acres[suffix] = cells[suffix] * cell * cell / SQM_PER_ACRE
+        bounds[suffix] = (layer.outlineLengths(zone_grid) + covered_outline[suffix] / subcells) * cell / SQM_PER_ACRE
+    return StoryMapPreview(zone_field, np.asarray(zone_grid.zone_ids), np.asarray(zone_grid.zone_areas) / SQM_PER_ACRE,
+                           acres, bounds, cell, subcells)
+
+#-------------------------------------------------------------------------------
+# Reading the layers and the command line
+
+def previewFeatureClasses(unit_fc, zone_field, gdb=GDE_GDB, cell=90.0, subcells=4, cache=ZONE_CACHE):
+    zones = readFeatureClass(unit_fc, [zone_field])
+    layers = {}
+    for layer, fields in PREVIEW_LAYERS:
+        select = sorted(set(field for suffix, field, value in fields if field is not None))
+        layers[layer] = readFeatureClass(os.path.join(gdb, layer), select)
+    return previewStoryMap(zones, zone_field, layers, cell, subcells, cache)
+
+def writePreview(preview, csv_file):
+    rows = preview.rows()
+    names = sorted(rows[0]) if rows else []
+    tmp = csv_file + ".tmp"
+    with open(tmp, "w", newline="") as f:
+        writer = csv.DictWriter(f, [preview.zone_field] + [name for name in names if name != preview.zone_field])
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(tmp, csv_file)
+    return csv_file
+
+def main():
+    parser = argparse.ArgumentParser(description="Approximate the story map AREA_*/PER_* fields from rasterized layers")
+    parser.add_argument("--units", choices=sorted(UNIT_SETS), default="hexagons")
+    parser.add_argument("--cell", type=float, default=90.0, help="Preview cell size (m)")
+    parser.add_argument("--subcells", type=int, default=4, help="Sub-cells per cell side along the unit edges")
+    parser.add_argument("--gdb", default=GDE_GDB)
+    parser.add_argument("--cache", default=ZONE_CACHE, help="Folder of saved zone grids")
+    parser.add_argument("--out", help="CSV to write the preview fields and their error bounds to")
+    args = parser.parse_args()
+
+    unit_fc, zone_field = UNIT_SETS[args.units]
+    preview = previewFeatureClasses(unit_fc, zone_field, args.gdb, args.cell, args.subcells, args.cache)
+    print(preview)
+    print("{:<12} {:>14}".format("Field", "Max error"))
+    for field, error in sorted(preview.maxErrors().items()):
+        print("{:<12} {:>14.3f}".format(field, error))
+    if args.out:
+        writePreview(preview, args.out)
+        print("Wrote " + args.out)
+
+if __name__ == "__main__":
+    main()
+
+# END
@@ -0,0 +1,165 @@
+#-------------------------------------------------------------------------------
+# Name:        NV iGDE Database - Summary cube
+# Purpose:     Long-form summary of every iGDE layer by summary unit, class and source, so new breakdowns of the
+#              story map numbers (phreatophyte area by SOURCE_CODE, wetland area by WET_SUBTYPE, ...) are a
+#              group-by on a table instead of a new Intersect/Dissolve block.
+#              Each layer is intersected with the units once and every piece is added to the cube cells
+#                (unit set, unit id, layer, attribute, value, source code) -> acres, miles, feature count
+#              for each class attribute of the layer, plus an "ALL" row per unit and source. Areas and lengths
+#              are summed over features, so they match the dissolved story map fields where features of a layer
+#              do not overlap. Each unit set's cube is written to its own SQLite file and CSV, so the unit sets
+#              can be built side by side.
+# Modules: csv; os; sqlite3; GDE_Geometry_clean; GDE_Overlay_clean; arcpy (for the overlay)
+#
+# Usage:       buildCube(gde_unit, "hexagons", "Hex_ID", ws=ws)
+#              query(CUBE_DB.format("hydrographic_areas"), ["value", "source_code"], layer="Phreatophytes",
+#                    attribute="PHR_GROUP")
+#
+# Author:      sarah.byer
+#
+# Created:     October 2026
+# Copyright:   (c) sarah.byer 2026
+#-------------------------------------------------------------------------------
+
+import csv, os, sqlite3
+
+from GDE_Geometry_clean import M_PER_MILE, SQM_PER_ACRE
+
+GDE_GDB = r"K:\GIS3\Projects\GDE\Geospatial\NV_iGDE_050919.gdb"
+# One cube per unit set ("hexagons", "hydrographic_areas")
+CUBE_DB = r"K:\GIS3\Projects\GDE\Geospatial\NV_iGDE_Summary_cube_{}.sqlite"
+CUBE_CSV = r"K:\GIS3\Projects\GDE\Geospatial\NV_iGDE_Summary_cube_{}.csv"
+
+# Layers in the cube and the class attributes each is broken down by
+CUBE_LAYERS = {
+    "Phreatophytes": ["PHR_GROUP", "PHR_TYPE"],
+    "Wetlands": ["WET_TYPE", "WET_SUBTYPE"],
+    "Lakes_Playas": ["BODY_TYPE"],
+    "Rivers_Streams": ["RIVER_TYPE", "RIVER_NAME"],
+    "Springs": ["SPRING_TYPE1"],
+}
+
+ALL = "ALL" # attribute and value of the per-unit totals
+CUBE_FIELDS = ["unit_set", "unit_id", "layer", "attribute", "value", "source_code", "acres", "miles", "features"]
+
+#-------------------------------------------------------------------------------
+# Accumulating pieces
+
+# Add overlay pieces to the cube cells. pieces are (unit id, feature id, {field: value}, area m2, length m);
+# cells is {(unit_set, unit_id, layer, attribute, value, source_code): [area, length, set of feature ids]}
+def accumulate(cells, unit_set, layer, pieces, class_fields):
+    for unit_id, fid, attrs, area, length in pieces:
+        source = attrs.get("SOURCE_CODE")
+        for attribute in [ALL] + list(class_fields):
+            value = ALL if attribute == ALL else attrs.get(attribute)
+            key = (unit_set, str(unit_id), layer, attribute, "" if value is None else str(value), source or "")
+            cell = cells.get(key)
+            if cell is None:
+                cell = cells[key] = [0.0, 0.0, set()]
+            cell[0] += area or 0.0
+            cell[1] += length or 0.0
+            cell[2].add(fid)
+    return cells
+
+# Cube rows from the cells: acres for polygons, miles for lines (0 where not applicable)
+def cubeRows(cells, geometry_types=None):
+    rows = []
+    for key in sorted(cells):
+        area, length, fids = cells[key]
+        geometry = (geometry_types or {}).get(key[2])
+        rows.append(dict(zip(CUBE_FIELDS, key + (
+            area / SQM_PER_ACRE if geometry in (None, "Polygon") else 0.0,
+            length / M_PER_MILE if geometry in (None, "Polyline") else 0.0,
+            len(fids)))))
+    return rows
+
+#-------------------------------------------------------------------------------
+# Storage and queries
+
+def _connect(db):
+    con = sqlite3.connect(db)
+    con.execute("CREATE TABLE IF NOT EXISTS summary_cube (unit_set TEXT, unit_id TEXT, layer TEXT, attribute TEXT, "
+                "value TEXT, source_code TEXT, acres REAL, miles REAL, features INTEGER)")
+    con.execute("CREATE INDEX IF NOT EXISTS cube_slice ON summary_cube (unit_set, layer, attribute)")
+    return con
+
+# Replace one unit set's rows in the SQLite cube and rewrite the CSV copy of the whole cube
+def writeCube(rows, unit_set, db, csv_file=None):
+    con = _connect(db)
+    try:
+        with con:
+            con.execute("DELETE FROM summary_cube WHERE unit_set = ?", (unit_set,))
+            con.executemany("INSERT INTO summary_cube VALUES ({})".format(",".join("?" * len(CUBE_FIELDS))),
+                            [[row[f] for f in CUBE_FIELDS] for row in rows])
+        if csv_file:
+            tmp = csv_file + ".tmp"
+            with open(tmp, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(CUBE_FIELDS)
+                writer.writerows(con.execute("SELECT {} FROM summary_cube ORDER BY unit_set, layer, attribute, unit_id"
+                                             .format(", ".join(CUBE_FIELDS))))
+            os.replace(tmp, csv_file)
+    finally:
+        con.close()
+
+# Group-by on the cube: sums of acres, miles and features for each combination of group_by fields,
+# for the rows matching where (field=value). Returns a list of dicts.
+def query(db, group_by, **where):
+    for field in list(group_by) + list(where):
+        if field not in CUBE_FIELDS:
+            raise ValueError("Unknown cube field {}".format(field))
+    sql = "SELECT {0}{1}SUM(acres), SUM(miles), SUM(features) FROM summary_cube".format(
+        ", ".join(group_by), ", " if group_by else "")
+    if where:
+        sql += " WHERE " + " AND ".join("{} = ?".format(field) for field in where)
+    if group_by:
+        sql += " GROUP BY {0} ORDER BY {0}".format(", ".join(group_by))
+    con = _connect(db)
+    try:
+        rows = con.execute(sql, [str(v) for v in where.values()]).fetchall()
+    finally:
+        con.close()
+    return [dict(zip(list(group_by) + ["acres", "miles", "features"], row)) for row in rows]
+
+#-------------------------------------------------------------------------------
+# Building the cube with arcpy
+
+# Pieces of a layer in each unit, from one Intersect with the units
+def layerPieces(layer_fc, unit_fc, unit_field, class_fields, out_fc):
+    import arcpy
+    from GDE_Overlay_clean import parallelIntersect
+    chunk = parallelIntersect([layer_fc, unit_fc], out_fc)
+    fid_field = "FID_" + os.path.basename(str(layer_fc))
+    existing = set(f.name for f in arcpy.ListFields(chunk))
+    fields = [f for f in list(class_fields) + ["SOURCE_CODE"] if f in existing]
+    with arcpy.da.SearchCursor(chunk, [unit_field, fid_field] + fields + ["SHAPE@AREA", "SHAPE@LENGTH"]) as cursor:
+        for row in cursor:
+            yield row[0], row[1], dict(zip(fields, row[2:-2])), row[-2], row[-1]
+
+# Intersect every cube layer with the units once and write the unit set's rows to the cube.
+# pieces: {layer: pieces already computed by the caller}, used instead of that layer's overlay
+# db and csv_file default to the unit set's cube files
+def buildCube(unit_fc, unit_set, unit_field, layers=CUBE_LAYERS, gdb=GDE_GDB, db=None, csv_file=None, ws=None,
+              pieces=None):
+    import arcpy
+    db = db or CUBE_DB.format(unit_set)
+    csv_file = csv_file or CUBE_CSV.format(unit_set)
+    cells, geometry_types = {}, {}
+    for layer, class_fields in sorted(layers.items()):
+        layer_fc = os.path.join(gdb, layer)
+        geometry_types[layer] = arcpy.Describe(layer_fc).shapeType
+        if pieces and layer in pieces:
+            accumulate(cells, unit_set, layer, pieces[layer], class_fields)
+            continue
+        out_fc = ws.new("cube_" + layer.lower()) if ws else "memory\\cube_" + layer.lower()
+        accumulate(cells, unit_set, layer, layerPieces(layer_fc, unit_fc, unit_field, class_fields, out_fc), class_fields)
+        if ws:
+            ws.release(out_fc)
+        else:
+            arcpy.Delete_management(out_fc)
+    rows = cubeRows(cells, geometry_types)
+    writeCube(rows, unit_set, db, csv_file)
+    print("{} summary cube rows for {}".format(len(rows), unit_set))
+    return rows
+
+# END
@@ -0,0 +1,431 @@
+#-------------------------------------------------------------------------------
+# Name:        NV iGDE Database - Synthetic Nevada-scale inputs
+# Purpose:     Generate deterministic synthetic stand-ins for the iGDE source data (NV CHAT hexagons,
+#              NDWR hydrographic areas, NHD flowlines/waterbodies, DRI wetlands, SSI springs and taxa tables,
+#              NNHP species features and categorical BpS rasters) so every stage can be timed without K:\GIS3.
+#              scale = 1.0 approximates statewide feature counts; smaller scales shrink the extent, not the density.
+# Modules: math; random; numpy
+#
+# Author:      sarah.byer
+#
+# Created:     October 2026
+# Copyright:   (c) sarah.byer 2026
+#-------------------------------------------------------------------------------
+
+import math, random
+import numpy as np
+
+# Approximate extent of Nevada in NAD 1983 UTM Zone 11N meters (xmin, ymin, xmax, ymax)
+NV_EXTENT = (230000.0, 3870000.0, 770000.0, 4650000.0)
+
+# Statewide feature counts at scale = 1.0
+NV_COUNTS = {
+    "hydrobasins": 256,
+    "flowlines": 300000,
+    "waterbodies": 30000,
+    "wetlands": 200000,
+    "springs": 12000,
+    "taxa_per_spring": 3,
+    "nnhp_points": 9000,
+    "nnhp_lines": 600,
+    "nnhp_polys": 2500,
+}
+
+# NV CHAT hexagons are one square mile
+HEX_AREA_SQM = 2589988.11
+LANDFIRE_CELL = 30.0
+
+# Attribute domains taken from the source data used in the iGDE scripts
+FLOWLINE_FCODES = [(46003, 0.70), (46006, 0.12), (55800, 0.08), (46007, 0.08), (33600, 0.02)]
+MAJOR_RIVERS = ["Humboldt River", "Truckee River", "Carson River", "Walker River", "Quinn River",
+                "Muddy River", "Virgin River", "Owyhee River", "Reese River", "Colorado River",
+                "White River", "Amargosa River"]
+OTHER_STREAM_NAMES = ["Cottonwood Creek", "Willow Creek", "Pine Creek", "Big Creek", "Mill Creek",
+                      "Birch Creek", "Maggie Creek", "White River Wash"]
+WATERBODY_LUT = {
+    36100: ("Playa", "Playa"),
+    39004: ("Lake", "Lake/Pond: Hydrographic Category = Perennial"),
+    39009: ("Lake", "Lake/Pond: Hydrographic Category = Perennial; Stage = Average Water Elevation"),
+    39011: ("Lake", "Lake/Pond: Hydrographic Category = Perennial; Stage = Date of Photography"),
+    39001: ("Lake", "Lake/Pond: Hydrographic Category = Intermittent"),
+    46600: ("Swamp/Marsh", "Swamp/Marsh"),
+    43600: ("Reservoir", "Reservoir"),
+}
+WETLAND_TYPES = {"Lake": ["open", "shore"], "Marsh": ["emergent", "seasonal"], "Meadow": ["wet", "seasonal"],
+                 "Playa": ["dry", "wet"], "Riparian": ["woody", "herbaceous"], "Spring": ["spring"]}
+INVENTORY_LEVELS = ["Level 1", "Level 2", "Provisional", "No Spring", "NoSpring"]
+SPRING_TYPES = ["Rheocrene", "Helocrene", "Hillslope", "Limnocrene", "Mound-form", "Hypocrene"]
+GENERA = ["Pyrgulopsis", "Rhinichthys", "Crenichthys", "Rana", "Anaxyrus", "Juncus", "Carex",
+          "Mimulus", "Eleocharis", "Salix", "Tryonia", "Juga", "Gila", "Catostomus"]
+EPITHETS = ["aurata", "osculus", "baileyi", "pipiens", "nelsoni", "balticus", "nebrascensis",
+            "guttatus", "palustris", "exigua", "clathrata", "laurae", "bicolor", "fumeiventris"]
+FLORA_KEEP_NAMES = ["Philonotis fontana", "Primula fragrans", "Scirpus americanus", "Spirogyra parula"]
+S_RANKS = ["S1", "S2", "S3", "S1S2", "SH", "SX", "S2S3"]
+
+# BpS system codes; GDE_CODES mirrors TNC_Raster_GDE_Systems.csv / Landfire_TNC_GDE_lut.csv
+GDE_CODES = [10542, 11530, 11551, 11540, 11600, 10800, 11010, 11620]
+NON_GDE_CODES = [10790, 10801, 11080, 11250, 11260, 11070, 11532]
+GDE_SYSTEMS = {
+    10542: ("Ponderosa Pine Riparian", "Forest", "No"),
+    11530: ("Inter-Mountain Basins Greasewood Flat", "Shrubland", "No"),
+    11551: ("North American Warm Desert Riparian Mesquite Bosque", "Shrubland", "No"),
+    11540: ("Great Basin Foothill and Lower Montane Riparian Woodland", "Forest", "No"),
+    11600: ("Western North American Emergent Marsh", "Wetland", "Yes"),
+    10800: ("Rocky Mountain Aspen Forest", "Forest", "No"),
+    11010: ("Inter-Mountain Basins Alkaline Wet Meadow", "Wetland", "Yes"),
+    11620: ("Rocky Mountain Subalpine-Montane Riparian Shrubland", "Shrubland", "No"),
+}
+TNC_RESOLUTIONS = [1.0, 2.0, 5.0, 10.0]
+
+#-------------------------------------------------------------------------------
+# Helpers
+
+# Extent shrunk by sqrt(scale) around the center of Nevada so densities stay statewide
+def scaledExtent(scale):
+    xmin, ymin, xmax, ymax = NV_EXTENT
+    f = math.sqrt(scale)
+    cx, cy = (xmin + xmax) / 2.0, (ymin + ymax) / 2.0
+    hw, hh = (xmax - xmin) * f / 2.0, (ymax - ymin) * f / 2.0
+    return (cx - hw, cy - hh, cx + hw, cy + hh)
+
+def scaledCount(name, scale, minimum=4):
+    return max(minimum, int(round(NV_COUNTS[name] * scale)))
+
+def _weighted(rng, choices):
+    r = rng.random()
+    total = 0.0
+    for value, weight in choices:
+        total += weight
+        if r < total:
+            return value
+    return choices[-1][0]
+
+def _randomPoint(rng, extent):
+    return (rng.uniform(extent[0], extent[2]), rng.uniform(extent[1], extent[3]))
+
+# Irregular star-shaped polygon around a center, clockwise like Esri exterior rings
+def _blob(rng, cx, cy, radius, n=8):
+    ring = []
+    for i in range(n):
+        a = -2 * math.pi * i / n
+        r = radius * rng.uniform(0.6, 1.0)
+        ring.append((cx + r * math.cos(a), cy + r * math.sin(a)))
+    ring.append(ring[0])
+    return [ring]
+
+def _walk(rng, x, y, n, step):
+    heading = rng.uniform(0, 2 * math.pi)
+    path = [(x, y)]
+    for i in range(n - 1):
+        heading += rng.uniform(-0.5, 0.5)
+        x += step * math.cos(heading)
+        y += step * math.sin(heading)
+        path.append((x, y))
+    return [path]
+
+#-------------------------------------------------------------------------------
+# Summary units
+
+# Flat-topped hexagon grid like nv_chat_polygons.shp
+def hexagons(scale=0.01, seed=26):
+    extent = scaledExtent(scale)
+    side = math.sqrt(2 * HEX_AREA_SQM / (3 * math.sqrt(3)))
+    dx, dy = 1.5 * side, math.sqrt(3) * side
+    ncols = int((extent[2] - extent[0]) / dx) + 1
+    nrows = int((extent[3] - extent[1]) / dy) + 1
+    features = []
+    hex_id = 1
+    for col in range(ncols):
+        cx = extent[0] + col * dx
+        for row in range(nrows):
+            cy = extent[1] + row * dy + (dy / 2.0 if col % 2 else 0.0)
+            ring = [(cx + side * math.cos(-math.pi * k / 3), cy + side * math.sin(-math.pi * k / 3)) for k in range(6)]
+            ring.append(ring[0])
+            features.append({"Hex_ID": hex_id, "SHAPE": [ring]})
+            hex_id += 1
+    return features
+
+# Rectangular stand-ins for NDWR_HydroBasins.shp
+def hydrobasins(scale=0.01, seed=26):
+    extent = scaledExtent(scale)
+    n = scaledCount("hydrobasins", scale)
+    ncols = int(math.ceil(math.sqrt(n)))
+    nrows = int(math.ceil(n / float(ncols)))
+    w = (extent[2] - extent[0]) / ncols
+    h = (extent[3] - extent[1]) / nrows
+    features = []
+    for i in range(nrows * ncols):
+        r, c = divmod(i, ncols)
+        x0, y0 = extent[0] + c * w, extent[1] + r * h
+        ring = [(x0, y0), (x0, y0 + h), (x0 + w, y0 + h), (x0 + w, y0), (x0, y0)]
+        features.append({"HYD_AREA": "{:03d}".format(i + 1), "HYD_AREA_N": "Basin {}".format(i + 1), "SHAPE": [ring]})
+    return features
+
+#-------------------------------------------------------------------------------
+# Hydrography
+
+# NHDFlowline: FCode, GNIS_Name, Permanent_Identifier
+def flowlines(scale=0.01, seed=26):
+    rng = random.Random(seed)
+    extent = scaledExtent(scale)
+    features = []
+    for i in range(scaledCount("flowlines", scale)):
+        fcode = _weighted(rng, FLOWLINE_FCODES)
+        r = rng.random()
+        if r < 0.15:
+            name = rng.choice(MAJOR_RIVERS)
+        elif r < 0.45:
+            name = rng.choice(OTHER_STREAM_NAMES)
+        else:
+            name = None
+        x, y = _randomPoint(rng, extent)
+        features.append({"FCode": fcode, "GNIS_Name": name,
+                         "Permanent_Identifier": str(152000000 + i),
+                         "SHAPE": _walk(rng, x, y, rng.randint(3, 10), rng.uniform(80, 250))})
+    return features
+
+# Major rivers lookup like NV_GDE_Major_RiversStreams.csv
+def majorRivers():
+    return [{"Name": name} for name in MAJOR_RIVERS]
+
+# NHDWaterbody: FCode, GNIS_Name, Permanent_Identifier
+def waterbodies(scale=0.01, seed=26):
+    rng = random.Random(seed + 1)
+    extent = scaledExtent(scale)
+    fcodes = sorted(WATERBODY_LUT)
+    features = []
+    for i in range(scaledCount("waterbodies", scale)):
+        x, y = _randomPoint(rng, extent)
+        fcode = rng.choice(fcodes)
+        radius = rng.uniform(500, 4000) if fcode == 36100 else rng.uniform(30, 600)
+        features.append({"FCode": fcode, "GNIS_Name": rng.choice([None, "Lake {}".format(i)]),
+                         "Permanent_Identifier": "{{{:08X}-0000-0000-0000-000000000000}}".format(i),
+                         "SHAPE": _blob(rng, x, y, radius)})
+    return features
+
+# Lookup like NHD_Waterbody_lut.csv
+def waterbodyLut():
+    return [{"FCode": code, "Type": t, "Description": d} for code, (t, d) in sorted(WATERBODY_LUT.items())]
+
+# DRI NVwetV1d wetlands: WETLAND_TYPE, WETLAND_SUBTYPE
+def wetlands(scale=0.01, seed=26):
+    rng = random.Random(seed + 2)
+    extent = scaledExtent(scale)
+    types = sorted(WETLAND_TYPES)
+    features = []
+    for i in range(scaledCount("wetlands", scale)):
+        wet_type = rng.choice(types)
+        x, y = _randomPoint(rng, extent)
+        features.append({"WETLAND_TYPE": wet_type, "WETLAND_SUBTYPE": rng.choice(WETLAND_TYPES[wet_type]),
+                         "SHAPE": _blob(rng, x, y, rng.uniform(20, 300))})
+    return features
+
+#-------------------------------------------------------------------------------
+# Springs Stewardship Institute (SSI)
+
+def _epithet(rng):
+    r = rng.random()
+    if r < 0.1:
+        return None
+    elif r < 0.2:
+        return rng.choice(["", " ", "x", "sp"])
+    return rng.choice(EPITHETS)
+
+# Summarized springs table plus the vertebrate, invertebrate and flora taxa tables keyed by SiteID
+def springs(scale=0.01, seed=26):
+    from GDE_Geometry_clean import utmToLatLon
+    rng = random.Random(seed + 3)
+    extent = scaledExtent(scale)
+    sites = []
+    for i in range(scaledCount("springs", scale)):
+        x, y = _randomPoint(rng, extent)
+        lat, lon = utmToLatLon(x, y)
+        sites.append({"SiteID": 1000 + i, "ShortName": "Spring {}".format(i),
+                      "SpringType1": rng.choice(SPRING_TYPES), "SpringType2": rng.choice([None] + SPRING_TYPES),
+                      "CastImageHyperlink": "https://example.org/img/{}.jpg".format(i),
+                      "CastSketchHyperlink": "https://example.org/sketch/{}.jpg".format(i),
+                      "LatitudeDD": lat, "LongitudeDD": lon, "ElevationM": rng.uniform(800, 3000),
+                      "InventoryLevel": _weighted(rng, [("Level 1", 0.55), ("Level 2", 0.3), ("Provisional", 0.12),
+                                                        ("No Spring", 0.02), ("NoSpring", 0.01)]),
+                      "SurveyCount": rng.randint(1, 12), "Flow_Mean": rng.uniform(0, 50), "pH_Mean": rng.uniform(6, 9),
+                      "Water_Temp_Mean": rng.uniform(5, 40), "Spec_Cond_Mean": rng.uniform(100, 3000),
+                      "Alkalinity_Mean": rng.uniform(20, 400), "TotalAreaSQM": rng.uniform(1, 5000),
+                      "SHAPE": (x, y)})
+    per_site = NV_COUNTS["taxa_per_spring"]
+    vert, invert, flora = [], [], []
+    for site in sites:
+        sid = site["SiteID"]
+        for k in range(rng.randint(0, 2 * per_site)):
+            vert.append({"SiteID": sid, "FaunaGenus": rng.choice(GENERA + [None, "x"]), "FaunaSpecies": _epithet(rng)})
+        for k in range(rng.randint(0, 2 * per_site)):
+            invert.append({"SiteID": sid, "Genus": rng.choice(GENERA + [None]), "Species": _epithet(rng)})
+        for k in range(rng.randint(0, 2 * per_site)):
+            species = _epithet(rng)
+            full = rng.choice(FLORA_KEEP_NAMES) if species is None and rng.random() < 0.3 else None
+            flora.append({"SiteID": sid, "Genus": rng.choice(GENERA + [None]), "Species": species, "FloraSpecies": full})
+    return {"sites": sites, "vert": vert, "invert": invert, "flora": flora}
+
+# Next monthly SSI release: a fraction of sites get new attributes, new taxa records or "No Spring",
+# a few are dropped and a few new sites are added
+def springsRelease(springs, fraction=0.02, seed=26):
+    rng = random.Random(seed + 6)
+    sites = []
+    for site in springs["sites"]:
+        r = rng.random()
+        if r < fraction * 0.1:
+            continue
+        site = dict(site)
+        if r < fraction * 0.5:
+            site["Flow_Mean"] = rng.uniform(0, 50)
+            site["SurveyCount"] += 1
+        elif r < fraction * 0.6:
+            site["InventoryLevel"] = "No Spring"
+        sites.append(site)
+    changed = set(s["SiteID"] for s in springs["sites"] if rng.random() < fraction * 0.5)
+    taxa = {}
+    for key in ("vert", "invert", "flora"):
+        taxa[key] = list(springs[key])
+    for sid in sorted(changed):
+        taxa["invert"].append({"SiteID": sid, "Genus": rng.choice(GENERA), "Species": rng.choice(EPITHETS)})
+    next_id = max(s["SiteID"] for s in springs["sites"]) + 1
+    for i in range(max(1, int(len(springs["sites"]) * fraction * 0.1))):
+        template = dict(rng.choice(springs["sites"]))
+        template["SiteID"] = next_id + i
+        template["InventoryLevel"] = "Provisional"
+        sites.append(template)
+        taxa["vert"].append({"SiteID": next_id + i, "FaunaGenus": rng.choice(GENERA), "FaunaSpecies": rng.choice(EPITHETS)})
+    return {"sites": sites, "vert": taxa["vert"], "invert": taxa["invert"], "flora": taxa["flora"]}
+
+#-------------------------------------------------------------------------------
+# Nevada Natural Heritage Program (NNHP)
+
+def _nnhpAttributes(rng):
+    genus, epithet = rng.choice(GENERA), rng.choice(EPITHETS)
+    return {"SNAME": "{} {}".format(genus, epithet), "SCOMNAME": "{} {}".format(epithet.title(), genus.lower()),
+            "S_RANK": rng.choice(S_RANKS), "G_RANK": rng.choice(["G1", "G2", "G3", "G4"]),
+            "MAJORGROUP": rng.choice(["Vertebrate Animal", "Invertebrate Animal", "Vascular Plant"]),
+            "MINORGROUP": rng.choice(["Fish", "Mollusk", "Amphibian", "Dicot", "Monocot"]),
+            "NV_STAT": None, "USESA_NV": rng.choice([None, "LE", "LT"]), "BLM_STAT": None, "USFS_STAT": None,
+            "NNPS_STAT": None, "WAP2012": rng.choice([None, "Y"]), "ENDEMISM": rng.choice([" ", "Y", "N"]),
+            "NNHP_TRACK": rng.choice(["Tracked", "Watch"]), "REFERENCE_": "ref", "REFERENCE1": "ref"}
+
+# Point, line and polygon species features (TNC_GDE_Project_point/line/poly.shp)
+def nnhp(scale=0.01, seed=26):
+    rng = random.Random(seed + 4)
+    extent = scaledExtent(scale)
+    points, lines, polys = [], [], []
+    for i in range(scaledCount("nnhp_points", scale)):
+        feat = _nnhpAttributes(rng)
+        feat["SHAPE"] = _randomPoint(rng, extent)
+        points.append(feat)
+    for i in range(scaledCount("nnhp_lines", scale)):
+        feat = _nnhpAttributes(rng)
+        x, y = _randomPoint(rng, extent)
+        feat["SHAPE"] = _walk(rng, x, y, 5, 200.0)
+        lines.append(feat)
+    for i in range(scaledCount("nnhp_polys", scale)):
+        feat = _nnhpAttributes(rng)
+        x, y = _randomPoint(rng, extent)
+        feat["SHAPE"] = _blob(rng, x, y, rng.uniform(50, 800))
+        polys.append(feat)
+    return {"points": points, "lines": lines, "polys": polys}
+
+# Endemism corrections like Endemic_corrections_ESM_NNHP.csv
+def endemismCorrections():
+    return [{"SNAME": "{} {}".format(g, e), "ENDEMISM": "Y" if (len(g) + len(e)) % 3 == 0 else "N"}
+            for g in GENERA for e in EPITHETS]
+
+#-------------------------------------------------------------------------------
+# Categorical BpS rasters
+
+# Blocky categorical array: random coarse classes repeated out to the full size
+def _categorical(np_rng, nrows, ncols, codes, patch):
+    crow = max(1, int(math.ceil(nrows / float(patch))))
+    ccol = max(1, int(math.ceil(ncols / float(patch))))
+    coarse = np_rng.choice(np.asarray(codes, dtype=np.int32), size=(crow, ccol))
+    full = np.repeat(np.repeat(coarse, patch, axis=0), patch, axis=1)
+    return full[:nrows, :ncols]
+
+# One LANDFIRE-like 30 m raster over the extent and a set of finer TNC study-area rasters inside it.
+# Each raster is a dict with the array, its upper-left corner, cell size, NoData value, value field and source code.
+def bpsRasters(scale=0.01, seed=26, tnc_count=11):
+    np_rng = np.random.default_rng(seed + 5)
+    rng = random.Random(seed + 5)
+    extent = scaledExtent(scale)
+    codes = GDE_CODES + NON_GDE_CODES
+    ncols = int((extent[2] - extent[0]) / LANDFIRE_CELL)
+    nrows = int((extent[3] - extent[1]) / LANDFIRE_CELL)
+    landfire = {"name": "us_140bps", "array": _categorical(np_rng, nrows, ncols, codes, 20),
+                "x0": extent[0], "y0": extent[1] + nrows * LANDFIRE_CELL, "cell": LANDFIRE_CELL,
+                "nodata": -9999, "field": "BPS_CODE", "source_code": "lf"}
+    tnc = []
+    for i in range(tnc_count):
+        res = TNC_RESOLUTIONS[i % len(TNC_RESOLUTIONS)]
+        # TNC study areas cover a few percent of the extent each; keep cell counts bounded
+        side = min((extent[2] - extent[0]) * 0.08, 1500.0 * res)
+        x0 = rng.uniform(extent[0], extent[2] - side)
+        y_top = rng.uniform(extent[1] + side, extent[3])
+        n = int(side / res)
+        array = _categorical(np_rng, n, n, codes, 25)
+        tnc.append({"name": "tnc_area_{:02d}.tif".format(i + 1), "array": array, "x0": round(x0 / res) * res,
+                    "y0": round(y_top / res) * res, "cell": res, "nodata": -9999,
+                    "field": ["SYS_CODE", "BSYS_CODE", "BSYSCODE"][i % 3], "source_code": "nvtnc{}".format(i + 1)})
+    return {"landfire": landfire, "tnc": tnc}
+
+# Cell-traced outline of a digital disk with a vertex at every cell edge, as RasterToPolygon_conversion
+# writes with NO_SIMPLIFY; clockwise like Esri exterior rings
+def _stairRing(cx, cy, radius_cells, cell):
+    n = int(radius_cells)
+    top = []
+    height = 0
+    for i in range(-n, n):
+        t = int(math.sqrt(max(0.0, radius_cells ** 2 - (i + 0.5) ** 2)) + 0.5)
+        step = 1 if t > height else -1
+        for j in range(height, t, step):
+            top.append((i, j))
+        top.append((i, t))
+        height = t
+    for j in range(height, 0, -1):
+        top.append((n, j))
+    ring = top + [(i, -j) for i, j in reversed(top) if j > 0] + [top[0]]
+    return [(cx + i * cell, cy + j * cell) for i, j in ring]
+
+# Raster-derived phreatophyte polygons (GRIDCODE, SOURCECODE) on the TNC resolutions
+def rasterPolygons(scale=0.01, seed=26):
+    rng = random.Random(seed + 6)
+    extent = scaledExtent(scale)
+    features = []
+    for i in range(scaledCount("wetlands", scale) // 10):
+        cell = TNC_RESOLUTIONS[i % len(TNC_RESOLUTIONS)]
+        x, y = _randomPoint(rng, extent)
+        ring = _stairRing(round(x / cell) * cell, round(y / cell) * cell, rng.uniform(8, 60), cell)
+        features.append({"GRIDCODE": rng.choice(GDE_CODES), "SOURCECODE": "nvtnc{}".format(i % 11 + 1), "SHAPE": [ring]})
+    return features
+
+# Lookup like TNC_Raster_GDE_Systems.csv / GDE_Phreatophyte_NameCodeGroup.csv
+def gdeSystems():
+    return [{"SYS_CODE": code, "SYS_NAME": name, "SYS_GROUP": group, "Wetland": wetland}
+            for code, (name, group, wetland) in sorted(GDE_SYSTEMS.items())]
+
+#-------------------------------------------------------------------------------
+# Full synthetic dataset for every pipeline stage
+
+def buildDataset(scale=0.01, seed=26):
+    return {
+        "scale": scale, "seed": seed,
+        "hexagons": hexagons(scale, seed),
+        "hydrobasins": hydrobasins(scale, seed),
+        "flowlines": flowlines(scale, seed),
+        "major_rivers": majorRivers(),
+        "waterbodies": waterbodies(scale, seed),
+        "waterbody_lut": waterbodyLut(),
+        "wetlands": wetlands(scale, seed),
+        "springs": springs(scale, seed),
+        "nnhp": nnhp(scale, seed),
+        "endemism": endemismCorrections(),
+        "rasters": bpsRasters(scale, seed),
+        "raster_polygons": rasterPolygons(scale, seed),
+        "gde_systems": gdeSystems(),
+    }
+
+# END
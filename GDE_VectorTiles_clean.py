@@ -0,0 +1,504 @@
+#-------------------------------------------------------------------------------
+# Name:        NV iGDE Database - Story map vector tiles
+# Purpose:     Build a zoom-level pyramid of Mapbox Vector Tiles (v2) from the story map summary layers
+#              (NV_Hexagons, NV_HydrographicAreas, NV_Photos) so the public story map loads only what is on
+#              screen instead of the full-resolution polygons. Geometry is clipped to each tile, simplified to
+#              the tile grid at every zoom, and attributes are pruned to the PER_*, COUNT_*, MILES_RVST and
+#              GDE_COUNT summary fields. Tiles are rendered in parallel worker processes and written gzipped
+#              to an MBTiles SQLite file.
+# Modules: argparse; fnmatch; gzip; math; multiprocessing; os; sqlite3; struct; GDE_Geometry_clean;
+#          arcpy (for reading the story map layers)
+#
+# Usage:       python GDE_VectorTiles_clean.py
+#              python GDE_VectorTiles_clean.py --max-zoom 11 --workers 8
+#
+# Author:      sarah.byer
+#
+# Created:     October 2026
+# Copyright:   (c) sarah.byer 2026
+#-------------------------------------------------------------------------------
+
+import argparse, fnmatch, gzip, json, math, multiprocessing, os, sqlite3, struct, sys
+from concurrent.futures import ProcessPoolExecutor
+
+from GDE_Geometry_clean import bbox, pointInRing, ringSignedArea, shapeParts, utmToLatLon
+
+# Story map geodatabase and the tile file written next to it
+story_gdb = r"K:\GIS3\Projects\GDE\Geospatial\NV_iGDE_Story_061719.gdb"
+story_tiles = r"K:\GIS3\Projects\GDE\Geospatial\NV_iGDE_Story_tiles.mbtiles"
+
+# Summary fields kept in the tiles; everything else (AREA_*, POLY_AREA, names...) is left out
+KEEP_FIELDS = ["PER_*", "COUNT_*", "MILES_RVST", "GDE_COUNT"]
+
+# (layer, id field used as the tile feature id, extra fields kept, min zoom, max zoom)
+# NOTE HYD_AREA codes such as "101A" are not integers, so they are kept as an attribute instead of the id.
+# The photo points have no summary fields, so their popup fields are kept as well.
+TILE_LAYERS = [
+    ("NV_HydrographicAreas", None, ["HYD_AREA"], 4, 12),
+    ("NV_Hexagons", "Hex_ID", [], 7, 12),
+    ("NV_Photos", None, ["GDE_TYPE", "CAPTION", "FLICKR", "JPEG"], 6, 12),
+]
+
+MIN_ZOOM = 4
+MAX_ZOOM = 12
+TILE_EXTENT = 4096 # tile grid units
+TILE_BUFFER = 64 # grid units kept outside the tile so polygon edges do not show at tile seams
+SIMPLIFY_UNITS = 8.0 # Douglas-Peucker tolerance in grid units (1/2 pixel of a 256 pixel tile)
+TILES_PER_TASK = 128
+
+EARTH_RADIUS = 6378137.0
+ORIGIN_SHIFT = math.pi * EARTH_RADIUS
+
+POINT, POLYGON = 1, 3
+
+#-------------------------------------------------------------------------------
+# Web Mercator
+
+def lonLatToMercator(lon, lat):
+    x = math.radians(lon) * EARTH_RADIUS
+    y = math.log(math.tan(math.pi / 4 + math.radians(lat) / 2)) * EARTH_RADIUS
+    return (x, y)
+
+def mercatorToLonLat(x, y):
+    lon = math.degrees(x / EARTH_RADIUS)
+    lat = math.degrees(2 * math.atan(math.exp(y / EARTH_RADIUS)) - math.pi / 2)
+    return (lon, lat)
+
+# NAD 1983 UTM Zone 11N -> Web Mercator (NAD 1983 and WGS 1984 are treated as the same datum at tile precision)
+def utmToMercator(x, y):
+    lat, lon = utmToLatLon(x, y)
+    return lonLatToMercator(lon, lat)
+
+def tileSize(zoom):
+    return 2 * ORIGIN_SHIFT / (1 << zoom)
+
+# XYZ tiles touched by a Mercator box (buffer included), as (col0, row0, col1, row1)
+def tileRange(box, zoom, buffer=TILE_BUFFER):
+    size = tileSize(zoom)
+    pad = size * buffer / float(TILE_EXTENT)
+    n = (1 << zoom) - 1
+    col0 = max(0, int(math.floor((box[0] - pad + ORIGIN_SHIFT) / size)))
+    col1 = min(n, int(math.floor((box[2] + pad + ORIGIN_SHIFT) / size)))
+    row0 = max(0, int(math.floor((ORIGIN_SHIFT - box[3] - pad) / size)))
+    row1 = min(n, int(math.floor((ORIGIN_SHIFT - box[1] + pad) / size)))
+    return col0, row0, col1, row1
+
+# Mercator box of an XYZ tile
+def tileBounds(zoom, col, row):
+    size = tileSize(zoom)
+    x0 = col * size - ORIGIN_SHIFT
+    y1 = ORIGIN_SHIFT - row * size
+    return (x0, y1 - size, x0 + size, y1)
+
+#-------------------------------------------------------------------------------
+# Features
+
+# Summary fields of a layer's field names that go into the tiles
+def keptFields(names, extra=()):
+    return [n for n in names if n in extra or any(fnmatch.fnmatchcase(n.upper(), p) for p in KEEP_FIELDS)]
+
+# Tile feature id from an id field value; only integers can be tile ids
+def featureId(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+# Feature dict for tiling: {"id", "type", "geometry" (Mercator), "bbox", "tags"}.
+# shape is a list of rings (UTM) for polygons or an (x, y) tuple for points.
+def tileFeature(shape, tags, fid=None):
+    if isinstance(shape, tuple):
+        x, y = utmToMercator(shape[0], shape[1])
+        return {"id": fid, "type": POINT, "geometry": (x, y), "bbox": (x, y, x, y), "tags": tags}
+    rings = [[utmToMercator(x, y) for x, y in ring] for ring in shape if len(ring) >= 4]
+    if not rings:
+        return None
+    # Exterior rings keep the orientation of the largest ring; the other direction marks holes
+    areas = [ringSignedArea(ring) for ring in rings]
+    outer_sign = 1 if max(areas, key=abs) > 0 else -1
+    xs = [pt[0] for ring in rings for pt in ring]
+    ys = [pt[1] for ring in rings for pt in ring]
+    return {"id": fid, "type": POLYGON, "geometry": groupRings(rings, [area * outer_sign > 0 for area in areas]),
+            "bbox": (min(xs), min(ys), max(xs), max(ys)), "tags": tags}
+
+# [(ring, is exterior)] with every hole right after the exterior ring that contains it, as vector tiles need
+# for multipart polygons. A hole belongs to the smallest exterior holding most of its vertices; holes outside
+# every exterior are dropped.
+def groupRings(rings, exterior):
+    outers = [i for i, e in enumerate(exterior) if e]
+    boxes = [bbox([ring]) for ring in rings]
+    sizes = [abs(ringSignedArea(ring)) for ring in rings]
+    holes = dict((i, []) for i in outers)
+    for h in [i for i, e in enumerate(exterior) if not e]:
+        hb = boxes[h]
+        around = [i for i in outers if boxes[i][0] <= hb[0] and boxes[i][1] <= hb[1] and boxes[i][2] >= hb[2] and
+                  boxes[i][3] >= hb[3]]
+        vertices = rings[h][:-1]
+        inside = [i for i in around if 2 * sum(pointInRing(x, y, rings[i]) for x, y in vertices) > len(vertices)]
+        if inside or around:
+            holes[min(inside or around, key=lambda i: sizes[i])].append(h)
+    return [(rings[j], j == i) for i in outers for j in [i] + holes[i]]
+
+#-------------------------------------------------------------------------------
+# Clipping and simplification in tile grid units
+
+def _clipEdge(ring, inside, cross):
+    out = []
+    if not ring:
+        return out
+    prev = ring[-1]
+    prev_in = inside(prev)
+    for pt in ring:
+        pt_in = inside(pt)
+        if pt_in:
+            if not prev_in:
+                out.append(cross(prev, pt))
+            out.append(pt)
+        elif prev_in:
+            out.append(cross(prev, pt))
+        prev, prev_in = pt, pt_in
+    return out
+
+# Sutherland-Hodgman clip of an open ring to the box lo..hi on both axes
+def clipRing(ring, lo, hi):
+    def xCross(v):
+        return lambda a, b: (v, a[1] + (b[1] - a[1]) * (v - a[0]) / (b[0] - a[0]))
+    def yCross(v):
+        return lambda a, b: (a[0] + (b[0] - a[0]) * (v - a[1]) / (b[1] - a[1]), v)
+    ring = _clipEdge(ring, lambda p: p[0] >= lo, xCross(lo))
+    ring = _clipEdge(ring, lambda p: p[0] <= hi, xCross(hi))
+    ring = _clipEdge(ring, lambda p: p[1] >= lo, yCross(lo))
+    ring = _clipEdge(ring, lambda p: p[1] <= hi, yCross(hi))
+    return ring
+
+# Douglas-Peucker on an open path, keeping both ends
+def simplifyPath(path, tolerance):
+    if len(path) < 3:
+        return list(path)
+    keep = [False] * len(path)
+    keep[0] = keep[-1] = True
+    tol2 = tolerance * tolerance
+    stack = [(0, len(path) - 1)]
+    while stack:
+        first, last = stack.pop()
+        ax, ay = path[first]
+        bx, by = path[last]
+        dx, dy = bx - ax, by - ay
+        seg2 = dx * dx + dy * dy
+        worst, index = 0.0, None
+        for i in range(first + 1, last):
+            px, py = path[i]
+            if seg2 == 0:
+                d2 = (px - ax) ** 2 + (py - ay) ** 2
+            else:
+                cross = dx * (py - ay) - dy * (px - ax)
+                d2 = cross * cross / seg2
+            if d2 > worst:
+                worst, index = d2, i
+        if index is not None and worst > tol2:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    return [pt for pt, k in zip(path, keep) if k]
+
+# Integer tile ring for a Mercator ring, or None when nothing of it is left in the tile
+def tileRing(ring, zoom, col, row, tolerance=SIMPLIFY_UNITS):
+    size = tileSize(zoom)
+    scale = TILE_EXTENT / size
+    x0 = col * size - ORIGIN_SHIFT
+    y0 = ORIGIN_SHIFT - row * size
+    pts = [((x - x0) * scale, (y0 - y) * scale) for x, y in ring[:-1]]
+    pts = clipRing(pts, -TILE_BUFFER, TILE_EXTENT + TILE_BUFFER)
+    if len(pts) < 3:
+        return None
+    pts = simplifyPath(pts + [pts[0]], tolerance)[:-1]
+    out = []
+    for x, y in pts:
+        pt = (int(round(x)), int(round(y)))
+        if not out or pt != out[-1]:
+            out.append(pt)
+    while len(out) > 1 and out[-1] == out[0]:
+        out.pop()
+    if len(out) < 3 or ringSignedArea(out) == 0:
+        return None
+    return out
+
+#-------------------------------------------------------------------------------
+# Vector tile protobuf encoding (vector_tile.proto version 2)
+
+def _varint(n):
+    out = bytearray()
+    while True:
+        byte = n & 0x7F
+        n >>= 7
+        if n:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+def _zigzag(n):
+    return (n << 1) ^ (n >> 63)
+
+def _key(field, wire_type):
+    return _varint((field << 3) | wire_type)
+
+def _bytesField(field, payload):
+    return _key(field, 2) + _varint(len(payload)) + payload
+
+def _packed(field, values):
+    return _bytesField(field, b"".join(_varint(v) for v in values))
+
+def _command(cmd, count):
+    return (cmd & 0x7) | (count << 3)
+
+MOVE_TO, LINE_TO, CLOSE_PATH = 1, 2, 7
+
+# Geometry command integers for a point or a list of (tile ring, is exterior) pairs
+def encodeGeometry(geom_type, geometry):
+    if geom_type == POINT:
+        return [_command(MOVE_TO, 1), _zigzag(geometry[0]), _zigzag(geometry[1])]
+    commands = []
+    cx = cy = 0
+    for ring, exterior in geometry:
+        # Exterior rings have positive area in tile coordinates (y down), holes negative
+        if (ringSignedArea(ring) > 0) != exterior:
+            ring = ring[::-1]
+        commands.append(_command(MOVE_TO, 1))
+        commands.extend((_zigzag(ring[0][0] - cx), _zigzag(ring[0][1] - cy)))
+        cx, cy = ring[0]
+        commands.append(_command(LINE_TO, len(ring) - 1))
+        for x, y in ring[1:]:
+            commands.extend((_zigzag(x - cx), _zigzag(y - cy)))
+            cx, cy = x, y
+        commands.append(_command(CLOSE_PATH, 1))
+    return commands
+
+def encodeValue(value):
+    if isinstance(value, bool):
+        return _key(7, 0) + _varint(int(value))
+    if isinstance(value, int):
+        if value >= 0:
+            return _key(5, 0) + _varint(value)
+        return _key(6, 0) + _varint(_zigzag(value))
+    if isinstance(value, float):
+        return _key(3, 1) + struct.pack("<d", value)
+    return _bytesField(1, str(value).encode("utf-8"))
+
+# features: list of (id, tags dict, type, geometry commands)
+def encodeLayer(name, features, extent=TILE_EXTENT):
+    keys, values = {}, {}
+    body = []
+    for fid, tags, geom_type, commands in features:
+        tag_ids = []
+        for k, v in tags.items():
+            if v is None:
+                continue
+            tag_ids.append(keys.setdefault(k, len(keys)))
+            tag_ids.append(values.setdefault((type(v), v), len(values)))
+        feature = b""
+        if fid is not None:
+            feature += _key(1, 0) + _varint(fid)
+        if tag_ids:
+            feature += _packed(2, tag_ids)
+        feature += _key(3, 0) + _varint(geom_type) + _packed(4, commands)
+        body.append(_bytesField(2, feature))
+    layer = _key(15, 0) + _varint(2) + _bytesField(1, name.encode("utf-8")) + b"".join(body)
+    layer += b"".join(_bytesField(3, k.encode("utf-8")) for k in sorted(keys, key=keys.get))
+    layer += b"".join(_bytesField(4, encodeValue(v[1])) for v in sorted(values, key=values.get))
+    layer += _key(5, 0) + _varint(extent)
+    return layer
+
+def encodeTile(layers):
+    return b"".join(_bytesField(3, layer) for layer in layers)
+
+#-------------------------------------------------------------------------------
+# Rendering (runs in the worker processes)
+
+_LAYERS = None
+
+def _initWorker(layers):
+    global _LAYERS
+    _LAYERS = layers
+
+# Vector tile bytes for one tile; members is {layer name: [feature index]}; None if the tile is empty
+def renderTile(layers, zoom, col, row, members):
+    size = tileSize(zoom)
+    scale = TILE_EXTENT / size
+    x0 = col * size - ORIGIN_SHIFT
+    y0 = ORIGIN_SHIFT - row * size
+    encoded = []
+    for name, features in layers:
+        out = []
+        for i in members.get(name, ()):
+            feature = features[i]
+            if feature["type"] == POINT:
+                x = int(round((feature["geometry"][0] - x0) * scale))
+                y = int(round((y0 - feature["geometry"][1]) * scale))
+                if 0 <= x < TILE_EXTENT and 0 <= y < TILE_EXTENT:
+                    out.append((feature["id"], feature["tags"], POINT, encodeGeometry(POINT, (x, y))))
+                continue
+            # Holes follow their exterior ring (groupRings) and are dropped with it
+            rings, kept = [], False
+            for ring, exterior in feature["geometry"]:
+                if not (exterior or kept):
+                    continue
+                clipped = tileRing(ring, zoom, col, row)
+                if exterior:
+                    kept = clipped is not None
+                if clipped is not None:
+                    rings.append((clipped, exterior))
+            if rings:
+                out.append((feature["id"], feature["tags"], POLYGON, encodeGeometry(POLYGON, rings)))
+        if out:
+            encoded.append(encodeLayer(name, out))
+    if not encoded:
+        return None
+    return encodeTile(encoded)
+
+def _renderTask(zoom, tiles, layers=None):
+    layers = layers if layers is not None else _LAYERS
+    results = []
+    for col, row, members in tiles:
+        data = renderTile(layers, zoom, col, row, members)
+        if data is not None:
+            results.append((zoom, col, row, gzip.compress(data, 6)))
+    return results
+
+# For each zoom, the features of each layer touching each tile: {zoom: {(col, row): {layer: [index]}}}
+def assignTiles(layers, min_zoom=MIN_ZOOM, max_zoom=MAX_ZOOM, zooms=None):
+    zooms = zooms or {}
+    pyramid = {}
+    for zoom in range(min_zoom, max_zoom + 1):
+        tiles = {}
+        for name, features in layers:
+            lo, hi = zooms.get(name, (min_zoom, max_zoom))
+            if not lo <= zoom <= hi:
+                continue
+            for i, feature in enumerate(features):
+                col0, row0, col1, row1 = tileRange(feature["bbox"], zoom)
+                for col in range(col0, col1 + 1):
+                    for row in range(row0, row1 + 1):
+                        tiles.setdefault((col, row), {}).setdefault(name, []).append(i)
+        pyramid[zoom] = tiles
+    return pyramid
+
+def _tasks(pyramid, per_task=TILES_PER_TASK):
+    for zoom in sorted(pyramid):
+        tiles = [(col, row, members) for (col, row), members in sorted(pyramid[zoom].items())]
+        for i in range(0, len(tiles), per_task):
+            yield zoom, tiles[i:i + per_task]
+
+# Render every tile of the pyramid; yields (zoom, col, row, gzipped tile) as tasks finish.
+# layers is a list of (layer name, [tile features]); zooms optionally limits layers to {name: (min, max)}.
+def renderPyramid(layers, min_zoom=MIN_ZOOM, max_zoom=MAX_ZOOM, zooms=None, workers=None):
+    pyramid = assignTiles(layers, min_zoom, max_zoom, zooms)
+    if workers == 1:
+        for zoom, tiles in _tasks(pyramid):
+            for result in _renderTask(zoom, tiles, layers):
+                yield result
+        return
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_initWorker, initargs=(layers,)) as pool:
+        futures = [pool.submit(_renderTask, zoom, tiles) for zoom, tiles in _tasks(pyramid)]
+        for future in futures:
+            for result in future.result():
+                yield result
+
+#-------------------------------------------------------------------------------
+# MBTiles output
+
+def _layerMetadata(layers, zooms):
+    vector_layers = []
+    for name, features in layers:
+        fields = {}
+        for feature in features:
+            for k, v in feature["tags"].items():
+                fields[k] = "String" if isinstance(v, str) else "Number"
+        lo, hi = zooms.get(name, (MIN_ZOOM, MAX_ZOOM))
+        vector_layers.append({"id": name, "fields": fields, "minzoom": lo, "maxzoom": hi})
+    return {"vector_layers": vector_layers}
+
+# Write the tiles to an MBTiles file (TMS row order, gzipped pbf); returns the number of tiles written.
+# The file is built under a temporary name and swapped in when complete.
+def writeMBTiles(out_file, layers, min_zoom=MIN_ZOOM, max_zoom=MAX_ZOOM, zooms=None, workers=None, name="NV iGDE story map"):
+    zooms = zooms or {}
+    tmp_file = out_file + ".tmp"
+    if os.path.exists(tmp_file):
+        os.remove(tmp_file)
+    metadata = {
+        "name": name, "format": "pbf", "type": "overlay", "version": "2",
+        "minzoom": str(min_zoom), "maxzoom": str(max_zoom),
+        "json": json.dumps(_layerMetadata(layers, zooms)),
+    }
+    # Empty layers give a tile file with metadata only and no bounds
+    boxes = [f["bbox"] for n, features in layers for f in features]
+    if boxes:
+        west, south = mercatorToLonLat(min(b[0] for b in boxes), min(b[1] for b in boxes))
+        east, north = mercatorToLonLat(max(b[2] for b in boxes), max(b[3] for b in boxes))
+        metadata["bounds"] = "{:.6f},{:.6f},{:.6f},{:.6f}".format(west, south, east, north)
+        metadata["center"] = "{:.6f},{:.6f},{}".format((west + east) / 2, (south + north) / 2, min_zoom + 2)
+    db = sqlite3.connect(tmp_file)
+    try:
+        db.execute("CREATE TABLE metadata (name TEXT, value TEXT)")
+        db.execute("CREATE TABLE tiles (zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, tile_data BLOB)")
+        db.executemany("INSERT INTO metadata VALUES (?, ?)", sorted(metadata.items()))
+        count = 0
+        for zoom, col, row, data in renderPyramid(layers, min_zoom, max_zoom, zooms, workers):
+            db.execute("INSERT INTO tiles VALUES (?, ?, ?, ?)", (zoom, col, (1 << zoom) - 1 - row, sqlite3.Binary(data)))
+            count += 1
+        db.execute("CREATE UNIQUE INDEX tile_index ON tiles (zoom_level, tile_column, tile_row)")
+        db.commit()
+    finally:
+        db.close()
+    os.replace(tmp_file, out_file)
+    return count
+
+#-------------------------------------------------------------------------------
+# Reading the story map layers with arcpy
+
+def readLayer(fc, id_field=None, extra=()):
+    import arcpy
+    describe = arcpy.Describe(fc)
+    fields = keptFields([f.name for f in arcpy.ListFields(fc)], extra)
+    point = describe.shapeType == "Point"
+    cursor_fields = fields + ([id_field] if id_field else []) + ["SHAPE@XY" if point else "SHAPE@"]
+    features = []
+    with arcpy.da.SearchCursor(fc, cursor_fields, spatial_reference=arcpy.SpatialReference(26911)) as cursor:
+        for row in cursor:
+            tags = dict(zip(fields, row[:len(fields)]))
+            fid = featureId(row[len(fields)]) if id_field else None
+            if row[-1] is None:
+                continue
+            if point:
+                shape = tuple(row[-1])
+            else:
+                shape = shapeParts(row[-1])
+            feature = tileFeature(shape, tags, fid)
+            if feature is not None:
+                features.append(feature)
+    return features
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the story map vector tile pyramid (MBTiles)")
+    parser.add_argument("--gdb", default=story_gdb, help="story map geodatabase")
+    parser.add_argument("--out", default=story_tiles, help="MBTiles file to write")
+    parser.add_argument("--min-zoom", type=int, default=MIN_ZOOM)
+    parser.add_argument("--max-zoom", type=int, default=MAX_ZOOM)
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    args = parser.parse_args(argv)
+
+    layers, zooms = [], {}
+    for name, id_field, extra, lo, hi in TILE_LAYERS:
+        features = readLayer(os.path.join(args.gdb, name), id_field, extra)
+        print("{} features read from {}".format(len(features), name))
+        layers.append((name, features))
+        zooms[name] = (lo, hi)
+    count = writeMBTiles(args.out, layers, args.min_zoom, args.max_zoom, zooms, args.workers)
+    print("{} tiles written to {}".format(count, args.out))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+# END
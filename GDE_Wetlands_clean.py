@@ -8,11 +8,11 @@
 # Copyright:   (c) sarah.byer 2019
 #-------------------------------------------------------------------------------
 
-# Import ArcGIS modules and check out spatial analyst extension
+# Import ArcGIS modules
 import arcpy, os
 from arcpy import env
-from arcpy.sa import *
-arcpy.CheckOutExtension("spatial")
+
+from GDE_Loader_clean import bulkLoad
 
 # Path to temporary geodatabase
 path =  r"K:\GIS3\Projects\GDE\Geospatial\Geodatabase_Layers\NV_GDE_Template_Temp.gdb"
@@ -27,63 +27,17 @@ epa_wetlands = r"K:\GIS3\Projects\GDE\Geospatial\Geodatabase_Layers\GDE_Wetlands
 
 # """NOTE wetland features contributed by TNC: #tnc_wetlands = r"K:\GIS3\Projects\GDE\Geospatial\Geodatabase_Layers\GDE_Wetlands\TNC_Wetland_Phre_050919.shp""""
 
-#-------------------------------------------------------------------------------
-# Exclude non-wetland features from the Wetland data
-
-# Make a copy of the original wetland feature class
-wet_copy = arcpy.Copy_management(epa_wetlands, "wetlands_copy")
-
-# Remove all Lake features from the copy
-with arcpy.da.UpdateCursor(wet_copy, ["WETLAND_TYPE"]) as cursor:
-    for row in cursor:
-        if row[0] == "Lake":
-            print("Deleting {} as a non-wetland feature".format(row[0]))
-            cursor.deleteRow()
-del cursor
-
-
-# Remove dry playas
-with arcpy.da.UpdateCursor(wet_copy, ["WETLAND_SUBTYPE"]) as cursor:
-    for row in cursor:
-        if row[0] == "dry":
-            print("Deleting dry playa as a non-wetland feature")
-            cursor.deleteRow()
-del cursor
-
-
-# Add source code field and populate
-# Desert Research Institute Wetlands = "driw"
-arcpy.AddField_management(wet_copy, "SOURCECODE", "TEXT")
-with arcpy.da.UpdateCursor(wet_copy, ["SOURCECODE"]) as cursor:
-    for row in cursor:
-        row[0] = "driw"
-        cursor.updateRow(row)
-del cursor
-
 #-------------------------------------------------------------------------------
 # Add wetland features to GDE database
+# The wetlands are streamed from NVwetV1d straight into the Wetlands layer, a batch of rows at a time, so
+# memory does not grow with the dataset and no copy of it is made.
+# Non-wetland features (Lake features and dry playas) are left out as the rows are read.
+# Source code of every wetland is written with each row: Desert Research Institute Wetlands = "driw"
 
 gde_wetlands = r"K:\GIS3\Projects\GDE\Geospatial\NV_iGDE_050919.gdb\Wetlands"
 
-# Map to GDE Wetland layer and poy polygon features there:
-def mapFields(inlayer, infield, mapfield_name, mapfield_alias, mapfield_type): # mapFields function
-    fldMap = arcpy.FieldMap()
-    fldMap.addInputField(inlayer, infield)
-    mapOut = fldMap.outputField
-    mapOut.name, mapOut.alias, mapOut.type = mapfield_name, mapfield_alias, mapfield_type
-    fldMap.outputField = mapOut
-    return fldMap
-
-# Field mapping for Wetlands layer
-wet_type_map = mapFields(wet_copy, "WETLAND_TYPE", "WET_TYPE", "Wetland Type", "TEXT")
-wet_subtype_map = mapFields(wet_copy, "WETLAND_SUBTYPE", "WET_SUBTYPE", "Wetland Subtype", "TEXT")
-source_map = mapFields(wet_copy, "SOURCECODE", "SOURCE_CODE", "Source Code", "TEXT")
-fldMap_list = [wet_type_map, wet_subtype_map, source_map]
-wetFldMappings = arcpy.FieldMappings()
-for fm in fldMap_list:
-    wetFldMappings.addFieldMap(fm)
-
-# Append to GDE database Wetland layer
-arcpy.Append_management(wet_copy, gde_wetlands, "NO_TEST", wetFldMappings)
+# Load into the GDE database Wetland layer (mapping in GDE_Schema_clean.py)
+bulkLoad(epa_wetlands, gde_wetlands, "Wetlands", "driw", constants={"SOURCECODE": "driw"},
+         exclude={"WETLAND_TYPE": ["Lake"], "WETLAND_SUBTYPE": ["dry"]})
 
 # END
\ No newline at end of file
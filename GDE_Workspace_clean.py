@@ -0,0 +1,182 @@
+#-------------------------------------------------------------------------------
+# Name:        NV iGDE Database - Intermediate workspace
+# Purpose:     Keep a script's intermediate datasets (copies, clips, dissolves, joins...) in the arcpy memory
+#              workspace instead of writing each one to NV_GDE_Template_Temp.gdb on the K: drive and reading
+#              it back. Once the process is over a memory budget, new intermediates go to a scratch geodatabase
+#              on local disk instead. Each intermediate has a consumer count and is deleted as soon as its last
+#              consumer releases it; whatever is left is deleted when the workspace is closed. Only the final
+#              iGDE layers (and anything created outside the workspace) are persisted.
+# Modules: atexit; os; sys; tempfile; arcpy (for creating and deleting datasets); psutil (optional)
+#
+# Usage:       ws = IntermediateWorkspace()
+#              wet_copy = arcpy.CopyFeatures_management(epa_wetlands, ws.new("wetlands_copy"))
+#              ...
+#              ws.release(wet_copy) # after the last step that reads it
+#
+#              The budget (MB) and scratch folder can be set with the GDE_MEMORY_BUDGET_MB and GDE_SCRATCH
+#              environment variables.
+#
+#              Constant columns (SOURCECODE = "ssi", ...) are recorded as virtual columns of an intermediate
+#              instead of being written to every row; the final write fills them in with the rest of the row:
+#              ws.setConstants(ssi_copy, SOURCECODE="ssi")
+#              bulkLoad(ssi_copy, gde_springs, "Springs", "ssi", constants=ws.constants(ssi_copy))
+#
+# Author:      sarah.byer
+#
+# Created:     October 2026
+# Copyright:   (c) sarah.byer 2026
+#-------------------------------------------------------------------------------
+
+import atexit, os, sys, tempfile
+
+MEMORY_WORKSPACE = "memory"
+MEMORY_BUDGET_MB = int(os.environ.get("GDE_MEMORY_BUDGET_MB", 4096))
+SCRATCH_DIR = os.environ.get("GDE_SCRATCH", tempfile.gettempdir())
+
+#-------------------------------------------------------------------------------
+# Process memory
+
+# Resident memory of this process in MB (the memory workspace lives inside the process)
+def processMemoryMB():
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 1048576.0
+    except ImportError:
+        pass
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        handle = ctypes.windll.kernel32.GetCurrentProcess()
+        ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb)
+        return counters.WorkingSetSize / 1048576.0
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1048576.0
+
+#-------------------------------------------------------------------------------
+# Workspace
+
+class IntermediateWorkspace(object):
+
+    def __init__(self, budget_mb=MEMORY_BUDGET_MB, scratch_dir=SCRATCH_DIR, memory_usage=processMemoryMB):
+        self.budget_mb = budget_mb
+        self.scratch_dir = scratch_dir
+        self.memory_usage = memory_usage
+        self.scratch_gdb = None
+        self.datasets = {} # path -> remaining consumers
+        self.virtual = {} # path -> {field: constant value}
+        self.spilled = 0
+        atexit.register(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Local scratch geodatabase, created the first time something spills
+    def _scratchGdb(self):
+        if self.scratch_gdb is None:
+            import arcpy
+            name = "gde_scratch_{}.gdb".format(os.getpid())
+            self.scratch_gdb = os.path.join(self.scratch_dir, name)
+            if not arcpy.Exists(self.scratch_gdb):
+                arcpy.CreateFileGDB_management(self.scratch_dir, name)
+        return self.scratch_gdb
+
+    def inMemory(self, item):
+        return str(item).startswith(MEMORY_WORKSPACE + "\\")
+
+    # Path for a new intermediate dataset read by `consumers` later steps
+    def new(self, name, consumers=1):
+        if self.memory_usage() < self.budget_mb:
+            path = MEMORY_WORKSPACE + "\\" + name
+        else:
+            path = os.path.join(self._scratchGdb(), name)
+            self.spilled += 1
+            print("Memory budget of {} MB reached; writing {} to {}".format(self.budget_mb, name, self.scratch_gdb))
+        if path in self.datasets:
+            self._delete(path)
+        self.datasets[path] = consumers
+        return path
+
+    # Record constant columns of a dataset; they cost nothing per row until the dataset's rows are written out
+    def setConstants(self, item, **values):
+        self.virtual.setdefault(str(item), {}).update(values)
+        return item
+
+    # {field: value} of the virtual constant columns of a dataset
+    def constants(self, item):
+        return dict(self.virtual.get(str(item), {}))
+
+    # (workspace, name) of an intermediate path, for tools that take them separately (CreateTable, CreateFeatureclass)
+    def split(self, path):
+        return tuple(str(path).rsplit("\\", 1))
+
+    # A consumer of each item has finished; items nobody else reads are deleted.
+    # Items may be paths or the Result objects returned by the geoprocessing tools.
+    def release(self, *items):
+        for item in items:
+            path = str(item)
+            if path not in self.datasets:
+                continue
+            self.datasets[path] -= 1
+            if self.datasets[path] <= 0:
+                self._delete(path)
+
+    def _delete(self, path):
+        import arcpy
+        if arcpy.Exists(path):
+            arcpy.Delete_management(path)
+        self.datasets.pop(path, None)
+        self.virtual.pop(path, None)
+
+    def close(self):
+        if not self.datasets and self.scratch_gdb is None:
+            return
+        for path in list(self.datasets):
+            self._delete(path)
+        if self.scratch_gdb is not None:
+            import arcpy
+            if arcpy.Exists(self.scratch_gdb):
+                arcpy.Delete_management(self.scratch_gdb)
+            self.scratch_gdb = None
+
+#-------------------------------------------------------------------------------
+# Constant columns
+
+# AddField type for a constant value
+def constantFieldType(value):
+    if isinstance(value, bool) or isinstance(value, int):
+        return "LONG"
+    if isinstance(value, float):
+        return "DOUBLE"
+    return "TEXT"
+
+# Write constant columns into every row of a dataset, for outputs of tools that cannot take them as they write
+# (one AddFields call and one cursor pass for all the columns)
+def materializeConstants(dataset, constants):
+    import arcpy
+    if not constants:
+        return dataset
+    fields = sorted(constants)
+    existing = set(f.name.upper() for f in arcpy.ListFields(dataset))
+    new = [[f, constantFieldType(constants[f])] for f in fields if f.upper() not in existing]
+    if new:
+        arcpy.AddFields_management(dataset, new)
+    values = [constants[f] for f in fields]
+    with arcpy.da.UpdateCursor(dataset, fields) as cursor:
+        for row in cursor:
+            cursor.updateRow(values)
+    return dataset
+
+# END
@@ -0,0 +1,155 @@
+#-------------------------------------------------------------------------------
+# Name:        NV iGDE Database - Zonal histogram of categorical rasters
+# Purpose:     Area and percent of every class (BpS/GDE code) of a categorical raster in every unit (Hex_ID or
+#              HYD_AREA), counted from the raster cells instead of polygonizing the raster, dissolving, intersecting
+#              with the units and measuring the pieces. The units are rasterized onto the raster's own grid one band
+#              of rows at a time (GDE_ZoneGrid_clean.py) and each band's cells are counted by (unit, class) with one
+#              bincount.
+#              By default a cell belongs to the unit holding its center. With subcells=k cells a unit boundary passes
+#              through are split between the units by coverage fractions to 1/k^2, interior cells count whole.
+#              With a cache folder the units come from the saved zone grid of the unit set on the raster's grid.
+# Modules: csv; os; numpy; GDE_Geometry_clean (acres); GDE_GeometryStore_clean; GDE_Mosaic_clean (grids, raster
+#          reading); GDE_ZoneGrid_clean; arcpy (for zonalHistogramFeatureClass)
+#
+# Usage:       hist = zonalHistogram(raster, hexagons, "Hex_ID", codes=gde_codes, subcells=4)
+#              hist.rows()   # [{"Hex_ID": .., "CLASS": .., "ACRES": .., "PERCENT": ..}, ...]
+#              hist = zonalHistogramFeatureClass(path + "\\TNC_BpS_Mosaic", gde_unit, "HYD_AREA", codes=gde_codes)
+#              hist = zonalHistogramFeatureClass(lf_bps, gde_unit, "Hex_ID", lf_codes, subcells=4, cache=ZONE_CACHE)
+#
+# Author:      sarah.byer
+#
+# Created:     October 2026
+# Copyright:   (c) sarah.byer 2026
+#-------------------------------------------------------------------------------
+
+import os
+
+import numpy as np
+
+from GDE_Geometry_clean import SQM_PER_ACRE
+from GDE_GeometryStore_clean import readFeatureClass
+from GDE_Mosaic_clean import MosaicGrid, NODATA, openRaster, rasterRows
+from GDE_ZoneGrid_clean import BLOCK_CELLS, rasterizeZones, zoneEdges, zoneGrid
+
+#-------------------------------------------------------------------------------
+# Histogram
+
+class ZonalHistogram(object):
+
+    # zone_ids: unit ids; codes: classes; acres: (units, classes) area of each class in each unit;
+    # zone_acres: area of each unit
+    def __init__(self, zone_field, zone_ids, codes, acres, zone_acres):
+        self.zone_field = zone_field
+        self.zone_ids = zone_ids
+        self.codes = np.asarray(codes, dtype=np.int64)
+        self.acres = acres
+        self.zone_acres = zone_acres
+
+    def __repr__(self):
+        return "ZonalHistogram({} x {} classes)".format(self.zone_field, len(self.codes))
+
+    # Percent of each unit in each class
+    def percent(self):
+        with np.errstate(all="ignore"):
+            return np.where(self.zone_acres[:, None] > 0, 100.0 * self.acres / self.zone_acres[:, None], 0.0)
+
+    # Acres of each unit in each group of classes, e.g. groups={code: PHR_GROUP}: {group: acres per unit}
+    def byGroup(self, groups):
+        totals = {}
+        for k, code in enumerate(self.codes.tolist()):
+            if code in groups:
+                group = groups[code]
+                totals[group] = totals.get(group, 0.0) + self.acres[:, k]
+        return totals
+
+    # Long-form rows of the classes present in each unit
+    def rows(self):
+        percent = self.percent()
+        zone, k = np.nonzero(self.acres > 0)
+        return [{self.zone_field: _item(self.zone_ids[z]), "CLASS": int(self.codes[c]), "ACRES": float(self.acres[z, c]),
+                 "PERCENT": float(percent[z, c])} for z, c in zip(zone.tolist(), k.tolist())]
+
+    # Histograms of several rasters over the same units, summed (e.g. the TNC mosaic and LANDFIRE outside it)
+    @staticmethod
+    def merge(histograms):
+        first = histograms[0]
+        codes = np.unique(np.concatenate([h.codes for h in histograms]))
+        acres = np.zeros((len(first.zone_ids), len(codes)))
+        for h in histograms:
+            acres[:, np.searchsorted(codes, h.codes)] += h.acres
+        return ZonalHistogram(first.zone_field, first.zone_ids, codes, acres, first.zone_acres)
+
+def _item(value):
+    return value.item() if hasattr(value, "item") else value
+
+# Cell counts by (unit, class) of one band of raster values against its ZoneBlock
+def _countBlock(values, block, codes, nzones):
+    ncodes = len(codes)
+    position = np.clip(np.searchsorted(codes, values), 0, max(ncodes - 1, 0))
+    valid = (values != NODATA) & (codes[position] == values) if ncodes else np.zeros(values.shape, dtype=bool)
+    counts = np.zeros(nzones * ncodes)
+    whole = block.interior() & valid
+    counts += np.bincount((block.ids[whole].astype(np.int64) - 1) * ncodes + position[whole], minlength=nzones * ncodes)
+    if len(block.edge_cells):
+        flat_valid, flat_position = valid.ravel(), position.ravel()
+        part = flat_valid[block.edge_cells]
+        keys = block.edge_zones[part].astype(np.int64) * ncodes + flat_position[block.edge_cells[part]]
+        counts += np.bincount(keys, weights=block.edge_fractions[part], minlength=nzones * ncodes)
+    return counts.reshape(nzones, ncodes)
+
+# Zonal histogram of a raster dict (array or reader, see GDE_Mosaic_clean.py) over the units of a polygon store.
+# codes: classes to count (default: every value in the raster); subcells: coverage fraction precision.
+# Bands of rows with none of the classes (e.g. outside the TNC study areas of the mosaic) are not rasterized.
+# cache: zone grid folder (GDE_ZoneGrid_clean.ZONE_CACHE) to rasterize the units on this grid once and reuse them;
+# best left off for sparse rasters such as the TNC mosaic, where most bands are skipped anyway.
+def zonalHistogram(raster, zones, zone_field, codes=None, subcells=1, block_cells=BLOCK_CELLS, cache=None):
+    grid = MosaicGrid.ofRaster(raster)
+    nzones = len(zones)
+    nodata = raster.get("nodata", NODATA)
+    if codes is None:
+        codes = np.unique(raster["array"])
+        codes = codes[codes != nodata]
+    codes = np.unique(np.asarray(codes, dtype=np.int64))
+    counts = np.zeros((nzones, len(codes)))
+    if cache is not None:
+        zone_grid = zoneGrid(zones, zone_field, grid, subcells, cache, block_cells)
+    else:
+        edges, edge_zone = zoneEdges(zones, grid)
+    rows = max(1, block_cells // max(1, grid.ncols * subcells * subcells))
+    for r0 in range(0, grid.nrows, rows):
+        r1 = min(r0 + rows, grid.nrows)
+        values = rasterRows(raster, r0, r1).astype(np.int64)
+        if nodata != NODATA:
+            values[values == nodata] = NODATA
+        if not np.isin(values, codes).any():
+            continue
+        if cache is not None:
+            block = zone_grid.block(r0, r1)
+        else:
+            block = rasterizeZones(edges, edge_zone, grid, r0, r1, subcells)
+        counts += _countBlock(values, block, codes, nzones)
+    acres = counts * grid.cell * grid.cell / SQM_PER_ACRE
+    return ZonalHistogram(zone_field, zones.attributes[zone_field], codes, acres, zones.areas() / SQM_PER_ACRE)
+
+# Zonal histogram of a raster on disk (read a band of rows at a time) over the units of a feature class
+def zonalHistogramFeatureClass(raster_path, zone_fc, zone_field, codes, subcells=1, field=None, cache=None):
+    raster = openRaster(raster_path, field=field)
+    return zonalHistogram(raster, readFeatureClass(zone_fc, [zone_field]), zone_field, codes, subcells, cache=cache)
+
+# Long-form CSV of the class areas of several histograms over the same units: {source: histogram}
+def writeHistograms(histograms, csv_file):
+    import csv
+    tmp = csv_file + ".tmp"
+    with open(tmp, "w", newline="") as f:
+        writer = None
+        for source in sorted(histograms):
+            for row in histograms[source].rows():
+                if writer is None:
+                    writer = csv.DictWriter(f, ["SOURCE"] + list(row))
+                    writer.writeheader()
+                row["SOURCE"] = source
+                writer.writerow(row)
+    os.replace(tmp, csv_file)
+    return csv_file
+
+# END
@@ -0,0 +1,280 @@
+#-------------------------------------------------------------------------------
+# Name:        NV iGDE Database - Rasterized zone grids
+# Purpose:     Rasterize a unit set (hexagons, hydrographic areas) onto a raster grid once and keep it. The units
+#              are rasterized one band of rows at a time with a vectorized scanline fill (every unit edge gives the
+#              crossings of the rows it spans; sorted crossings pair up into runs by the even-odd rule). A cell
+#              belongs to the unit holding its center, or with subcells=k the units are rasterized on a k x k finer
+#              grid and cells a unit boundary passes through are split between the units by the share of their
+#              sub-cells (coverage fractions to 1/k^2). coverRows() rasterizes overlapping polygons (a whole layer)
+#              as one coverage mask.
+#              A zone grid is the integer unit ids of every cell plus the edge cells with their unit fractions. It
+#              is saved as .npy files in a folder named by a hash of the unit set (geometry and ids) and of the grid
+#              (origin, cell size, shape, subcells), and loads memory-mapped, so every raster summary on the same
+#              grid reuses it instead of re-deriving unit membership from the shapefile.
+# Modules: hashlib; json; os; shutil; numpy; GDE_LineTabulation_clean (segments); GDE_Mosaic_clean (grids)
+#
+# Usage:       zones = zoneGrid(hexagons, "Hex_ID", MosaicGrid.ofRaster(landfire), subcells=4)
+#              block = zones.block(r0, r1)      # ZoneBlock: ids, edge_cells, edge_zones, edge_fractions
+#
+# Author:      sarah.byer
+#
+# Created:     October 2026
+# Copyright:   (c) sarah.byer 2026
+#-------------------------------------------------------------------------------
+
+import hashlib, json, os, shutil
+
+import numpy as np
+
+from GDE_LineTabulation_clean import storeSegments
+from GDE_Mosaic_clean import MosaicGrid
+
+ZONE_CACHE = r"K:\GIS3\Projects\GDE\Geospatial\Build_Cache\zone_grids"
+BLOCK_CELLS = 4000000 # (sub-)cells rasterized together
+
+#-------------------------------------------------------------------------------
+# Rasterizing the units
+
+class ZoneBlock(object):
+
+    # Units of the grid rows [r0, r0 + rows): ids (rows, cols) int32, 1 + index of the unit holding the cell (0:
+    # none); edge_cells: flat indices into ids of the cells split between units, with edge_zones (unit index) and
+    # edge_fractions (share of the cell) for each part
+    def __init__(self, r0, ids, edge_cells=None, edge_zones=None, edge_fractions=None):
+        self.r0 = r0
+        self.ids = ids
+        self.edge_cells = np.zeros(0, dtype=np.int64) if edge_cells is None else edge_cells
+        self.edge_zones = np.zeros(0, dtype=np.int32) if edge_zones is None else edge_zones
+        self.edge_fractions = np.zeros(0, dtype=np.float32) if edge_fractions is None else edge_fractions
+
+    def __repr__(self):
+        return "ZoneBlock(rows {}-{}, {} edge cells)".format(self.r0, self.r0 + self.ids.shape[0], len(np.unique(self.edge_cells)))
+
+    # Cells that count whole for the unit in ids
+    def interior(self):
+        mask = self.ids > 0
+        mask.flat[self.edge_cells] = False
+        return mask
+
+# Unit edges in the column/row units of a grid: (u0, v0, u1, v1) with v measured down from the grid top, and
+# the unit index of each edge. Horizontal edges never cross a scanline and are dropped.
+def zoneEdges(zones, grid):
+    segs, zone = storeSegments(zones, closed=True)
+    u0 = (segs[:, 0] - grid.x0) / grid.cell
+    u1 = (segs[:, 2] - grid.x0) / grid.cell
+    v0 = (grid.y0 - segs[:, 1]) / grid.cell
+    v1 = (grid.y0 - segs[:, 3]) / grid.cell
+    keep = v0 != v1
+    return np.column_stack((u0, v0, u1, v1))[keep], zone[keep].astype(np.int64)
+
+# Runs of each unit on the scanlines through the row centers of rows [r0, r1):
+# (unit, row, u start, u end), sorted by row and start
+def _runs(edges, edge_zone, r0, r1):
+    u0, v0, u1, v1 = edges[:, 0], edges[:, 1], edges[:, 2], edges[:, 3]
+    # Row q's scanline is at v = q + 0.5; an edge crosses rows ceil(vmin - 0.5) .. ceil(vmax - 0.5) - 1
+    q0 = np.maximum(np.ceil(np.minimum(v0, v1) - 0.5), r0).astype(np.int64)
+    q1 = np.minimum(np.ceil(np.maximum(v0, v1) - 0.5), r1).astype(np.int64)
+    counts = np.maximum(q1 - q0, 0)
+    which = np.repeat(np.arange(len(edges)), counts)
+    if not len(which):
+        empty = np.zeros(0)
+        return empty.astype(np.int64), empty.astype(np.int64), empty, empty
+    starts = np.cumsum(counts) - counts
+    rows = q0[which] + (np.arange(len(which)) - np.repeat(starts, counts))
+    u = u0[which] + (rows + 0.5 - v0[which]) * (u1[which] - u0[which]) / (v1[which] - v0[which])
+    zone = edge_zone[which]
+    # Crossings of one unit on one row pair up (even-odd) once sorted along the row
+    order = np.lexsort((u, rows, zone))
+    zone, rows, u = zone[order], rows[order], u[order]
+    zone, rows, ua, ub = zone[0::2], rows[0::2], u[0::2], u[1::2]
+    order = np.lexsort((ua, rows))
+    return zone[order], rows[order], ua[order], ub[order]
+
+# ids of rows [r0, r1) of a grid by the cell-center rule
+def _centerIds(edges, edge_zone, r0, r1, ncols):
+    zone, rows, ua, ub = _runs(edges, edge_zone, r0, r1)
+    ids = np.zeros((r1 - r0) * ncols, dtype=np.int32)
+    # Cells whose centers c + 0.5 fall in [ua, ub)
+    c0 = np.clip(np.ceil(ua - 0.5), 0, ncols).astype(np.int64)
+    c1 = np.clip(np.ceil(ub - 0.5), 0, ncols).astype(np.int64)
+    filled = c1 > c0
+    if filled.any():
+        zone, start, stop = zone[filled], (rows[filled] - r0) * ncols + c0[filled], (rows[filled] - r0) * ncols + c1[filled]
+        order = np.argsort(start, kind="stable")
+        zone, start, stop = zone[order], start[order], stop[order]
+        # Each cell takes the last run starting at or before it, if that run reaches it
+        marker = np.zeros(len(ids), dtype=np.int64)
+        marker[start] = np.arange(1, len(start) + 1)
+        last = np.maximum.accumulate(marker)
+        inside = (last > 0) & (np.arange(len(ids)) < stop[np.maximum(last, 1) - 1])
+        ids[inside] = zone[last[inside] - 1] + 1
+    return ids.reshape(r1 - r0, ncols)
+
+# Cells of rows [r0, r1) whose centers fall inside any of the polygons (overlaps count once), as a boolean array
+def coverRows(edges, edge_zone, r0, r1, ncols):
+    zone, rows, ua, ub = _runs(edges, edge_zone, r0, r1)
+    n = (r1 - r0) * ncols
+    c0 = np.clip(np.ceil(ua - 0.5), 0, ncols).astype(np.int64)
+    c1 = np.clip(np.ceil(ub - 0.5), 0, ncols).astype(np.int64)
+    filled = c1 > c0
+    offset = (rows[filled] - r0) * ncols
+    # Runs open and close a depth count; cells at depth > 0 are covered
+    depth = np.cumsum(np.bincount(offset + c0[filled], minlength=n + 1) - np.bincount(offset + c1[filled], minlength=n + 1))
+    return (depth[:n] > 0).reshape(r1 - r0, ncols)
+
+# Units of the grid rows [r0, r1), by cell centers (subcells=1) or with coverage fractions on a finer grid
+def rasterizeZones(edges, edge_zone, grid, r0, r1, subcells=1):
+    if subcells == 1:
+        return ZoneBlock(r0, _centerIds(edges, edge_zone, r0, r1, grid.ncols))
+    k = int(subcells)
+    fine = _centerIds(edges * k, edge_zone, r0 * k, r1 * k, grid.ncols * k)
+    rows = r1 - r0
+    parts = fine.reshape(rows, k, grid.ncols, k).transpose(0, 2, 1, 3).reshape(rows * grid.ncols, k * k)
+    low, high = parts.min(axis=1), parts.max(axis=1)
+    ids = low.astype(np.int32)
+    edge = np.flatnonzero(low != high)
+    if not len(edge):
+        return ZoneBlock(r0, ids.reshape(rows, grid.ncols))
+    # Sub-cells of every edge cell counted by unit (0 = outside every unit)
+    span = int(high.max()) + 1
+    keys, counts = np.unique(np.repeat(edge, k * k) * span + parts[edge].ravel(), return_counts=True)
+    cells, zones = keys // span, keys % span
+    # The unit with the largest share holds the cell in ids
+    order = np.lexsort((counts, cells))
+    last = np.r_[cells[order][1:] != cells[order][:-1], True]
+    ids[cells[order][last]] = zones[order][last]
+    inside = zones > 0
+    return ZoneBlock(r0, ids.reshape(rows, grid.ncols), cells[inside], (zones[inside] - 1).astype(np.int32),
+                     (counts[inside] / float(k * k)).astype(np.float32))
+
+# ZoneBlocks covering a grid, in bands of rows
+def zoneBlocks(zones, grid, subcells=1, block_cells=BLOCK_CELLS):
+    edges, edge_zone = zoneEdges(zones, grid)
+    rows = max(1, block_cells // max(1, grid.ncols * subcells * subcells))
+    for r0 in range(0, grid.nrows, rows):
+        yield rasterizeZones(edges, edge_zone, grid, r0, min(r0 + rows, grid.nrows), subcells)
+
+#-------------------------------------------------------------------------------
+# Cached zone grids
+
+# Unit ids as a NumPy array without Python objects (text ids of a store are object arrays), so they hash by
+# value and save memory-mapped
+def zoneIds(zones, zone_field):
+    ids = np.asarray(zones.attributes[zone_field])
+    if ids.dtype == object:
+        ids = np.array(["" if v is None else str(v) for v in ids.tolist()], dtype=str)
+    return ids
+
+# Hash of a unit set: the unit geometry and the unit ids
+def unitSetKey(zones, zone_field):
+    digest = hashlib.sha256()
+    for array in (zones.coords, zones.ring_offsets, zones.feature_offsets, zoneIds(zones, zone_field)):
+        array = np.ascontiguousarray(array)
+        digest.update(str(array.dtype).encode())
+        digest.update(array.tobytes())
+    digest.update(zone_field.encode())
+    return digest.hexdigest()[:16]
+
+# Hash of a target grid: origin, cell size, shape and coverage precision
+def gridKey(grid, subcells=1):
+    text = "{!r} {!r} {!r} {} {} {}".format(grid.x0, grid.y0, grid.cell, grid.nrows, grid.ncols, int(subcells))
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+class ZoneGrid(object):
+
+    # ids: (nrows, ncols) int32 as in ZoneBlock for the whole grid; edge_cells: sorted flat indices into ids of
+    # the split cells with edge_zones/edge_fractions; zone_ids: unit ids; zone_areas: unit areas (square meters)
+    def __init__(self, grid, subcells, zone_field, zone_ids, zone_areas, ids, edge_cells, edge_zones, edge_fractions):
+        self.grid = grid
+        self.subcells = subcells
+        self.zone_field = zone_field
+        self.zone_ids = zone_ids
+        self.zone_areas = zone_areas
+        self.ids = ids
+        self.edge_cells = edge_cells
+        self.edge_zones = edge_zones
+        self.edge_fractions = edge_fractions
+
+    def __len__(self):
+        return len(self.zone_ids)
+
+    def __repr__(self):
+        return "ZoneGrid({} {} units on {} x {} cells, subcells={})".format(len(self), self.zone_field, self.grid.nrows,
+                                                                          self.grid.ncols, self.subcells)
+
+    # ZoneBlock of the grid rows [r0, r1), read from the (memory-mapped) arrays
+    def block(self, r0, r1):
+        ncols = self.grid.ncols
+        lo, hi = np.searchsorted(self.edge_cells, [r0 * ncols, r1 * ncols])
+        return ZoneBlock(r0, np.asarray(self.ids[r0:r1]), np.asarray(self.edge_cells[lo:hi]) - r0 * ncols,
+                         np.asarray(self.edge_zones[lo:hi]), np.asarray(self.edge_fractions[lo:hi]))
+
+    def blocks(self, block_cells=BLOCK_CELLS):
+        rows = max(1, block_cells // max(1, self.grid.ncols))
+        for r0 in range(0, self.grid.nrows, rows):
+            yield self.block(r0, min(r0 + rows, self.grid.nrows))
+
+    # Rasterize the units band by band. With a folder the ids are written straight into ids.npy (memory-mapped),
+    # so the whole grid is never held in memory.
+    @classmethod
+    def build(cls, zones, zone_field, grid, subcells=1, folder=None, block_cells=BLOCK_CELLS):
+        shape = (grid.nrows, grid.ncols)
+        if folder is None:
+            ids = np.zeros(shape, dtype=np.int32)
+        else:
+            if not os.path.isdir(folder):
+                os.makedirs(folder)
+            ids = np.lib.format.open_memmap(os.path.join(folder, "ids.npy"), mode="w+", dtype=np.int32, shape=shape)
+        cells, parts, fractions = [np.zeros(0, dtype=np.int64)], [np.zeros(0, dtype=np.int32)], [np.zeros(0, dtype=np.float32)]
+        for block in zoneBlocks(zones, grid, subcells, block_cells):
+            ids[block.r0:block.r0 + block.ids.shape[0]] = block.ids
+            cells.append(block.edge_cells + block.r0 * grid.ncols)
+            parts.append(block.edge_zones)
+            fractions.append(block.edge_fractions)
+        zone_grid = cls(grid, subcells, zone_field, zoneIds(zones, zone_field), zones.areas(), ids,
+                        np.concatenate(cells).astype(np.int64), np.concatenate(parts).astype(np.int32),
+                        np.concatenate(fractions).astype(np.float32))
+        if folder is not None:
+            ids.flush()
+            zone_grid._save(folder)
+        return zone_grid
+
+    # Everything but ids.npy, which build() has already written
+    def _save(self, folder):
+        for name in ("edge_cells", "edge_zones", "edge_fractions", "zone_ids", "zone_areas"):
+            np.save(os.path.join(folder, name + ".npy"), np.asarray(getattr(self, name)))
+        grid = self.grid
+        with open(os.path.join(folder, "zone_grid.json"), "w") as f:
+            json.dump({"x0": grid.x0, "y0": grid.y0, "cell": grid.cell, "nrows": grid.nrows, "ncols": grid.ncols,
+                       "subcells": self.subcells, "zone_field": self.zone_field, "units": len(self)}, f)
+
+    # Arrays are memory-mapped read-only
+    @classmethod
+    def load(cls, folder):
+        with open(os.path.join(folder, "zone_grid.json")) as f:
+            meta = json.load(f)
+        def arr(name):
+            return np.load(os.path.join(folder, name + ".npy"), mmap_mode="r")
+        grid = MosaicGrid(meta["x0"], meta["y0"], meta["cell"], meta["nrows"], meta["ncols"])
+        return cls(grid, meta["subcells"], meta["zone_field"], arr("zone_ids"), arr("zone_areas"), arr("ids"),
+                   arr("edge_cells"), arr("edge_zones"), arr("edge_fractions"))
+
+# Zone grid of a unit set on a target grid, rasterized the first time and loaded from the cache after that.
+# The folder name is the unit set and grid hashes, so edited units or another grid get their own zone grid.
+def zoneGrid(zones, zone_field, grid, subcells=1, cache=ZONE_CACHE, block_cells=BLOCK_CELLS):
+    if cache is None:
+        return ZoneGrid.build(zones, zone_field, grid, subcells, block_cells=block_cells)
+    folder = os.path.join(cache, "{}_{}".format(unitSetKey(zones, zone_field), gridKey(grid, subcells)))
+    if os.path.isfile(os.path.join(folder, "zone_grid.json")):
+        return ZoneGrid.load(folder)
+    print("Rasterizing {} {} units on {} x {} cells".format(len(zones), zone_field, grid.nrows, grid.ncols))
+    tmp = folder + ".tmp"
+    if os.path.isdir(tmp):
+        shutil.rmtree(tmp)
+    ZoneGrid.build(zones, zone_field, grid, subcells, tmp, block_cells)
+    if os.path.isdir(folder):
+        shutil.rmtree(folder)
+    os.replace(tmp, folder)
+    return ZoneGrid.load(folder)
+
+# END
@@ -0,0 +1,68 @@
+#-------------------------------------------------------------------------------
+# Name:        NV iGDE Database - Build cache tests
+# Purpose:     Restore cached outputs with a small in-memory stand-in for the arcpy tools restoreOutputs calls.
+#
+# Usage:       python -m pytest -q tests
+#
+# Author:      sarah.byer
+#
+# Created:     October 2026
+# Copyright:   (c) sarah.byer 2026
+#-------------------------------------------------------------------------------
+
+import os, shutil, sys, tempfile, types, unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import GDE_BuildCache_clean
+
+# Geodatabases are folders; Copy refuses to write into a geodatabase that does not exist
+class FakeArcpy(types.ModuleType):
+    def __init__(self, datasets):
+        types.ModuleType.__init__(self, "arcpy")
+        self.datasets = set(datasets)
+
+    def Exists(self, path):
+        return path in self.datasets or os.path.isdir(path)
+
+    def Delete_management(self, path):
+        self.datasets.discard(path)
+
+    def CreateFileGDB_management(self, folder, name):
+        os.makedirs(os.path.join(folder, name))
+
+    def Copy_management(self, source, target):
+        if source not in self.datasets:
+            raise RuntimeError("{} does not exist".format(source))
+        if not os.path.isdir(os.path.dirname(target)):
+            raise RuntimeError("{} does not exist".format(os.path.dirname(target)))
+        self.datasets.add(target)
+
+class RestoreOutputsTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_restore_into_missing_gdb(self):
+        cache_gdb = os.path.join(self.folder, "cache", "Springs_abc.gdb")
+        os.makedirs(cache_gdb)
+        target_gdb = os.path.join(self.folder, "NV_iGDE_new.gdb")
+        paths = [target_gdb, os.path.join(target_gdb, "Springs")]
+        arcpy = FakeArcpy([os.path.join(cache_gdb, "Springs")])
+        with mock.patch.dict(sys.modules, {"arcpy": arcpy}):
+            GDE_BuildCache_clean.restoreOutputs(paths, cache_gdb)
+        self.assertTrue(os.path.isdir(target_gdb))
+        self.assertIn(os.path.join(target_gdb, "Springs"), arcpy.datasets)
+
+    def test_workspace_of_feature_dataset_member(self):
+        path = os.path.join("data", "NV_iGDE.gdb", "Hydro", "Rivers")
+        self.assertEqual(GDE_BuildCache_clean.workspaceOf(path), os.path.join("data", "NV_iGDE.gdb"))
+        self.assertIsNone(GDE_BuildCache_clean.workspaceOf(os.path.join("data", "Rivers.shp")))
+
+if __name__ == "__main__":
+    unittest.main()
+
+# END
@@ -0,0 +1,79 @@
+#-------------------------------------------------------------------------------
+# Name:        NV iGDE Database - Field calculator tests
+# Purpose:     Compiled expressions against plain columns, and calculateField against a small in-memory
+#              stand-in for the arcpy cursors.
+#
+# Usage:       python -m pytest -q tests
+#
+# Author:      sarah.byer
+#
+# Created:     October 2026
+# Copyright:   (c) sarah.byer 2026
+#-------------------------------------------------------------------------------
+
+import os, sys, types, unittest
+from unittest import mock
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from GDE_FieldCalc_clean import calculateField, compileExpression, fromColumn, toColumn
+
+# A table is [{field: value}] with OID@ the row number
+class FakeArcpy(types.ModuleType):
+    def __init__(self, rows):
+        types.ModuleType.__init__(self, "arcpy")
+        self.rows = rows
+        self.da = types.SimpleNamespace(SearchCursor=self._searchCursor, UpdateCursor=self._updateCursor)
+
+    def _values(self, i, fields):
+        return [i if f == "OID@" else self.rows[i][f] for f in fields]
+
+    def _searchCursor(self, table, fields):
+        return mock.MagicMock(__enter__=lambda s: iter([tuple(self._values(i, fields)) for i in range(len(self.rows))]),
+                              __exit__=lambda s, *a: False)
+
+    def _updateCursor(self, table, fields):
+        arcpy = self
+        class Cursor(object):
+            def __init__(self):
+                self.i = -1
+            def __next__(self):
+                self.i += 1
+                if self.i >= len(arcpy.rows):
+                    raise StopIteration
+                return arcpy._values(self.i, fields)
+            def updateRow(self, row):
+                for f, v in zip(fields, row):
+                    if f != "OID@":
+                        arcpy.rows[self.i][f] = v
+        return mock.MagicMock(__enter__=lambda s: Cursor(), __exit__=lambda s, *a: False)
+
+class ExpressionTest(unittest.TestCase):
+    def test_round_digits_on_empty_columns(self):
+        values, nulls = compileExpression("round(!AREA!, 2)")({"AREA": np.zeros(0)}, 0)
+        self.assertEqual(len(values), 0)
+
+    def test_dotted_and_underscored_field_names(self):
+        expr = compileExpression("!units.A__B! + !units__A.B!")
+        self.assertEqual(expr.fields, ["units.A__B", "units__A.B"])
+        values, nulls = expr({"units.A__B": np.array([1, 2]), "units__A.B": np.array([10, 20])})
+        self.assertEqual(values.tolist(), [11, 22])
+
+    def test_integer_column_with_nulls(self):
+        array, nulls = toColumn([3, None, 5])
+        self.assertEqual(array.dtype, np.int64)
+        self.assertEqual(fromColumn(*compileExpression("!COUNT! * 2")({"COUNT": (array, nulls)})), [6, None, 10])
+
+class CalculateFieldTest(unittest.TestCase):
+    def test_chunks_cover_every_row(self):
+        arcpy = FakeArcpy([{"AREA": a, "PER": None} for a in [1.0, 2.0, None, 4.0, 5.0]])
+        with mock.patch.dict(sys.modules, {"arcpy": arcpy}):
+            calculateField("units", "PER", "100 * !AREA! / 5", chunk_rows=2)
+        self.assertEqual([r["PER"] for r in arcpy.rows], [20.0, 40.0, None, 80.0, 100.0])
+
+if __name__ == "__main__":
+    unittest.main()
+
+# END
@@ -0,0 +1,67 @@
+#-------------------------------------------------------------------------------
+# Name:        NV iGDE Database - Geometry store tests
+# Purpose:     Attribute columns, saving and loading, and writing null shapes through a small in-memory stand-in
+#              for the arcpy insert cursor.
+#
+# Usage:       python -m pytest -q tests
+#
+# Author:      sarah.byer
+#
+# Created:     October 2026
+# Copyright:   (c) sarah.byer 2026
+#-------------------------------------------------------------------------------
+
+import os, shutil, sys, tempfile, types, unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import GDE_GeometryStore_clean as geometrystore
+
+SITES = [{"SPRING_ID": "S1", "NOTE": None, "SHAPE": (1.0, 2.0)},
+         {"SPRING_ID": None, "NOTE": None, "SHAPE": None}]
+
+# Rows inserted with InsertCursor, as lists of values
+class FakeArcpy(types.ModuleType):
+    def __init__(self):
+        types.ModuleType.__init__(self, "arcpy")
+        self.rows = []
+        self.da = types.SimpleNamespace(InsertCursor=self._insertCursor)
+        self.SpatialReference = lambda code: code
+        self.Point = lambda x, y: (x, y)
+        self.PointGeometry = lambda point, sr: ("POINT", point)
+
+    def _insertCursor(self, fc, fields):
+        return mock.MagicMock(__enter__=lambda s: types.SimpleNamespace(insertRow=self.rows.append),
+                              __exit__=lambda s, *a: False)
+
+class GeometryStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.store = geometrystore.fromRecords(SITES, geometrystore.POINT, ["SPRING_ID", "NOTE"])
+
+    def test_text_columns_keep_nulls(self):
+        self.assertEqual(self.store.attributes["SPRING_ID"].dtype, object)
+        self.assertEqual(self.store.attributes["SPRING_ID"].tolist(), ["S1", None])
+        self.assertEqual(self.store.attributes["NOTE"].dtype, object)
+        self.assertEqual(self.store.attributes["NOTE"].tolist(), [None, None])
+
+    def test_save_and_load_text_columns(self):
+        folder = tempfile.mkdtemp()
+        try:
+            self.store.save(folder)
+            loaded = geometrystore.GeometryStore.load(folder)
+            self.assertEqual(loaded.attributes["SPRING_ID"].tolist(), ["S1", None])
+            self.assertEqual(loaded.record(1)["SHAPE"], None)
+        finally:
+            shutil.rmtree(folder)
+
+    def test_null_point_written_as_null_shape(self):
+        arcpy = FakeArcpy()
+        with mock.patch.dict(sys.modules, {"arcpy": arcpy}):
+            geometrystore.writeFeatureClass(self.store, "springs", ["SPRING_ID"])
+        self.assertEqual(arcpy.rows, [["S1", ("POINT", (1.0, 2.0))], [None, None]])
+
+if __name__ == "__main__":
+    unittest.main()
+
+# END
@@ -0,0 +1,45 @@
+#-------------------------------------------------------------------------------
+# Name:        NV iGDE Database - Line length tabulation tests
+# Purpose:     Lengths of small polylines inside square zones.
+#
+# Usage:       python -m pytest -q tests
+#
+# Author:      sarah.byer
+#
+# Created:     October 2026
+# Copyright:   (c) sarah.byer 2026
+#-------------------------------------------------------------------------------
+
+import os, sys, unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import GDE_GeometryStore_clean as geometrystore
+from GDE_LineTabulation_clean import tabulateLengths
+
+def _square(x, y, size):
+    return [[(x, y), (x, y + size), (x + size, y + size), (x + size, y), (x, y)]]
+
+class TabulateLengthsTest(unittest.TestCase):
+    def setUp(self):
+        self.zones = geometrystore.fromRecords([{"Hex_ID": "A", "SHAPE": _square(0, 0, 10)},
+                                                {"Hex_ID": "B", "SHAPE": _square(10, 0, 10)}],
+                                               geometrystore.POLYGON, ["Hex_ID"])
+
+    def lengths(self, lines):
+        store = geometrystore.fromRecords([{"SHAPE": [line]} for line in lines], geometrystore.POLYLINE)
+        return tabulateLengths(store, self.zones, "Hex_ID").byZone()
+
+    def test_line_split_between_zones(self):
+        lengths = self.lengths([[(5, 5), (15, 5)]])
+        self.assertAlmostEqual(lengths["A"], 5.0)
+        self.assertAlmostEqual(lengths["B"], 5.0)
+
+    def test_duplicate_segments_count_once(self):
+        lengths = self.lengths([[(2, 2), (8, 2)], [(8, 2), (2, 2)], [(2, 2), (8, 2), (8, 6)]])
+        self.assertAlmostEqual(lengths["A"], 10.0)
+
+if __name__ == "__main__":
+    unittest.main()
+
+# END
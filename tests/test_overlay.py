@@ -0,0 +1,106 @@
+#-------------------------------------------------------------------------------
+# Name:        NV iGDE Database - Parallel overlay tests
+# Purpose:     Run parallelErase against a small in-memory stand-in for the arcpy tools it calls. Features are
+#              boxes and Erase drops every input box that meets an erase box.
+#
+# Usage:       python -m pytest -q tests
+#
+# Author:      sarah.byer
+#
+# Created:     October 2026
+# Copyright:   (c) sarah.byer 2026
+#-------------------------------------------------------------------------------
+
+import os, re, sys, types, unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import GDE_Overlay_clean
+
+class _Shape(object):
+    def __init__(self, box):
+        self.extent = types.SimpleNamespace(XMin=box[0], YMin=box[1], XMax=box[2], YMax=box[3])
+
+# Feature classes are {oid: box}; a feature layer is (feature class, selected oids)
+class FakeArcpy(types.ModuleType):
+    def __init__(self, tables):
+        types.ModuleType.__init__(self, "arcpy")
+        self.tables = dict(tables)
+        self.workspaces = set()
+        self.env = types.SimpleNamespace(overwriteOutput=False)
+        self.da = types.SimpleNamespace(SearchCursor=self._searchCursor)
+
+    def _features(self, source):
+        if isinstance(source, tuple):
+            fc, ids = source
+            return dict((i, box) for i, box in self.tables[fc].items() if i in ids)
+        return dict(self.tables[source])
+
+    def _searchCursor(self, fc, fields):
+        return mock.MagicMock(__enter__=lambda s: [(i, _Shape(box)) for i, box in self.tables[fc].items()],
+                              __exit__=lambda s, *a: False)
+
+    def Exists(self, path):
+        return path in self.tables or path in self.workspaces
+
+    def Delete_management(self, paths):
+        for path in paths if isinstance(paths, list) else [paths]:
+            if not isinstance(path, tuple):
+                self.tables.pop(path, None)
+                self.workspaces.discard(path)
+
+    def CreateFileGDB_management(self, folder, name):
+        self.workspaces.add(os.path.join(folder, name))
+
+    def Describe(self, fc):
+        return types.SimpleNamespace(OIDFieldName="OBJECTID")
+
+    def AddFieldDelimiters(self, fc, field):
+        return field
+
+    def MakeFeatureLayer_management(self, fc, name, where):
+        match = re.match(r"OBJECTID IN \((.*)\)$", where)
+        return (fc, set(int(i) for i in match.group(1).split(",")) if match else set())
+
+    def CopyFeatures_management(self, source, out_fc):
+        self.tables[out_fc] = self._features(source)
+        return out_fc
+
+    def Erase_analysis(self, in_lyr, erase_lyr, out_fc, *args):
+        erase = list(self._features(erase_lyr).values())
+        meets = lambda a, b: a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+        self.tables[out_fc] = dict((i, box) for i, box in self._features(in_lyr).items()
+                                   if not any(meets(box, e) for e in erase))
+
+    def Merge_management(self, inputs, out_fc):
+        self.tables[out_fc] = {}
+        for fc in inputs:
+            self.tables[out_fc].update(self.tables[fc])
+
+    def GetCount_management(self, fc):
+        return [str(len(self.tables[fc]))]
+
+def _inline(func, args, workers):
+    return [func(*a) for a in args]
+
+class ParallelEraseTest(unittest.TestCase):
+    def erase(self, features, erase_features):
+        arcpy = FakeArcpy({"in_fc": features, "erase_fc": erase_features})
+        with mock.patch.dict(sys.modules, {"arcpy": arcpy}), \
+             mock.patch.object(GDE_Overlay_clean, "parallelMap", _inline):
+            GDE_Overlay_clean.parallelErase("in_fc", "erase_fc", "out_fc", partitions=4)
+        return arcpy.tables["out_fc"]
+
+    def test_feature_far_from_erase_layer_survives(self):
+        out = self.erase({1: (0, 0, 1, 1), 2: (1000, 1000, 1001, 1001)}, {10: (0, 0, 2, 2)})
+        self.assertEqual(sorted(out), [2])
+
+    def test_nothing_overlaps_copies_input(self):
+        out = self.erase({1: (0, 0, 1, 1), 2: (1000, 1000, 1001, 1001)}, {10: (500, 500, 501, 501)})
+        self.assertEqual(sorted(out), [1, 2])
+
+if __name__ == "__main__":
+    unittest.main()
+
+# END
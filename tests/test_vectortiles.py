@@ -0,0 +1,59 @@
+#-------------------------------------------------------------------------------
+# Name:        NV iGDE Database - Story map vector tile tests
+# Purpose:     Ring grouping of multipart polygons and MBTiles files of empty layers.
+#
+# Usage:       python -m pytest -q tests
+#
+# Author:      sarah.byer
+#
+# Created:     October 2026
+# Copyright:   (c) sarah.byer 2026
+#-------------------------------------------------------------------------------
+
+import os, shutil, sqlite3, sys, tempfile, unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from GDE_VectorTiles_clean import groupRings, tileFeature, writeMBTiles
+
+def _square(x, y, size, clockwise=True):
+    ring = [(x, y), (x, y + size), (x + size, y + size), (x + size, y), (x, y)]
+    return ring if clockwise else ring[::-1]
+
+class GroupRingsTest(unittest.TestCase):
+    def test_holes_follow_their_exterior(self):
+        first, second = _square(0, 0, 10), _square(20, 0, 10)
+        hole = _square(22, 2, 2, clockwise=False)
+        geometry = groupRings([first, second, hole], [True, True, False])
+        self.assertEqual([(ring, exterior) for ring, exterior in geometry],
+                         [(first, True), (second, True), (hole, False)])
+
+    def test_tile_feature_groups_multipart_holes(self):
+        x, y = 600000, 4300000
+        rings = [_square(x, y, 1000), _square(x + 100, y + 100, 100, False), _square(x + 5000, y, 1000),
+                 _square(x + 5100, y + 100, 100, False), _square(x + 300, y + 300, 100, False)]
+        feature = tileFeature(rings, {})
+        self.assertEqual([exterior for ring, exterior in feature["geometry"]], [True, False, False, True, False])
+
+class WriteMBTilesTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_empty_layers_write_metadata_only(self):
+        out_file = os.path.join(self.folder, "empty.mbtiles")
+        self.assertEqual(writeMBTiles(out_file, [("NV_Hexagons", [])], workers=1), 0)
+        db = sqlite3.connect(out_file)
+        try:
+            metadata = dict(db.execute("SELECT name, value FROM metadata"))
+            self.assertNotIn("bounds", metadata)
+            self.assertEqual(db.execute("SELECT COUNT(*) FROM tiles").fetchone()[0], 0)
+        finally:
+            db.close()
+
+if __name__ == "__main__":
+    unittest.main()
+
+# END